@@ -39,105 +39,59 @@ SPIS TREŚCI (SEKCJE KODU)
 
 # --- Importy systemowe ---
 # Importujemy wszystkie niezbędne biblioteki do obsługi plików, systemu, logowania, przetwarzania audio i API
-import hashlib  # Do generowania unikalnych identyfikatorów plików
 import logging  # Do logowania zdarzeń i błędów
-import math  # Do obliczeń matematycznych (np. dzielenie na fragmenty)
 import os  # Do obsługi zmiennych środowiskowych
-import platform  # Do wykrywania systemu operacyjnego
-import re  # Do operacji na wyrażeniach regularnych
-import shutil  # Do operacji na plikach i katalogach
-import subprocess  # nosec B404 # Bezpieczne wywoływanie FFmpeg
-import tempfile  # Do obsługi plików tymczasowych
+import sqlite3  # Do obsługi błędów bazy indeksu transkrypcji
 import threading  # Do obsługi wątków (np. komunikaty o długich operacjach)
 import time  # Do operacji na czasie
 from pathlib import Path  # Do obsługi ścieżek plików
-from typing import Optional  # Typowanie opcjonalne
+from typing import BinaryIO, Optional, Union  # Typowanie źródeł plików
 
 import openai  # Klient OpenAI do transkrypcji i podsumowań
 
 # --- Importy zewnętrzne ---
 import streamlit as st  # Framework do budowy interfejsu webowego
-import yt_dlp  # Narzędzie do pobierania audio z YouTube
 from dotenv import load_dotenv  # Ładowanie zmiennych środowiskowych z pliku .env
 import traceback  # Do logowania pełnych tracebacków
 
+# --- Importy lokalne ---
+from audio2tekst import captions  # Transkrypcja z napisów YouTube
+from audio2tekst import catalog  # Katalog artefaktów w uploads/ (SQLite)
+from audio2tekst import framed  # Kompresja transkrypcji i podsumowań
+from audio2tekst import live  # Transkrypcja na żywo (mikrofon, plik w trakcie zapisu)
+from audio2tekst import metrics  # Pomiary etapów przetwarzania
+from audio2tekst import pipeline  # Transkrypcja fragmentów i podsumowanie
+from audio2tekst import retention  # Polityka retencji plików w uploads/
+from audio2tekst import session_memory  # Bufor komunikatów i zajętość stanu sesji
+from audio2tekst import singleflight  # Łączenie równoczesnych, identycznych zadań
+from audio2tekst import storage  # Przyjmowanie plików do uploads/ (UID, oryginały)
+from audio2tekst import transcript_index  # Indeks pełnotekstowy transkrypcji (SQLite FTS5)
+from audio2tekst import transcript_view  # Stronicowany podgląd i eksport transkrypcji
+from audio2tekst import transcription  # Silniki transkrypcji (Whisper API, lokalny Whisper)
+from audio2tekst import vad  # Usuwanie ciszy przed podziałem (VAD)
+from audio2tekst import youtube  # Pobieranie audio z YouTube
+from audio2tekst.media import (  # Operacje FFmpeg
+    chunk_source,
+    clip_range,
+    cut_range,
+    get_duration,
+    parse_time,
+    use_streaming,
+)
+from audio2tekst.scheduler import get_scheduler  # Wspólny limit procesów FFmpeg
+from audio2tekst.scratch import ScratchSpace, sweep_orphans  # Przestrzeń robocza zadań
+from audio2tekst.system import (  # Kompatybilność systemów (Windows, macOS, Linux)
+    check_dependencies,
+    get_safe_encoding,
+    get_system_info,
+)
+
 # --- Konfiguracja logowania ---
 # Ustawiamy poziom logowania na INFO i tworzymy loggera
 logging.basicConfig(level=logging.INFO, encoding="utf-8")
 logger = logging.getLogger(__name__)
 
 
-# --- Funkcje pomocnicze dla kompatybilności systemów ---
-def get_system_info() -> dict:
-    """Zwraca informacje o systemie operacyjnym (platforma, architektura, wersja Pythona, itp.)."""
-    return {
-        "platform": platform.system().lower(),
-        "architecture": platform.machine(),
-        "python_version": platform.python_version(),
-        "is_windows": platform.system().lower() == "windows",
-        "is_macos": platform.system().lower() == "darwin",
-        "is_linux": platform.system().lower() == "linux",
-    }
-
-
-def find_executable(name: str) -> Optional[str]:
-    """Znajduje ścieżkę do pliku wykonywalnego w systemie (np. ffmpeg, ffprobe)."""
-    system_info = get_system_info()
-
-    # Na Windows dodaj .exe jeśli nie ma rozszerzenia
-    if system_info["is_windows"] and not name.endswith(".exe"):
-        name += ".exe"
-
-    # Sprawdź czy jest dostępny w PATH
-    if shutil.which(name):
-        return shutil.which(name)
-
-    # Sprawdź typowe lokalizacje
-    common_paths = []
-    if system_info["is_windows"]:
-        common_paths = [
-            "C:\\ffmpeg\\bin",
-            "C:\\Program Files\\ffmpeg\\bin",
-            "C:\\Program Files (x86)\\ffmpeg\\bin",
-        ]
-    elif system_info["is_macos"]:
-        common_paths = ["/usr/local/bin", "/opt/homebrew/bin", "/usr/bin"]
-    else:  # Linux
-        common_paths = ["/usr/bin", "/usr/local/bin", "/snap/bin"]
-
-    for path in common_paths:
-        full_path = Path(path) / name
-        if full_path.exists() and full_path.is_file():
-            return str(full_path)
-
-    return None
-
-
-def check_dependencies() -> dict:
-    """Sprawdza dostępność wymaganych narzędzi systemowych (FFmpeg, FFprobe)."""
-    dependencies = {
-        "ffmpeg": find_executable("ffmpeg"),
-        "ffprobe": find_executable("ffprobe"),
-    }
-
-    return {
-        name: {"available": path is not None, "path": path}
-        for name, path in dependencies.items()
-    }
-
-
-def get_safe_encoding() -> str:
-    """Zwraca bezpieczne kodowanie dla systemu (UTF-8 lub UTF-8-sig dla Windows)."""
-    system_info = get_system_info()
-
-    if system_info["is_windows"]:
-        # Windows może używać różnych kodowań
-        return "utf-8-sig"  # BOM dla lepszej kompatybilności
-    else:
-        # Unix-like systemy standardowo używają UTF-8
-        return "utf-8"
-
-
 # Nowa funkcja do weryfikacji klucza
 def verify_api_key(key_to_verify: str) -> bool:
     """Sprawdza poprawność klucza OpenAI API."""
@@ -177,6 +131,12 @@ st.set_page_config(
 )
 load_dotenv()
 
+# Limit przesyłanego pliku - niezależny od limitu fragmentu dla Whisper API (MAX_SIZE).
+# Pliki video są przy przyjęciu zastępowane samą ścieżką audio.
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_FILE_SIZE", "2048")) * 1024 * 1024
+# Katalog na serwerze z dużymi plikami do transkrypcji (bez przesyłania przez przeglądarkę)
+IMPORT_DIR = Path(os.getenv("IMPORT_DIR", "uploads/incoming"))
+
 # --- Nagłówek aplikacji (zawsze widoczny) ---
 st.markdown("""
 <div style='text-align: center; margin-bottom: 2rem;'>
@@ -265,25 +225,55 @@ if not st.session_state.api_key_verified:
 # --- Po weryfikacji klucza: wyczyść komunikaty i pokaż kolejne opcje ---
 st.sidebar.success("Klucz OpenAI API zweryfikowany! Możesz korzystać z funkcji aplikacji.")
 
-# Okno wyboru źródła audio: lokalny plik lub YouTube
+# Okno wyboru źródła audio: lokalny plik, plik na serwerze, YouTube lub nagranie na żywo
 source_option = st.sidebar.radio(
     label="Wybierz źródło:",
-    options=["Plik lokalny", "YouTube"],
+    options=["Plik lokalny", "Plik na serwerze", "YouTube", "Na żywo"],
     index=0,
     horizontal=False,
 )
 
 # Inicjalizacja zmiennych
 audio_file = None
+server_file = None
 youtube_url = ""
+youtube_captions = "off"
+live_mode = ""
+live_follow_file = None
 
 if source_option == "Plik lokalny":
     audio_file = st.sidebar.file_uploader(
         "Wybierz plik audio lub video do transkrypcji:",
         type=["mp3", "wav", "m4a", "mp4", "mov", "avi", "webm"],
         accept_multiple_files=False,
-        help="Obsługiwane formaty: mp3, wav, m4a, mp4, mov, avi, webm. Maksymalny rozmiar: 25MB."
+        help=(
+            "Obsługiwane formaty: mp3, wav, m4a, mp4, mov, avi, webm. "
+            f"Maksymalny rozmiar: {MAX_UPLOAD_SIZE/1024/1024:.0f} MB. "
+            "Z plików video zachowywana jest tylko ścieżka audio."
+        ),
+    )
+    st.sidebar.markdown("---")
+
+if source_option == "Plik na serwerze":
+    server_files = (
+        sorted(
+            f.name for f in IMPORT_DIR.iterdir()
+            if f.is_file() and f.suffix.lower() in {".mp3", ".wav", ".m4a", ".mp4", ".mov", ".avi", ".webm"}
+        )
+        if IMPORT_DIR.is_dir()
+        else []
     )
+    if server_files:
+        server_file_name = st.sidebar.selectbox(
+            "Wybierz plik z katalogu na serwerze:",
+            options=server_files,
+            index=None,
+            help=f"Pliki z katalogu {IMPORT_DIR} (IMPORT_DIR). Duże nagrania nie są przesyłane przez przeglądarkę.",
+        )
+        if server_file_name:
+            server_file = IMPORT_DIR / server_file_name
+    else:
+        st.sidebar.info(f"Brak plików audio/video w katalogu {IMPORT_DIR}.")
     st.sidebar.markdown("---")
 
 if source_option == "YouTube":
@@ -291,13 +281,72 @@ if source_option == "YouTube":
         "Wklej adres www z YouTube:",
         value="",
         key="youtube_url_input",
-        help="Wklej pełny adres filmu z YouTube."
+        help="Wklej pełny adres filmu, playlisty lub kanału z YouTube."
+    )
+    youtube_captions = st.sidebar.selectbox(
+        "Napisy z YouTube:",
+        options=list(captions.MODES),
+        index=list(captions.MODES).index(captions.mode()),
+        format_func=lambda name: captions.MODES[name],
+        help=(
+            "Gdy film ma napisy w języku transkrypcji, są używane zamiast transkrypcji audio "
+            "(bez pobierania i bez kosztów Whisper API)."
+        ),
+    )
+    st.sidebar.markdown("---")
+
+if source_option == "Na żywo":
+    live_mode = st.sidebar.radio(
+        "Nagranie na żywo:",
+        options=["Mikrofon", "Plik w trakcie zapisu"],
+        help=(
+            "Mikrofon: kolejne nagrania są dopisywane do transkrypcji sesji. "
+            "Plik w trakcie zapisu: nagranie z katalogu IMPORT_DIR (np. OBS w MKV/FLV) "
+            "transkrybowane na bieżąco, gdy jeszcze rośnie."
+        ),
     )
+    if live_mode == "Plik w trakcie zapisu":
+        growing_files = (
+            sorted(f.name for f in IMPORT_DIR.iterdir() if f.is_file() and f.suffix.lower() in live.FOLLOW_EXT)
+            if IMPORT_DIR.is_dir()
+            else []
+        )
+        if growing_files:
+            live_file_name = st.sidebar.selectbox(
+                "Wybierz nagranie z katalogu na serwerze:",
+                options=growing_files,
+                index=None,
+                help=f"Formaty czytelne w trakcie zapisu: {', '.join(live.FOLLOW_EXT)}.",
+            )
+            if live_file_name:
+                live_follow_file = IMPORT_DIR / live_file_name
+        else:
+            st.sidebar.info(f"Brak nagrań ({', '.join(live.FOLLOW_EXT)}) w katalogu {IMPORT_DIR}.")
     st.sidebar.markdown("---")
 
+# Zakres nagrania - transkrybowany (i pobierany z YouTube) jest tylko ten fragment
+range_start, range_end = 0.0, None
+if source_option != "Na żywo" and (source_option != "YouTube" or not youtube.is_playlist_url(youtube_url)):
+    with st.sidebar.expander("✂️ Zakres nagrania", expanded=False):
+        range_inputs = (
+            st.text_input("Od:", value="", placeholder="0:00", help="Początek zakresu: sekundy lub GG:MM:SS"),
+            st.text_input("Do:", value="", placeholder="koniec", help="Koniec zakresu: puste = do końca nagrania"),
+        )
+        try:
+            range_start, range_end = parse_time(range_inputs[0]) or 0.0, parse_time(range_inputs[1])
+            if range_end is not None and range_end <= range_start:
+                raise ValueError("Koniec zakresu musi być za początkiem")
+        except ValueError as exc:
+            st.error(f"{exc} - transkrypcja całego nagrania.")
+            range_start, range_end = 0.0, None
+
 # --- Klucz API zweryfikowany, inicjalizacja klienta i główna aplikacja ---
 try:
-    client = openai.OpenAI(api_key=st.session_state.api_key)
+    client = openai.OpenAI(
+        api_key=st.session_state.api_key,
+        # Hak zlicza ponowienia żądań w mierzonym etapie (audio2tekst.metrics)
+        http_client=openai.DefaultHttpxClient(event_hooks={"request": [metrics.http_request_hook]}),
+    )
 except openai.OpenAIError as e:
     st.error(f"Nie udało się zainicjować klienta OpenAI po weryfikacji klucza: {e}")
     logger.error("Błąd inicjalizacji klienta OpenAI po weryfikacji: %s", e)
@@ -316,12 +365,33 @@ except (AttributeError, TypeError, ImportError) as e:  # Bardziej specyficzne wy
 
 # --- Stałe i konfiguracja ścieżek ---
 # Tworzymy katalogi na pliki oryginalne, transkrypcje i podsumowania
-BASE_DIR = Path("uploads")
-for folder in ("originals", "transcripts", "summaries"):
-    (BASE_DIR / folder).mkdir(parents=True, exist_ok=True)
-ALLOWED_EXT = {".mp3", ".wav", ".m4a", ".mp4", ".mov", ".avi", ".webm"}
-MAX_SIZE = 25 * 1024 * 1024  # 25MB
+BASE_DIR = storage.BASE_DIR
+storage.ensure_dirs(BASE_DIR)
+ALLOWED_EXT = storage.ALLOWED_EXT
+MAX_SIZE = 25 * 1024 * 1024  # 25MB - limit pojedynczego fragmentu dla Whisper API
 CHUNK_MS = 5 * 60 * 1000  # 5 minut w ms
+INDEX_DB_PATH = Path("db") / "transcripts.sqlite3"  # Indeks FTS5 transkrypcji
+CATALOG_DB_PATH = Path("db") / "catalog.sqlite3"  # Katalog artefaktów w uploads/
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "whisper-1")
+DEFAULT_LANGUAGE = os.getenv("DEFAULT_LANGUAGE", "pl")
+# Algorytm UID plików: xxh3_128 (z pakietem xxhash), blake2b lub md5 (UID sprzed wersji z katalogiem)
+CONTENT_HASH = os.getenv("CONTENT_HASH", "")
+# Tryb szybki: UID znanego pliku rozpoznawany po rozmiarze i próbkach zawartości
+CONTENT_ID_QUICK = os.getenv("CONTENT_ID_QUICK", "false").lower() == "true"
+CHAT_MODEL = os.getenv("CHAT_MODEL", "gpt-3.5-turbo")
+MAX_SUMMARY_TOKENS = int(os.getenv("MAX_SUMMARY_TOKENS", "300"))
+# Domyślny silnik transkrypcji (openai lub local); można go zmienić dla każdego zadania
+TRANSCRIPTION_BACKEND = os.getenv("TRANSCRIPTION_BACKEND", "openai")
+# Eksport pomiarów etapów: plik JSON lines i port endpointu Prometheusa (puste/0 = wyłączone)
+METRICS_JSONL = os.getenv("METRICS_JSONL", "")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+# Playlisty i kanały YouTube: liczba równoczesnych pobrań i najwyższa liczba filmów
+YOUTUBE_DOWNLOAD_WORKERS = int(os.getenv("YOUTUBE_DOWNLOAD_WORKERS", str(youtube.DEFAULT_DOWNLOAD_WORKERS)))
+YOUTUBE_PLAYLIST_LIMIT = int(os.getenv("YOUTUBE_PLAYLIST_LIMIT", str(youtube.DEFAULT_PLAYLIST_LIMIT)))
+# Sesja na żywo bez odświeżania podglądu (zamknięta karta) jest kończona po tylu minutach
+LIVE_ABANDON_TIMEOUT = float(os.getenv("LIVE_ABANDON_MIN", "10")) * 60
+# Odtwarzacz wczytuje cały plik do pamięci przy każdym odświeżeniu - większe pliki są pomijane
+AUDIO_PLAYER_MAX_SIZE = int(os.getenv("AUDIO_PLAYER_MAX_MB", "100")) * 1024 * 1024
 
 # --- Funkcje pomocnicze ---
 # UWAGA: To jest ulepszona wersja programu Audio2Tekst
@@ -334,444 +404,917 @@ CHUNK_MS = 5 * 60 * 1000  # 5 minut w ms
 # ✅ Zwiększona stabilność na różnych środowiskach
 
 
-def init_paths(file_bytes: bytes, file_extension: str):
+def init_paths(file_source: Union[bytes, BinaryIO, Path], file_extension: str):
     """
-    Inicjalizuje ścieżki dla plików na podstawie zawartości (hash MD5 jako UID).
-    
-    Funkcja tworzy unikalny identyfikator pliku (UID) na podstawie jego zawartości używając MD5,
-    następnie inicjalizuje ścieżki dla pliku oryginalnego, transkrypcji i podsumowania.
-    Usuwa stare pliki o tym samym UID z innymi rozszerzeniami, aby uniknąć konfliktów.
-    
-    Args:
-        file_bytes (bytes): Zawartość pliku audio/video
-        file_extension (str): Rozszerzenie pliku (np. '.mp3', '.wav')
-    
+    Inicjalizuje ścieżki dla plików na podstawie zawartości (skrót zawartości jako UID).
+
+    Opakowanie `storage.prepare_source` z konfiguracją aplikacji (CONTENT_HASH,
+    CONTENT_ID_QUICK, katalog artefaktów).
+
     Returns:
         tuple: (file_uid, orig_path, transcript_path, summary_path)
-            - file_uid (str): Unikalny identyfikator pliku (MD5 hash)
-            - orig_path (Path): Ścieżka do oryginalnego pliku
-            - transcript_path (Path): Ścieżka do pliku transkrypcji
-            - summary_path (Path): Ścieżka do pliku podsumowania
+
+    Raises:
+        RuntimeError: Gdy nie udało się przyjąć pliku (np. brak FFmpeg lub ścieżki audio)
     """
-    file_uid_local = hashlib.md5(file_bytes, usedforsecurity=False).hexdigest()
-    orig_path_local = BASE_DIR / "originals" / f"{file_uid_local}{file_extension}"
-    transcript_path_local = BASE_DIR / "transcripts" / f"{file_uid_local}.txt"
-    summary_path_local = BASE_DIR / "summaries" / f"{file_uid_local}.txt"
-    for audio_ext in [".mp3", ".wav", ".m4a", ".mp4", ".mov", ".avi", ".webm"]:
-        old_path_local = BASE_DIR / "originals" / f"{file_uid_local}{audio_ext}"
-        if old_path_local.exists() and old_path_local != orig_path_local:
-            try:
-                old_path_local.unlink()
-            except OSError as cleanup_exc:
-                logger.warning(
-                    "Nie udało się usunąć starego pliku %s: %s", old_path_local, cleanup_exc
-                )
-    if not orig_path_local.exists():
-        orig_path_local.write_bytes(file_bytes)
-    # Zmienione nazwy lokalne, aby uniknąć konfliktu z zewnętrznym scope
-    return file_uid_local, orig_path_local, transcript_path_local, summary_path_local
-
-
-# --- Automatyczne czyszczenie katalogu uploads/originals przy starcie aplikacji ---
-def clean_uploads_originals():
-    """Usuwa wszystkie pliki z katalogu uploads/originals przy starcie aplikacji."""
-    originals_path = Path("uploads/originals")
-    if originals_path.exists():
-        for orig_file in originals_path.iterdir():
-            try:
-                orig_file.unlink()
-            except OSError as e:
-                logger.warning("Nie udało się usunąć pliku %s: %s", orig_file, e)
+    return storage.prepare_source(
+        file_source,
+        file_extension,
+        base_dir=BASE_DIR,
+        catalog_db=CATALOG_DB_PATH,
+        content_hash=CONTENT_HASH,
+        quick=CONTENT_ID_QUICK,
+    )
+
+
+# --- Retencja plików w uploads/ (limity rozmiaru, LRU, TTL) ---
+@st.cache_resource
+def sync_artefact_catalog() -> dict:
+    """Jednorazowo (na proces) uzgadnia katalog artefaktów z zawartością uploads/."""
+    try:
+        return catalog.sync_with_disk(BASE_DIR, db_path=CATALOG_DB_PATH)
+    except sqlite3.Error as exc:
+        logger.warning("Nie udało się uzgodnić katalogu artefaktów: %s", exc)
+        return {"added": 0, "dropped": 0}
+
+
+@st.cache_resource
+def start_retention_manager() -> retention.RetentionManager:
+    """
+    Uruchamia (raz na proces) wątek retencji działający w tle.
+
+    Limity i czasy życia artefaktów są odczytywane ze zmiennych
+    RETENTION_<ORIGINALS|TRANSCRIPTS|SUMMARIES>_<MB|DAYS>.
+    """
+    return retention.RetentionManager(db_path=CATALOG_DB_PATH).start()
+
+
+@st.cache_resource
+def sweep_scratch_space() -> dict:
+    """Jednorazowo (na proces) usuwa pliki robocze porzucone przez poprzednie uruchomienia."""
+    return sweep_orphans()
 
 
-clean_uploads_originals()
+sync_artefact_catalog()
+sweep_scratch_space()
+retention_manager = start_retention_manager()
+
+
+# --- Eksport pomiarów etapów przetwarzania ---
+@st.cache_resource
+def start_metrics_export() -> bool:
+    """Konfiguruje (raz na proces) zapis pomiarów do JSON lines i endpoint Prometheusa."""
+    if METRICS_JSONL:
+        metrics.configure(jsonl_path=Path(METRICS_JSONL))
+    if METRICS_PORT:
+        try:
+            metrics.start_metrics_server(METRICS_PORT)
+        except OSError as exc:
+            logger.warning("Nie udało się uruchomić endpointu metryk na porcie %d: %s", METRICS_PORT, exc)
+            return False
+    return True
 
 
-def validate_youtube_url(url: str) -> bool:
-    """Sprawdza czy URL jest prawidłowym adresem YouTube (różne formaty linków)."""
-    youtube_patterns = [
-        r"(?:https?://)?(?:www\.)?youtube\.com/watch\?v=[\w-]+",
-        r"(?:https?://)?(?:www\.)?youtu\.be/[\w-]+",
-        r"(?:https?://)?(?:www\.)?youtube\.com/embed/[\w-]+",
-        r"(?:https?://)?(?:www\.)?youtube\.com/v/[\w-]+",
-        r"(?:https?://)?(?:www\.)?youtube\.com/shorts/[\w-]+",
-        r"(?:https?://)?(?:m\.)?youtube\.com/watch\?v=[\w-]+",
-    ]
-    return any(re.match(pattern, url.strip()) for pattern in youtube_patterns)
+start_metrics_export()
 
 
-def download_youtube_audio(url: str):
+def download_youtube_audio(url: str, start: float = 0.0, end: Optional[float] = None):
     """
-    Pobiera audio z filmu YouTube i konwertuje do formatu MP3, jeśli to konieczne.
-    
-    Funkcja waliduje URL YouTube, pobiera najlepszy dostępny format audio,
-    a następnie konwertuje do MP3 jeśli plik nie jest już w obsługiwanym formacie audio.
-    Obsługuje różne błędy pobierania i zapewnia szczegółowe komunikaty o błędach.
-    
-    Args:
-        youtube_url (str): URL filmu YouTube do pobrania
-    
+    Pobiera audio z filmu YouTube (`youtube.download_audio`) i pokazuje błędy w interfejsie.
+
     Returns:
-        tuple: (file_data, file_extension)
-            - file_data (bytes): Zawartość pliku audio
-            - file_extension (str): Rozszerzenie pliku (np. '.mp3', '.wav')
-    
-    Raises:
-        ValueError: Gdy URL jest nieprawidłowy
-        RuntimeError: Gdy wystąpi błąd podczas pobierania lub konwersji
-        FileNotFoundError: Gdy nie znaleziono pliku audio
+        tuple | None: (file_data, file_extension) lub None przy błędzie
     """
-    if not validate_youtube_url(url):
-        raise ValueError(
-            "Nieprawidłowy adres YouTube. Wklej prawidłowy link do filmu YouTube."
-        )
-
-    tmpdir = tempfile.mkdtemp(prefix="audio2tekst_yt_")
     try:
-        output_template = str(Path(tmpdir) / "%(id)s.%(ext)s")
-        ydl_opts = {
-            "format": "bestaudio[ext=webm]/bestaudio",
-            "outtmpl": output_template,
-            "quiet": True,
-            "noplaylist": True,
-            "extractaudio": True,
-            "audioformat": "webm",
-            "prefer_ffmpeg": True,
-        }
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
-
-        for yt_file in Path(tmpdir).iterdir():
-            if yt_file.suffix.lower() in ALLOWED_EXT and yt_file.is_file():
-                # Jeśli plik jest już mp3 lub wav, zwróć bez konwersji
-                if yt_file.suffix.lower() in [".mp3", ".wav"]:
-                    yt_file_bytes = yt_file.read_bytes()
-                    return yt_file_bytes, yt_file.suffix.lower()
-                # W przeciwnym razie konwertuj do mp3
-                ffmpeg_deps = check_dependencies()
-                if not ffmpeg_deps["ffmpeg"]["available"]:
-                    raise RuntimeError("FFmpeg nie jest dostępne w systemie. Zainstaluj FFmpeg.")
-                ffmpeg_bin = ffmpeg_deps["ffmpeg"]["path"]
-                yt_mp3_path = yt_file.with_suffix(".mp3")
-                ffmpeg_cmd = [ffmpeg_bin, "-y", "-i", str(yt_file), str(yt_mp3_path)]
-                try:
-                    subprocess.run(  # nosec B603 # FFmpeg command with validated args
-                        ffmpeg_cmd,
-                        stdout=subprocess.DEVNULL,
-                        stderr=subprocess.DEVNULL,
-                        check=True,
-                    )
-                except subprocess.CalledProcessError as conversion_exc:
-                    raise RuntimeError(
-                        f"Błąd konwersji do MP3: {conversion_exc}"
-                    ) from conversion_exc
-                if yt_mp3_path.exists():
-                    file_data = yt_mp3_path.read_bytes()
-                    return file_data, ".mp3"
-                else:
-                    raise RuntimeError("Konwersja do MP3 nie powiodła się.")
-        raise FileNotFoundError("Nie znaleziono pliku audio z YouTube")
-
+        return youtube.download_audio(url, start, end)
     except ValueError as e:
         st.error(f"Błąd URL: {str(e)}")
     except RuntimeError as e:
         st.error(f"Błąd pobierania: {str(e)}")
-    except (OSError, FileNotFoundError, KeyError) as exc:
+    except (OSError, KeyError) as exc:
         st.error(f"Błąd systemowy podczas pobierania z YouTube: {str(exc)}")
         logger.error("Błąd pobierania z YouTube: %s", traceback.format_exc())
     except (TypeError, AttributeError) as exc:  # Inne nieprzewidziane wyjątki
         st.error(f"Nieoczekiwany błąd: {str(exc)}")
         logger.error("Błąd pobierania z YouTube: %s", traceback.format_exc())
-    finally:
-        try:
-            shutil.rmtree(tmpdir)
-        except OSError as cleanup_exc:
-            logger.warning(
-                "Nie udało się usunąć tymczasowego katalogu: %s", cleanup_exc
-            )
+    return None
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def expand_youtube_playlist(url: str) -> list:
+    """Filmy playlisty lub kanału YouTube (same metadane, pamiętane przez 10 minut)."""
+    return youtube.expand_playlist(url, limit=YOUTUBE_PLAYLIST_LIMIT)
 
 
-def get_duration(file_path: Path) -> float:
+def fetch_playlist_video(url: str, captions_mode: str = "off"):
     """
-    Zwraca długość pliku audio/video w sekundach przy użyciu ffprobe.
-    
-    Funkcja wykorzystuje narzędzie ffprobe do analizy metadanych pliku
-    i wyciągnięcia informacji o długości trwania w sekundach.
-    
-    Args:
-        file_path (Path): Ścieżka do pliku audio/video
-    
+    Film playlisty w wątku puli pobierania: transkrypcja z napisów albo pobranie audio.
+
     Returns:
-        float: Długość pliku w sekundach
-    
-    Raises:
-        RuntimeError: Gdy ffprobe nie jest dostępne lub wystąpi błąd podczas analizy
+        tuple: (UID transkrypcji z napisów lub None, (file_data, file_extension) lub None)
     """
-    # Sprawdź dostępność ffprobe
-    dependencies_info = check_dependencies()
-    if not dependencies_info["ffprobe"]["available"]:
-        raise RuntimeError("FFprobe nie jest dostępne w systemie. Zainstaluj FFmpeg.")
-
-    ffprobe_path = dependencies_info["ffprobe"]["path"]
-    ffprobe_cmd = [
-        ffprobe_path,
-        "-v",
-        "error",
-        "-show_entries",
-        "format=duration",
-        "-of",
-        "default=noprint_wrappers=1:nokey=1",
-        str(file_path),
-    ]
+    video_id = youtube.extract_youtube_id(url)
+    if captions_mode != "off":
+        caption_uid = caption_youtube_transcript(url, video_id, captions_mode)
+        if caption_uid is not None:
+            return caption_uid, None
+    with metrics.stage("download", job_id=youtube.source_key(video_id)) as download_stage:
+        downloaded = youtube.download_audio(url)
+        download_stage.bytes_out = len(downloaded[0])
+    return None, downloaded
+
+
+def caption_youtube_transcript(
+    url: str, video_id: str, captions_mode: str, start: float = 0.0, end: Optional[float] = None
+):
+    """
+    Zapisuje transkrypcję z napisów filmu (`audio2tekst.captions`), jeśli film je ma.
+
+    Bez wywołań Streamlit - używana także w wątkach puli pobierania playlisty.
 
+    Returns:
+        str | None: UID transkrypcji albo None (brak napisów - potrzebna transkrypcja audio)
+    """
     try:
-        result = subprocess.run(  # nosec B603 # Bezpieczne wywołanie ffprobe z walidowanymi argumentami
-            ffprobe_cmd,
-            capture_output=True,
-            text=True,
-            timeout=30,  # timeout dla bezpieczeństwa
-            check=True,
+        result = captions.caption_transcript(
+            url, DEFAULT_LANGUAGE, allow_auto=captions_mode == "auto", chunk_ms=CHUNK_MS, start=start, end=end
+        )
+        if result is None:
+            return None
+        transcript, track = result
+        file_uid = captions.store_transcript(
+            video_id, transcript, track, source=video_id, language=DEFAULT_LANGUAGE,
+            base_dir=BASE_DIR, catalog_db=CATALOG_DB_PATH, index_db=INDEX_DB_PATH,
+            content_hash=CONTENT_HASH, encoding=get_safe_encoding(), start=start, end=end,
         )
-        return float(result.stdout.strip())
-    except subprocess.TimeoutExpired as exc:
-        raise RuntimeError("Przekroczono czas oczekiwania na analizę pliku") from exc
-    except subprocess.CalledProcessError as exc:
-        raise RuntimeError(f"Błąd podczas analizy pliku: {exc}") from exc
-    except ValueError as exc:
-        raise RuntimeError(f"Nie można odczytać długości pliku: {exc}") from exc
+    except (RuntimeError, OSError, sqlite3.Error) as exc:
+        logger.warning("Napisy %s niedostępne, transkrypcja audio: %s", url, exc)
+        return None
+    return file_uid
 
 
-def split_audio(file_path: Path):
+def transcribe_chunks(audio_chunks, backend: transcription.TranscriptionBackend, on_text=None):
     """
-    Dzieli długie pliki audio na mniejsze części do przetworzenia (chunking).
-    """
-    dependencies_info = check_dependencies()
-    if not dependencies_info["ffmpeg"]["available"]:
-        raise RuntimeError("FFmpeg nie jest dostępne w systemie. Zainstaluj FFmpeg.")
-    ffmpeg_exe_path = dependencies_info["ffmpeg"]["path"]
-    duration = get_duration(file_path)
-    seg_sec = CHUNK_MS / 1000
-    parts = []
-    for i in range(math.ceil(duration / seg_sec)):
-        start = i * seg_sec
-        length = seg_sec if (start + seg_sec) <= duration else (duration - start)
-        fd, tmp = tempfile.mkstemp(suffix=file_path.suffix, prefix="audio2tekst_")
-        os.close(fd)
-        tmp_path = Path(tmp)
-        ffmpeg_cmd = [
-            ffmpeg_exe_path, "-y", "-i", str(file_path), 
-            "-ss", str(start), "-t", str(length), 
-            "-c", "copy", str(tmp_path)
-        ]
-        try:
-            subprocess.run(  # nosec B603 # FFmpeg command with validated args
-                ffmpeg_cmd,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.PIPE,
-                timeout=300,
-                check=True,
-                text=True,
-            )
-            parts.append(tmp_path)
-        except subprocess.TimeoutExpired as exc:
-            if tmp_path.exists():
-                tmp_path.unlink()
-            raise RuntimeError(f"Przekroczono czas oczekiwania podczas dzielenia pliku (segment {i+1})") from exc
-        except subprocess.CalledProcessError as exc:
-            if tmp_path.exists():
-                tmp_path.unlink()
-            logger.error("FFmpeg error: %s", exc.stderr)
-            raise RuntimeError(f"Błąd podczas dzielenia pliku (segment {i+1}): {exc}") from exc
-    return parts
-
-
-def clean_transcript(transcript_text: str) -> str:
-    """
-    Czyści transkrypcję z typowych artefaktów mowy.
-    """
-    cleaned_text = re.sub(r"\\b(?:em|yhm|um|uh|a{2,}|y{2,})\\b", "", transcript_text, flags=re.IGNORECASE)
-    cleaned_text = re.sub(r"\\s+", " ", cleaned_text)
-    return cleaned_text.strip()
-
+    Transkrybuje kolejne fragmenty wybranym silnikiem i zwalnia je po użyciu.
 
-def transcribe_chunks(audio_chunks, openai_client):
-    texts = []
+    Opakowanie `pipeline.transcribe_chunks` dla interfejsu: komunikat przy
+    długiej transkrypcji i informacje o fragmentach w panelu bocznym.
+    """
     long_transcription_msg = (
         "Plik audio poddawany transkrypcji jest bardzo duży. "
         "Potrzebuję więcej czasu. Cierpliwości..."
     )
     show_long_msg = [False]
-    empty_audio_chunks = []
-    failed_audio_chunks = []
     def delayed_info():
         time.sleep(10)
         show_long_msg[0] = True
         st.info(long_transcription_msg)
     thread = threading.Thread(target=delayed_info)
     thread.start()
-    with st.spinner("Transkrypcja w toku..."):
-        for audio_idx, audio_chunk_file in enumerate(audio_chunks):
-            chunk_size = audio_chunk_file.stat().st_size if audio_chunk_file.exists() else 0
-            # Zamiast st.info, dodaj do audio_info_msgs
-            st.session_state.setdefault('audio_info_msgs', []).append(
-                f"Fragment {audio_idx+1}/{len(audio_chunks)}: {audio_chunk_file} | Rozmiar: {chunk_size/1024:.1f} KB"
+
+    def report_chunk(audio_idx, chunk_count, audio_chunk_file, chunk_size):
+        # Zamiast st.info - do ograniczonego bufora komunikatów sesji
+        session_memory.add_message(
+            st.session_state,
+            f"Fragment {audio_idx+1}/{chunk_count}: {audio_chunk_file} | Rozmiar: {chunk_size/1024:.1f} KB",
+        )
+
+    return pipeline.transcribe_chunks(
+        audio_chunks, backend, language=DEFAULT_LANGUAGE, on_chunk=report_chunk, on_text=on_text
+    )
+
+
+def save_summary(file_uid: str, summary_path: Path, topic: str, summary: str) -> None:
+    """Zapisuje podsumowanie atomowo (skompresowane), rejestruje je w katalogu artefaktów i indeksuje."""
+    with metrics.stage("write") as write_stage:
+        stored_path, write_stage.bytes_out = storage.write_artefact(
+            summary_path, f"{topic}\n{summary}", encoding=get_safe_encoding()
+        )
+    catalog.register(
+        file_uid, "summary", stored_path,
+        write_stage.bytes_out, db_path=CATALOG_DB_PATH,
+    )
+    try:
+        transcript_index.index_summary(file_uid, topic, summary, db_path=INDEX_DB_PATH)
+    except sqlite3.Error as exc:
+        logger.warning("Nie udało się zaindeksować podsumowania %s: %s", file_uid, exc)
+
+
+def transcribe_file(
+    file_uid: str,
+    orig_path: Path,
+    transcript_path: Path,
+    summary_path: Path,
+    backend: transcription.TranscriptionBackend,
+    source_name: str,
+    source_kind: str,
+    summarize_during: bool = False,
+    start: float = 0.0,
+    end: Optional[float] = None,
+) -> str:
+    """
+    Podział, transkrypcja, zapis i indeksowanie - raz dla wszystkich sesji z tym plikiem.
+
+    `file_uid` to UID artefaktów (dla zakresu `start`-`end` - `storage.range_uid`).
+    """
+    audio_duration = get_duration(orig_path, start, end)
+    rolling = None
+    if summarize_during and catalog.lookup(file_uid, "summary", db_path=CATALOG_DB_PATH) is None:
+        # Części tekstu są podsumowywane w tle, gdy kolejne fragmenty są jeszcze transkrybowane
+        rolling = pipeline.RollingSummarizer(client, model=CHAT_MODEL, max_tokens=MAX_SUMMARY_TOKENS)
+    try:
+        # Fragmenty w pamięci lub w przestrzeni roboczej zadania - usuwane także po błędzie lub przerwaniu
+        scratch_bytes = 0 if use_streaming(orig_path) else orig_path.stat().st_size
+        with ScratchSpace(file_uid, expected_bytes=scratch_bytes) as scratch_space:
+            speech_path = orig_path
+            if vad.enabled():
+                if start or end is not None:
+                    # Cisza jest wykrywana tylko w wyciętym zakresie
+                    speech_path = cut_range(orig_path, start, end, scratch_space)
+                    start, end = 0.0, None
+                speech_path, speech_map = vad.trim_silence(
+                    speech_path, scratch_space, duration=audio_duration
+                )
+                if speech_map is not None:
+                    session_memory.add_message(
+                        st.session_state,
+                        f"Usunięto {speech_map.removed_seconds:.0f} s ciszy "
+                        f"z {speech_map.duration:.0f} s nagrania",
+                    )
+            audio_chunks = chunk_source(speech_path, scratch=scratch_space, start=start, end=end)
+            transcript_result = transcribe_chunks(
+                audio_chunks, backend, on_text=rolling.add if rolling is not None else None
+            )
+        with metrics.stage("write") as write_stage:
+            stored_path, write_stage.bytes_out = storage.write_artefact(
+                transcript_path, transcript_result, encoding=get_safe_encoding()
+            )
+        catalog.register(
+            file_uid, "transcript", stored_path,
+            write_stage.bytes_out, db_path=CATALOG_DB_PATH,
+        )
+        try:
+            transcript_index.index_transcript(
+                file_uid,
+                transcript_result,
+                source=source_name,
+                source_kind=source_kind,
+                duration=audio_duration,
+                language=DEFAULT_LANGUAGE,
+                model=backend.model_label,
+                db_path=INDEX_DB_PATH,
+            )
+        except sqlite3.Error as exc:
+            logger.warning("Nie udało się zaindeksować transkrypcji %s: %s", file_uid, exc)
+        if rolling is not None:
+            # Po ostatnim fragmencie zostaje reszta tekstu i krótkie zapytanie łączące
+            topic, summary = rolling.finish()
+            if topic.startswith(("Błąd", "Brak środków", "Nie udało się")):
+                logger.warning("Podsumowanie w trakcie transkrypcji %s: %s: %s", file_uid, topic, summary)
+            else:
+                save_summary(file_uid, summary_path, topic, summary)
+        return transcript_result
+    finally:
+        if rolling is not None:
+            rolling.cancel()
+
+
+def run_transcription(
+    file_uid: str,
+    orig_path: Path,
+    transcript_path: Path,
+    summary_path: Path,
+    backend_name: str,
+    source_name: str,
+    source_kind: str,
+    summarize_during: bool = False,
+    start: float = 0.0,
+    end: Optional[float] = None,
+) -> None:
+    """
+    Transkrybuje przyjęty plik (lub jego zakres `start`-`end`) wybranym silnikiem (`transcribe_file`).
+
+    Ta sama transkrypcja zlecona równocześnie w innej sesji nie jest
+    powtarzana - wywołanie czeka na jej wynik. Ścieżki transkrypcji
+    i podsumowania zakresu wynikają z `storage.range_uid`.
+
+    Raises:
+        RuntimeError, ValueError, OSError: Błędy transkrypcji, zapisu lub silnika
+    """
+    # Oryginał jest oznaczony jako używany, żeby inne sesje go nie usunęły
+    if catalog.acquire(file_uid, "original", db_path=CATALOG_DB_PATH) is None:
+        raise RuntimeError("Oryginał pliku został usunięty z uploads/ - prześlij plik ponownie")
+    artefact_uid = storage.range_uid(file_uid, start, end)
+    try:
+        with metrics.job(artefact_uid):
+            backend = transcription.create_backend(backend_name, openai_client=client, openai_model=WHISPER_MODEL)
+            singleflight.get_coordinator().do(
+                singleflight.transcription_key(artefact_uid, backend.model_label, DEFAULT_LANGUAGE),
+                lambda: transcribe_file(
+                    artefact_uid, orig_path, transcript_path, summary_path,
+                    backend, source_name, source_kind, summarize_during, start, end,
+                ),
+            )
+    finally:
+        catalog.release(file_uid, "original", db_path=CATALOG_DB_PATH)
+
+
+def transcribe_playlist(videos: list, backend_name: str, captions_mode: str = "off") -> dict:
+    """
+    Pobiera filmy playlisty równolegle i transkrybuje każdy zaraz po pobraniu.
+
+    Filmy z zapisaną transkrypcją są pomijane, a filmy z zachowanym
+    oryginałem transkrybowane bez ponownego pobierania. Przy `captions_mode`
+    innym niż `off` film z napisami nie jest pobierany.
+
+    Returns:
+        dict: Liczba filmów `done` (przetranskrybowane), `captions` (z napisów),
+        `skipped` (gotowe wcześniej) i `failed`
+    """
+    counts = {"done": 0, "captions": 0, "skipped": 0, "failed": 0}
+    progress = st.progress(0.0, text="Transkrypcja playlisty...")
+
+    def report(outcome: str) -> None:
+        counts[outcome] += 1
+        finished = sum(counts.values())
+        progress.progress(finished / len(videos), text=f"Transkrypcja playlisty: {finished}/{len(videos)}")
+
+    def transcribe(video: dict, file_uid: str, orig_path: Optional[Path]) -> None:
+        transcript_path, summary_path = storage.artefact_paths(file_uid, BASE_DIR)
+        if catalog.lookup(file_uid, "transcript", db_path=CATALOG_DB_PATH) is not None:
+            report("skipped")
+            return
+        try:
+            run_transcription(
+                file_uid, orig_path, transcript_path, summary_path, backend_name, video["id"], "youtube"
+            )
+        except (RuntimeError, ValueError, OSError) as exc:
+            st.error(f"{video['title']}: błąd transkrypcji: {exc}")
+            logger.error("Błąd transkrypcji %s (%s): %s", file_uid, video["url"], exc)
+            report("failed")
+        else:
+            st.write(f"✅ {video['title']}")
+            report("done")
+
+    to_download = []
+    for video in videos:
+        file_uid = youtube.cached_uid(video["id"], db_path=CATALOG_DB_PATH)
+        known_original = catalog.lookup(file_uid, "original", db_path=CATALOG_DB_PATH) if file_uid else None
+        if file_uid is None or (
+            known_original is None and catalog.lookup(file_uid, "transcript", db_path=CATALOG_DB_PATH) is None
+        ):
+            to_download.append(video)
+        else:
+            transcribe(video, file_uid, Path(known_original["path"]) if known_original else None)
+    # Pobrane pliki trafiają do transkrypcji w kolejności ukończenia pobierania
+    for video, fetched, error in youtube.download_concurrently(
+        to_download,
+        workers=YOUTUBE_DOWNLOAD_WORKERS,
+        download=lambda url: fetch_playlist_video(url, captions_mode),
+    ):
+        if error is not None:
+            st.error(f"{video['title']}: błąd pobierania: {error}")
+            logger.error("Błąd pobierania %s: %s", video["url"], error)
+            report("failed")
+            continue
+        caption_uid, downloaded = fetched
+        if caption_uid is not None:
+            st.write(f"✅ {video['title']} (napisy)")
+            report("captions")
+            continue
+        try:
+            file_uid, orig_path, _, _ = init_paths(*downloaded)
+        except (RuntimeError, OSError) as exc:
+            st.error(f"{video['title']}: nie udało się przygotować pliku: {exc}")
+            report("failed")
+            continue
+        fetched = downloaded = None  # Zawartość pobrania nie jest potrzebna po zapisaniu oryginału
+        youtube.remember_video(video["id"], file_uid, db_path=CATALOG_DB_PATH)
+        metrics.link_job(youtube.source_key(video["id"]), file_uid)
+        transcribe(video, file_uid, orig_path)
+    return counts
+
+
+def download_data(file_uid: str, transcript_path: Path, summary_path: Path, export_format: str):
+    """
+    Funkcja budująca plik do pobrania (TXT, JSON lub ZIP z podsumowaniem) z plików na dysku.
+
+    Streamlit wywołuje ją dopiero po kliknięciu przycisku, więc zwykłe
+    odświeżenie strony nie kopiuje transkrypcji do pamięci sesji.
+    """
+    def build() -> bytes:
+        has_summary = catalog.lookup(file_uid, "summary", db_path=CATALOG_DB_PATH) is not None
+        if export_format == "json":
+            summary = storage.read_summary(summary_path, encoding=get_safe_encoding()) if has_summary else None
+            return b"".join(transcript_view.iter_json(file_uid, transcript_path, summary))
+        if export_format == "zip":
+            members = transcript_view.bundle_members(
+                file_uid, transcript_path, summary_path if has_summary else None
+            )
+            return b"".join(transcript_view.iter_zip(members))
+        return b"".join(transcript_view.iter_text(transcript_path))
+
+    return build
+
+
+# --- Transkrypcja na żywo ---
+@st.cache_resource
+def live_registry() -> dict:
+    """Sesje na żywo procesu - działają w tle między odświeżeniami strony; stan sesji pamięta tylko ich id."""
+    return {}
+
+
+def start_live_session(backend_name: str, source_name: str, follow_path: Optional[Path] = None) -> str:
+    """
+    Otwiera sesję na żywo (z dekoderem śledzącym plik `follow_path`) i zwraca jej id.
+
+    Raises:
+        RuntimeError, ValueError: Gdy silnik transkrypcji lub FFmpeg nie są dostępne
+    """
+    scratch_space = ScratchSpace("live", tmpfs=False)
+    try:
+        backend = transcription.create_backend(backend_name, openai_client=client, openai_model=WHISPER_MODEL)
+        session = live.LiveSession(
+            backend, scratch_space.new_file(".txt", prefix="live_"), language=DEFAULT_LANGUAGE
+        )
+        decoder = live.start_decoder(session, follow_path, follow=True) if follow_path is not None else None
+    except (RuntimeError, ValueError):
+        scratch_space.cleanup()
+        raise
+    live_id = scratch_space.path.name
+    live_registry()[live_id] = {
+        "session": session, "decoder": decoder, "scratch": scratch_space, "source": source_name,
+        "seen": time.monotonic(),
+    }
+    return live_id
+
+
+def stop_live_session(live_id: str) -> Optional[str]:
+    """Kończy sesję, zapisuje transkrypcję jak transkrypcję pliku i zwraca jej UID (None bez mowy)."""
+    entry = live_registry().pop(live_id, None)
+    if entry is None:
+        return None
+    with st.spinner("Transkrypcja ostatniego segmentu..."):
+        return close_live_entry(live_id, entry)
+
+
+def close_live_entry(live_id: str, entry: dict) -> Optional[str]:
+    """Zatrzymuje dekoder i sesję wyjętą z rejestru, zapisuje transkrypcję i usuwa przestrzeń roboczą."""
+    try:
+        if entry["decoder"] is not None:
+            entry["decoder"].stop()
+            try:
+                entry["decoder"].wait()
+            except RuntimeError as exc:
+                logger.warning("Dekoder sesji na żywo %s: %s", live_id, exc)
+        entry["session"].finish()
+        if not entry["session"].transcript_path.stat().st_size:
+            return None
+        return entry["session"].store(
+            entry["source"],
+            base_dir=BASE_DIR,
+            catalog_db=CATALOG_DB_PATH,
+            index_db=INDEX_DB_PATH,
+            content_hash=CONTENT_HASH,
+            encoding=get_safe_encoding(),
+        )
+    finally:
+        entry["scratch"].cleanup()
+
+
+def expire_live_sessions(registry: dict) -> int:
+    """
+    Kończy sesje, których podgląd nie był odświeżany od `LIVE_ABANDON_TIMEOUT` sekund.
+
+    Karta przeglądarki zamknięta bez zakończenia sesji zostawiłaby w rejestrze
+    działający dekoder (proces FFmpeg), wątek transkrypcji i przestrzeń roboczą;
+    transkrypcja takiej sesji jest zapisywana jak po kliknięciu „Zakończ sesję”.
+
+    Returns:
+        int: Liczba zakończonych sesji
+    """
+    deadline = time.monotonic() - LIVE_ABANDON_TIMEOUT
+    expired = 0
+    for live_id, entry in list(registry.items()):
+        if entry["seen"] >= deadline or registry.pop(live_id, None) is None:
+            continue
+        logger.info("Sesja na żywo %s porzucona - kończenie w tle", live_id)
+        try:
+            close_live_entry(live_id, entry)
+        except (OSError, RuntimeError, sqlite3.Error) as exc:
+            logger.error("Błąd zapisu porzuconej sesji na żywo %s: %s", live_id, exc)
+        expired += 1
+    return expired
+
+
+@st.cache_resource
+def start_live_reaper() -> threading.Thread:
+    """Uruchamia (raz na proces) wątek kończący porzucone sesje na żywo."""
+    registry = live_registry()
+
+    def reap() -> None:
+        while True:
+            time.sleep(60)
+            expire_live_sessions(registry)
+
+    thread = threading.Thread(target=reap, name="audio2tekst-live-reaper", daemon=True)
+    thread.start()
+    return thread
+
+
+start_live_reaper()
+
+
+@st.fragment(run_every=1.0)
+def show_live_session(live_id: str) -> None:
+    """Podgląd sesji odświeżany co sekundę: ostatnie wiersze transkrypcji i opóźnienie."""
+    entry = live_registry().get(live_id)
+    if entry is None:
+        return
+    entry["seen"] = time.monotonic()
+    stats = entry["session"].stats()
+    columns = st.columns(4)
+    columns[0].metric("Nagranie", f"{stats['audio_seconds']:.0f} s")
+    columns[1].metric("Segmenty", stats["segments"])
+    columns[2].metric("Opóźnienie", f"{stats['last_latency']:.1f} s")
+    columns[3].metric("W kolejce", stats["queued"])
+    lines = [live.format_line(line["start"], line["end"], line["text"]) for line in entry["session"].recent_lines()]
+    st.text_area("Transkrypcja na żywo", "\n".join(lines), height=300, label_visibility="collapsed")
+    if entry["decoder"] is not None and not entry["decoder"].running:
+        st.info("Plik przestał rosnąć - zakończ sesję, aby zapisać transkrypcję.")
+
+
+# --- Indeks pełnotekstowy transkrypcji ---
+@st.cache_resource
+def backfill_transcript_index() -> int:
+    """Jednorazowo (na proces) indeksuje transkrypcje zapisane przed wprowadzeniem indeksu."""
+    try:
+        return transcript_index.backfill_from_uploads(BASE_DIR, db_path=INDEX_DB_PATH)
+    except sqlite3.Error as exc:
+        logger.warning("Nie udało się uzupełnić indeksu transkrypcji: %s", exc)
+        return 0
+
+
+backfill_transcript_index()
+
+# --- Obsługa YouTube i plików lokalnych ---
+file_source = None
+file_ext = ""
+source_name = ""
+source_kind = "file"
+youtube_uid = None  # UID oryginału pobranego wcześniej w tej sesji
+youtube_original = None
+youtube_clipped = False  # Oryginał pobrany z YouTube tylko dla zakresu nagrania
+
+if audio_file is not None:
+    file_ext = Path(audio_file.name).suffix.lower()
+    if file_ext not in ALLOWED_EXT:
+        st.error(f"Nieobsługiwany format pliku: {file_ext}")
+    elif audio_file.size > MAX_UPLOAD_SIZE:
+        st.error(
+            f"Plik jest za duży ({audio_file.size/1024/1024:.1f} MB). "
+            f"Maksymalny rozmiar: {MAX_UPLOAD_SIZE/1024/1024:.0f} MB."
+        )
+    else:
+        # Przekazujemy obiekt pliku - bez dodatkowej kopii zawartości (getvalue)
+        file_source = audio_file
+        source_name = audio_file.name
+elif server_file is not None:
+    file_ext = server_file.suffix.lower()
+    file_source = server_file
+    source_name = server_file.name
+elif youtube_url and youtube.is_playlist_url(youtube_url):
+    # Playlista lub kanał - lista filmów z metadanych yt-dlp, bez pobierania
+    try:
+        with st.spinner("Odczyt listy filmów z YouTube..."):
+            playlist_videos = expand_youtube_playlist(youtube_url.strip())
+    except (ValueError, RuntimeError) as exc:
+        st.error(f"Nie udało się odczytać playlisty: {exc}")
+        playlist_videos = []
+    if playlist_videos:
+        st.subheader(f"📃 Playlista: {len(playlist_videos)} filmów")
+        ready_uids = {
+            video["id"]: youtube.cached_uid(video["id"], db_path=CATALOG_DB_PATH) for video in playlist_videos
+        }
+        st.dataframe(
+            [
+                {
+                    "Tytuł": video["title"],
+                    "Czas": f"{video['duration'] / 60:.0f} min" if video["duration"] else "",
+                    "Transkrypcja": "✅" if ready_uids[video["id"]] and catalog.lookup(
+                        ready_uids[video["id"]], "transcript", db_path=CATALOG_DB_PATH
+                    ) else "",
+                }
+                for video in playlist_videos
+            ],
+            hide_index=True,
+        )
+        backend_names = transcription.available_backends()
+        playlist_backend = st.selectbox(
+            "Silnik transkrypcji:",
+            options=backend_names,
+            index=backend_names.index(TRANSCRIPTION_BACKEND) if TRANSCRIPTION_BACKEND in backend_names else 0,
+            format_func=lambda name: transcription.BACKENDS[name],
+            key="backend_playlist",
+        )
+        if client is not None and st.button("📝 Transkrybuj playlistę"):
+            playlist_counts = transcribe_playlist(playlist_videos, playlist_backend, youtube_captions)
+            st.success(
+                f"Przetranskrybowano: {playlist_counts['done']}, z napisów: {playlist_counts['captions']}, "
+                f"gotowe wcześniej: {playlist_counts['skipped']}, "
+                f"błędy: {playlist_counts['failed']}. Wklej adres filmu, aby zobaczyć jego transkrypcję."
             )
-            logger.info(
-                "Fragment %d: %s | Rozmiar: %d bajtów",
-                audio_idx + 1,
-                audio_chunk_file,
-                chunk_size,
+elif youtube_url:
+    # Stan sesji pamięta tylko UID pobranego pliku (None po błędzie pobierania),
+    # a nie jego zawartość - oryginał leży w uploads/originals
+    source_name = youtube.extract_youtube_id(youtube_url)
+    source_kind = "youtube"
+    video_key = youtube.source_key(source_name, range_start, range_end)
+    yt_key = f"yt_{youtube_url.strip()}_{video_key}"
+    if yt_key not in st.session_state:
+        # Film przyjęty wcześniej (np. z playlisty lub w innej sesji) nie jest pobierany ponownie
+        st.session_state[yt_key] = youtube.cached_uid(
+            source_name, db_path=CATALOG_DB_PATH, start=range_start, end=range_end
+        ) or ""
+    if st.session_state.get(yt_key):
+        known_original = catalog.lookup(st.session_state[yt_key], "original", db_path=CATALOG_DB_PATH)
+        if known_original is not None:
+            youtube_uid = st.session_state[yt_key]
+            youtube_original = Path(known_original["path"])
+        elif catalog.lookup(st.session_state[yt_key], "transcript", db_path=CATALOG_DB_PATH) is not None:
+            # Transkrypcja z napisów (bez oryginału) albo oryginał usunięty po transkrypcji
+            youtube_uid = st.session_state[yt_key]
+        youtube_clipped = youtube_uid is not None
+    if youtube_uid is None and (range_start or range_end is not None):
+        # Zakres całego filmu pobranego wcześniej jest wycinany lokalnie, bez pobierania
+        youtube_uid = youtube.cached_original(source_name, db_path=CATALOG_DB_PATH)
+        if youtube_uid is not None:
+            youtube_original = Path(catalog.lookup(youtube_uid, "original", db_path=CATALOG_DB_PATH)["path"])
+    if youtube_uid is None and st.session_state.get(yt_key, "") is not None and youtube_captions != "off":
+        with st.spinner("Sprawdzanie napisów YouTube..."):
+            youtube_uid = caption_youtube_transcript(
+                youtube_url.strip(), source_name, youtube_captions, range_start, range_end
             )
-            if chunk_size == 0:
-                empty_audio_chunks.append(audio_chunk_file)
-                continue
+            youtube_clipped = youtube_uid is not None
+        if youtube_uid is not None:
+            st.session_state[yt_key] = youtube_uid
+            session_memory.add_message(st.session_state, f"Transkrypcja z napisów YouTube filmu {source_name}")
+    if youtube_uid is None and st.session_state.get(yt_key, "") is not None:
+        # Pierwsze otwarcie lub oryginał usunięty przez retencję - pobieramy ponownie
+        with st.spinner("Pobieranie audio z YouTube..."), metrics.stage(
+            "download", job_id=video_key
+        ) as download_stage:
+            downloaded = download_youtube_audio(youtube_url, range_start, range_end)
+            if downloaded:
+                download_stage.bytes_out = len(downloaded[0])
+        st.session_state[yt_key] = None
+        if downloaded:
+            file_source, file_ext = downloaded
+            youtube_clipped = True
+
+# --- Przygotowanie do transkrypcji ---
+prepared_paths = None
+if youtube_uid is not None and client is not None:
+    prepared_paths = (youtube_uid, youtube_original, *storage.artefact_paths(youtube_uid, BASE_DIR))
+elif file_source is not None and client is not None:
+    try:
+        with st.spinner("Przygotowanie pliku..."):
+            prepared_paths = init_paths(file_source, file_ext)
+    except (RuntimeError, OSError) as exc:
+        st.error(f"Nie udało się przygotować pliku: {exc}")
+        logger.error("Błąd przyjęcia pliku %s: %s", source_name, exc)
+    if prepared_paths is not None and source_kind == "youtube":
+        # Pobieranie zmierzono, zanim UID pliku był znany
+        metrics.link_job(video_key, prepared_paths[0])
+        youtube.remember_video(
+            source_name, prepared_paths[0], db_path=CATALOG_DB_PATH, start=range_start, end=range_end
+        )
+        st.session_state[yt_key] = prepared_paths[0]
+    # Zawartość pobrania nie jest potrzebna po zapisaniu oryginału
+    file_source = None
+
+# Zakres wycinany z oryginału (oryginał pobrany tylko dla zakresu już go nie wymaga)
+cut_start, cut_end = (0.0, None) if youtube_clipped else (range_start, range_end)
+if prepared_paths is not None and (cut_start or cut_end is not None):
+    try:
+        orig_duration = get_duration(prepared_paths[1])
+        cut_start, cut_end = clip_range(orig_duration, cut_start, cut_end)
+        # Koniec za końcem nagrania to ten sam zakres co brak końca
+        cut_end = cut_end if cut_end < orig_duration else None
+    except (RuntimeError, ValueError) as exc:
+        st.error(f"Nieprawidłowy zakres nagrania: {exc}")
+        prepared_paths = None
+    else:
+        prepared_paths = (
+            prepared_paths[0], prepared_paths[1],
+            *storage.artefact_paths(storage.range_uid(prepared_paths[0], cut_start, cut_end), BASE_DIR),
+        )
+
+if prepared_paths is not None:
+    source_uid, orig_path, transcript_path, summary_path = prepared_paths
+    # Artefakty (transkrypcja, podsumowanie) zakresu mają własny UID
+    file_uid = storage.range_uid(source_uid, cut_start, cut_end)
+
+    # --- Odtwarzacz audio ---
+    if orig_path is not None:
+        orig_size = orig_path.stat().st_size
+        if orig_size <= AUDIO_PLAYER_MAX_SIZE:
+            st.audio(str(orig_path), start_time=int(cut_start), end_time=int(cut_end) if cut_end else None)
+        else:
+            st.caption(
+                f"🔇 Odtwarzacz pominięty - plik ma {orig_size / 1024 / 1024:.0f} MB "
+                f"(limit AUDIO_PLAYER_MAX_MB: {AUDIO_PLAYER_MAX_SIZE // 1024 // 1024} MB)"
+            )
+    elif source_kind == "youtube":
+        # Transkrypcja z napisów - film nie był pobierany
+        st.video(youtube_url.strip())
+
+    # Stan sesji nie przechowuje tekstów - gotowość artefaktów wynika z katalogu
+    transcript_ready = catalog.lookup(file_uid, "transcript", db_path=CATALOG_DB_PATH) is not None
+
+    # --- Proces transkrypcji (split, transcribe, zapis) ---
+    if not transcript_ready and orig_path is None:
+        st.warning("Transkrypcja została usunięta z uploads/ - odśwież stronę, aby pobrać film ponownie.")
+        st.session_state[yt_key] = ""
+    elif not transcript_ready:
+        backend_names = transcription.available_backends()
+        backend_name = st.selectbox(
+            "Silnik transkrypcji:",
+            options=backend_names,
+            index=backend_names.index(TRANSCRIPTION_BACKEND) if TRANSCRIPTION_BACKEND in backend_names else 0,
+            format_func=lambda name: transcription.BACKENDS[name],
+            key=f"backend_{file_uid}",
+        )
+        summarize_during = st.checkbox(
+            "Podsumuj w trakcie transkrypcji",
+            value=False,
+            key=f"summarize_during_{file_uid}",
+            help="Części tekstu są podsumowywane, zanim skończy się transkrypcja całego nagrania",
+        )
+        if st.button("📝 Transkrybuj"):
             try:
-                if chunk_size <= MAX_SIZE:
-                    with open(audio_chunk_file, "rb") as audio_file_chunk:
-                        transcript_text = openai_client.audio.transcriptions.create(
-                            model="whisper-1",
-                            file=audio_file_chunk,
-                            language="pl",
-                            response_format="text",
-                        )
-                        cleaned_transcript = clean_transcript(str(transcript_text))
-                        if not cleaned_transcript.strip():
-                            failed_audio_chunks.append(audio_chunk_file)
-                        texts.append(cleaned_transcript)
-                else:
-                    failed_audio_chunks.append(audio_chunk_file)
-            except (OSError, openai.OpenAIError) as exc:
-                logger.error(
-                    "Błąd podczas transkrypcji fragmentu %s: %s",
-                    audio_chunk_file,
-                    str(exc),
-                )
-                failed_audio_chunks.append(audio_chunk_file)
-            finally:
-                try:
-                    if audio_chunk_file.exists():
-                        audio_chunk_file.unlink()
-                except OSError as cleanup_exc:
-                    logger.warning(
-                        "Nie udało się usunąć pliku tymczasowego %s: %s",
-                        audio_chunk_file,
-                        cleanup_exc,
+                with st.spinner("Transkrypcja w toku..."):
+                    run_transcription(
+                        source_uid, orig_path, transcript_path, summary_path,
+                        backend_name, source_name, source_kind, summarize_during, cut_start, cut_end,
                     )
-    return "\n".join(texts)
+            except (RuntimeError, ValueError, OSError) as exc:
+                st.error(f"Błąd podczas transkrypcji: {exc}")
+                logger.error("Błąd transkrypcji %s: %s", file_uid, exc)
+            else:
+                st.rerun()
 
+    # --- Interfejs po transkrypcji (wyświetlanie, pobieranie) ---
+    else:
+        # Z dysku czytana jest tylko wyświetlana strona transkrypcji
+        transcript_pages = transcript_view.TranscriptPages(transcript_path)
+        st.subheader("📝 Transkrypcja")
+        page_idx = 0
+        if len(transcript_pages) > 1:
+            page_idx = int(st.number_input(
+                f"Strona (z {len(transcript_pages)}, {transcript_pages.size/1024:.0f} KB):",
+                min_value=1,
+                max_value=len(transcript_pages),
+                value=1,
+                step=1,
+                key=f"transcript_page_{file_uid}",
+            )) - 1
+        st.text_area("Transkrypcja", transcript_pages.page(page_idx), height=300, label_visibility="collapsed")
+        download_columns = st.columns(3)
+        for column, (export_format, label) in zip(download_columns, (
+            ("txt", "Pobierz transkrypcję (TXT)"),
+            ("json", "Pobierz JSON"),
+            ("zip", "Pobierz paczkę (ZIP)"),
+        )):
+            column.download_button(
+                label,
+                data=download_data(file_uid, transcript_path, summary_path, export_format),
+                file_name=f"transkrypcja_{file_uid}.{export_format}",
+                mime=transcript_view.FORMATS[export_format].split(";")[0],
+                key=f"download_{export_format}_{file_uid}",
+            )
 
-def summarize(input_text: str, openai_client):
-    log_path = Path("logs/summary_errors.log")
-    log_path.parent.mkdir(parents=True, exist_ok=True)
-    logger.info("Rozpoczynam summarize() - długość tekstu: %s znaków", len(input_text))
-    class OpenAIAPIError(Exception):
-        pass
-    try:
-        MAX_CHUNK = 8000
-        if len(input_text) > MAX_CHUNK:
-            text_chunks = [input_text[i : i + MAX_CHUNK] for i in range(0, len(input_text), MAX_CHUNK)]
-            partial_summaries = []
-            for text_idx, text_chunk in enumerate(text_chunks):
-                try:
-                    prompt = (
-                        f"Podaj temat w jednym zdaniu i podsumowanie 3-5 zdaniami "
-                        f"(fragment {text_idx+1}/{len(text_chunks)}):\n"
-                        + text_chunk
+        # --- Podsumowanie AI (generowanie, wyświetlanie, pobieranie) ---
+        if catalog.lookup(file_uid, "summary", db_path=CATALOG_DB_PATH) is None:
+            if st.button("🤖 Generuj podsumowanie"):
+                def run_summary():
+                    """Podsumowanie, zapis i indeksowanie - raz dla wszystkich sesji z tym plikiem."""
+                    topic, summary = pipeline.summarize(
+                        storage.read_artefact(transcript_path, encoding=get_safe_encoding()), client, model=CHAT_MODEL, max_tokens=MAX_SUMMARY_TOKENS
                     )
-                    completion = openai_client.chat.completions.create(
-                        model="gpt-3.5-turbo",
-                        messages=[{"role": "user", "content": prompt}],
-                        max_tokens=300,
+                    if topic.startswith(("Błąd", "Brak środków", "Nie udało się")):
+                        return topic, summary
+                    save_summary(file_uid, summary_path, topic, summary)
+                    return topic, summary
+
+                with st.spinner("Generowanie podsumowania..."), metrics.job(file_uid):
+                    (topic, summary), _ = singleflight.get_coordinator().do(
+                        singleflight.summary_key(file_uid, CHAT_MODEL), run_summary
                     )
-                    if completion and completion.choices and completion.choices[0].message:
-                        content = completion.choices[0].message.content
-                        partial_summaries.append(content)
-                    else:
-                        raise OpenAIAPIError("Brak odpowiedzi z modelu OpenAI")
-                except (openai.OpenAIError, OpenAIAPIError) as exc:
-                    # Zmieniono nazwę zmiennej lokalnej na msg_summary, aby uniknąć konfliktu z outer scope
-                    msg_summary = f"Błąd fragmentu {text_idx+1}: {exc}\n"
-                    logger.error(msg_summary)
-                    with open(log_path, "a", encoding="utf-8") as log_file:
-                        log_file.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {msg_summary}")
-                    return "Błąd podczas podsumowywania fragmentu", str(exc)
-            if not partial_summaries:
-                return (
-                    "Nie udało się wygenerować podsumowania",
-                    "Brak podsumowań fragmentów.",
-                )
-            try:
-                final_prompt = (
-                    "Oto podsumowania fragmentów długiego tekstu. "
-                    "Na ich podstawie podaj jeden temat i jedno podsumowanie całości (3-5 zdań):\n"
-                    + "\n".join(partial_summaries)
-                )
-                completion = openai_client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[{"role": "user", "content": final_prompt}],
-                    max_tokens=300,
-                )
-                if completion and completion.choices and completion.choices[0].message:
-                    content = completion.choices[0].message.content
-                    lines = content.splitlines() if content else []
-                    final_topic = lines[0] if lines else "Nie udało się wygenerować tematu"
-                    final_summary = " ".join(lines[1:]) if len(lines) > 1 else "Nie udało się wygenerować podsumowania"
-                    return final_topic, final_summary
+                if topic.startswith(("Błąd", "Brak środków", "Nie udało się")):
+                    st.error(f"{topic}: {summary}")
                 else:
-                    raise OpenAIAPIError("Brak odpowiedzi z modelu OpenAI (final)")
-            except (openai.OpenAIError, OpenAIAPIError) as exc:
-                msg_final_summary = f"Błąd końcowego podsumowania: {exc}\n"
-                logger.error(msg_final_summary)
-                with open(log_path, "a", encoding="utf-8") as log_file:
-                    log_file.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {msg_final_summary}")
-                return "Błąd podczas generowania końcowego podsumowania", str(exc)
+                    st.rerun()
         else:
+            topic, summary = storage.read_summary(summary_path, encoding=get_safe_encoding())
+            st.subheader("🤖 Podsumowanie")
+            st.markdown(f"**Temat:** {topic}")
+            st.write(summary)
+            st.download_button(
+                "Pobierz podsumowanie (TXT)",
+                data=f"{topic}\n{summary}",
+                file_name=f"podsumowanie_{file_uid}.txt",
+                mime="text/plain",
+            )
+
+# --- Transkrypcja na żywo (mikrofon lub plik w trakcie zapisu) ---
+if source_option == "Na żywo" and client is not None:
+    st.subheader("🎙️ Transkrypcja na żywo")
+    live_id = st.session_state.get("live_id")
+    live_entry = live_registry().get(live_id) if live_id is not None else None
+    if live_entry is None:
+        # Sesja zakończona w innej karcie, porzucona lub sprzed restartu
+        live_id = st.session_state.live_id = None
+    else:
+        live_entry["seen"] = time.monotonic()
+    if live_id is None:
+        backend_names = transcription.available_backends()
+        live_backend = st.selectbox(
+            "Silnik transkrypcji:",
+            options=backend_names,
+            index=backend_names.index(TRANSCRIPTION_BACKEND) if TRANSCRIPTION_BACKEND in backend_names else 0,
+            format_func=lambda name: transcription.BACKENDS[name],
+            key="backend_live",
+        )
+        live_source = live_follow_file.name if live_follow_file is not None else "mikrofon"
+        can_start = live_mode == "Mikrofon" or live_follow_file is not None
+        if st.button("▶️ Rozpocznij sesję", disabled=not can_start):
             try:
-                prompt = "Podaj temat w jednym zdaniu i podsumowanie 3-5 zdaniami:\n" + input_text
-                completion = openai_client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=300,
-                )
-                if completion and completion.choices and completion.choices[0].message:
-                    content = completion.choices[0].message.content
-                    lines = content.splitlines() if content else []
-                    short_topic = lines[0] if lines else "Nie udało się wygenerować tematu"
-                    short_summary = " ".join(lines[1:]) if len(lines) > 1 else "Nie udało się wygenerować podsumowania"
-                    return short_topic, short_summary
+                st.session_state.live_id = start_live_session(live_backend, live_source, live_follow_file)
+                st.session_state.live_clip = 0
+            except (RuntimeError, ValueError) as exc:
+                st.error(f"Nie udało się rozpocząć sesji: {exc}")
+            else:
+                st.rerun()
+        live_uid = st.session_state.get("live_uid")
+        if live_uid == "":
+            st.info("W sesji nie wykryto mowy - transkrypcja nie została zapisana.")
+        elif live_uid and catalog.lookup(live_uid, "transcript", db_path=CATALOG_DB_PATH) is not None:
+            live_transcript_path, live_summary_path = storage.artefact_paths(live_uid, BASE_DIR)
+            st.success(f"Zapisano transkrypcję sesji (UID: {live_uid}) - znajdziesz ją w wyszukiwarce.")
+            st.download_button(
+                "Pobierz transkrypcję sesji (TXT)",
+                data=download_data(live_uid, live_transcript_path, live_summary_path, "txt"),
+                file_name=f"transkrypcja_{live_uid}.txt",
+                mime="text/plain",
+            )
+    else:
+        if live_entry["decoder"] is None:
+            # Każde nagranie z mikrofonu trafia do sesji; koniec nagrania to koniec segmentu
+            clip = st.audio_input(
+                "Nagraj wypowiedź:",
+                sample_rate=live.SAMPLE_RATE,
+                key=f"live_clip_{live_id}_{st.session_state.live_clip}",
+            )
+            if clip is not None:
+                try:
+                    session = live_entry["session"]
+                    session.feed(live.decode_clip(clip.getvalue()))
+                    session.flush()
+                except RuntimeError as exc:
+                    st.error(f"Nie udało się odczytać nagrania: {exc}")
                 else:
-                    raise OpenAIAPIError("Brak odpowiedzi z modelu OpenAI (krótki tekst)")
-            except (openai.OpenAIError, OpenAIAPIError) as exc:
-                msg_short_summary = f"Błąd podsumowania krótkiego tekstu: {exc}\n"
-                logger.error(msg_short_summary)
-                with open(log_path, "a", encoding="utf-8") as log_file:
-                    log_file.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {msg_short_summary}")
-                return "Błąd podczas podsumowywania tekstu", str(exc)
-    except (openai.OpenAIError, OpenAIAPIError) as exc:
-        if (
-            "insufficient_quota" in str(exc).lower()
-            or "you exceeded your current quota" in str(exc).lower()
-            or "error code: 429" in str(exc).lower()
-        ):
-            return "Brak środków na koncie OpenAI", str(exc)
-        error_msg = f"Błąd ogólny podsumowania: {exc}\n"
-        logger.error(error_msg)
-        with open(log_path, "a", encoding="utf-8") as log_file:
-            log_file.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {error_msg}")
-        return "Błąd ogólny podczas podsumowywania", str(exc)
-    return (
-        "Nie udało się wygenerować podsumowania",
-        "Spróbuj ponownie lub skontaktuj się z administratorem",
-    )
-
+                    st.session_state.live_clip += 1
+                    st.rerun()
+        show_live_session(live_id)
+        if st.button("⏹️ Zakończ sesję"):
+            try:
+                st.session_state.live_uid = stop_live_session(live_id)
+            except (OSError, RuntimeError, sqlite3.Error) as exc:
+                st.error(f"Nie udało się zapisać transkrypcji sesji: {exc}")
+                logger.error("Błąd zapisu sesji na żywo %s: %s", live_id, exc)
+            else:
+                # Pusty UID - sesja bez mowy, nic nie zapisano
+                st.session_state.live_uid = st.session_state.live_uid or ""
+            st.session_state.live_id = None
+            st.rerun()
 
-# --- Stałe i konfiguracja ścieżek ---
-BASE_DIR = Path("uploads")
-for folder in ("originals", "transcripts", "summaries"):
-    (BASE_DIR / folder).mkdir(parents=True, exist_ok=True)
-ALLOWED_EXT = {".mp3", ".wav", ".m4a", ".mp4", ".mov", ".avi", ".webm"}
-MAX_SIZE = 25 * 1024 * 1024  # 25MB
-CHUNK_MS = 5 * 60 * 1000  # 5 minut w ms
+# --- Wyszukiwanie w zapisanych transkrypcjach i podsumowaniach ---
+with st.sidebar.expander("🔎 Szukaj w transkrypcjach", expanded=False):
+    search_query = st.text_input("Szukana fraza:", key="transcript_search_query")
+    if search_query:
+        try:
+            search_hits = transcript_index.search_transcripts(search_query, db_path=INDEX_DB_PATH)
+        except sqlite3.Error as exc:
+            search_hits = []
+            st.warning(f"Błąd wyszukiwania: {exc}")
+        if not search_hits:
+            st.write("Brak wyników.")
+        for hit in search_hits:
+            hit_date = time.strftime("%Y-%m-%d %H:%M", time.localtime(hit["created_at"]))
+            hit_title = hit["topic"] or hit["source"] or hit["uid"]
+            st.markdown(f"**{hit_title}**  \n`{hit['source'] or hit['uid']}` · {hit_date}")
+            st.caption(hit["snippet"])
 
 # --- Panel boczny: Informacje o systemie i audio na samym dole sidebaru ---
 with st.sidebar.expander("ℹ️ Informacje o systemie"):
@@ -788,18 +1331,57 @@ with st.sidebar.expander("ℹ️ Informacje o systemie"):
             st.write(f"  📁 Ścieżka: `{info['path']}`")
     st.write("**Kodowanie:**", get_safe_encoding())
     st.write("**Obsługiwane formaty:**", ", ".join(ALLOWED_EXT))
-    st.write("**Maksymalny rozmiar:**", f"{MAX_SIZE/1024/1024:.1f} MB")
+    st.write("**Maksymalny rozmiar pliku:**", f"{MAX_UPLOAD_SIZE/1024/1024:.0f} MB")
+    st.write("**Maksymalny rozmiar fragmentu (Whisper API):**", f"{MAX_SIZE/1024/1024:.1f} MB")
     st.write("**Długość fragmentu:**", f"{CHUNK_MS/1000/60:.0f} minut")
+    st.write(
+        "**Silniki transkrypcji:**",
+        ", ".join(transcription.BACKENDS[name] for name in transcription.available_backends()),
+    )
+    ffmpeg_stats = get_scheduler().stats()
+    st.write(
+        "**Procesy FFmpeg:**",
+        f"{ffmpeg_stats['running']}/{ffmpeg_stats['max_processes']} aktywne, "
+        f"kolejka: {ffmpeg_stats['queued']}, "
+        f"wykorzystanie: {ffmpeg_stats['average_utilisation']:.0%} "
+        f"(zakończone: {ffmpeg_stats['completed']}, błędy: {ffmpeg_stats['failed']})",
+    )
+    flight_stats = singleflight.get_coordinator().stats()
+    st.write(
+        "**Wspólne zadania:**",
+        f"{flight_stats['in_flight']} w toku, oczekujące sesje: {flight_stats['waiting']} "
+        f"(wykonane: {flight_stats['executions']}, dołączenia: {flight_stats['shared']})",
+    )
+    st.write("**Zajętość uploads/:**")
+    retention_report = retention_manager.report()
+    for kind, usage in retention_report["usage"].items():
+        quota_label = f"{usage['quota']/1024/1024:.0f} MB" if usage["quota"] else "bez limitu"
+        evicted = retention_report["evictions"][kind]
+        st.write(
+            f"- {catalog.KINDS[kind]}: {usage['files']} plików, "
+            f"{usage['bytes']/1024/1024:.1f} MB / {quota_label} "
+            f"(usunięto: {evicted['quota']} LRU, {evicted['ttl']} TTL)"
+        )
+    compression = framed.stats()
+    st.write(
+        f"**Kompresja transkrypcji i podsumowań:** {compression['codec']}"
+        + (f" (poziom {compression['level']})" if compression["level"] is not None else "")
+    )
+    if retention_report["last_error"]:
+        st.warning(f"Ostatni przebieg retencji zakończył się błędem: {retention_report['last_error']}")
     # Przycisk czyszczenia pamięci aplikacji
     if st.button("Wyczyść pamięć aplikacji (audio, transkrypcje, logi)"):
-        for folder in ("originals", "transcripts", "summaries"):
-            folder_path = BASE_DIR / folder
-            if folder_path.exists():
-                for file in folder_path.iterdir():
-                    try:
-                        file.unlink()
-                    except OSError as e:
-                        st.warning(f"Nie udało się usunąć pliku: {file} ({e})")
+        if st.session_state.get("live_id"):
+            # Sesja na żywo nie może zostać w rejestrze bez odwołania w stanie sesji
+            try:
+                stop_live_session(st.session_state.live_id)
+            except (OSError, RuntimeError, sqlite3.Error) as exc:
+                logger.error("Błąd zapisu sesji na żywo %s: %s", st.session_state.live_id, exc)
+        try:
+            catalog.purge(db_path=CATALOG_DB_PATH)
+            transcript_index.clear_index(db_path=INDEX_DB_PATH)
+        except sqlite3.Error as e:
+            st.warning(f"Nie udało się wyczyścić katalogu plików lub indeksu ({e})")
         logs_path = Path("logs")
         if logs_path.exists():
             for file in logs_path.iterdir():
@@ -814,21 +1396,61 @@ with st.sidebar.expander("ℹ️ Informacje o systemie"):
         time.sleep(1)
         st.rerun()
 
+with st.sidebar.expander("⏱️ Czasy etapów", expanded=False):
+    job_rows = metrics.job_breakdown(prepared_paths[0]) if prepared_paths is not None else []
+    if job_rows:
+        st.dataframe(
+            [
+                {
+                    "Etap": row["stage"],
+                    "Liczba": row["count"],
+                    "Czas [s]": round(row["seconds"], 2),
+                    "Wejście [KB]": round(row["bytes_in"] / 1024, 1),
+                    "Wyjście [KB]": round(row["bytes_out"] / 1024, 1),
+                    "Ponowienia": row["retries"],
+                    "Cache": row["cache_hits"],
+                    "Błędy": row["errors"],
+                }
+                for row in job_rows
+            ],
+            hide_index=True,
+        )
+        st.caption(f"Łącznie: {sum(row['seconds'] for row in job_rows):.2f} s")
+    else:
+        st.write("Brak pomiarów dla bieżącego pliku.")
+
 with st.sidebar.expander("🎵 Informacje o audio", expanded=False):
-    if 'audio_info_msgs' in st.session_state:
-        for msg in st.session_state['audio_info_msgs']:
+    info_msgs = session_memory.messages(st.session_state)
+    if info_msgs:
+        for msg in info_msgs:
             st.write(msg)
+        st.caption(f"Ostatnie {session_memory.log_lines()} komunikatów sesji.")
     else:
         st.write("Brak informacji o pliku audio.")
 
+with st.sidebar.expander("🧠 Pamięć sesji", expanded=False):
+    session_usage = session_memory.usage(st.session_state)
+    st.write(
+        f"**Stan sesji:** {session_usage['total']/1024:.1f} KB w {len(session_usage['entries'])} wpisach "
+        f"(komunikaty: {session_usage['messages']}/{session_memory.log_lines()})"
+    )
+    st.dataframe(
+        [
+            {"Klucz": entry["key"], "Rozmiar [KB]": round(entry["bytes"] / 1024, 2)}
+            for entry in session_usage["entries"][:10]
+        ],
+        hide_index=True,
+    )
+
 # --- Zbieranie komunikatów audio do sidebaru zamiast st.info ---
-# Przed każdą operacją na pliku audio, zamiast st.info(...), dodaj do st.session_state['audio_info_msgs']
+# Przed każdą operacją na pliku audio, zamiast st.info(...), dodaj komunikat do bufora sesji
+# (ograniczonego do SESSION_LOG_LINES ostatnich wpisów)
 # Przykład:
-# st.session_state.setdefault('audio_info_msgs', []).append("Plik do transkrypcji: ...")
+# session_memory.add_message(st.session_state, "Plik do transkrypcji: ...")
 # Przykład dla fragmentów:
-# st.session_state['audio_info_msgs'].append(
-#     f"Fragment {audio_idx+1}/{len(audio_chunks)}: {audio_chunk_file} | "
-#     f"Rozmiar: {chunk_size/1024:.1f} KB"
+# session_memory.add_message(
+#     st.session_state,
+#     f"Fragment {audio_idx+1}/{chunk_count}: {audio_chunk_file} | Rozmiar: {chunk_size/1024:.1f} KB",
 # )
 
 # --- Komunikat o błędnym YouTube URL pod polem w sidebarze ---
@@ -0,0 +1,7 @@
+"""
+Audio2Tekst - moduły rdzenia
+=======================================
+
+Pakiet zawiera logikę niezależną od interfejsu Streamlit, którą
+`app.py` (i przyszłe interfejsy) mogą importować bez uruchamiania UI.
+"""
@@ -0,0 +1,1327 @@
+"""
+Serwer HTTP API do zlecania transkrypcji bez interfejsu Streamlit.
+
+Działa obok `app.py` na tym samym rdzeniu (`storage`, `media`, `pipeline`,
+katalog artefaktów i indeks transkrypcji), więc wyniki zapisane przez API
+są widoczne w aplikacji i odwrotnie. Endpointy:
+
+- `POST /jobs` - zlecenie zadania. Treść żądania to sam plik audio/video
+  (nazwa w parametrze `?filename=` lub nagłówku `X-Filename`), albo JSON
+  `{"youtube_url": "...", "summarize": true}`. Parametr `?summarize=1`
+  dodaje podsumowanie dla przesłanego pliku. Adres playlisty lub kanału
+  YouTube zleca osobne zadanie dla każdego filmu (odpowiedź `{"jobs": [...]}`).
+  Pole `"captions"` (`off`, `manual`, `auto`; domyślnie `YOUTUBE_CAPTIONS`)
+  pozwala użyć napisów filmu zamiast pobierania i transkrypcji audio.
+  Pola `"start"` i `"end"` (albo `?start=&end=` przy przesłanym pliku;
+  sekundy lub `GG:MM:SS`) ograniczają transkrypcję do zakresu nagrania -
+  z YouTube pobierany jest tylko ten zakres.
+- `GET /jobs/{id}` - status, postęp i wynik zadania.
+- `GET /jobs/{id}/events` - postęp jako Server-Sent Events: `status`,
+  `chunk` (tekst każdego fragmentu z czasem `start`-`end` w sekundach
+  oryginalnego nagrania), `done` lub `error`.
+- `GET /transcripts/{uid}?page=N` - strona zapisanej transkrypcji (od 1),
+  odczytana z dysku bez wczytywania całego pliku.
+- `GET /transcripts/{uid}/download?format=txt|json|zip` - transkrypcja
+  (JSON i ZIP z podsumowaniem) wysyłana blokami prosto z dysku.
+- `POST /live` - otwarcie sesji transkrypcji na żywo (opcjonalnie JSON
+  `{"source": "nazwa", "summarize": true}`; odpowiedź 201 z zadaniem).
+- `PUT /live/{id}` - strumień audio sesji (dowolny format FFmpeg, np. WebM
+  z `MediaRecorder` albo MKV/FLV z OBS) w kodowaniu chunked lub z
+  `Content-Length`. Segmenty cięte w pauzach są transkrybowane w trakcie
+  przesyłania i trafiają do `GET /jobs/{id}/events` jako zdarzenia `chunk`
+  (z opóźnieniem `latency` w sekundach); koniec treści żądania kończy sesję
+  i zapisuje transkrypcję (`audio2tekst.live`).
+- `GET /health` - stan serwera i kolejki zadań.
+
+Zadania wykonuje ograniczona pula wątków (`API_WORKERS`) z kolejką
+(`API_MAX_QUEUE`, po przekroczeniu 503). Identyczne zgłoszenia (ten sam UID
+zawartości, silnik i język albo ten sam film YouTube) dołączają do jednego
+zadania w toku, a plik z zapisaną już transkrypcją kończy się od razu.
+Filmy YouTube pobiera osobna pula (`YOUTUBE_DOWNLOAD_WORKERS`); pobrany
+film od razu trafia do kolejki transkrypcji, a film przyjęty wcześniej nie
+jest pobierany ponownie. Sesji na żywo jest najwyżej `API_LIVE_SESSIONS`
+(poza kolejką zadań - każdą obsługuje wątek jej żądania `PUT`), a historia
+ich zdarzeń jest ograniczona do `LIVE_EVENT_HISTORY` ostatnich.
+
+Uruchomienie: `python -m audio2tekst.api_server --port 8502`.
+"""
+
+import argparse
+import collections
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+import openai
+from dotenv import load_dotenv
+
+from audio2tekst import (
+    captions,
+    catalog,
+    hashing,
+    live,
+    metrics,
+    pipeline,
+    retention,
+    singleflight,
+    storage,
+    transcript_index,
+    transcription,
+    transcript_view,
+    vad,
+    youtube,
+)
+from audio2tekst.media import (
+    CHUNK_MS,
+    chunk_source,
+    clip_range,
+    cut_range,
+    get_duration,
+    parse_time,
+    plan_segments,
+    use_streaming,
+)
+from audio2tekst.scratch import ScratchSpace, sweep_orphans
+from audio2tekst.system import get_safe_encoding
+
+logger = logging.getLogger(__name__)
+
+SSE_KEEPALIVE = 15.0  # Sekundy między komentarzami podtrzymującymi połączenie SSE
+LIVE_EVENT_HISTORY = 500  # Zdarzenia sesji na żywo dostępne dla klientów podłączonych później
+LIVE_READ_BYTES = 64 * 1024  # Najwięcej bajtów strumienia przekazywanych dekoderowi naraz
+TRUE_VALUES = ("1", "true", "yes", "tak")
+
+
+class QueueFull(RuntimeError):
+    """Kolejka zadań jest pełna - klient powinien ponowić zgłoszenie później."""
+
+
+def parse_range(start, end) -> Tuple[float, Optional[float]]:
+    """
+    Zakres nagrania z pól żądania (sekundy lub `GG:MM:SS`; brak = całe nagranie).
+
+    Raises:
+        ValueError: Gdy czas jest niepoprawny lub koniec nie jest za początkiem
+    """
+    if isinstance(start, bool) or isinstance(end, bool):
+        raise ValueError("Początek i koniec zakresu muszą być czasem")
+    range_start, range_end = parse_time(start) or 0.0, parse_time(end)
+    if range_end is not None and range_end <= range_start:
+        raise ValueError(f"Koniec zakresu ({range_end:g} s) musi być za początkiem ({range_start:g} s)")
+    return range_start, range_end
+
+
+class Job:
+    """
+    Zadanie transkrypcji wraz z historią zdarzeń dla strumienia SSE.
+
+    Zdarzenia są przechowywane do końca życia zadania, więc klient
+    podłączony później (lub wznawiający z `Last-Event-ID`) dostaje całą historię.
+    Z `max_events` (sesje na żywo) zostaje tylko tyle ostatnich zdarzeń.
+
+    `source_uid` to UID oryginału, a `uid` - UID artefaktów zadania (dla
+    zakresu `start`-`end` nagrania `storage.range_uid`). Oryginał pobrany
+    z YouTube tylko dla zakresu (`clipped`) zaczyna się w sekundzie `start`.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        source: str,
+        source_kind: str,
+        summarize: bool,
+        uid: Optional[str] = None,
+        captions: str = "off",
+        start: float = 0.0,
+        end: Optional[float] = None,
+        clipped: bool = False,
+        max_events: Optional[int] = None,
+    ):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.start = start
+        self.end = end
+        self.uid: Optional[str] = None
+        self.source_uid: Optional[str] = None
+        self.clipped = False
+        if uid is not None:
+            self.set_source(uid, clipped)
+        self.source = source
+        self.source_kind = source_kind
+        self.summarize = summarize
+        self.captions = captions
+        self.caption_track: Optional[Dict] = None
+        self.status = "queued"
+        self.cached = False
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.chunks_done = 0
+        self.chunks_total = 0
+        self.removed_seconds = 0.0
+        self.spans: List[Tuple[float, float]] = []
+        self.transcript = ""
+        self.topic = ""
+        self.summary = ""
+        self.summary_error = ""
+        self.error = ""
+        self.events: List[Dict] = []
+        self.max_events = max_events
+        self._dropped = 0  # Zdarzenia usunięte z początku historii (`max_events`)
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    @property
+    def ranged(self) -> bool:
+        return bool(self.start) or self.end is not None
+
+    def set_source(self, uid: str, clipped: bool = False) -> None:
+        """Ustawia oryginał zadania; `clipped` - oryginał zawiera tylko zakres `start`-`end`."""
+        self.source_uid = uid
+        self.clipped = clipped
+        self.uid = uid if clipped else storage.range_uid(uid, self.start, self.end)
+
+    def emit(self, event: str, data: Dict) -> None:
+        """Dodaje zdarzenie i budzi klientów czekających na strumień SSE."""
+        with self._cond:
+            self.events.append({"id": self._dropped + len(self.events), "event": event, "data": data})
+            if self.max_events is not None and len(self.events) > self.max_events:
+                excess = len(self.events) - self.max_events
+                del self.events[:excess]
+                self._dropped += excess
+            self._cond.notify_all()
+
+    def set_status(self, status: str) -> None:
+        self.status = status
+        if status == "running":
+            self.started_at = time.time()
+        self.emit("status", {"status": status})
+
+    def chunk_done(self, index: int, total: int, text: str) -> None:
+        """Rejestruje transkrypcję fragmentu (wywoływane przez `pipeline.transcribe_chunks`)."""
+        self.chunks_done += 1
+        self.chunks_total = total
+        data = {"index": index, "total": total, "text": text}
+        if index < len(self.spans):
+            data["start"], data["end"] = self.spans[index]
+        self.emit("chunk", data)
+
+    def finish(self, error: str = "") -> None:
+        # Status i ostatnie zdarzenie zmieniają się razem, żeby strumień SSE
+        # nie zakończył się przed wysłaniem 'done' lub 'error'
+        with self._cond:
+            self.error = error
+            self.status = "failed" if error else "done"
+            self.finished_at = time.time()
+            if error:
+                self.emit("error", {"error": error})
+            else:
+                self.emit("done", self.to_dict(include_text=False))
+
+    def wait_events(self, after: int, timeout: float) -> List[Dict]:
+        """Zwraca zdarzenia o numerze większym niż `after` (czeka na nie najwyżej `timeout` s)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._dropped + len(self.events) > after + 1 or self.finished, timeout)
+            return self.events[max(after + 1 - self._dropped, 0):]
+
+    def to_dict(self, include_text: bool = True) -> Dict:
+        payload = {
+            "id": self.id,
+            "status": self.status,
+            "uid": self.uid,
+            "source": self.source,
+            "source_kind": self.source_kind,
+            "summarize": self.summarize,
+            "cached": self.cached,
+            "range": {"start": self.start, "end": self.end} if self.ranged else None,
+            "captions": (
+                {"language": self.caption_track["language"], "kind": self.caption_track["kind"]}
+                if self.caption_track else None
+            ),
+            "progress": {"chunks_done": self.chunks_done, "chunks_total": self.chunks_total},
+            "removed_seconds": self.removed_seconds,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+        if include_text and self.status == "done":
+            payload["result"] = {
+                "transcript": self.transcript,
+                "topic": self.topic,
+                "summary": self.summary,
+                "summary_error": self.summary_error,
+            }
+        return payload
+
+
+class JobManager:
+    """
+    Kolejka zadań wykonywanych przez ograniczoną pulę wątków.
+
+    Args:
+        openai_client: Klient OpenAI (transkrypcja silnikiem 'openai' i podsumowania)
+        workers (int): Liczba równocześnie wykonywanych zadań
+        max_queue (int): Liczba zadań oczekujących ponad `workers` (przekroczenie - `QueueFull`)
+        max_history (int): Liczba zakończonych zadań przechowywanych do odczytu statusu
+        base_dir (Path): Katalog uploads/
+        catalog_db (Path): Baza katalogu artefaktów
+        index_db (Path): Baza indeksu pełnotekstowego transkrypcji
+        backend (str): Silnik transkrypcji ('openai' lub 'local')
+        whisper_model (str): Model Whisper API
+        language (str): Język nagrań
+        chat_model (str): Model podsumowań
+        max_tokens (int): Limit tokenów podsumowania
+        chunk_ms (int): Długość fragmentu w ms
+        content_hash (str): Algorytm UID plików (pusty = domyślny)
+        quick (bool): Rozpoznawanie znanych plików po szybkim identyfikatorze
+        download_workers (int): Liczba równoczesnych pobrań z YouTube
+        playlist_limit (int): Najwyższa liczba filmów przyjmowanych z jednej playlisty
+        extractor (callable, optional): Ekstraktor metadanych yt-dlp (playlisty i napisy)
+        downloader (callable, optional): Funkcja pobierająca film (domyślnie `youtube.download_audio`)
+        captions (str): Domyślny tryb napisów YouTube (`off`, `manual`, `auto`; `audio2tekst.captions`)
+        live_sessions (int): Liczba równoczesnych sesji transkrypcji na żywo
+    """
+
+    def __init__(
+        self,
+        openai_client=None,
+        workers: int = 2,
+        max_queue: int = 16,
+        max_history: int = 1000,
+        base_dir: Path = storage.BASE_DIR,
+        catalog_db: Path = catalog.DB_PATH,
+        index_db: Path = transcript_index.DB_PATH,
+        backend: str = "openai",
+        whisper_model: str = "whisper-1",
+        language: str = "pl",
+        chat_model: str = "gpt-3.5-turbo",
+        max_tokens: int = 300,
+        chunk_ms: int = CHUNK_MS,
+        content_hash: str = "",
+        quick: bool = False,
+        download_workers: int = youtube.DEFAULT_DOWNLOAD_WORKERS,
+        playlist_limit: int = youtube.DEFAULT_PLAYLIST_LIMIT,
+        extractor: Optional[Callable[[str, Dict], Dict]] = None,
+        downloader: Optional[Callable[[str], youtube.Downloaded]] = None,
+        captions: str = "off",
+        live_sessions: int = 2,
+    ):
+        self.openai_client = openai_client
+        self.workers = max(workers, 1)
+        self.max_queue = max(max_queue, 0)
+        self.max_history = max_history
+        self.base_dir = Path(base_dir)
+        self.catalog_db = catalog_db
+        self.index_db = index_db
+        self.backend = backend
+        self.whisper_model = whisper_model
+        self.language = language
+        self.chat_model = chat_model
+        self.max_tokens = max_tokens
+        self.chunk_ms = chunk_ms
+        self.content_hash = content_hash
+        self.quick = quick
+        self.download_workers = max(download_workers, 1)
+        self.playlist_limit = max(playlist_limit, 1)
+        self.extractor = extractor
+        self.downloader = downloader or youtube.download_audio
+        self.captions = captions
+        self.live_sessions = max(live_sessions, 0)
+        self.submitted = 0
+        self.deduplicated = 0
+        self.cache_hits = 0
+        self._lock = threading.Lock()
+        self._jobs: "collections.OrderedDict[str, Job]" = collections.OrderedDict()
+        self._active: Dict[str, Job] = {}
+        self._live: Dict[str, Job] = {}
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="audio2tekst-api")
+        # Pobieranie nie zajmuje wątków transkrypcji
+        self._downloads = ThreadPoolExecutor(
+            max_workers=self.download_workers, thread_name_prefix="audio2tekst-download"
+        )
+        storage.ensure_dirs(self.base_dir)
+
+    # --- Zgłaszanie zadań ---
+
+    def submit_file(
+        self,
+        file_path: Path,
+        filename: str,
+        summarize: bool = False,
+        move: bool = False,
+        start: float = 0.0,
+        end: Optional[float] = None,
+    ) -> Job:
+        """
+        Przyjmuje plik (UID, zapis oryginału) i zwraca zadanie - nowe, trwające lub zakończone.
+
+        Z zakresem `start`-`end` (sekundy) transkrybowany jest tylko ten
+        fragment nagrania; jego wynik ma własny UID (`storage.range_uid`).
+
+        Raises:
+            QueueFull: Gdy kolejka zadań jest pełna
+            RuntimeError: Gdy pliku nie da się przyjąć (np. brak ścieżki audio)
+            ValueError: Gdy zakres leży poza nagraniem
+        """
+        uid, orig_path, transcript_path, summary_path = storage.prepare_source(
+            file_path,
+            Path(filename).suffix.lower(),
+            base_dir=self.base_dir,
+            catalog_db=self.catalog_db,
+            content_hash=self.content_hash,
+            quick=self.quick,
+            move=move,
+        )
+        if start or end is not None:
+            duration = get_duration(orig_path)
+            start, clipped_end = clip_range(duration, start, end)
+            # Koniec za końcem nagrania to ten sam zakres co brak końca
+            end = clipped_end if clipped_end < duration else None
+        key = singleflight.transcription_key(storage.range_uid(uid, start, end), self.backend, self.language)
+        return self._submit(key, filename, "file", summarize, uid=uid, start=start, end=end)
+
+    def submit_youtube(
+        self,
+        url: str,
+        summarize: bool = False,
+        captions_mode: Optional[str] = None,
+        start: float = 0.0,
+        end: Optional[float] = None,
+    ) -> Job:
+        """
+        Zleca pobranie i transkrypcję filmu YouTube.
+
+        Przy trybie napisów innym niż `off` (domyślnie `captions`) film
+        z napisami w języku transkrypcji nie jest pobierany - transkrypcją
+        zostają jego napisy. Z zakresem `start`-`end` (sekundy) pobierany jest
+        tylko ten fragment filmu, a gdy cały film jest już w uploads/, zakres
+        jest z niego wycinany bez pobierania.
+
+        Raises:
+            ValueError: Gdy adres nie jest adresem YouTube lub zakres jest pusty
+            QueueFull: Gdy kolejka zadań jest pełna
+        """
+        if not youtube.validate_youtube_url(url):
+            raise ValueError("Nieprawidłowy adres YouTube. Wklej prawidłowy link do filmu YouTube.")
+        if start < 0 or (end is not None and end <= start):
+            raise ValueError(f"Pusty zakres nagrania: {start:.1f}-{end:.1f} s")
+        video_id = youtube.extract_youtube_id(url)
+        key = f"{youtube.source_key(video_id, start, end)}:{self.backend}:{self.language}"
+        uid = youtube.cached_uid(video_id, db_path=self.catalog_db, start=start, end=end)
+        clipped = uid is not None
+        if uid is None and (start or end is not None):
+            uid = youtube.cached_original(video_id, db_path=self.catalog_db)
+        return self._submit(
+            key, url.strip(), "youtube", summarize, uid=uid, captions_mode=captions_mode,
+            start=start, end=end, clipped=clipped,
+        )
+
+    def submit_playlist(self, url: str, summarize: bool = False, captions_mode: Optional[str] = None) -> List[Job]:
+        """
+        Rozwija playlistę lub kanał YouTube i zleca zadanie dla każdego filmu.
+
+        Filmy są pobierane przez pulę `download_workers` i trafiają do kolejki
+        transkrypcji w kolejności ukończenia pobierania. Filmy z zapisaną
+        transkrypcją kończą się od razu, a filmy z zachowanym oryginałem nie są
+        pobierane ponownie. Zadania playlisty nie podlegają limitowi kolejki
+        (ogranicza je `playlist_limit`), ale pełna kolejka odrzuca całą playlistę.
+
+        Raises:
+            ValueError: Gdy adres nie jest adresem playlisty lub kanału albo nie zawiera filmów
+            RuntimeError: Gdy nie udało się odczytać metadanych playlisty
+            QueueFull: Gdy kolejka zadań jest pełna
+        """
+        with self._lock:
+            if len(self._active) >= self.workers + self.max_queue:
+                raise QueueFull(
+                    f"Kolejka zadań jest pełna ({len(self._active)} zadań). Spróbuj ponownie później."
+                )
+        videos = youtube.expand_playlist(url, extractor=self.extractor, limit=self.playlist_limit)
+        if not videos:
+            raise ValueError("Playlista nie zawiera dostępnych filmów.")
+        jobs = []
+        for video in videos:
+            key = f"youtube:{video['id']}:{self.backend}:{self.language}"
+            uid = youtube.cached_uid(video["id"], db_path=self.catalog_db)
+            jobs.append(self._submit(
+                key, video["url"], "youtube", summarize, uid=uid, bounded=False, captions_mode=captions_mode
+            ))
+        return jobs
+
+    def _submit(
+        self,
+        key: str,
+        source: str,
+        source_kind: str,
+        summarize: bool,
+        uid: Optional[str] = None,
+        bounded: bool = True,
+        captions_mode: Optional[str] = None,
+        start: float = 0.0,
+        end: Optional[float] = None,
+        clipped: bool = False,
+    ) -> Job:
+        with self._lock:
+            self.submitted += 1
+            active = self._active.get(key)
+            if active is not None:
+                # Identyczne zgłoszenie dołącza do zadania w toku
+                self.deduplicated += 1
+                active.summarize = active.summarize or summarize
+                return active
+            job = Job(
+                key, source, source_kind, summarize, uid=uid, captions=captions_mode or self.captions,
+                start=start, end=end, clipped=clipped,
+            )
+            if job.uid is not None and self._is_cached(job.uid, summarize):
+                self.cache_hits += 1
+                self._remember(job)
+                job.cached = True
+                self._load_cached(job)
+                job.finish()
+                return job
+            if bounded and len(self._active) >= self.workers + self.max_queue:
+                raise QueueFull(
+                    f"Kolejka zadań jest pełna ({len(self._active)} zadań). Spróbuj ponownie później."
+                )
+            self._active[key] = job
+            self._remember(job)
+        job.emit("status", {"status": "queued"})
+        if source_kind == "youtube" and uid is None:
+            self._downloads.submit(self._fetch, job)
+        else:
+            self._executor.submit(self._run, job)
+        return job
+
+    def open_live(self, source: str = "", summarize: bool = False) -> Job:
+        """
+        Otwiera sesję transkrypcji na żywo; strumień audio przekazuje potem `run_live`.
+
+        Raises:
+            QueueFull: Gdy trwa już `live_sessions` sesji
+        """
+        with self._lock:
+            if len(self._live) >= self.live_sessions:
+                raise QueueFull(
+                    f"Trwa już {len(self._live)} sesji na żywo (API_LIVE_SESSIONS). Spróbuj ponownie później."
+                )
+            job = Job(
+                f"live:{uuid.uuid4().hex}", source or "na żywo", "live", summarize, max_events=LIVE_EVENT_HISTORY
+            )
+            self._live[job.key] = job
+            self._remember(job)
+        job.emit("status", {"status": "queued"})
+        return job
+
+    def run_live(self, job: Job, blocks: Iterable[bytes]) -> None:
+        """
+        Transkrybuje strumień sesji na żywo w wątku wywołującego aż do końca `blocks`.
+
+        Każdy segment to zdarzenie `chunk` z czasem `start`-`end` od początku
+        strumienia i opóźnieniem `latency`; po końcu strumienia transkrypcja
+        jest zapisywana jak transkrypcja pliku (UID z treści). Błąd kończy
+        zadanie statusem `failed`.
+        """
+        job.set_status("running")
+        # Sesja jest udana tylko wtedy, gdy blok `try` dobiegnie końca
+        error = "Sesja przerwana nieoczekiwanym błędem"
+        rolling = None
+        try:
+            with metrics.job(job.key), ScratchSpace(job.id, tmpfs=False) as scratch_space:
+                backend = transcription.create_backend(
+                    self.backend, openai_client=self.openai_client, openai_model=self.whisper_model
+                )
+                if job.summarize:
+                    rolling = pipeline.RollingSummarizer(
+                        self.openai_client, model=self.chat_model, max_tokens=self.max_tokens
+                    )
+
+                def on_segment(segment: live.Segment, text: str, latency: float) -> None:
+                    job.chunks_done += 1
+                    job.chunks_total = segment.index + 1
+                    job.emit("chunk", {
+                        "index": segment.index,
+                        "total": job.chunks_total,
+                        "text": text,
+                        "start": round(segment.start, 2),
+                        "end": round(segment.end, 2),
+                        "latency": round(latency, 2),
+                    })
+                    if rolling is not None and text:
+                        rolling.add(text)
+
+                session = live.LiveSession(
+                    backend,
+                    scratch_space.new_file(".txt", prefix="live_"),
+                    language=self.language,
+                    on_segment=on_segment,
+                    job_id=job.key,
+                )
+                live.transcribe_stream(session, blocks)
+                if not session.transcript_path.stat().st_size:
+                    raise RuntimeError("W strumieniu nie wykryto mowy")
+                job.uid = session.store(
+                    job.source,
+                    base_dir=self.base_dir,
+                    catalog_db=self.catalog_db,
+                    index_db=self.index_db,
+                    content_hash=self.content_hash,
+                    encoding=get_safe_encoding(),
+                )
+            metrics.link_job(job.key, job.uid)
+            with metrics.job(job.uid):
+                self._load_cached_transcript(job)
+                if job.summarize:
+                    self._summarize(job, rolling)
+            error = ""
+        except (RuntimeError, ValueError, OSError, sqlite3.Error, transcription.TranscriptionError) as exc:
+            logger.error("Błąd sesji na żywo %s: %s", job.id, exc)
+            error = str(exc) or exc.__class__.__name__
+        except Exception:
+            logger.exception("Nieoczekiwany błąd sesji na żywo %s", job.id)
+        finally:
+            if rolling is not None:
+                rolling.cancel()
+            with self._lock:
+                self._live.pop(job.key, None)
+            job.finish(error)
+
+    def _remember(self, job: Job) -> None:
+        """Zapisuje zadanie do odczytu statusu i usuwa najstarsze zakończone ponad `max_history`."""
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.max_history:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if not oldest.finished:
+                break
+            del self._jobs[oldest_id]
+
+    def _is_cached(self, uid: str, summarize: bool) -> bool:
+        if catalog.lookup(uid, "transcript", db_path=self.catalog_db) is None:
+            return False
+        return not summarize or catalog.lookup(uid, "summary", db_path=self.catalog_db) is not None
+
+    def _load_cached(self, job: Job) -> None:
+        transcript_path, summary_path = storage.artefact_paths(job.uid, self.base_dir)
+        job.transcript = storage.read_artefact(transcript_path, encoding=get_safe_encoding())
+        if job.summarize:
+            job.topic, job.summary = storage.read_summary(summary_path, encoding=get_safe_encoding())
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def artefacts(self, uid: str) -> Optional[Tuple[Path, Optional[Path]]]:
+        """Ścieżki zapisanej transkrypcji i podsumowania (None, jeśli go nie ma) albo None."""
+        transcript = catalog.lookup(uid, "transcript", db_path=self.catalog_db)
+        if transcript is None:
+            return None
+        summary = catalog.lookup(uid, "summary", db_path=self.catalog_db)
+        return Path(transcript["path"]), Path(summary["path"]) if summary is not None else None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            statuses = collections.Counter(job.status for job in self._active.values())
+            return {
+                "workers": self.workers,
+                "download_workers": self.download_workers,
+                "max_queue": self.max_queue,
+                "downloading": statuses.get("downloading", 0),
+                "queued": statuses.get("queued", 0),
+                "running": statuses.get("running", 0),
+                "live": len(self._live),
+                "jobs": len(self._jobs),
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "cache_hits": self.cache_hits,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._downloads.shutdown(wait=wait, cancel_futures=True)
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    # --- Wykonanie zadania ---
+
+    def _run(self, job: Job) -> None:
+        job.set_status("running")
+        # Zadanie jest udane tylko wtedy, gdy blok `try` dobiegnie końca
+        error = "Zadanie przerwane nieoczekiwanym błędem"
+        rolling = None
+        try:
+            with metrics.job(job.uid):
+                if catalog.lookup(job.uid, "transcript", db_path=self.catalog_db) is None:
+                    if job.summarize and catalog.lookup(job.uid, "summary", db_path=self.catalog_db) is None:
+                        # Podsumowanie części tekstu już w trakcie transkrypcji
+                        rolling = pipeline.RollingSummarizer(
+                            self.openai_client, model=self.chat_model, max_tokens=self.max_tokens
+                        )
+                    self._transcribe(job, rolling)
+                else:
+                    # Transkrypcja z napisów powstała w tym zadaniu
+                    job.cached = job.caption_track is None
+                    self._load_cached_transcript(job)
+                if job.summarize:
+                    self._summarize(job, rolling)
+            error = ""
+        except (RuntimeError, ValueError, OSError, sqlite3.Error, transcription.TranscriptionError) as exc:
+            logger.error("Błąd zadania %s (%s): %s", job.id, job.source, exc)
+            error = str(exc) or exc.__class__.__name__
+        except Exception:
+            logger.exception("Nieoczekiwany błąd zadania %s (%s)", job.id, job.source)
+        finally:
+            if rolling is not None:
+                rolling.cancel()
+            self._finish(job, error)
+
+    def _finish(self, job: Job, error: str) -> None:
+        # Zadanie znika z aktywnych dopiero po rejestracji wyników w katalogu,
+        # więc kolejne identyczne zgłoszenie trafi na gotowy wynik
+        with self._lock:
+            self._active.pop(job.key, None)
+        job.finish(error)
+
+    def _fetch(self, job: Job) -> None:
+        """Pobiera film (pula pobierania) i przekazuje zadanie do kolejki transkrypcji."""
+        job.set_status("downloading")
+        try:
+            if job.captions == "off" or not self._transcribe_captions(job):
+                self._download(job)
+        except (RuntimeError, ValueError, OSError, sqlite3.Error) as exc:
+            logger.error("Błąd pobierania %s (%s): %s", job.id, job.source, exc)
+            self._finish(job, str(exc) or exc.__class__.__name__)
+            return
+        except Exception:
+            logger.exception("Nieoczekiwany błąd pobierania %s (%s)", job.id, job.source)
+            self._finish(job, "Pobieranie przerwane nieoczekiwanym błędem")
+            return
+        job.set_status("queued")
+        try:
+            self._executor.submit(self._run, job)
+        except RuntimeError as exc:
+            # Pula transkrypcji jest już zamknięta (zatrzymanie serwera)
+            self._finish(job, str(exc))
+
+    def _load_cached_transcript(self, job: Job) -> None:
+        transcript_path, _ = storage.artefact_paths(job.uid, self.base_dir)
+        job.transcript = storage.read_artefact(transcript_path, encoding=get_safe_encoding())
+
+    def _download(self, job: Job) -> None:
+        video_id = youtube.extract_youtube_id(job.source)
+        video_key = youtube.source_key(video_id, job.start, job.end)
+        with metrics.stage("download", job_id=video_key) as download_stage:
+            if job.ranged:
+                file_data, file_ext = self.downloader(job.source, job.start, job.end)
+            else:
+                file_data, file_ext = self.downloader(job.source)
+            download_stage.bytes_out = len(file_data)
+        uid = storage.prepare_source(
+            file_data,
+            file_ext,
+            base_dir=self.base_dir,
+            catalog_db=self.catalog_db,
+            content_hash=self.content_hash,
+            quick=self.quick,
+        )[0]
+        # Pobrany plik zawiera tylko zakres filmu
+        job.set_source(uid, clipped=True)
+        youtube.remember_video(video_id, job.uid, db_path=self.catalog_db, start=job.start, end=job.end)
+        metrics.link_job(video_key, job.uid)
+
+    def _transcribe_captions(self, job: Job) -> bool:
+        """Transkrypcja z napisów filmu (bez pobierania audio); False, gdy film nie ma odpowiednich napisów."""
+        try:
+            result = captions.caption_transcript(
+                job.source,
+                self.language,
+                allow_auto=job.captions == "auto",
+                chunk_ms=self.chunk_ms,
+                extractor=self.extractor,
+                start=job.start,
+                end=job.end,
+            )
+        except RuntimeError as exc:
+            logger.warning("Napisy %s niedostępne, transkrypcja audio: %s", job.source, exc)
+            return False
+        if result is None:
+            return False
+        transcript, job.caption_track = result
+        job.uid = captions.store_transcript(
+            youtube.extract_youtube_id(job.source),
+            transcript,
+            job.caption_track,
+            source=job.source,
+            language=self.language,
+            base_dir=self.base_dir,
+            catalog_db=self.catalog_db,
+            index_db=self.index_db,
+            content_hash=self.content_hash,
+            encoding=get_safe_encoding(),
+            start=job.start,
+            end=job.end,
+        )
+        return True
+
+    def _transcribe(self, job: Job, rolling: Optional[pipeline.RollingSummarizer] = None) -> None:
+        # Oryginał jest oznaczony jako używany, żeby retencja go nie usunęła
+        known_original = catalog.acquire(job.source_uid, "original", db_path=self.catalog_db)
+        if known_original is None:
+            raise RuntimeError("Oryginał pliku został usunięty z uploads/ - prześlij plik ponownie")
+        orig_path = Path(known_original["path"])
+        transcript_path, _ = storage.artefact_paths(job.uid, self.base_dir)
+        try:
+            backend = transcription.create_backend(
+                self.backend, openai_client=self.openai_client, openai_model=self.whisper_model
+            )
+            # Zakres wycinany z oryginału; oryginał pobrany tylko dla zakresu zaczyna się w sekundzie `start`
+            start, end = (0.0, None) if job.clipped else (job.start, job.end)
+            offset = job.start if job.clipped else 0.0
+            file_duration = get_duration(orig_path)
+            audio_duration = file_duration
+            if start or end is not None:
+                start, end = clip_range(file_duration, start, end)
+                audio_duration = end - start
+            scratch_bytes = 0 if use_streaming(orig_path) else orig_path.stat().st_size
+            with ScratchSpace(job.uid, expected_bytes=scratch_bytes) as scratch_space:
+                speech_path, speech_map = orig_path, None
+                if vad.enabled():
+                    if start or end is not None:
+                        speech_path = cut_range(orig_path, start, end, scratch_space)
+                        offset, start, end, file_duration = offset + start, 0.0, None, audio_duration
+                    speech_path, speech_map = vad.trim_silence(
+                        speech_path, scratch_space, duration=audio_duration
+                    )
+                    if speech_map is not None:
+                        job.removed_seconds = speech_map.removed_seconds
+                        file_duration = speech_map.speech_seconds
+                audio_chunks = chunk_source(
+                    speech_path, self.chunk_ms, scratch=scratch_space, start=start, end=end
+                )
+                job.chunks_total = len(audio_chunks)
+                # Czas fragmentów w oryginalnym nagraniu (zdarzenia SSE `chunk`)
+                to_original = speech_map.to_original if speech_map is not None else float
+                job.spans = [
+                    (offset + to_original(span_start), offset + to_original(span_start + length))
+                    for span_start, length in plan_segments(file_duration, self.chunk_ms, start, end)
+                ]
+                def on_text(index: int, total: int, text: str) -> None:
+                    job.chunk_done(index, total, text)
+                    if rolling is not None:
+                        rolling.add(text)
+
+                job.transcript = pipeline.transcribe_chunks(
+                    audio_chunks, backend, language=self.language, on_text=on_text
+                )
+            with metrics.stage("write") as write_stage:
+                stored_path, write_stage.bytes_out = storage.write_artefact(
+                    transcript_path, job.transcript, encoding=get_safe_encoding()
+                )
+            catalog.register(
+                job.uid, "transcript", stored_path, write_stage.bytes_out, db_path=self.catalog_db
+            )
+        finally:
+            catalog.release(job.source_uid, "original", db_path=self.catalog_db)
+        try:
+            transcript_index.index_transcript(
+                job.uid,
+                job.transcript,
+                source=job.source,
+                source_kind=job.source_kind,
+                duration=audio_duration,
+                language=self.language,
+                model=backend.model_label,
+                db_path=self.index_db,
+            )
+        except sqlite3.Error as exc:
+            logger.warning("Nie udało się zaindeksować transkrypcji %s: %s", job.uid, exc)
+
+    def _summarize(self, job: Job, rolling: Optional[pipeline.RollingSummarizer] = None) -> None:
+        _, summary_path = storage.artefact_paths(job.uid, self.base_dir)
+        if catalog.lookup(job.uid, "summary", db_path=self.catalog_db) is not None:
+            job.topic, job.summary = storage.read_summary(summary_path, encoding=get_safe_encoding())
+            return
+        if rolling is not None:
+            topic, summary = rolling.finish()
+        else:
+            topic, summary = pipeline.summarize(
+                job.transcript, self.openai_client, model=self.chat_model, max_tokens=self.max_tokens
+            )
+        if topic.startswith(("Błąd", "Brak środków", "Nie udało się")):
+            # Transkrypcja jest poprawna - zadanie kończy się sukcesem z opisem błędu podsumowania
+            job.summary_error = f"{topic}: {summary}"
+            return
+        with metrics.stage("write") as write_stage:
+            stored_path, write_stage.bytes_out = storage.write_artefact(
+                summary_path, f"{topic}\n{summary}", encoding=get_safe_encoding()
+            )
+        catalog.register(job.uid, "summary", stored_path, write_stage.bytes_out, db_path=self.catalog_db)
+        try:
+            transcript_index.index_summary(job.uid, topic, summary, db_path=self.index_db)
+        except sqlite3.Error as exc:
+            logger.warning("Nie udało się zaindeksować podsumowania %s: %s", job.uid, exc)
+        job.topic, job.summary = topic, summary
+
+
+class ApiServer:
+    """
+    Serwer HTTP API uruchamiany w wątku w tle (lub w pierwszym planie przez `main`).
+
+    Args:
+        manager (JobManager): Kolejka zadań
+        host (str): Adres nasłuchu
+        port (int): Port (0 = dowolny wolny port)
+        max_upload (int): Limit rozmiaru przesyłanego pliku w bajtach (0 = bez limitu)
+    """
+
+    def __init__(self, manager: JobManager, host: str = "127.0.0.1", port: int = 0, max_upload: int = 0):
+        self.manager = manager
+        self.max_upload = max_upload
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "ApiServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="audio2tekst-api-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "ApiServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _handler_class(self):
+        server = self
+        manager = self.manager
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send_json(self, status: int, payload: Dict, headers: Optional[Dict] = None) -> None:
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_error(self, status: int, message: str, headers: Optional[Dict] = None) -> None:
+                self._send_json(status, {"error": message}, headers)
+
+            def _skip_body(self) -> None:
+                """Zamyka połączenie po odpowiedzi - nieprzeczytana treść żądania nie trafi do kolejnego."""
+                self.close_connection = True
+
+            def _send_job(self, job: Job) -> None:
+                status = 200 if job.finished else 202
+                self._send_json(status, job.to_dict(), {"Location": f"/jobs/{job.id}"})
+
+            def do_GET(self):  # noqa: N802 - nazwa wymagana przez BaseHTTPRequestHandler
+                url = urlsplit(self.path)
+                path, query = url.path.rstrip("/"), url.query
+                parts = path.split("/")[1:]
+                if path == "/health":
+                    self._send_json(200, {"status": "ok", "jobs": manager.stats()})
+                elif len(parts) in (2, 3) and parts[0] == "jobs":
+                    job = manager.get(parts[1])
+                    if job is None:
+                        self._send_error(404, f"Nieznane zadanie: {parts[1]}")
+                    elif len(parts) == 2:
+                        self._send_json(200, job.to_dict())
+                    elif parts[2] == "events":
+                        self._stream_events(job)
+                    else:
+                        self._send_error(404, f"Nieznany endpoint: {path}")
+                elif len(parts) in (2, 3) and parts[0] == "transcripts":
+                    self._send_transcript(parts[1], parts[2] if len(parts) == 3 else "", parse_qs(query))
+                else:
+                    self._send_error(404, f"Nieznany endpoint: {path}")
+
+            def _send_transcript(self, uid: str, action: str, query: Dict[str, List[str]]) -> None:
+                artefacts = manager.artefacts(uid)
+                if artefacts is None:
+                    self._send_error(404, f"Brak zapisanej transkrypcji: {uid}")
+                    return
+                transcript_path, summary_path = artefacts
+                if action == "":
+                    pages = transcript_view.TranscriptPages(transcript_path)
+                    page = (query.get("page") or ["1"])[0]
+                    if not page.isdigit() or not 1 <= int(page) <= len(pages):
+                        self._send_error(400, f"Nieprawidłowy numer strony: {page} (stron: {len(pages)})")
+                        return
+                    self._send_json(200, {
+                        "uid": uid,
+                        "page": int(page),
+                        "pages": len(pages),
+                        "bytes": pages.size,
+                        "text": pages.page(int(page) - 1),
+                    })
+                elif action == "download":
+                    export_format = (query.get("format") or ["txt"])[0].lower()
+                    if export_format not in transcript_view.FORMATS:
+                        self._send_error(400, f"Nieobsługiwany format: {export_format}")
+                        return
+                    if export_format == "txt":
+                        reader = storage.open_artefact(transcript_path)
+                        self._send_stream(
+                            reader.iter_blocks(), f"transkrypcja_{uid}.txt",
+                            transcript_view.FORMATS["txt"], length=reader.size,
+                        )
+                    elif export_format == "json":
+                        summary = (
+                            storage.read_summary(summary_path, encoding=get_safe_encoding())
+                            if summary_path is not None else None
+                        )
+                        self._send_stream(
+                            transcript_view.iter_json(uid, transcript_path, summary),
+                            f"transkrypcja_{uid}.json", transcript_view.FORMATS["json"],
+                        )
+                    else:
+                        self._send_stream(
+                            transcript_view.iter_zip(transcript_view.bundle_members(uid, transcript_path, summary_path)),
+                            f"transkrypcja_{uid}.zip", transcript_view.FORMATS["zip"],
+                        )
+                else:
+                    self._send_error(404, f"Nieznany endpoint: /transcripts/{uid}/{action}")
+
+            def _send_stream(
+                self, blocks: Iterable[bytes], filename: str, content_type: str, length: Optional[int] = None
+            ) -> None:
+                """Wysyła plik blokami z dysku: ze znaną długością albo w kodowaniu chunked."""
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
+                if length is not None:
+                    self.send_header("Content-Length", str(length))
+                else:
+                    self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for block in blocks:
+                        if length is not None:
+                            self.wfile.write(block)
+                        else:
+                            self.wfile.write(f"{len(block):X}\r\n".encode("ascii") + block + b"\r\n")
+                    if length is None:
+                        self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    logger.debug("Klient przerwał pobieranie %s", filename)
+                    self.close_connection = True
+
+            def do_POST(self):  # noqa: N802 - nazwa wymagana przez BaseHTTPRequestHandler
+                url = urlsplit(self.path)
+                if url.path.rstrip("/") == "/live":
+                    self._open_live()
+                    return
+                if url.path.rstrip("/") != "/jobs":
+                    self._skip_body()
+                    self._send_error(404, f"Nieznany endpoint: {url.path}")
+                    return
+                query = parse_qs(url.query)
+                content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+                try:
+                    if content_type == "application/json":
+                        job = self._submit_youtube()
+                    else:
+                        job = self._submit_upload(query)
+                except QueueFull as exc:
+                    self._send_error(503, str(exc), {"Retry-After": "5"})
+                    return
+                except ValueError as exc:
+                    self._send_error(400, str(exc))
+                    return
+                except RuntimeError as exc:
+                    self._send_error(422, f"Nie udało się przyjąć pliku: {exc}")
+                    return
+                except (OSError, sqlite3.Error) as exc:
+                    logger.error("Błąd przyjęcia zgłoszenia: %s", exc)
+                    self._send_error(500, f"Błąd serwera podczas przyjmowania zadania: {exc}")
+                    return
+                if isinstance(job, list):
+                    self._send_json(202, {"jobs": [member.to_dict(include_text=False) for member in job]})
+                elif job is not None:
+                    self._send_job(job)
+
+            def _submit_youtube(self) -> Union[Job, List[Job]]:
+                length = int(self.headers.get("Content-Length", "0"))
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    raise ValueError("Treść żądania nie jest poprawnym JSON") from None
+                if not isinstance(request, dict) or not request.get("youtube_url"):
+                    raise ValueError("Brak pola 'youtube_url' w żądaniu")
+                url = str(request["youtube_url"])
+                captions_mode = request.get("captions")
+                if isinstance(captions_mode, bool):
+                    captions_mode = "auto" if captions_mode else "off"
+                if captions_mode is not None and captions_mode not in captions.MODES:
+                    raise ValueError(f"Nieznany tryb napisów: {captions_mode} (dostępne: {', '.join(captions.MODES)})")
+                start, end = parse_range(request.get("start"), request.get("end"))
+                if youtube.is_playlist_url(url):
+                    if start or end is not None:
+                        raise ValueError("Zakres nagrania nie jest obsługiwany dla playlist i kanałów")
+                    return manager.submit_playlist(url, bool(request.get("summarize")), captions_mode)
+                return manager.submit_youtube(url, bool(request.get("summarize")), captions_mode, start, end)
+
+            def _submit_upload(self, query: Dict[str, List[str]]) -> Optional[Job]:
+                filename = (query.get("filename") or [self.headers.get("X-Filename", "")])[0]
+                summarize = (query.get("summarize") or ["0"])[0].lower() in TRUE_VALUES
+                file_ext = Path(filename).suffix.lower()
+                length = self.headers.get("Content-Length")
+                if length is None:
+                    self._skip_body()
+                    self._send_error(411, "Wymagany nagłówek Content-Length")
+                    return None
+                length = int(length)
+                if file_ext not in storage.ALLOWED_EXT:
+                    self._skip_body()
+                    self._send_error(
+                        415, f"Nieobsługiwany format pliku: '{file_ext}'. Podaj nazwę pliku (?filename=)."
+                    )
+                    return None
+                if server.max_upload and length > server.max_upload:
+                    self._skip_body()
+                    self._send_error(
+                        413, f"Plik jest za duży. Maksymalny rozmiar: {server.max_upload/1024/1024:.0f} MB."
+                    )
+                    return None
+                if length == 0:
+                    raise ValueError("Pusta treść żądania - brak pliku")
+                try:
+                    start, end = parse_range((query.get("start") or [None])[0], (query.get("end") or [None])[0])
+                except ValueError:
+                    self._skip_body()
+                    raise
+                # Treść trafia strumieniowo do pliku tymczasowego obok uploads/originals,
+                # skąd po przyjęciu jest przenoszona bez kopiowania
+                fd, part_name = tempfile.mkstemp(
+                    prefix=".upload.", suffix=file_ext, dir=manager.base_dir / "originals"
+                )
+                part_path = Path(part_name)
+                try:
+                    with os.fdopen(fd, "wb") as part_file:
+                        remaining = length
+                        while remaining:
+                            block = self.rfile.read(min(remaining, hashing.BLOCK_SIZE))
+                            if not block:
+                                raise ValueError("Połączenie przerwane w trakcie przesyłania pliku")
+                            part_file.write(block)
+                            remaining -= len(block)
+                    return manager.submit_file(part_path, filename, summarize, move=True, start=start, end=end)
+                finally:
+                    part_path.unlink(missing_ok=True)
+
+            def _open_live(self) -> None:
+                length = int(self.headers.get("Content-Length", "0"))
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._send_error(400, "Treść żądania nie jest poprawnym JSON")
+                    return
+                if not isinstance(request, dict):
+                    self._send_error(400, "Treść żądania musi być obiektem JSON")
+                    return
+                try:
+                    job = manager.open_live(str(request.get("source") or ""), bool(request.get("summarize")))
+                except QueueFull as exc:
+                    self._send_error(503, str(exc), {"Retry-After": "5"})
+                    return
+                self._send_json(201, job.to_dict(), {"Location": f"/jobs/{job.id}"})
+
+            def do_PUT(self):  # noqa: N802 - nazwa wymagana przez BaseHTTPRequestHandler
+                parts = urlsplit(self.path).path.rstrip("/").split("/")[1:]
+                if len(parts) != 2 or parts[0] != "live":
+                    self._skip_body()
+                    self._send_error(404, f"Nieznany endpoint: {self.path}")
+                    return
+                job = manager.get(parts[1])
+                if job is None or job.source_kind != "live":
+                    self._skip_body()
+                    self._send_error(404, f"Nieznana sesja na żywo: {parts[1]}")
+                    return
+                if job.status != "queued":
+                    self._skip_body()
+                    self._send_error(409, f"Sesja {job.id} otrzymała już strumień audio (status: {job.status})")
+                    return
+                chunked = self.headers.get("Transfer-Encoding", "").lower() == "chunked"
+                if not chunked and self.headers.get("Content-Length") is None:
+                    self._skip_body()
+                    self._send_error(411, "Wymagany nagłówek Content-Length lub Transfer-Encoding: chunked")
+                    return
+                blocks = self._iter_chunked() if chunked else self._iter_body(int(self.headers["Content-Length"]))
+                manager.run_live(job, blocks)
+                if job.status == "failed":
+                    # Nieprzeczytana reszta strumienia nie może trafić do kolejnego żądania
+                    self._skip_body()
+                try:
+                    self._send_json(
+                        200 if job.status == "done" else 422, job.to_dict(), {"Location": f"/jobs/{job.id}"}
+                    )
+                except (BrokenPipeError, ConnectionResetError):
+                    logger.debug("Klient sesji na żywo %s rozłączył się przed odpowiedzią", job.id)
+
+            def _iter_body(self, length: int) -> Iterator[bytes]:
+                """
+                Treść żądania blokami w miarę nadchodzenia (bez czekania na pełny blok).
+
+                Zerwane połączenie kończy strumień - sesja na żywo zapisuje to, co już odebrała.
+                """
+                remaining = length
+                while remaining:
+                    block = self.rfile.read1(min(remaining, LIVE_READ_BYTES))
+                    if not block:
+                        logger.info("Klient przerwał strumień sesji na żywo")
+                        self.close_connection = True
+                        return
+                    remaining -= len(block)
+                    yield block
+
+            def _iter_chunked(self) -> Iterator[bytes]:
+                """Treść żądania w kodowaniu chunked (np. `fetch` ze strumieniem albo `curl -T -`)."""
+                while True:
+                    size_line = self.rfile.readline(1024)
+                    if not size_line:
+                        logger.info("Klient przerwał strumień sesji na żywo")
+                        self.close_connection = True
+                        return
+                    try:
+                        size = int(size_line.split(b";")[0].strip(), 16)
+                    except ValueError:
+                        raise ValueError("Nieprawidłowe kodowanie chunked treści żądania") from None
+                    if size == 0:
+                        # Pomija nagłówki końcowe (trailer) aż do pustego wiersza
+                        while self.rfile.readline(1024) not in (b"\r\n", b"\n", b""):
+                            pass
+                        return
+                    yield from self._iter_body(size)
+                    self.rfile.readline(1024)
+
+            def _stream_events(self, job: Job) -> None:
+                """Wysyła zdarzenia zadania jako Server-Sent Events aż do jego zakończenia."""
+                last_id = self.headers.get("Last-Event-ID", "")
+                sent = int(last_id) if last_id.isdigit() else -1
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                try:
+                    while True:
+                        events = job.wait_events(sent, SSE_KEEPALIVE)
+                        if not events:
+                            if job.finished:
+                                return
+                            self.wfile.write(b": keep-alive\n\n")
+                        for event in events:
+                            data = json.dumps(event["data"], ensure_ascii=False)
+                            self.wfile.write(
+                                f"id: {event['id']}\nevent: {event['event']}\ndata: {data}\n\n".encode("utf-8")
+                            )
+                            sent = event["id"]
+                            if event["event"] in ("done", "error"):
+                                self.wfile.flush()
+                                return
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    logger.debug("Klient SSE zadania %s rozłączył się", job.id)
+
+            def log_message(self, format, *args):  # noqa: A002 - sygnatura klasy bazowej
+                logger.debug("api: " + format, *args)
+
+        return Handler
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Uruchamia serwer API z konfiguracją z `.env` i wiersza poleceń."""
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Serwer HTTP API Audio2Tekst")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8502")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("API_WORKERS", "2")))
+    parser.add_argument("--max-queue", type=int, default=int(os.getenv("API_MAX_QUEUE", "16")))
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, encoding="utf-8")
+
+    try:
+        client = openai.OpenAI(
+            http_client=openai.DefaultHttpxClient(event_hooks={"request": [metrics.http_request_hook]}),
+        )
+    except openai.OpenAIError as exc:
+        # Bez klucza działa tylko lokalny silnik transkrypcji (bez podsumowań)
+        logger.warning("Klient OpenAI niedostępny: %s", exc)
+        client = None
+    if os.getenv("METRICS_JSONL"):
+        metrics.configure(jsonl_path=Path(os.environ["METRICS_JSONL"]))
+    manager = JobManager(
+        openai_client=client,
+        workers=args.workers,
+        max_queue=args.max_queue,
+        backend=os.getenv("TRANSCRIPTION_BACKEND", "openai"),
+        whisper_model=os.getenv("WHISPER_MODEL", "whisper-1"),
+        language=os.getenv("DEFAULT_LANGUAGE", "pl"),
+        chat_model=os.getenv("CHAT_MODEL", "gpt-3.5-turbo"),
+        max_tokens=int(os.getenv("MAX_SUMMARY_TOKENS", "300")),
+        content_hash=os.getenv("CONTENT_HASH", ""),
+        quick=os.getenv("CONTENT_ID_QUICK", "false").lower() == "true",
+        download_workers=int(os.getenv("YOUTUBE_DOWNLOAD_WORKERS", str(youtube.DEFAULT_DOWNLOAD_WORKERS))),
+        playlist_limit=int(os.getenv("YOUTUBE_PLAYLIST_LIMIT", str(youtube.DEFAULT_PLAYLIST_LIMIT))),
+        captions=captions.mode(),
+        live_sessions=int(os.getenv("API_LIVE_SESSIONS", "2")),
+    )
+    try:
+        catalog.sync_with_disk(manager.base_dir, db_path=manager.catalog_db)
+    except sqlite3.Error as exc:
+        logger.warning("Nie udało się uzgodnić katalogu artefaktów: %s", exc)
+    sweep_orphans()
+    retention_manager = retention.RetentionManager(db_path=manager.catalog_db).start()
+    server = ApiServer(
+        manager,
+        host=args.host,
+        port=args.port,
+        max_upload=int(os.getenv("MAX_FILE_SIZE", "2048")) * 1024 * 1024,
+    )
+    logger.info("Serwer API Audio2Tekst: %s (Ctrl+C kończy)", server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+        retention_manager.stop()
+        manager.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
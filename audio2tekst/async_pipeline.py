@@ -0,0 +1,409 @@
+"""
+Asynchroniczny potok (asyncio): analiza, podział, transkrypcja i podsumowanie.
+
+Odpowiednik `audio2tekst.media` i `audio2tekst.pipeline` dla usług opartych na
+pętli zdarzeń (np. brama FastAPI): FFmpeg/FFprobe są uruchamiane przez
+`asyncio.create_subprocess_exec`, a zapytania do OpenAI wysyła `openai.AsyncOpenAI`,
+więc jedna pętla obsługuje setki równoczesnych zadań bez wątku na zadanie.
+
+Semafory obiektu `AsyncPipeline` ograniczają równoległość każdego etapu
+wspólnie dla wszystkich zadań, które go używają. Obiekt należy tworzyć
+i używać w jednej pętli zdarzeń.
+
+Przykład:
+    pipeline = AsyncPipeline(openai.AsyncOpenAI(), transcribe_limit=16)
+    result = await pipeline.run(Path("nagranie.mp3"), job_id="uid")
+
+Pomiar ponowień żądań: `openai.AsyncOpenAI(http_client=openai.DefaultAsyncHttpxClient(
+event_hooks={"request": [metrics.async_http_request_hook]}))`.
+"""
+
+import asyncio
+import logging
+import os
+import subprocess  # nosec B404 # Bezpieczne wywoływanie FFmpeg
+import tempfile
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+import openai
+
+from audio2tekst import metrics, transcription
+from audio2tekst.media import CHUNK_MS, duration_command, plan_segments, segment_command
+from audio2tekst.pipeline import (
+    SUMMARY_CHUNK_CHARS,
+    clean_transcript,
+    completion_size,
+    is_quota_error,
+    log_summary_error,
+    map_prompt,
+    parse_summary,
+    reduce_prompt,
+    single_prompt,
+)
+from audio2tekst.scratch import ScratchSpace
+from audio2tekst.system import check_dependencies
+
+logger = logging.getLogger(__name__)
+
+PROBE_TIMEOUT = 30
+SEGMENT_TIMEOUT = 300
+
+
+class _EmptyCompletionError(RuntimeError):
+    """Model nie zwrócił treści odpowiedzi."""
+
+
+class AsyncPipeline:
+    """
+    Asynchroniczne etapy potoku z limitem równoległości każdego etapu.
+
+    Args:
+        openai_client (openai.AsyncOpenAI, optional): Klient do transkrypcji
+            i podsumowań (wymagany, gdy nie podano `backend`, i do podsumowań)
+        whisper_model (str): Model transkrypcji Whisper API
+        chat_model (str): Model podsumowań
+        max_tokens (int): Limit tokenów odpowiedzi podsumowania
+        ffmpeg_limit (int, optional): Równoczesne procesy FFmpeg/FFprobe
+            (domyślnie `FFMPEG_MAX_PROCESSES` lub liczba rdzeni CPU)
+        transcribe_limit (int): Równoczesne transkrypcje fragmentów
+        summarize_limit (int): Równoczesne zapytania podsumowania
+        backend (TranscriptionBackend, optional): Synchroniczny silnik
+            transkrypcji (np. lokalny Whisper) wykonywany w wątkach zamiast
+            `openai_client`
+    """
+
+    def __init__(
+        self,
+        openai_client=None,
+        whisper_model: str = "whisper-1",
+        chat_model: str = "gpt-3.5-turbo",
+        max_tokens: int = 300,
+        ffmpeg_limit: Optional[int] = None,
+        transcribe_limit: int = 8,
+        summarize_limit: int = 4,
+        backend: Optional[transcription.TranscriptionBackend] = None,
+    ):
+        self.client = openai_client
+        self.whisper_model = whisper_model
+        self.chat_model = chat_model
+        self.max_tokens = max_tokens
+        self.backend = backend
+        ffmpeg_limit = ffmpeg_limit or int(os.getenv("FFMPEG_MAX_PROCESSES", "0")) or os.cpu_count() or 1
+        self.limits = {"ffmpeg": ffmpeg_limit, "transcribe": transcribe_limit, "summarize": summarize_limit}
+        self._semaphores = {name: asyncio.Semaphore(limit) for name, limit in self.limits.items()}
+        self._active = dict.fromkeys(self.limits, 0)
+        self._waiting = dict.fromkeys(self.limits, 0)
+        self._peak = dict.fromkeys(self.limits, 0)
+
+    @asynccontextmanager
+    async def _slot(self, name: str) -> AsyncIterator[None]:
+        self._waiting[name] += 1
+        try:
+            await self._semaphores[name].acquire()
+        finally:
+            self._waiting[name] -= 1
+        self._active[name] += 1
+        self._peak[name] = max(self._peak[name], self._active[name])
+        try:
+            yield
+        finally:
+            self._active[name] -= 1
+            self._semaphores[name].release()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Zwraca limit, liczbę aktywnych i oczekujących operacji oraz szczyt dla każdego etapu."""
+        return {
+            name: {
+                "limit": limit,
+                "active": self._active[name],
+                "waiting": self._waiting[name],
+                "peak_active": self._peak[name],
+            }
+            for name, limit in self.limits.items()
+        }
+
+    async def _exec(self, cmd: Sequence[str], timeout: float) -> bytes:
+        """Uruchamia proces w limicie FFmpeg; przy anulowaniu lub przekroczeniu czasu zabija go."""
+        async with self._slot("ffmpeg"):
+            process = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+            except BaseException:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                raise
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, list(cmd), stdout, stderr)
+        return stdout
+
+    async def probe(self, file_path: Path) -> float:
+        """
+        Zwraca długość pliku audio/video w sekundach (ffprobe).
+
+        Raises:
+            RuntimeError: Gdy ffprobe nie jest dostępne lub wystąpi błąd podczas analizy
+        """
+        dependencies_info = check_dependencies()
+        if not dependencies_info["ffprobe"]["available"]:
+            raise RuntimeError("FFprobe nie jest dostępne w systemie. Zainstaluj FFmpeg.")
+        with metrics.stage("probe"):
+            try:
+                stdout = await self._exec(
+                    duration_command(dependencies_info["ffprobe"]["path"], file_path), PROBE_TIMEOUT
+                )
+                return float(stdout.decode("utf-8").strip())
+            except asyncio.TimeoutError as exc:
+                raise RuntimeError("Przekroczono czas oczekiwania na analizę pliku") from exc
+            except subprocess.CalledProcessError as exc:
+                raise RuntimeError(f"Błąd podczas analizy pliku: {exc}") from exc
+            except ValueError as exc:
+                raise RuntimeError(f"Nie można odczytać długości pliku: {exc}") from exc
+
+    async def split(
+        self,
+        file_path: Path,
+        chunk_ms: int = CHUNK_MS,
+        duration: Optional[float] = None,
+        scratch: Optional[ScratchSpace] = None,
+    ) -> List[Path]:
+        """
+        Dzieli plik na fragmenty (równolegle, w limicie procesów FFmpeg).
+
+        Długość pliku jest mierzona przez `probe()`, chyba że podano `duration`.
+        Fragmenty trafiają do przestrzeni roboczej `scratch` (jeśli podano),
+        a po podziale sprawdzany jest jej limit bajtów.
+
+        Przy błędzie lub anulowaniu usuwa wszystkie utworzone pliki fragmentów.
+
+        Raises:
+            RuntimeError: Gdy FFmpeg nie jest dostępny lub nie udało się wyciąć segmentu
+            ScratchQuotaExceeded: Gdy fragmenty przekroczyły limit przestrzeni roboczej
+        """
+        dependencies_info = check_dependencies()
+        if not dependencies_info["ffmpeg"]["available"]:
+            raise RuntimeError("FFmpeg nie jest dostępne w systemie. Zainstaluj FFmpeg.")
+        ffmpeg_path = dependencies_info["ffmpeg"]["path"]
+        if duration is None:
+            duration = await self.probe(file_path)
+        segments = plan_segments(duration, chunk_ms)
+        parts = []
+        for _segment in segments:
+            if scratch is not None:
+                parts.append(scratch.new_file(suffix=file_path.suffix))
+                continue
+            fd, tmp = tempfile.mkstemp(suffix=file_path.suffix, prefix="audio2tekst_")
+            os.close(fd)
+            parts.append(Path(tmp))
+
+        async def cut_segment(i: int, start: float, length: float) -> None:
+            try:
+                await self._exec(segment_command(ffmpeg_path, file_path, start, length, parts[i]), SEGMENT_TIMEOUT)
+            except asyncio.TimeoutError as exc:
+                raise RuntimeError(
+                    f"Przekroczono czas oczekiwania podczas dzielenia pliku (segment {i+1})"
+                ) from exc
+            except subprocess.CalledProcessError as exc:
+                logger.error("FFmpeg error: %s", exc.stderr)
+                raise RuntimeError(f"Błąd podczas dzielenia pliku (segment {i+1}): {exc}") from exc
+
+        with metrics.stage("split", bytes_in=file_path.stat().st_size) as split_stage:
+            try:
+                results = await asyncio.gather(
+                    *(cut_segment(i, start, length)
+                      for i, (start, length) in enumerate(segments)),
+                    return_exceptions=True,
+                )
+                errors = [result for result in results if isinstance(result, BaseException)]
+                if errors:
+                    raise errors[0]
+                if scratch is not None:
+                    scratch.check_quota()
+            except BaseException:
+                for part in parts:
+                    part.unlink(missing_ok=True)
+                raise
+            split_stage.bytes_out = sum(part.stat().st_size for part in parts)
+        return parts
+
+    async def _transcribe_file(self, audio_path: Path, language: str) -> str:
+        if self.backend is not None:
+            return await asyncio.to_thread(self.backend.transcribe, audio_path, language)
+        audio_bytes = await asyncio.to_thread(audio_path.read_bytes)
+        transcript_text = await self.client.audio.transcriptions.create(
+            model=self.whisper_model,
+            file=(audio_path.name, audio_bytes),
+            language=language,
+            response_format="text",
+        )
+        return str(transcript_text)
+
+    async def transcribe(
+        self,
+        audio_chunks: List[Path],
+        language: str = "pl",
+        on_chunk: Optional[Callable[[int, int, Path, int], None]] = None,
+    ) -> str:
+        """
+        Transkrybuje fragmenty równolegle (w limicie etapu) i usuwa ich pliki.
+
+        Zachowanie jak `pipeline.transcribe_chunks`: fragmenty puste są pomijane,
+        teksty łączone w kolejności fragmentów, a fragment za duży lub zakończony
+        błędem przerywa transkrypcję (pozostałe zadania są anulowane). Pliki są
+        usuwane także po anulowaniu zadania.
+
+        Args:
+            audio_chunks (list): Ścieżki fragmentów w kolejności odtwarzania
+            language (str): Język nagrania
+            on_chunk (callable, optional): Wywoływana przed transkrypcją fragmentu
+                z argumentami (numer od 0, liczba fragmentów, ścieżka, rozmiar w bajtach)
+
+        Returns:
+            str: Transkrypcje fragmentów rozdzielone znakiem nowej linii
+
+        Raises:
+            TranscriptionError: Gdy któryś fragment nie został przetranskrybowany
+        """
+        max_chunk_bytes = (
+            self.backend.max_chunk_bytes if self.backend is not None else transcription.OPENAI_MAX_CHUNK_BYTES
+        )
+
+        async def transcribe_one(audio_idx: int, audio_chunk_file: Path) -> Optional[str]:
+            try:
+                async with self._slot("transcribe"):
+                    chunk_size = audio_chunk_file.stat().st_size if audio_chunk_file.exists() else 0
+                    if on_chunk is not None:
+                        on_chunk(audio_idx, len(audio_chunks), audio_chunk_file, chunk_size)
+                    if chunk_size == 0:
+                        return None
+                    if max_chunk_bytes is not None and chunk_size > max_chunk_bytes:
+                        raise transcription.TranscriptionError(
+                            f"rozmiar {chunk_size / 1024 / 1024:.1f} MB przekracza limit silnika "
+                            f"transkrypcji ({max_chunk_bytes / 1024 / 1024:.0f} MB)"
+                        )
+                    with metrics.stage("transcribe", bytes_in=chunk_size) as transcribe_stage:
+                        transcript_text = await self._transcribe_file(audio_chunk_file, language)
+                        transcribe_stage.bytes_out = len(transcript_text.encode("utf-8"))
+                    return clean_transcript(transcript_text)
+            except (OSError, openai.OpenAIError, transcription.TranscriptionError) as exc:
+                logger.error("Błąd podczas transkrypcji fragmentu %s: %s", audio_chunk_file, exc)
+                raise transcription.TranscriptionError(
+                    f"Nie udało się przetranskrybować fragmentu {audio_idx + 1}/{len(audio_chunks)}: {exc}"
+                ) from exc
+            finally:
+                audio_chunk_file.unlink(missing_ok=True)
+
+        tasks = [asyncio.ensure_future(transcribe_one(idx, chunk)) for idx, chunk in enumerate(audio_chunks)]
+        try:
+            texts = await asyncio.gather(*tasks)
+        except BaseException:
+            # Pierwszy błąd przerywa całość - pozostałe fragmenty nie trafiają do API
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            # Zadania anulowane przed startem nie doszły do własnego `finally`
+            for chunk in audio_chunks:
+                chunk.unlink(missing_ok=True)
+        return "\n".join(text for text in texts if text is not None)
+
+    async def _complete(self, stage_name: str, prompt: str) -> str:
+        async with self._slot("summarize"):
+            with metrics.stage(stage_name, bytes_in=len(prompt.encode("utf-8"))) as summary_stage:
+                completion = await self.client.chat.completions.create(
+                    model=self.chat_model,
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=self.max_tokens,
+                )
+                summary_stage.bytes_out = completion_size(completion)
+        if completion and completion.choices and completion.choices[0].message:
+            return completion.choices[0].message.content or ""
+        raise _EmptyCompletionError("Brak odpowiedzi z modelu OpenAI")
+
+    @staticmethod
+    def _summary_error(topic: str, message: str, exc: Exception) -> Tuple[str, str]:
+        if is_quota_error(exc):
+            return "Brak środków na koncie OpenAI", str(exc)
+        log_summary_error(f"{message}: {exc}\n")
+        return topic, str(exc)
+
+    async def summarize(self, input_text: str) -> Tuple[str, str]:
+        """
+        Generuje temat i podsumowanie tekstu (map-reduce dla długich tekstów).
+
+        Części długiego tekstu są podsumowywane równolegle (w limicie etapu).
+
+        Returns:
+            tuple: (temat, podsumowanie); przy błędzie temat zaczyna się od
+                'Błąd', 'Brak środków' lub 'Nie udało się', a drugi element
+                zawiera opis błędu - jak `pipeline.summarize`
+        """
+        logger.info("Rozpoczynam summarize() - długość tekstu: %s znaków", len(input_text))
+        if len(input_text) <= SUMMARY_CHUNK_CHARS:
+            try:
+                return parse_summary(await self._complete("summarize", single_prompt(input_text)))
+            except (openai.OpenAIError, _EmptyCompletionError) as exc:
+                return self._summary_error(
+                    "Błąd podczas podsumowywania tekstu", "Błąd podsumowania krótkiego tekstu", exc
+                )
+
+        text_chunks = [
+            input_text[i : i + SUMMARY_CHUNK_CHARS] for i in range(0, len(input_text), SUMMARY_CHUNK_CHARS)
+        ]
+        results = await asyncio.gather(
+            *(self._complete("summarize_map", map_prompt(idx, len(text_chunks), chunk))
+              for idx, chunk in enumerate(text_chunks)),
+            return_exceptions=True,
+        )
+        for text_idx, result in enumerate(results):
+            if isinstance(result, (openai.OpenAIError, _EmptyCompletionError)):
+                return self._summary_error(
+                    "Błąd podczas podsumowywania fragmentu", f"Błąd fragmentu {text_idx+1}", result
+                )
+            if isinstance(result, BaseException):
+                raise result
+        try:
+            return parse_summary(await self._complete("summarize_reduce", reduce_prompt(results)))
+        except (openai.OpenAIError, _EmptyCompletionError) as exc:
+            return self._summary_error(
+                "Błąd podczas generowania końcowego podsumowania", "Błąd końcowego podsumowania", exc
+            )
+
+    async def run(
+        self,
+        file_path: Path,
+        language: str = "pl",
+        chunk_ms: int = CHUNK_MS,
+        summarize: bool = True,
+        job_id: Optional[str] = None,
+        on_chunk: Optional[Callable[[int, int, Path, int], None]] = None,
+    ) -> Dict:
+        """
+        Wykonuje cały potok dla jednego pliku: analiza, podział, transkrypcja, podsumowanie.
+
+        Returns:
+            dict: {'duration', 'chunks', 'transcript', 'topic', 'summary'}
+                ('topic' i 'summary' są None, gdy `summarize=False`)
+
+        Raises:
+            RuntimeError: Gdy nie udało się przeanalizować lub podzielić pliku
+            TranscriptionError: Gdy któryś fragment nie został przetranskrybowany
+        """
+        with metrics.job(job_id or str(file_path)):
+            duration = await self.probe(file_path)
+            with ScratchSpace(job_id or "job", expected_bytes=file_path.stat().st_size) as scratch_space:
+                chunks = await self.split(file_path, chunk_ms, duration, scratch_space)
+                transcript = await self.transcribe(chunks, language, on_chunk)
+            topic, summary = await self.summarize(transcript) if summarize else (None, None)
+        return {
+            "duration": duration,
+            "chunks": len(chunks),
+            "transcript": transcript,
+            "topic": topic,
+            "summary": summary,
+        }
@@ -0,0 +1,215 @@
+"""
+Transkrypcja z gotowych napisów YouTube - szybka ścieżka bez pobierania audio.
+
+Napisy filmu (dodane przez autora albo generowane automatycznie w języku
+nagrania) są wybierane z metadanych yt-dlp (`pick_track`), a plik WebVTT
+jest zamieniany na transkrypcję w tym samym formacie co wynik Whisper:
+jeden wiersz tekstu na fragment `CHUNK_MS` nagrania (`to_transcript`).
+Napisy generowane automatycznie powtarzają w kolejnych wpisach poprzedni
+wiersz - powtórzenia są usuwane. Gdy filmu nie ma odpowiednich napisów,
+`caption_transcript` zwraca None i wywołujący pobiera audio jak dotąd.
+Z zakresem nagrania (`start`, `end`) brane są tylko napisy z tego zakresu.
+
+Konfiguracja (zmienne środowiskowe):
+
+- `YOUTUBE_CAPTIONS` - `off` (domyślnie, zawsze transkrypcja audio),
+  `manual` (tylko napisy dodane przez autora) lub `auto` (także napisy
+  generowane automatycznie w języku nagrania).
+"""
+
+import html
+import logging
+import os
+import re
+import sqlite3
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from audio2tekst import catalog, hashing, metrics, storage, transcript_index, youtube
+from audio2tekst.media import CHUNK_MS
+
+logger = logging.getLogger(__name__)
+
+MODES = {
+    "off": "Nie - zawsze transkrypcja audio",
+    "manual": "Tylko napisy dodane przez autora",
+    "auto": "Napisy autora lub automatyczne",
+}
+# Etykieta modelu w indeksie transkrypcji zależnie od rodzaju napisów
+MODEL_LABELS = {"subtitles": "youtube-captions", "automatic_captions": "youtube-auto-captions"}
+TIMESTAMP = re.compile(r"(?:(\d+):)?(\d{2}):(\d{2})[.,](\d{3})")
+TAG = re.compile(r"<[^>]*>")
+
+
+def mode() -> str:
+    """Tryb napisów z `YOUTUBE_CAPTIONS` (nieznana wartość = `off`)."""
+    value = os.getenv("YOUTUBE_CAPTIONS", "off").strip().lower()
+    return value if value in MODES else "off"
+
+
+def _matches(key: str, language: str) -> bool:
+    return key == language or key.startswith(f"{language}-")
+
+
+def pick_track(info: Dict, language: str, allow_auto: bool = True) -> Optional[Dict]:
+    """
+    Wybiera napisy WebVTT w języku `language` z metadanych yt-dlp.
+
+    Pierwszeństwo mają napisy dodane przez autora. Z napisów generowanych
+    automatycznie brane są tylko napisy w języku nagrania (`<język>-orig`
+    albo język filmu zgodny z `language`) - tłumaczenia maszynowe są pomijane.
+
+    Returns:
+        dict | None: `{"language", "kind", "url", "name"}` albo None
+    """
+    subtitles = info.get("subtitles") or {}
+    candidates = [("subtitles", key) for key in subtitles if _matches(key, language)]
+    if allow_auto:
+        automatic = info.get("automatic_captions") or {}
+        video_language = (info.get("language") or "").split("-")[0]
+        if f"{language}-orig" in automatic:
+            candidates.append(("automatic_captions", f"{language}-orig"))
+        elif language in automatic and video_language == language:
+            candidates.append(("automatic_captions", language))
+    for kind, key in candidates:
+        for track in info[kind][key]:
+            if track.get("ext") == "vtt" and track.get("url"):
+                return {"language": key, "kind": kind, "url": track["url"], "name": track.get("name") or key}
+    return None
+
+
+def _seconds(match: "re.Match") -> float:
+    hours, minutes, seconds, millis = match.groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(millis) / 1000
+
+
+def parse_vtt(text: str) -> List[Tuple[float, str]]:
+    """
+    Wiersze napisów WebVTT jako (czas początku wpisu w s, tekst).
+
+    Znaczniki (`<c>`, czasy słów) i encje HTML są usuwane, a wiersz
+    powtarzający poprzedni (napisy automatyczne) jest pomijany.
+    """
+    lines: List[Tuple[float, str]] = []
+    for block in re.split(r"\r?\n\s*\r?\n", text.lstrip("\ufeff")):
+        block_lines = block.strip().splitlines()
+        timing = next((index for index, line in enumerate(block_lines) if "-->" in line), None)
+        if timing is None:  # Nagłówek WEBVTT, NOTE, STYLE
+            continue
+        start = TIMESTAMP.search(block_lines[timing])
+        if start is None:
+            continue
+        for line in block_lines[timing + 1:]:
+            line = " ".join(html.unescape(TAG.sub("", line)).split())
+            if line and (not lines or lines[-1][1] != line):
+                lines.append((_seconds(start), line))
+    return lines
+
+
+def to_transcript(lines: List[Tuple[float, str]], chunk_ms: int = CHUNK_MS) -> str:
+    """Transkrypcja z wierszy napisów: jeden wiersz tekstu na fragment `chunk_ms` nagrania."""
+    chunks: Dict[int, List[str]] = {}
+    for start, line in lines:
+        chunks.setdefault(int(start * 1000) // chunk_ms, []).append(line)
+    return "\n".join(" ".join(chunks[index]) for index in sorted(chunks))
+
+
+def caption_transcript(
+    url: str,
+    language: str,
+    allow_auto: bool = True,
+    chunk_ms: int = CHUNK_MS,
+    extractor: Optional[Callable[[str, Dict], Dict]] = None,
+    fetch: Optional[Callable[[str], str]] = None,
+    start: float = 0.0,
+    end: Optional[float] = None,
+) -> Optional[Tuple[str, Dict]]:
+    """
+    Transkrypcja filmu YouTube z jego napisów (bez pobierania audio).
+
+    Args:
+        url (str): Adres filmu
+        language (str): Język transkrypcji (np. 'pl')
+        allow_auto (bool): Czy przyjmować napisy generowane automatycznie
+        chunk_ms (int): Długość fragmentu transkrypcji w ms
+        extractor (callable, optional): Ekstraktor metadanych (domyślnie `youtube.extract_info`)
+        fetch (callable, optional): Pobieranie pliku napisów (domyślnie `youtube.fetch_text`)
+        start (float): Początek zakresu filmu w sekundach
+        end (float, optional): Koniec zakresu w sekundach (None = koniec filmu)
+
+    Returns:
+        tuple | None: (transkrypcja, napisy z `pick_track` uzupełnione o `duration` - długość zakresu)
+        albo None, gdy film nie ma odpowiednich napisów
+
+    Raises:
+        RuntimeError: Gdy nie udało się odczytać metadanych lub pliku napisów
+    """
+    job_id = youtube.source_key(youtube.extract_youtube_id(url), start, end)
+    with metrics.stage("captions", job_id=job_id) as captions_stage:
+        info = (extractor or youtube.extract_info)(url, {"quiet": True, "skip_download": True, "noplaylist": True})
+        track = pick_track(info, language, allow_auto=allow_auto)
+        if track is None:
+            return None
+        text = (fetch or youtube.fetch_text)(track["url"])
+        captions_stage.bytes_in = len(text.encode("utf-8"))
+        # Fragmenty transkrypcji liczone od początku zakresu, jak przy transkrypcji audio
+        lines = [
+            (line_start - start, line)
+            for line_start, line in parse_vtt(text)
+            if line_start >= start and (end is None or line_start < end)
+        ]
+        transcript = to_transcript(lines, chunk_ms)
+        captions_stage.bytes_out = len(transcript.encode("utf-8"))
+    if not transcript:
+        return None
+    duration = info.get("duration")
+    if duration is not None and (start or end is not None):
+        duration = max(min(duration, end if end is not None else duration) - start, 0.0)
+    track["duration"] = duration
+    logger.info("Napisy %s (%s) zamiast transkrypcji audio: %s", track["language"], track["kind"], url)
+    return transcript, track
+
+
+def store_transcript(
+    video_id: str,
+    transcript: str,
+    track: Dict,
+    source: str = "",
+    language: str = "",
+    base_dir: Path = storage.BASE_DIR,
+    catalog_db: Path = catalog.DB_PATH,
+    index_db: Path = transcript_index.DB_PATH,
+    content_hash: str = "",
+    encoding: str = "utf-8",
+    start: float = 0.0,
+    end: Optional[float] = None,
+) -> str:
+    """
+    Zapisuje transkrypcję z napisów jak transkrypcję audio i zwraca jej UID.
+
+    UID to skrót treści transkrypcji (film nie ma pobranego oryginału), a film
+    jest zapamiętywany w katalogu (`youtube.remember_video`), więc kolejne
+    zgłoszenie tego filmu (lub tego samego zakresu `start`-`end`) trafia od
+    razu na gotowy wynik.
+    """
+    uid = hashing.content_id(transcript.encode("utf-8"), algorithm=content_hash)
+    transcript_path, _ = storage.artefact_paths(uid, base_dir)
+    with metrics.stage("write", job_id=uid) as write_stage:
+        stored_path, write_stage.bytes_out = storage.write_artefact(transcript_path, transcript, encoding=encoding)
+    catalog.register(uid, "transcript", stored_path, write_stage.bytes_out, db_path=catalog_db)
+    youtube.remember_video(video_id, uid, db_path=catalog_db, start=start, end=end)
+    metrics.link_job(youtube.source_key(video_id, start, end), uid)
+    try:
+        transcript_index.index_transcript(
+            uid,
+            transcript,
+            source=source or video_id,
+            source_kind="youtube",
+            duration=track.get("duration"),
+            language=language,
+            model=MODEL_LABELS.get(track["kind"], track["kind"]),
+            db_path=index_db,
+        )
+    except sqlite3.Error as exc:
+        logger.warning("Nie udało się zaindeksować transkrypcji %s: %s", uid, exc)
+    return uid
@@ -0,0 +1,323 @@
+"""
+Katalog artefaktów zapisanych w katalogu `uploads/` (SQLite).
+
+Każdy plik (oryginał, transkrypcja, podsumowanie) ma jeden wiersz z UID,
+rodzajem, ścieżką, rozmiarem, czasem utworzenia i ostatniego dostępu oraz
+licznikiem referencji. Wyszukiwanie i czyszczenie plików to zapytania po
+indeksie zamiast sprawdzania `exists()` i przeglądania katalogów, a czas
+ostatniego dostępu jest podstawą polityki usuwania LRU.
+"""
+
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from audio2tekst import db
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = Path("db") / "catalog.sqlite3"
+KINDS = {
+    "original": "originals",
+    "transcript": "transcripts",
+    "summary": "summaries",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artefacts (
+    uid TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    refcount INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (uid, kind)
+);
+CREATE INDEX IF NOT EXISTS artefacts_kind_accessed ON artefacts(kind, accessed_at);
+CREATE TABLE IF NOT EXISTS quick_ids (
+    quick_id TEXT PRIMARY KEY,
+    uid TEXT NOT NULL
+);
+"""
+
+
+def _transaction(db_path: Path):
+    """Transakcja na bazie katalogu (schemat tworzony przy pierwszym użyciu)."""
+    return db.transaction(db_path, _SCHEMA)
+
+
+def register(
+    uid: str, kind: str, path: Path, size: int, db_path: Path = DB_PATH
+) -> Optional[Path]:
+    """
+    Rejestruje (lub aktualizuje) artefakt w katalogu.
+
+    Args:
+        uid (str): Identyfikator pliku
+        kind (str): Rodzaj artefaktu ('original', 'transcript', 'summary')
+        path (Path): Ścieżka do pliku
+        size (int): Rozmiar pliku w bajtach
+        db_path (Path): Ścieżka do bazy katalogu
+
+    Returns:
+        Path | None: Poprzednia ścieżka artefaktu, jeśli była inna
+            (np. oryginał z innym rozszerzeniem) - wywołujący powinien ją usunąć
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Nieznany rodzaj artefaktu: {kind}")
+    now = time.time()
+    with _transaction(db_path) as conn:
+        row = conn.execute(
+            "SELECT path FROM artefacts WHERE uid = ? AND kind = ?", (uid, kind)
+        ).fetchone()
+        conn.execute(
+            """
+            INSERT INTO artefacts (uid, kind, path, size, created_at, accessed_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(uid, kind) DO UPDATE SET
+                path = excluded.path,
+                size = excluded.size,
+                accessed_at = excluded.accessed_at
+            """,
+            (uid, kind, str(path), size, now, now),
+        )
+    if row and row["path"] != str(path):
+        return Path(row["path"])
+    return None
+
+
+def lookup(uid: str, kind: str, db_path: Path = DB_PATH) -> Optional[Dict]:
+    """
+    Zwraca wpis artefaktu i odświeża jego czas ostatniego dostępu.
+
+    Returns:
+        dict | None: Wiersz katalogu (uid, kind, path, size, created_at,
+            accessed_at, refcount) albo None, gdy artefakt nie jest znany
+    """
+    with _transaction(db_path) as conn:
+        row = conn.execute(
+            "SELECT * FROM artefacts WHERE uid = ? AND kind = ?", (uid, kind)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        conn.execute(
+            "UPDATE artefacts SET accessed_at = ? WHERE uid = ? AND kind = ?",
+            (now, uid, kind),
+        )
+    entry = dict(row)
+    entry["accessed_at"] = now
+    return entry
+
+
+def register_quick_id(quick_id: str, uid: str, db_path: Path = DB_PATH) -> None:
+    """Zapamiętuje, że plik o szybkim identyfikatorze `quick_id` ma pełny UID `uid`."""
+    with _transaction(db_path) as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO quick_ids (quick_id, uid) VALUES (?, ?)", (quick_id, uid)
+        )
+
+
+def find_by_quick_id(quick_id: str, db_path: Path = DB_PATH) -> Optional[str]:
+    """
+    Zwraca UID znanego pliku o podanym szybkim identyfikatorze.
+
+    UID jest zwracany tylko wtedy, gdy w katalogu istnieje jeszcze
+    jakikolwiek artefakt tego pliku - inaczej trafienie nic nie daje.
+    """
+    with _transaction(db_path) as conn:
+        row = conn.execute(
+            """
+            SELECT q.uid FROM quick_ids AS q
+            WHERE q.quick_id = ?
+              AND EXISTS (SELECT 1 FROM artefacts AS a WHERE a.uid = q.uid)
+            """,
+            (quick_id,),
+        ).fetchone()
+    return row["uid"] if row else None
+
+
+def acquire(uid: str, kind: str, db_path: Path = DB_PATH) -> Optional[Dict]:
+    """
+    Zwiększa licznik referencji - artefakt jest używany i nie może zostać usunięty.
+
+    Sprawdzenie, czy artefakt istnieje, i zwiększenie licznika to jedna
+    instrukcja, więc retencja nie może usunąć pliku pomiędzy nimi.
+
+    Returns:
+        dict | None: Wiersz katalogu po zwiększeniu licznika albo None, gdy
+            artefakt nie jest znany (licznik nie został zmieniony)
+    """
+    with _transaction(db_path) as conn:
+        updated = conn.execute(
+            "UPDATE artefacts SET refcount = refcount + 1, accessed_at = ? "
+            "WHERE uid = ? AND kind = ?",
+            (time.time(), uid, kind),
+        ).rowcount
+        if updated != 1:
+            return None
+        # Odczyt w tej samej transakcji - po UPDATE nikt inny nie pisze do bazy
+        row = conn.execute(
+            "SELECT * FROM artefacts WHERE uid = ? AND kind = ?", (uid, kind)
+        ).fetchone()
+    return dict(row)
+
+
+def release(uid: str, kind: str, db_path: Path = DB_PATH) -> None:
+    """Zmniejsza licznik referencji (nigdy poniżej zera)."""
+    with _transaction(db_path) as conn:
+        conn.execute(
+            "UPDATE artefacts SET refcount = MAX(refcount - 1, 0) "
+            "WHERE uid = ? AND kind = ?",
+            (uid, kind),
+        )
+
+
+def list_artefacts(
+    kind: Optional[str] = None,
+    unreferenced_only: bool = False,
+    db_path: Path = DB_PATH,
+) -> List[Dict]:
+    """
+    Zwraca artefakty posortowane od najdawniej używanego (kolejność LRU).
+
+    Args:
+        kind (str, optional): Ogranicza wynik do jednego rodzaju artefaktów
+        unreferenced_only (bool): Pomija artefakty z niezerowym licznikiem referencji
+        db_path (Path): Ścieżka do bazy katalogu
+    """
+    query = "SELECT * FROM artefacts WHERE 1 = 1"
+    params: list = []
+    if kind is not None:
+        query += " AND kind = ?"
+        params.append(kind)
+    if unreferenced_only:
+        query += " AND refcount = 0"
+    query += " ORDER BY accessed_at"
+    with _transaction(db_path) as conn:
+        rows = conn.execute(query, params).fetchall()
+    return [dict(row) for row in rows]
+
+
+def usage_by_kind(db_path: Path = DB_PATH) -> Dict[str, Dict[str, int]]:
+    """Zwraca liczbę plików i sumaryczny rozmiar (bajty) dla każdego rodzaju artefaktu."""
+    usage = {kind: {"files": 0, "bytes": 0} for kind in KINDS}
+    with _transaction(db_path) as conn:
+        rows = conn.execute(
+            "SELECT kind, COUNT(*) AS files, COALESCE(SUM(size), 0) AS bytes "
+            "FROM artefacts GROUP BY kind"
+        ).fetchall()
+    for row in rows:
+        usage[row["kind"]] = {"files": row["files"], "bytes": row["bytes"]}
+    return usage
+
+
+def _delete(
+    uid: str, kind: str, delete_file: bool, unreferenced_only: bool, db_path: Path
+) -> Optional[int]:
+    """Usuwa wpis (warunkowo: tylko nieużywany) i plik; None, gdy nic nie usunięto."""
+    query = "DELETE FROM artefacts WHERE uid = ? AND kind = ? AND path = ?"
+    if unreferenced_only:
+        # Warunek w tej samej instrukcji co DELETE - równoczesne `acquire`
+        # wygrywa albo przegrywa w całości, nigdy w połowie
+        query += " AND refcount = 0"
+    with _transaction(db_path) as conn:
+        row = conn.execute(
+            "SELECT path, size FROM artefacts WHERE uid = ? AND kind = ?", (uid, kind)
+        ).fetchone()
+        if row is None or conn.execute(query, (uid, kind, row["path"])).rowcount != 1:
+            return None
+    if delete_file:
+        try:
+            Path(row["path"]).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            logger.warning("Nie udało się usunąć pliku %s: %s", row["path"], exc)
+    return row["size"]
+
+
+def remove(uid: str, kind: str, delete_file: bool = True, db_path: Path = DB_PATH) -> int:
+    """
+    Usuwa artefakt z katalogu (i domyślnie z dysku).
+
+    Returns:
+        int: Liczba zwolnionych bajtów (0, gdy artefakt nie był znany)
+    """
+    return _delete(uid, kind, delete_file, False, db_path) or 0
+
+
+def evict(uid: str, kind: str, db_path: Path = DB_PATH) -> Optional[int]:
+    """
+    Usuwa artefakt z katalogu i z dysku, o ile nie jest używany (licznik referencji 0).
+
+    Returns:
+        int | None: Liczba zwolnionych bajtów albo None, gdy artefakt nie był
+            znany lub w międzyczasie został oznaczony jako używany
+    """
+    return _delete(uid, kind, True, True, db_path)
+
+
+def purge(
+    kinds: Optional[List[str]] = None,
+    unreferenced_only: bool = True,
+    db_path: Path = DB_PATH,
+) -> int:
+    """
+    Usuwa wszystkie artefakty wybranych rodzajów na podstawie katalogu.
+
+    Args:
+        kinds (list, optional): Rodzaje do usunięcia (domyślnie wszystkie)
+        unreferenced_only (bool): Pozostawia artefakty używane przez trwające zadania
+        db_path (Path): Ścieżka do bazy katalogu
+
+    Returns:
+        int: Liczba usuniętych artefaktów
+    """
+    removed = 0
+    for kind in kinds or list(KINDS):
+        for entry in list_artefacts(kind, unreferenced_only, db_path=db_path):
+            if unreferenced_only:
+                if evict(entry["uid"], kind, db_path=db_path) is None:
+                    continue
+            else:
+                remove(entry["uid"], kind, db_path=db_path)
+            removed += 1
+    return removed
+
+
+def sync_with_disk(base_dir: Path, db_path: Path = DB_PATH) -> Dict[str, int]:
+    """
+    Uzgadnia katalog z zawartością `uploads/` (jednorazowo przy starcie procesu).
+
+    Dodaje pliki, których katalog nie zna (np. zapisane przed jego wprowadzeniem),
+    i usuwa wpisy wskazujące na nieistniejące pliki.
+
+    Returns:
+        dict: Liczba dodanych ('added') i usuniętych ('dropped') wpisów
+    """
+    added = 0
+    dropped = 0
+    known = {entry["path"] for entry in list_artefacts(db_path=db_path)}
+    for kind, folder in KINDS.items():
+        folder_path = base_dir / folder
+        if not folder_path.exists():
+            continue
+        for artefact_file in folder_path.iterdir():
+            if not artefact_file.is_file() or artefact_file.name.startswith("."):
+                continue
+            if str(artefact_file) in known:
+                continue
+            # <uid>.mp3, <uid>.txt, <uid>.txt.gz - UID to nazwa do pierwszej kropki
+            register(
+                artefact_file.name.split(".")[0], kind, artefact_file,
+                artefact_file.stat().st_size, db_path=db_path,
+            )
+            added += 1
+    for entry in list_artefacts(db_path=db_path):
+        if not Path(entry["path"]).exists():
+            remove(entry["uid"], entry["kind"], delete_file=False, db_path=db_path)
+            dropped += 1
+    return {"added": added, "dropped": dropped}
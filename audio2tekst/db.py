@@ -0,0 +1,34 @@
+"""
+Wspólna obsługa połączeń SQLite dla baz w katalogu `db/`.
+
+Każde wywołanie otwiera nowe połączenie - Streamlit obsługuje sesje
+w osobnych wątkach, a SQLite w trybie WAL dobrze znosi wielu czytelników
+i jednego piszącego naraz.
+"""
+
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+
+def connect(db_path: Path, schema: str) -> sqlite3.Connection:
+    """Otwiera połączenie z bazą i tworzy schemat, jeśli nie istnieje."""
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path), timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(schema)
+    return conn
+
+
+@contextmanager
+def transaction(db_path: Path, schema: str) -> Iterator[sqlite3.Connection]:
+    """Otwiera połączenie, zatwierdza transakcję i zawsze je zamyka."""
+    conn = connect(db_path, schema)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
@@ -0,0 +1,397 @@
+"""
+Lokalny serwer zastępujący OpenAI API w testach wydajności i obciążenia.
+
+Implementuje `/v1/audio/transcriptions` (multipart), `/v1/chat/completions`
+i `/v1/models` w formacie zgodnym z klientem `openai.OpenAI`, więc potok
+transkrypcji i podsumowania działa bez sieci i bez kosztów:
+`openai.OpenAI(base_url=server.url, api_key="test")`.
+
+Zachowanie serwera jest konfigurowalne:
+
+- opóźnienie odpowiedzi z rozkładu (`LatencyModel`: stałe, jednostajne,
+  normalne, logarytmiczno-normalne) plus czas zależny od rozmiaru żądania,
+  osobno dla każdego endpointu,
+- wstrzykiwanie błędów (losowo z zadanym prawdopodobieństwem lub
+  zaplanowane `fail_next()`),
+- limity zapytań na minutę i równoczesnych żądań - przekroczenie zwraca
+  429 z nagłówkiem `retry-after`, jak prawdziwe API.
+
+Uruchomienie samodzielne: `python -m audio2tekst.fake_openai --port 8000`.
+"""
+
+import argparse
+import collections
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRANSCRIPT = "To jest transkrypcja fragmentu nagrania testowego."
+DEFAULT_SUMMARY = "Temat: nagranie testowe\nNagranie zawiera ton testowy i szum."
+MODELS = ("whisper-1", "gpt-3.5-turbo", "gpt-4o-mini")
+ENDPOINTS = ("/v1/audio/transcriptions", "/v1/chat/completions", "/v1/models")
+ERROR_MESSAGES = {
+    400: ("invalid_request_error", "Nieprawidłowe żądanie"),
+    429: ("rate_limit_exceeded", "Przekroczono limit zapytań"),
+    500: ("server_error", "Wewnętrzny błąd serwera"),
+    502: ("server_error", "Błędna odpowiedź serwera pośredniczącego"),
+    503: ("server_error", "Serwer jest przeciążony"),
+}
+_RESPONSE_FORMAT_RE = re.compile(rb'name="response_format"\r\n\r\n([a-z_]+)')
+_FILE_FIELD_RE = re.compile(rb'name="file"; filename="')
+
+
+class LatencyModel:
+    """
+    Rozkład opóźnienia odpowiedzi.
+
+    Args:
+        kind (str): 'fixed' (a), 'uniform' (a..b), 'normal' (średnia a, odchylenie b)
+            lub 'lognormal' (mediana a, sigma b)
+        a (float): Pierwszy parametr rozkładu w sekundach
+        b (float): Drugi parametr rozkładu
+        per_mb (float): Dodatkowe sekundy na każdy MB treści żądania (np. wysyłka audio)
+        seed (int, optional): Ziarno generatora dla powtarzalnych przebiegów
+    """
+
+    KINDS = ("fixed", "uniform", "normal", "lognormal")
+
+    def __init__(
+        self,
+        kind: str = "fixed",
+        a: float = 0.0,
+        b: float = 0.0,
+        per_mb: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        if kind not in self.KINDS:
+            raise ValueError(f"Nieznany rozkład opóźnienia: {kind}. Dostępne: {', '.join(self.KINDS)}")
+        self.kind = kind
+        self.a = a
+        self.b = b
+        self.per_mb = per_mb
+        self._random = random.Random(seed)  # nosec B311 - symulacja, nie kryptografia
+        self._lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec: str, seed: Optional[int] = None) -> "LatencyModel":
+        """
+        Tworzy rozkład z opisu tekstowego, np. '0.2', 'uniform:0.1:0.5',
+        'lognormal:0.8:0.4' lub 'normal:1:0.2+0.5/mb'.
+        """
+        per_mb = 0.0
+        if "+" in spec:
+            spec, extra = spec.split("+", 1)
+            per_mb = float(extra.removesuffix("/mb"))
+        parts = spec.split(":")
+        if len(parts) == 1:
+            return cls("fixed", float(parts[0]), per_mb=per_mb, seed=seed)
+        values = [float(value) for value in parts[1:]] + [0.0]
+        return cls(parts[0], values[0], values[1], per_mb=per_mb, seed=seed)
+
+    def sample(self, body_size: int = 0) -> float:
+        """Losuje opóźnienie (w sekundach, nigdy ujemne) dla żądania o podanym rozmiarze."""
+        with self._lock:
+            if self.kind == "fixed":
+                value = self.a
+            elif self.kind == "uniform":
+                value = self._random.uniform(self.a, self.b)
+            elif self.kind == "normal":
+                value = self._random.gauss(self.a, self.b)
+            else:
+                value = self.a * self._random.lognormvariate(0.0, self.b)
+        return max(value, 0.0) + self.per_mb * body_size / (1024 * 1024)
+
+
+class FakeOpenAIServer:
+    """
+    Serwer HTTP udający OpenAI API, uruchamiany w wątku w tle.
+
+    Args:
+        host (str): Adres nasłuchu
+        port (int): Port (0 = dowolny wolny port)
+        latency (float | str | LatencyModel): Opóźnienie wszystkich endpointów
+        endpoint_latency (dict, optional): Osobne opóźnienia dla wybranych endpointów
+        error_rate (float): Prawdopodobieństwo losowego błędu odpowiedzi (0-1)
+        error_statuses (list): Kody błędów wybierane losowo przy wstrzykiwaniu
+        requests_per_minute (int): Limit zapytań w oknie 60 s (0 = bez limitu)
+        max_concurrency (int): Limit równoczesnych żądań (0 = bez limitu)
+        transcript_text (str): Tekst zwracany przez transkrypcję
+        summary_text (str): Treść zwracana przez Chat Completions
+        seed (int, optional): Ziarno losowania opóźnień i błędów
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency=0.0,
+        endpoint_latency: Optional[Dict[str, object]] = None,
+        error_rate: float = 0.0,
+        error_statuses: Sequence[int] = (500, 503),
+        requests_per_minute: int = 0,
+        max_concurrency: int = 0,
+        transcript_text: str = DEFAULT_TRANSCRIPT,
+        summary_text: str = DEFAULT_SUMMARY,
+        seed: Optional[int] = None,
+    ):
+        self.latency = self._latency_model(latency, seed)
+        self.endpoint_latency = {
+            endpoint: self._latency_model(value, seed)
+            for endpoint, value in (endpoint_latency or {}).items()
+        }
+        self.error_rate = error_rate
+        self.error_statuses = list(error_statuses)
+        self.requests_per_minute = requests_per_minute
+        self.max_concurrency = max_concurrency
+        self.transcript_text = transcript_text
+        self.summary_text = summary_text
+        self._random = random.Random(seed)  # nosec B311 - symulacja, nie kryptografia
+        self._lock = threading.Lock()
+        self._scheduled_errors: List[int] = []
+        self._window: Deque[float] = collections.deque()
+        self.requests: Dict[str, int] = {}
+        self.statuses: Dict[int, int] = {}
+        self.bytes_received = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _latency_model(value, seed: Optional[int]) -> LatencyModel:
+        if isinstance(value, LatencyModel):
+            return value
+        if isinstance(value, str):
+            return LatencyModel.parse(value, seed=seed)
+        return LatencyModel("fixed", float(value), seed=seed)
+
+    @property
+    def url(self) -> str:
+        """Adres bazowy API do przekazania jako `base_url` klienta OpenAI."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="audio2tekst-fake-openai", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def fail_next(self, count: int = 1, status: int = 500) -> None:
+        """Planuje błąd `status` dla kolejnych `count` żądań (przed losowymi błędami)."""
+        with self._lock:
+            self._scheduled_errors.extend([status] * count)
+
+    def stats(self) -> Dict:
+        """
+        Zwraca statystyki serwera.
+
+        Returns:
+            dict: {'requests': {endpoint: liczba}, 'statuses': {kod: liczba},
+                   'bytes_received', 'in_flight', 'peak_in_flight'}
+        """
+        with self._lock:
+            return {
+                "requests": dict(self.requests),
+                "statuses": dict(self.statuses),
+                "bytes_received": self.bytes_received,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+            }
+
+    def _admit(self, endpoint: str, body_size: int) -> Optional[int]:
+        """Rejestruje żądanie i zwraca kod błędu do odesłania (None = obsłuż normalnie)."""
+        now = time.monotonic()
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            self.bytes_received += body_size
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            if self.max_concurrency and self.in_flight > self.max_concurrency:
+                return 429
+            if self.requests_per_minute:
+                while self._window and self._window[0] <= now - 60:
+                    self._window.popleft()
+                if len(self._window) >= self.requests_per_minute:
+                    return 429
+                self._window.append(now)
+            if self._scheduled_errors:
+                return self._scheduled_errors.pop(0)
+            if self.error_rate and self._random.random() < self.error_rate:
+                return self._random.choice(self.error_statuses)
+        return None
+
+    def _retry_after(self) -> float:
+        """Czas do zwolnienia miejsca w oknie limitu zapytań (sekundy)."""
+        with self._lock:
+            if self.requests_per_minute and self._window:
+                return max(self._window[0] + 60 - time.monotonic(), 0.0)
+        return 1.0
+
+    def _finish(self, status: int) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _read_body(self) -> bytes:
+                length = int(self.headers.get("Content-Length", "0"))
+                return self.rfile.read(length) if length else b""
+
+            def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict] = None) -> None:
+                # Statystyki przed wysłaniem - klient może je odczytać zaraz po odebraniu odpowiedzi
+                server._finish(status)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_json(self, status: int, payload: Dict, headers: Optional[Dict] = None) -> None:
+                self._send(status, json.dumps(payload).encode("utf-8"), "application/json", headers)
+
+            def _send_error(self, status: int, message: str = "") -> None:
+                error_type, default_message = ERROR_MESSAGES.get(status, ("server_error", "Błąd serwera"))
+                headers = {}
+                if status == 429:
+                    headers["retry-after"] = f"{server._retry_after():.3f}"
+                self._send_json(
+                    status,
+                    {"error": {"message": message or default_message, "type": error_type, "code": error_type}},
+                    headers,
+                )
+
+            def _handle(self, endpoint: str, body: bytes) -> None:
+                error_status = server._admit(endpoint, len(body))
+                model = server.endpoint_latency.get(endpoint, server.latency)
+                delay = model.sample(len(body))
+                if delay:
+                    time.sleep(delay)
+                if error_status is not None:
+                    self._send_error(error_status)
+                elif endpoint == "/v1/audio/transcriptions":
+                    self._transcription(body)
+                elif endpoint == "/v1/chat/completions":
+                    self._chat_completion(body)
+                elif endpoint == "/v1/models":
+                    self._send_json(200, {
+                        "object": "list",
+                        "data": [
+                            {"id": name, "object": "model", "created": 0, "owned_by": "audio2tekst"}
+                            for name in MODELS
+                        ],
+                    })
+                else:
+                    self._send_error(404, f"Nieznany endpoint: {endpoint}")
+
+            def _transcription(self, body: bytes) -> None:
+                if not _FILE_FIELD_RE.search(body):
+                    self._send_error(400, "Brak pliku audio w żądaniu multipart")
+                    return
+                match = _RESPONSE_FORMAT_RE.search(body)
+                if match and match.group(1) == b"text":
+                    self._send(200, server.transcript_text.encode("utf-8"), "text/plain; charset=utf-8")
+                else:
+                    self._send_json(200, {"text": server.transcript_text})
+
+            def _chat_completion(self, body: bytes) -> None:
+                try:
+                    request = json.loads(body or b"{}")
+                except ValueError:
+                    self._send_error(400, "Treść żądania nie jest poprawnym JSON")
+                    return
+                self._send_json(200, {
+                    "id": f"chatcmpl-{uuid.uuid4().hex}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "gpt-3.5-turbo"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": server.summary_text},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                })
+
+            def do_GET(self):  # noqa: N802 - nazwa wymagana przez BaseHTTPRequestHandler
+                self._handle(self.path.split("?")[0], b"")
+
+            def do_POST(self):  # noqa: N802 - nazwa wymagana przez BaseHTTPRequestHandler
+                body = self._read_body()
+                self._handle(self.path.split("?")[0], body)
+
+            def log_message(self, format, *args):  # noqa: A002 - sygnatura klasy bazowej
+                logger.debug("fake-openai: " + format, *args)
+
+        return Handler
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Uruchamia serwer z wiersza poleceń (do ręcznych testów obciążenia)."""
+    parser = argparse.ArgumentParser(description="Lokalny serwer zastępujący OpenAI API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", default="0", help="np. 0.2, uniform:0.1:0.5, lognormal:0.8:0.4+0.5/mb")
+    parser.add_argument("--transcription-latency", default=None, help="Opóźnienie /v1/audio/transcriptions")
+    parser.add_argument("--chat-latency", default=None, help="Opóźnienie /v1/chat/completions")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rpm", type=int, default=0, help="Limit zapytań na minutę (0 = bez limitu)")
+    parser.add_argument("--max-concurrency", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+    endpoint_latency = {}
+    if args.transcription_latency:
+        endpoint_latency["/v1/audio/transcriptions"] = args.transcription_latency
+    if args.chat_latency:
+        endpoint_latency["/v1/chat/completions"] = args.chat_latency
+    server = FakeOpenAIServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        endpoint_latency=endpoint_latency,
+        error_rate=args.error_rate,
+        requests_per_minute=args.rpm,
+        max_concurrency=args.max_concurrency,
+        seed=args.seed,
+    )
+    logging.basicConfig(level=logging.INFO)
+    logger.info("Serwer testowy OpenAI API: %s (Ctrl+C kończy)", server.url)
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
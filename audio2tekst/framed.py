@@ -0,0 +1,248 @@
+"""
+Skompresowane artefakty tekstowe w formacie niezależnych ramek z indeksem.
+
+Tekst jest dzielony na bloki po `FRAME_BYTES` bajtów (przed kompresją),
+a każdy blok kompresowany osobno - jako osobny człon gzip albo osobna ramka
+zstd. Na początku pliku stoi indeks ramek (rozmiary przed i po kompresji)
+zapisany tak, że zwykłe narzędzia go pomijają: w polu FEXTRA pustego członu
+gzip albo w ramce pomijalnej (skippable frame) zstd. Plik pozostaje więc
+poprawnym plikiem `.gz` / `.zst` (`gzip -d`, `zstd -d`), a odczyt fragmentu
+(`FramedReader.read`) rozpakowuje tylko ramki, które go obejmują.
+
+Kodeki: `gzip` (biblioteka standardowa) oraz `zstd` (gdy zainstalowano
+pakiet `zstandard`). Pliki bez kompresji są czytane przez `PlainReader`
+z tym samym interfejsem.
+"""
+
+import bisect
+import gzip
+import io
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+try:  # Opcjonalna zależność - szybsza i skuteczniejsza od gzip
+    import zstandard
+except ImportError:  # pragma: no cover - zależy od środowiska
+    zstandard = None
+
+FRAME_BYTES = 64 * 1024  # 64 KB tekstu na ramkę
+MAX_FRAMES = 8000  # Indeks musi zmieścić się w polu FEXTRA (64 KB)
+INDEX_MAGIC = b"A2FX"
+INDEX_ENTRY = struct.Struct("<II")  # (rozmiar po kompresji, rozmiar przed kompresją)
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+ZSTD_SKIPPABLE = 0x184D2A5E
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+DEFAULT_LEVELS = {"gzip": 6, "zstd": 3}
+
+Reader = Union["FramedReader", "PlainReader"]
+
+
+def available_codecs() -> List[str]:
+    """Kodeki dostępne w tym środowisku (`none` oznacza brak kompresji)."""
+    return ["none", "gzip"] + (["zstd"] if zstandard is not None else [])
+
+
+def _compress_frame(data: bytes, codec: str, level: int) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _decompress_frame(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Odczyt pliku .zst wymaga pakietu zstandard")
+        # Także wiele ramek (plik skompresowany poza aplikacją)
+        return zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data), read_across_frames=True).read()
+    return gzip.decompress(data)
+
+
+def _index_header(codec: str, frames: List[Tuple[int, int]]) -> bytes:
+    """Indeks ramek opakowany tak, by dekompresory go pomijały."""
+    payload = INDEX_MAGIC + struct.pack("<I", len(frames)) + b"".join(INDEX_ENTRY.pack(*frame) for frame in frames)
+    if codec == "zstd":
+        return struct.pack("<II", ZSTD_SKIPPABLE, len(payload)) + payload
+    # Pusty człon gzip z podpolem "A2" w FEXTRA (RFC 1952, 2.3.1.1)
+    extra = b"A2" + struct.pack("<H", len(payload)) + payload
+    empty_deflate = zlib.compressobj(wbits=-15)
+    body = empty_deflate.compress(b"") + empty_deflate.flush()
+    return (
+        GZIP_MAGIC + b"\x08\x04" + b"\x00\x00\x00\x00" + b"\x00\xff"
+        + struct.pack("<H", len(extra)) + extra + body + struct.pack("<II", 0, 0)
+    )
+
+
+def compress(data: bytes, codec: str, level: Optional[int] = None, frame_bytes: int = FRAME_BYTES) -> bytes:
+    """
+    Kompresuje dane do formatu ramek z indeksem.
+
+    Args:
+        data (bytes): Dane do kompresji
+        codec (str): `gzip` lub `zstd`
+        level (int, optional): Poziom kompresji (domyślnie 6 dla gzip, 3 dla zstd)
+        frame_bytes (int): Rozmiar ramki przed kompresją
+
+    Raises:
+        ValueError: Gdy kodek nie jest dostępny w tym środowisku
+    """
+    if codec not in SUFFIXES or codec not in available_codecs():
+        raise ValueError(f"Kodek '{codec}' jest niedostępny. Dostępne: {', '.join(available_codecs())}")
+    level = DEFAULT_LEVELS[codec] if level is None else level
+    # Bardzo duże pliki dostają większe ramki, żeby indeks zmieścił się w nagłówku
+    frame_bytes = max(frame_bytes, -(-len(data) // MAX_FRAMES))
+    frames = []
+    index = []
+    for start in range(0, len(data), frame_bytes):
+        frame = _compress_frame(data[start:start + frame_bytes], codec, level)
+        frames.append(frame)
+        index.append((len(frame), min(frame_bytes, len(data) - start)))
+    return _index_header(codec, index) + b"".join(frames)
+
+
+def detect(head: bytes) -> str:
+    """Kodek pliku na podstawie pierwszych bajtów (`none` dla zwykłego tekstu)."""
+    if head.startswith(GZIP_MAGIC):
+        return "gzip"
+    if head.startswith(ZSTD_MAGIC) or head[:4] == struct.pack("<I", ZSTD_SKIPPABLE):
+        return "zstd"
+    return "none"
+
+
+def _parse_index(payload: bytes) -> Optional[List[Tuple[int, int]]]:
+    if not payload.startswith(INDEX_MAGIC):
+        return None
+    (count,) = struct.unpack_from("<I", payload, len(INDEX_MAGIC))
+    offset = len(INDEX_MAGIC) + 4
+    return [INDEX_ENTRY.unpack_from(payload, offset + i * INDEX_ENTRY.size) for i in range(count)]
+
+
+def _read_index(source, codec: str) -> Tuple[int, Optional[List[Tuple[int, int]]]]:
+    """Zwraca (długość nagłówka, indeks ramek) albo (0, None) dla pliku bez indeksu."""
+    head = source.read(12)
+    if codec == "zstd":
+        magic, length = struct.unpack_from("<II", head)
+        if magic != ZSTD_SKIPPABLE:
+            return 0, None
+        source.seek(8)
+        return 8 + length, _parse_index(source.read(length))
+    flags = head[3] if len(head) > 3 else 0
+    if not flags & 0x04:
+        return 0, None
+    (extra_length,) = struct.unpack_from("<H", head, 10)
+    extra = source.read(extra_length)
+    if extra[:2] != b"A2":
+        return 0, None
+    index = _parse_index(extra[4:])
+    # Pusty człon: blok deflate (2 bajty), CRC32 i ISIZE
+    return 12 + extra_length + 2 + 8, index
+
+
+class FramedReader:
+    """
+    Odczyt skompresowanego artefaktu: całość blokami albo wybrany zakres bajtów.
+
+    Zakres rozpakowuje tylko obejmujące go ramki. Plik skompresowany bez
+    indeksu (np. poza aplikacją) jest rozpakowywany w całości przy otwarciu.
+    """
+
+    def __init__(self, path: Path, codec: Optional[str] = None):
+        self.path = Path(path)
+        with self.path.open("rb") as source:
+            self.codec = codec or detect(source.read(4))
+            source.seek(0)
+            header_length, index = _read_index(source, self.codec)
+        self._data: Optional[bytes] = None
+        if index is None:
+            self._data = _decompress_frame(self.path.read_bytes(), self.codec)
+            index = [(0, len(self._data))]
+        self._frames: List[Tuple[int, int, int]] = []  # (przesunięcie w pliku, długość, przesunięcie tekstu)
+        file_offset, text_offset = header_length, 0
+        for compressed, size in index:
+            self._frames.append((file_offset, compressed, text_offset))
+            file_offset += compressed
+            text_offset += size
+        self.size = text_offset
+        self._starts = [frame[2] for frame in self._frames]
+
+    def _frame(self, source, number: int) -> bytes:
+        if self._data is not None:
+            return self._data
+        file_offset, compressed, _ = self._frames[number]
+        source.seek(file_offset)
+        return _decompress_frame(source.read(compressed), self.codec)
+
+    def read(self, start: int, length: int) -> bytes:
+        """Bajty tekstu z zakresu [start, start + length)."""
+        end = min(start + length, self.size)
+        if start >= end:
+            return b""
+        first = bisect.bisect_right(self._starts, start) - 1
+        parts = []
+        with self.path.open("rb") as source:
+            number = first
+            while number < len(self._frames) and self._frames[number][2] < end:
+                parts.append(self._frame(source, number))
+                number += 1
+        data = b"".join(parts)
+        offset = self._frames[first][2]
+        return data[start - offset:end - offset]
+
+    def iter_blocks(self) -> Iterator[bytes]:
+        """Cały tekst, ramka po ramce."""
+        with self.path.open("rb") as source:
+            for number in range(len(self._frames)):
+                yield self._frame(source, number)
+
+
+class PlainReader:
+    """Odczyt nieskompresowanego artefaktu z tym samym interfejsem co `FramedReader`."""
+
+    codec = "none"
+
+    def __init__(self, path: Path, block: int = FRAME_BYTES):
+        self.path = Path(path)
+        self.size = self.path.stat().st_size
+        self.block = block
+
+    def read(self, start: int, length: int) -> bytes:
+        with self.path.open("rb") as source:
+            source.seek(start)
+            return source.read(max(0, min(length, self.size - start)))
+
+    def iter_blocks(self) -> Iterator[bytes]:
+        with self.path.open("rb") as source:
+            while True:
+                data = source.read(self.block)
+                if not data:
+                    return
+                yield data
+
+
+def open_reader(path: Path) -> Reader:
+    """Czytelnik pliku artefaktu - skompresowanego lub zwykłego (rozpoznanie po zawartości)."""
+    with Path(path).open("rb") as source:
+        codec = detect(source.read(4))
+    return PlainReader(path) if codec == "none" else FramedReader(path, codec)
+
+
+def codec_from_env() -> Tuple[str, Optional[int]]:
+    """
+    Kodek i poziom z `ARTEFACT_COMPRESSION` i `ARTEFACT_COMPRESSION_LEVEL`.
+
+    Niedostępny kodek (np. `zstd` bez pakietu `zstandard`) jest zastępowany przez gzip.
+    """
+    codec = os.getenv("ARTEFACT_COMPRESSION", "gzip").strip().lower() or "none"
+    if codec not in available_codecs():
+        codec = "gzip" if codec == "zstd" else "none"
+    level = os.getenv("ARTEFACT_COMPRESSION_LEVEL", "").strip()
+    return codec, int(level) if level else None
+
+
+def stats() -> Dict[str, object]:
+    """Konfiguracja kompresji (do panelu diagnostycznego)."""
+    codec, level = codec_from_env()
+    return {"codec": codec, "level": level if level is not None else DEFAULT_LEVELS.get(codec), "available": available_codecs()}
@@ -0,0 +1,206 @@
+"""
+Identyfikatory zawartości plików (UID) dla pamięci podręcznej w `uploads/`.
+
+UID pliku to skrót jego zawartości liczony strumieniowo, blok po bloku.
+Dostępne algorytmy: `blake2b` (domyślny, 16-bajtowy skrót z biblioteki
+standardowej), `xxh3_128` (tylko na życzenie, wymaga pakietu `xxhash`)
+oraz `md5` (identyfikatory sprzed zmiany). Domyślny algorytm nie zależy
+od zainstalowanych pakietów, więc UID plików nie zmieniają się po
+doinstalowaniu `xxhash`. Odczyt kolejnych bloków
+odbywa się w osobnym wątku, równolegle z liczeniem skrótu - `hashlib`
+zwalnia GIL dla dużych buforów.
+
+Tryb szybki (`quick_id`) liczy skrót z rozmiaru i kilku próbek pliku;
+pozwala sprawdzić pamięć podręczną, zanim zostanie policzony pełny skrót.
+"""
+
+import hashlib
+import io
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterator, Optional, Union
+
+try:  # Opcjonalna zależność - wyraźnie szybsza od skrótów z hashlib
+    import xxhash
+except ImportError:  # pragma: no cover - zależy od środowiska
+    xxhash = None
+
+BLOCK_SIZE = 1024 * 1024  # 1 MB
+PREFETCH_BLOCKS = 4
+QUICK_SAMPLE_SIZE = 256 * 1024  # 256 KB
+QUICK_SAMPLES = 3
+
+Source = Union[bytes, bytearray, memoryview, str, Path, BinaryIO]
+
+HASHERS: Dict[str, Callable] = {
+    "md5": lambda: hashlib.md5(usedforsecurity=False),
+    "blake2b": lambda: hashlib.blake2b(digest_size=16),
+}
+if xxhash is not None:
+    HASHERS["xxh3_128"] = xxhash.xxh3_128
+
+
+DEFAULT_ALGORITHM = "blake2b"
+LEGACY_ALGORITHM = "md5"  # UID plików zapisanych przed zmianą algorytmu
+
+
+def default_algorithm() -> str:
+    """Zwraca algorytm domyślny (stały, niezależny od zainstalowanych pakietów)."""
+    return DEFAULT_ALGORITHM
+
+
+def resolve_algorithm(name: Optional[str]) -> str:
+    """
+    Zwraca nazwę algorytmu do użycia (pusta nazwa = algorytm domyślny).
+
+    Raises:
+        ValueError: Gdy algorytm nie jest dostępny w tym środowisku
+    """
+    if not name:
+        return default_algorithm()
+    name = name.lower()
+    if name not in HASHERS:
+        raise ValueError(
+            f"Nieobsługiwany algorytm skrótu: {name}. Dostępne: {', '.join(sorted(HASHERS))}"
+        )
+    return name
+
+
+def _iter_blocks(source: Source, block_size: int) -> Iterator[bytes]:
+    """Zwraca kolejne bloki źródła (bajty w pamięci, ścieżka lub plik binarny)."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for offset in range(0, len(view), block_size):
+            yield view[offset : offset + block_size]
+        return
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as file_obj:
+            yield from _iter_blocks(file_obj, block_size)
+        return
+    while True:
+        block = source.read(block_size)
+        if not block:
+            return
+        yield block
+
+
+def _iter_blocks_prefetched(
+    source: Source, block_size: int, depth: int = PREFETCH_BLOCKS
+) -> Iterator[bytes]:
+    """
+    Czyta bloki w osobnym wątku i przekazuje je przez ograniczoną kolejkę.
+
+    Pamięć jest ograniczona do `depth` bloków; każdy wyjątek z wątku
+    czytającego (nie tylko `OSError`) jest zgłaszany w wątku liczącym skrót,
+    a znacznik końca trafia do kolejki zawsze, więc konsument nie czeka
+    w nieskończoność na blok, który nigdy nie nadejdzie.
+    """
+    blocks: "queue.Queue" = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+
+    def reader() -> None:
+        try:
+            for block in _iter_blocks(source, block_size):
+                if stop.is_set():
+                    return
+                blocks.put(bytes(block))
+        except BaseException as exc:  # pylint: disable=broad-except
+            blocks.put(exc)
+        finally:
+            blocks.put(done)
+
+    thread = threading.Thread(target=reader, name="audio2tekst-hash-reader", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = blocks.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        # Odblokowanie czytającego, jeśli czeka na miejsce w kolejce
+        while thread.is_alive():
+            try:
+                blocks.get_nowait()
+            except queue.Empty:
+                thread.join(0.01)
+
+
+def content_id(
+    source: Source,
+    algorithm: Optional[str] = None,
+    block_size: int = BLOCK_SIZE,
+    prefetch: Optional[bool] = None,
+) -> str:
+    """
+    Liczy identyfikator zawartości (skrót hex) strumieniowo, blok po bloku.
+
+    Args:
+        source: Bajty w pamięci, ścieżka do pliku lub otwarty plik binarny
+        algorithm (str, optional): 'blake2b' (domyślny), 'xxh3_128' lub 'md5'
+        block_size (int): Rozmiar bloku odczytu w bajtach
+        prefetch (bool, optional): Czy czytać bloki w osobnym wątku; domyślnie
+            włączone dla plików, wyłączone dla danych już obecnych w pamięci
+
+    Returns:
+        str: Skrót zawartości w postaci szesnastkowej (32 znaki)
+    """
+    hasher = HASHERS[resolve_algorithm(algorithm)]()
+    if prefetch is None:
+        prefetch = not isinstance(source, (bytes, bytearray, memoryview))
+    blocks = (
+        _iter_blocks_prefetched(source, block_size)
+        if prefetch
+        else _iter_blocks(source, block_size)
+    )
+    for block in blocks:
+        hasher.update(block)
+    return hasher.hexdigest()
+
+
+def quick_id(
+    source: Source,
+    sample_size: int = QUICK_SAMPLE_SIZE,
+    samples: int = QUICK_SAMPLES,
+) -> str:
+    """
+    Liczy szybki identyfikator z rozmiaru pliku i kilku równomiernie rozłożonych próbek.
+
+    Czas działania nie zależy od rozmiaru pliku. Identyfikator nie jest
+    gwarancją identyczności zawartości - służy do wstępnego sprawdzenia
+    pamięci podręcznej przed policzeniem pełnego skrótu.
+
+    Args:
+        source: Bajty w pamięci, ścieżka do pliku lub otwarty plik binarny z obsługą seek
+        sample_size (int): Rozmiar pojedynczej próbki w bajtach
+        samples (int): Liczba próbek (pierwsza na początku, ostatnia na końcu pliku)
+
+    Returns:
+        str: Identyfikator w postaci '<rozmiar hex>-<skrót hex>'
+    """
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as file_obj:
+            return quick_id(file_obj, sample_size, samples)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    start_pos = source.tell()
+    size = source.seek(0, os.SEEK_END) - start_pos
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(size.to_bytes(8, "little"))
+    if size <= sample_size * samples:
+        offsets = [0]
+        sample_size = size
+    else:
+        step = (size - sample_size) / (samples - 1) if samples > 1 else 0
+        offsets = [int(i * step) for i in range(samples)]
+    for offset in offsets:
+        source.seek(start_pos + offset)
+        hasher.update(source.read(sample_size))
+    source.seek(start_pos)
+    return f"{size:x}-{hasher.hexdigest()}"
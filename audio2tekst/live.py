@@ -0,0 +1,624 @@
+"""
+Transkrypcja na żywo - nagranie przetwarzane w trakcie, gdy dopiero powstaje.
+
+Źródłem jest strumień audio w dowolnym formacie obsługiwanym przez FFmpeg:
+plik w trakcie zapisu (np. nagranie OBS w MKV lub FLV - plik MP4 nie da się
+czytać przed końcem zapisu), treść żądania HTTP przesyłana na bieżąco
+(serwer API, np. `MediaRecorder` przeglądarki) albo nagrania z mikrofonu
+w aplikacji. `Decoder` dekoduje strumień przez FFmpeg do PCM (mono, 16 kHz),
+`Segmenter` tnie go w miejscach ciszy (energia ramek 30 ms względem poziomu
+szumu z ostatnich sekund, jak w `audio2tekst.vad`), a `LiveSession`
+transkrybuje kolejne segmenty w osobnym wątku i dopisuje ich tekst do
+transkrypcji, gdy mówca jeszcze mówi. Segmenty bez mowy nie są wysyłane do
+silnika transkrypcji.
+
+Opóźnienie to długość segmentu (`LIVE_MIN_SEGMENT_SEC` - `LIVE_MAX_SEGMENT_SEC`),
+pauza potrzebna do cięcia (`LIVE_SILENCE_MS`) i czas transkrypcji segmentu.
+Pamięć nie zależy od długości sesji: bufor segmentu ma najwyżej
+`LIVE_MAX_SEGMENT_SEC` audio, kolejka transkrypcji `LIVE_QUEUE` segmentów
+(pełna kolejka wstrzymuje odczyt z FFmpeg), tekst trafia do pliku, a w pamięci
+zostaje tylko `LIVE_RECENT_LINES` ostatnich wierszy.
+
+Dekoder działa przez całą sesję i prawie cały czas czeka na dane, więc nie
+zajmuje miejsca w harmonogramie procesów FFmpeg (`audio2tekst.scheduler`).
+
+Odtworzenie gotowego pliku w tempie nagrania (`decode_command(..., readrate=1)`,
+`python -m audio2tekst.live --replay nagranie.mp3`) daje powtarzalne testy
+opóźnienia bez mikrofonu; `--speed` przyspiesza odtwarzanie.
+
+Konfiguracja (zmienne środowiskowe):
+
+- `LIVE_MIN_SEGMENT_SEC` / `LIVE_MAX_SEGMENT_SEC` - najkrótszy segment cięty
+  w pauzie i najdłuższy segment (cięty w najcichszym miejscu bez pauzy),
+- `LIVE_SILENCE_MS` - pauza, w której segment jest cięty,
+- `LIVE_QUEUE` - segmenty czekające na transkrypcję,
+- `LIVE_RECENT_LINES` - ostatnie wiersze trzymane w pamięci do podglądu,
+- `LIVE_IDLE_SEC` - po ilu sekundach bez nowych danych kończy się śledzenie pliku.
+"""
+
+import argparse
+import collections
+import io
+import logging
+import os
+import queue
+import sqlite3
+import subprocess  # nosec B404 # Bezpieczne wywoływanie FFmpeg
+import threading
+import time
+import wave
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterator, List, NamedTuple, Optional, Sequence, Union
+
+import openai
+from dotenv import load_dotenv
+
+from audio2tekst import catalog, hashing, metrics, storage, transcript_index, transcription
+from audio2tekst.media import AudioChunk
+from audio2tekst.pipeline import clean_transcript
+from audio2tekst.scheduler import get_scheduler
+from audio2tekst.scratch import ScratchSpace
+from audio2tekst.system import check_dependencies
+from audio2tekst.vad import FRAME_SAMPLES, FRAME_SEC, MIN_SPEECH_DB, MIN_SPEECH_SEC, SAMPLE_RATE, SILENCE_DB, np
+
+logger = logging.getLogger(__name__)
+
+FRAME_BYTES = FRAME_SAMPLES * 2  # PCM s16le
+READ_BYTES = FRAME_BYTES * 4  # Blok odczytu z FFmpeg (120 ms)
+NOISE_WINDOW_SEC = 10.0  # Okno oceny poziomu szumu tła
+MARGIN_DB = 12.0  # Nadwyżka energii ponad szum tła uznawana za mowę
+LEAD_PADDING_SEC = 0.3  # Cisza zachowywana przed początkiem mowy
+DECODE_TIMEOUT = 60
+# Formaty, które da się czytać w trakcie zapisu (MP4/MOV mają indeks dopiero na końcu pliku)
+FOLLOW_EXT = (".mkv", ".flv", ".ts", ".webm", ".ogg", ".wav", ".mp3", ".aac")
+
+
+class Segment(NamedTuple):
+    """Segment nagrania do transkrypcji: czas w sekundach od początku sesji i PCM."""
+
+    index: int
+    start: float
+    end: float
+    pcm: bytes
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+def decode_command(
+    ffmpeg_path: str,
+    source: Union[Path, str],
+    follow: bool = False,
+    idle_timeout: Optional[float] = None,
+    readrate: Optional[float] = None,
+) -> List[str]:
+    """
+    Polecenie FFmpeg dekodujące strumień do PCM s16le, mono, 16 kHz na standardowe wyjście.
+
+    Args:
+        ffmpeg_path (str): Ścieżka do FFmpeg
+        source (Path | str): Plik albo '-' (standardowe wejście)
+        follow (bool): Czytaj plik w trakcie zapisu (koniec po `idle_timeout` s bez nowych danych)
+        idle_timeout (float, optional): Czas bez nowych danych (domyślnie `LIVE_IDLE_SEC`)
+        readrate (float, optional): Odtwarzanie w tempie nagrania (1) lub szybciej (np. 4)
+    """
+    command = [ffmpeg_path, "-v", "error", "-nostdin"]
+    if readrate:
+        command += ["-readrate", f"{readrate:g}"]
+    # Mała próbka analizy - dekodowanie rusza po pierwszych kilobajtach strumienia
+    command += ["-probesize", "32768", "-analyzeduration", "500000"]
+    if str(source) == "-":
+        command += ["-i", "pipe:0"]
+    elif follow:
+        if idle_timeout is None:
+            idle_timeout = _env_float("LIVE_IDLE_SEC", 10.0)
+        command += ["-follow", "1", "-rw_timeout", str(int(idle_timeout * 1_000_000)), "-i", f"file:{source}"]
+    else:
+        command += ["-i", str(source)]
+    return command + [
+        "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-flush_packets", "1", "pipe:1",
+    ]
+
+
+def frame_energy(pcm: bytes) -> "np.ndarray":
+    """Energia (dBFS) pełnych ramek 30 ms w bloku PCM."""
+    frames = np.frombuffer(pcm, dtype="<i2").astype(np.float32).reshape(-1, FRAME_SAMPLES) / 32768.0
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return np.where(rms > 0, 20 * np.log10(np.maximum(rms, 1e-10)), SILENCE_DB)
+
+
+class Segmenter:
+    """
+    Tnie strumień PCM na segmenty w miejscach ciszy.
+
+    Segment jest cięty, gdy po co najmniej `min_segment` s nagrania pauza
+    osiągnie `silence` s (w środku tej pauzy) albo - gdy pauzy brak - w najcichszej ramce
+    drugiej połowy po `max_segment` s. Cisza przed mową jest odrzucana na
+    bieżąco, więc bufor nigdy nie przekracza `max_segment` s audio.
+
+    Raises:
+        RuntimeError: Gdy NumPy nie jest dostępny
+    """
+
+    def __init__(
+        self,
+        min_segment: Optional[float] = None,
+        max_segment: Optional[float] = None,
+        silence: Optional[float] = None,
+        margin_db: float = MARGIN_DB,
+    ):
+        if np is None:
+            raise RuntimeError("Transkrypcja na żywo wymaga NumPy (pip install numpy)")
+        self.min_segment = _env_float("LIVE_MIN_SEGMENT_SEC", 3.0) if min_segment is None else min_segment
+        self.max_segment = _env_float("LIVE_MAX_SEGMENT_SEC", 15.0) if max_segment is None else max_segment
+        silence = _env_float("LIVE_SILENCE_MS", 400) / 1000 if silence is None else silence
+        self.margin_db = margin_db
+        self._silence_frames = max(int(silence / FRAME_SEC), 1)
+        self._max_frames = max(int(self.max_segment / FRAME_SEC), 2)
+        self._lead_frames = int(LEAD_PADDING_SEC / FRAME_SEC)
+        self._history: Deque[float] = collections.deque(maxlen=int(NOISE_WINDOW_SEC / FRAME_SEC))
+        self._pending = b""
+        self._buffer = bytearray()
+        self._energy: List[float] = []
+        self._threshold = MIN_SPEECH_DB
+        self.position = 0.0  # Początek bufora w sekundach od początku strumienia
+        self.index = 0
+        self.peak_buffer = 0
+
+    @property
+    def buffered_seconds(self) -> float:
+        return len(self._energy) * FRAME_SEC
+
+    def feed(self, pcm: bytes) -> List[Segment]:
+        """Dodaje blok PCM i zwraca segmenty gotowe do transkrypcji."""
+        data = self._pending + pcm
+        usable = len(data) - len(data) % FRAME_BYTES
+        self._pending = data[usable:]
+        if not usable:
+            return []
+        energies = frame_energy(data[:usable])
+        self._history.extend(energies.tolist())
+        # Próg ponad szumem tła, ale poniżej typowej głośności - bez pauz w oknie (np. na początku
+        # sesji) cały sygnał powyżej `MIN_SPEECH_DB` jest mową
+        noise_floor, loud = np.percentile(np.fromiter(self._history, dtype=np.float32), [10, 90])
+        self._threshold = max(min(noise_floor + self.margin_db, loud - self.margin_db), MIN_SPEECH_DB)
+        segments = []
+        for number, energy in enumerate(energies.tolist()):
+            self._buffer += data[number * FRAME_BYTES:(number + 1) * FRAME_BYTES]
+            self._energy.append(energy)
+            self.peak_buffer = max(self.peak_buffer, len(self._buffer))
+            segment = self._next_segment()
+            if segment is not None:
+                segments.append(segment)
+        return segments
+
+    def flush(self) -> Optional[Segment]:
+        """Zwraca resztę bufora jako ostatni segment (koniec strumienia)."""
+        return self._cut(len(self._energy))
+
+    def _speech_frames(self, energies: Sequence[float]) -> int:
+        return sum(1 for energy in energies if energy >= self._threshold)
+
+    def _next_segment(self) -> Optional[Segment]:
+        frames = len(self._energy)
+        silent_run = 0
+        for energy in reversed(self._energy):
+            if energy >= self._threshold:
+                break
+            silent_run += 1
+        if silent_run == frames:
+            # Sama cisza - zostaje tylko margines przed mową
+            if frames > self._lead_frames:
+                self._drop(frames - self._lead_frames)
+            return None
+        if frames * FRAME_SEC >= self.min_segment and silent_run >= self._silence_frames:
+            return self._cut(frames - silent_run // 2)
+        if frames >= self._max_frames:
+            half = frames // 2
+            quietest = half + min(range(frames - half), key=lambda offset: self._energy[half + offset])
+            return self._cut(quietest + 1)
+        return None
+
+    def _drop(self, frames: int) -> None:
+        del self._buffer[:frames * FRAME_BYTES]
+        del self._energy[:frames]
+        self.position += frames * FRAME_SEC
+
+    def _cut(self, frames: int) -> Optional[Segment]:
+        if frames <= 0:
+            return None
+        speech_seconds = self._speech_frames(self._energy[:frames]) * FRAME_SEC
+        segment = Segment(
+            self.index, self.position, self.position + frames * FRAME_SEC, bytes(self._buffer[:frames * FRAME_BYTES])
+        )
+        self._drop(frames)
+        if speech_seconds < MIN_SPEECH_SEC:
+            return None
+        self.index += 1
+        return segment
+
+
+def encode_wav(segment: Segment) -> AudioChunk:
+    """Segment jako plik WAV w pamięci (nazwa `live_00001.wav` w żądaniu do silnika)."""
+    output = io.BytesIO()
+    with wave.open(output, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(segment.pcm)
+    return AudioChunk(output.getvalue(), f"live_{segment.index:05d}.wav")
+
+
+def decode_clip(data: bytes) -> bytes:
+    """
+    Dekoduje krótkie nagranie (np. z mikrofonu w przeglądarce) do PCM sesji.
+
+    Raises:
+        RuntimeError: Gdy FFmpeg nie jest dostępny lub dekodowanie się nie powiodło
+    """
+    ffmpeg_exe_path = _ffmpeg_path()
+    try:
+        result = get_scheduler().run(
+            decode_command(ffmpeg_exe_path, "-"), input=data, capture_output=True, timeout=DECODE_TIMEOUT, check=True
+        )
+    except subprocess.TimeoutExpired as exc:
+        raise RuntimeError("Przekroczono czas oczekiwania na dekodowanie nagrania") from exc
+    except subprocess.CalledProcessError as exc:
+        raise RuntimeError(f"Błąd dekodowania nagrania: {exc.stderr.decode('utf-8', 'replace')}") from exc
+    return result.stdout
+
+
+class LiveSession:
+    """
+    Transkrypcja segmentów na bieżąco z dopisywaniem tekstu do pliku.
+
+    `feed()` przyjmuje PCM (z jednego wątku), segmenty trafiają do kolejki
+    (`queue_size`), a wątek sesji transkrybuje je po kolei i dopisuje do
+    `transcript_path` (wiersz tekstu na segment). `on_segment` jest wywoływana
+    w wątku sesji z argumentami (segment bez PCM, tekst, opóźnienie w s).
+
+    Args:
+        backend (TranscriptionBackend): Silnik transkrypcji
+        transcript_path (Path): Plik, do którego dopisywana jest transkrypcja
+        language (str): Język nagrania
+        segmenter (Segmenter, optional): Podział strumienia (domyślnie z ustawień `LIVE_*`)
+        on_segment (callable, optional): Wywoływana po transkrypcji każdego segmentu
+        job_id (str, optional): Zadanie w pomiarach etapów (`audio2tekst.metrics`)
+    """
+
+    def __init__(
+        self,
+        backend: transcription.TranscriptionBackend,
+        transcript_path: Path,
+        language: str = "pl",
+        segmenter: Optional[Segmenter] = None,
+        on_segment: Optional[Callable[[Segment, str, float], None]] = None,
+        job_id: Optional[str] = None,
+        queue_size: Optional[int] = None,
+        recent_lines: Optional[int] = None,
+    ):
+        self.backend = backend
+        self.transcript_path = Path(transcript_path)
+        self.language = language
+        self.segmenter = segmenter or Segmenter()
+        self.on_segment = on_segment
+        self.job_id = job_id
+        size = int(os.getenv("LIVE_QUEUE", "4")) if queue_size is None else queue_size
+        self.recent: Deque[Dict] = collections.deque(
+            maxlen=int(os.getenv("LIVE_RECENT_LINES", "50")) if recent_lines is None else recent_lines
+        )
+        self.segments = 0
+        self.failed = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._latency_total = 0.0
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max(size, 1))
+        self._lock = threading.Lock()
+        self._closed = False
+        self.transcript_path.parent.mkdir(parents=True, exist_ok=True)
+        self.transcript_path.write_text("", encoding="utf-8")
+        self._worker = threading.Thread(target=self._transcribe_loop, name="audio2tekst-live", daemon=True)
+        self._worker.start()
+
+    @property
+    def audio_seconds(self) -> float:
+        """Długość przyjętego nagrania w sekundach."""
+        return self.segmenter.position + self.segmenter.buffered_seconds
+
+    def feed(self, pcm: bytes) -> None:
+        """Przyjmuje PCM (s16le, mono, 16 kHz); czeka, gdy kolejka transkrypcji jest pełna."""
+        for segment in self.segmenter.feed(pcm):
+            self._queue.put((segment, time.monotonic()))
+
+    def flush(self) -> None:
+        """Przekazuje do transkrypcji przyjęte nagranie bez czekania na pauzę (np. koniec nagrania z mikrofonu)."""
+        segment = self.segmenter.flush()
+        if segment is not None:
+            self._queue.put((segment, time.monotonic()))
+
+    def finish(self) -> None:
+        """Transkrybuje resztę nagrania i czeka na koniec wątku sesji."""
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        self._queue.put(None)
+        self._worker.join()
+
+    def recent_lines(self) -> List[Dict]:
+        """Kopia ostatnich wierszy (`start`, `end`, `text`) do podglądu."""
+        with self._lock:
+            return list(self.recent)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "segments": self.segments,
+                "failed": self.failed,
+                "audio_seconds": self.audio_seconds,
+                "queued": self._queue.qsize(),
+                "last_latency": self.last_latency,
+                "max_latency": self.max_latency,
+                "mean_latency": self._latency_total / self.segments if self.segments else 0.0,
+            }
+
+    def _transcribe_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            try:
+                self._transcribe_segment(*item)
+            except Exception:  # pylint: disable=broad-except
+                # Wątek musi odebrać znacznik końca, inaczej `feed()` i `finish()` czekałyby bez końca
+                logger.exception("Nieoczekiwany błąd segmentu %s sesji na żywo", item[0].index)
+                with self._lock:
+                    self.failed += 1
+
+    def _transcribe_segment(self, segment: Segment, cut_at: float) -> None:
+        chunk = encode_wav(segment)
+        try:
+            with metrics.stage("transcribe", bytes_in=chunk.size, job_id=self.job_id) as transcribe_stage:
+                text = clean_transcript(self.backend.transcribe(chunk, self.language))
+                transcribe_stage.bytes_out = len(text.encode("utf-8"))
+        except (OSError, openai.OpenAIError, transcription.TranscriptionError) as exc:
+            # Błąd jednego segmentu nie przerywa sesji (jak w `pipeline.transcribe_chunks`)
+            logger.error("Błąd transkrypcji segmentu %s: %s", chunk.name, exc)
+            with self._lock:
+                self.failed += 1
+            return
+        finally:
+            chunk.close()
+        latency = time.monotonic() - cut_at
+        if text:
+            with open(self.transcript_path, "a", encoding="utf-8") as transcript_file:
+                transcript_file.write(text + "\n")
+        with self._lock:
+            self.segments += 1
+            self.last_latency = latency
+            self.max_latency = max(self.max_latency, latency)
+            self._latency_total += latency
+            self.recent.append({"start": segment.start, "end": segment.end, "text": text})
+        if self.on_segment is not None:
+            self.on_segment(segment._replace(pcm=b""), text, latency)
+
+    def store(
+        self,
+        source: str,
+        source_kind: str = "live",
+        base_dir: Path = storage.BASE_DIR,
+        catalog_db: Path = catalog.DB_PATH,
+        index_db: Path = transcript_index.DB_PATH,
+        content_hash: str = "",
+        encoding: str = "utf-8",
+    ) -> str:
+        """
+        Zapisuje transkrypcję zakończonej sesji jak transkrypcję pliku i zwraca jej UID.
+
+        UID to skrót treści transkrypcji (sesja nie ma zapisanego oryginału).
+        """
+        uid = hashing.content_id(self.transcript_path, algorithm=content_hash)
+        transcript = self.transcript_path.read_text(encoding="utf-8").rstrip("\n")
+        transcript_path, _ = storage.artefact_paths(uid, base_dir)
+        with metrics.stage("write", job_id=self.job_id) as write_stage:
+            stored_path, write_stage.bytes_out = storage.write_artefact(transcript_path, transcript, encoding=encoding)
+        catalog.register(uid, "transcript", stored_path, write_stage.bytes_out, db_path=catalog_db)
+        try:
+            transcript_index.index_transcript(
+                uid,
+                transcript,
+                source=source,
+                source_kind=source_kind,
+                duration=self.audio_seconds,
+                language=self.language,
+                model=self.backend.model_label,
+                db_path=index_db,
+            )
+        except sqlite3.Error as exc:
+            logger.warning("Nie udało się zaindeksować transkrypcji %s: %s", uid, exc)
+        return uid
+
+
+class Decoder:
+    """
+    Proces FFmpeg dekodujący strumień do PCM przekazywanego do `LiveSession.feed`.
+
+    Przy źródle '-' dane strumienia przekazuje `write()`; wątek dekodera
+    czyta PCM blokami po 120 ms, więc segment trafia do transkrypcji zaraz
+    po pauzie w nagraniu.
+
+    Raises:
+        RuntimeError: Gdy FFmpeg nie jest dostępny
+    """
+
+    def __init__(self, command: Sequence[str], session: LiveSession):
+        self.session = session
+        self.error = ""
+        stdin = subprocess.PIPE if "pipe:0" in command else subprocess.DEVNULL
+        self._process = subprocess.Popen(  # nosec B603 # Argumenty przygotowane przez decode_command
+            list(command), stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        self._thread = threading.Thread(target=self._pump, name="audio2tekst-live-decoder", daemon=True)
+        self._thread.start()
+
+    @property
+    def running(self) -> bool:
+        """Czy strumień jest jeszcze dekodowany (śledzenie pliku kończy się po `LIVE_IDLE_SEC`)."""
+        return self._thread.is_alive()
+
+    def _pump(self) -> None:
+        try:
+            while True:
+                block = self._process.stdout.read1(READ_BYTES)
+                if not block:
+                    break
+                self.session.feed(block)
+        except (OSError, RuntimeError) as exc:
+            self.error = str(exc)
+            self._process.kill()
+        self.error = self.error or self._process.stderr.read().decode("utf-8", "replace").strip()
+
+    def write(self, data: bytes) -> None:
+        """Przekazuje kolejne bajty strumienia (źródło '-')."""
+        try:
+            self._process.stdin.write(data)
+            self._process.stdin.flush()
+        except (BrokenPipeError, ValueError) as exc:
+            raise RuntimeError(f"Dekoder zakończył pracę: {self.error or exc}") from exc
+
+    def close_input(self) -> None:
+        if self._process.stdin is not None and not self._process.stdin.closed:
+            try:
+                self._process.stdin.close()
+            except BrokenPipeError:
+                pass
+
+    def stop(self) -> None:
+        """Kończy dekodowanie (np. przerwane śledzenie pliku)."""
+        self.close_input()
+        if self._process.poll() is None:
+            self._process.terminate()
+
+    def wait(self) -> None:
+        """
+        Czeka na koniec strumienia.
+
+        Raises:
+            RuntimeError: Gdy FFmpeg nie zdekodował strumienia
+        """
+        self.close_input()
+        self._thread.join()
+        returncode = self._process.wait()
+        # Śledzenie pliku kończy się błędem odczytu po czasie bez nowych danych
+        if returncode not in (0, -15) and not self.session.audio_seconds:
+            raise RuntimeError(f"Błąd dekodowania strumienia: {self.error or returncode}")
+        if self.error:
+            logger.info("Dekoder strumienia: %s", self.error)
+
+
+def _ffmpeg_path() -> str:
+    dependencies_info = check_dependencies()
+    if not dependencies_info["ffmpeg"]["available"]:
+        raise RuntimeError("FFmpeg nie jest dostępne w systemie. Zainstaluj FFmpeg.")
+    return dependencies_info["ffmpeg"]["path"]
+
+
+def start_decoder(
+    session: LiveSession,
+    source: Union[Path, str] = "-",
+    follow: bool = False,
+    readrate: Optional[float] = None,
+    idle_timeout: Optional[float] = None,
+) -> Decoder:
+    """
+    Uruchamia dekoder źródła ('-' = dane z `Decoder.write`) dla sesji.
+
+    Raises:
+        RuntimeError: Gdy FFmpeg nie jest dostępny
+    """
+    command = decode_command(_ffmpeg_path(), source, follow=follow, idle_timeout=idle_timeout, readrate=readrate)
+    return Decoder(command, session)
+
+
+def transcribe_stream(
+    session: LiveSession,
+    blocks: Iterator[bytes],
+) -> None:
+    """
+    Przekazuje bloki strumienia (np. treść żądania HTTP) przez dekoder do sesji i kończy sesję.
+
+    Raises:
+        RuntimeError: Gdy FFmpeg nie zdekodował strumienia
+    """
+    decoder = start_decoder(session)
+    try:
+        for block in blocks:
+            decoder.write(block)
+        decoder.wait()
+    except BaseException:
+        decoder.stop()
+        raise
+    finally:
+        session.finish()
+
+
+def _format_time(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def format_line(start: float, end: float, text: str) -> str:
+    """Wiersz podglądu: `[GG:MM:SS-GG:MM:SS] tekst`."""
+    return f"[{_format_time(start)}-{_format_time(end)}] {text}"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Transkrypcja na żywo pliku w trakcie zapisu lub odtwarzanego")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--follow", type=Path, help="Plik w trakcie zapisu (np. nagranie OBS w MKV/FLV)")
+    source.add_argument("--replay", type=Path, help="Gotowy plik odtwarzany w tempie nagrania")
+    parser.add_argument("--speed", type=float, default=1.0, help="Tempo odtwarzania --replay (1 = czas rzeczywisty)")
+    parser.add_argument("--backend", default=os.getenv("TRANSCRIPTION_BACKEND", "openai"))
+    parser.add_argument("--language", default=os.getenv("DEFAULT_LANGUAGE", "pl"))
+    parser.add_argument("--save", action="store_true", help="Zapisz transkrypcję w uploads/ i indeksie")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    load_dotenv()
+    client = openai.OpenAI() if args.backend == "openai" else None
+    backend = transcription.create_backend(
+        args.backend, openai_client=client, openai_model=os.getenv("WHISPER_MODEL", "whisper-1")
+    )
+
+    def show(segment: Segment, text: str, latency: float) -> None:
+        print(f"{format_line(segment.start, segment.end, text)}  ({latency:.1f} s)", flush=True)
+
+    with ScratchSpace("live", tmpfs=False) as scratch_space:
+        session = LiveSession(
+            backend, scratch_space.new_file(".txt", prefix="live_"), language=args.language, on_segment=show
+        )
+        decoder = start_decoder(
+            session, args.follow or args.replay, follow=args.follow is not None,
+            readrate=args.speed if args.replay is not None else None,
+        )
+        try:
+            decoder.wait()
+        except KeyboardInterrupt:
+            decoder.stop()
+        finally:
+            session.finish()
+        stats = session.stats()
+        print(
+            f"Segmenty: {stats['segments']}, nagranie: {stats['audio_seconds']:.0f} s, opóźnienie: "
+            f"średnio {stats['mean_latency']:.1f} s, najwyżej {stats['max_latency']:.1f} s"
+        )
+        if args.save and stats["segments"]:
+            storage.ensure_dirs()
+            print(f"UID transkrypcji: {session.store(str(args.follow or args.replay))}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
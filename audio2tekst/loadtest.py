@@ -0,0 +1,424 @@
+"""
+Test obciążenia aplikacji Streamlit: wiele równoczesnych sesji użytkowników.
+
+Każda sesja to osobny `streamlit.testing.v1.AppTest` wykonujący prawdziwy
+`app.py` w tym samym procesie - tak jak sesje przeglądarek obsługiwane przez
+jeden kontener Streamlit (wspólne `st.cache_resource`, harmonogram FFmpeg,
+katalog `uploads/` i bazy SQLite). Sesja przechodzi pełną ścieżkę
+użytkownika: weryfikacja klucza, przesłanie pliku, transkrypcja
+i podsumowanie, a zapytania do OpenAI obsługuje lokalny `FakeOpenAIServer`.
+
+Raport zawiera percentyle czasu odpowiedzi każdego kroku, przyrost pamięci
+RSS na sesję (pomocny przy doborze pamięci kontenera) i odsetek błędów.
+
+Użycie:
+    python -m audio2tekst.loadtest --sessions 10 --audio-seconds 120 --latency 0.3
+
+Wymaga pakietów z `requirements-dev.txt` (psutil) i FFmpeg do wygenerowania
+nagrań. AppTest nie egzekwuje `server.maxUploadSize` ani nie mierzy przesyłania przez
+sieć; do doboru limitu służy rozmiar pliku w raporcie (`--audio-seconds`,
+`--bitrate`) zestawiony z pamięcią na sesję.
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess  # nosec B404
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import psutil
+
+from audio2tekst.fake_openai import FakeOpenAIServer
+from audio2tekst.scheduler import get_scheduler
+from audio2tekst.system import check_dependencies
+
+logger = logging.getLogger(__name__)
+
+APP_PATH = Path(__file__).resolve().parent.parent / "app.py"
+STEPS = ("load", "upload", "transcribe", "summarize", "total")
+PERCENTILES = (50, 90, 95, 99)
+TRANSCRIBE_BUTTON = "📝 Transkrybuj"
+SUMMARY_BUTTON = "🤖 Generuj podsumowanie"
+SUMMARY_HEADER = "🤖 Podsumowanie"
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentyl `q` (0-100) z interpolacją liniową; 0.0 dla pustej listy."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def generate_sample(path: Path, seconds: int, frequency: int = 440, bitrate: str = "64k") -> Path:
+    """
+    Tworzy syntetyczne nagranie MP3 (ton + szum) za pomocą FFmpeg.
+
+    Różne częstotliwości dają różną treść pliku, więc sesje nie trafiają
+    we wspólny wpis katalogu (brak deduplikacji po UID).
+    """
+    ffmpeg = check_dependencies()["ffmpeg"]
+    if not ffmpeg["available"]:
+        raise RuntimeError("FFmpeg nie jest dostępny - nie można wygenerować nagrania testowego")
+    subprocess.run(  # nosec B603
+        [ffmpeg["path"], "-y", "-v", "error",
+         "-f", "lavfi", "-i", f"sine=frequency={frequency}:duration={seconds}",
+         "-f", "lavfi", "-i", f"anoisesrc=duration={seconds}:amplitude=0.05",
+         "-filter_complex", "amix=inputs=2:duration=shortest",
+         "-ac", "1", "-b:a", bitrate, str(path)],
+        check=True,
+    )
+    return path
+
+
+class _MemorySampler:
+    """Próbkuje w tle RSS procesu (maksimum w trakcie testu)."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak_rss = self.process.memory_info().rss
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="audio2tekst-loadtest-rss", daemon=True)
+
+    def _sample(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.peak_rss = max(self.peak_rss, self.process.memory_info().rss)
+            except psutil.Error:
+                pass
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "_MemorySampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+@contextmanager
+def _app_environment(workdir: Path, base_url: str) -> Iterator[None]:
+    """Katalog roboczy aplikacji i zmienne środowiskowe kierujące klienta do fałszywego API."""
+    overrides = {"OPENAI_BASE_URL": base_url, "OPENAI_API_KEY": "sk-loadtest"}
+    previous_env = {name: os.environ.get(name) for name in overrides}
+    previous_cwd = Path.cwd()
+    os.environ.update(overrides)
+    os.chdir(workdir)
+    try:
+        yield
+    finally:
+        os.chdir(previous_cwd)
+        for name, value in previous_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+@contextmanager
+def _concurrent_sessions() -> Iterator[None]:
+    """
+    Przygotowuje AppTest do równoległych sesji w jednym procesie, jak w serwerze Streamlit.
+
+    AppTest zakłada, że w procesie wykonuje się jeden przebieg skryptu naraz:
+
+    - przy każdym `run()` ustawia i na koniec zeruje globalny `Runtime._instance`;
+      tu pierwszy utworzony obiekt Runtime jest wspólny dla wszystkich sesji
+      (jak jeden Runtime serwera),
+    - każdy przebieg tworzy nową `ScriptCache`, więc sesje kompilowałyby `app.py`
+      równolegle (`ast.parse` w CPython 3.11 nie jest na to odporny); tu jest
+      jedna wspólna pamięć skompilowanego skryptu,
+    - każdy przebieg podmienia `config.get_option`, żeby włączyć `global.appTest`,
+      a przeplatające się przebiegi przywracałyby sobie wartość domyślną; tu
+      opcja jest włączona na cały test.
+    """
+    from unittest.mock import patch
+
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import local_script_runner
+    from streamlit.testing.v1.util import patch_config_options
+
+    pinned: List[Runtime] = []
+    pin_lock = threading.Lock()
+
+    def instance(cls) -> Runtime:
+        with pin_lock:
+            if not pinned:
+                if cls._instance is None:
+                    raise RuntimeError("Runtime hasn't been created!")
+                pinned.append(cls._instance)
+            return pinned[0]
+
+    def exists(cls) -> bool:
+        return bool(pinned) or cls._instance is not None
+
+    shared_cache = ScriptCache()
+    with patch.object(Runtime, "instance", classmethod(instance)), \
+            patch.object(Runtime, "exists", classmethod(exists)), \
+            patch.object(local_script_runner, "ScriptCache", lambda: shared_cache), \
+            patch_config_options({"global.appTest": True}):
+        yield
+
+
+def _first_error(app) -> Optional[str]:
+    if app.exception:
+        return f"wyjątek: {app.exception[0].message}"
+    if app.error:
+        return f"błąd: {app.error[0].value}"
+    return None
+
+
+def _click(app, label: str) -> bool:
+    for button in app.button:
+        if button.label == label:
+            button.click()
+            return True
+    return False
+
+
+def run_session(
+    session_id: int,
+    upload: Path,
+    app_path: Path = APP_PATH,
+    timeout: float = 120.0,
+    summarize: bool = True,
+) -> Dict:
+    """
+    Przeprowadza jedną sesję użytkownika i mierzy czas każdego kroku.
+
+    Returns:
+        dict: {'session', 'ok', 'error', 'steps': {krok: sekundy}, 'cached', 'app'}
+            ('cached' - kroki pominięte, bo wynik był gotowy; 'app' to obiekt
+            AppTest - trzymany do końca testu jak żywa sesja)
+    """
+    from streamlit.testing.v1 import AppTest
+
+    result: Dict = {
+        "session": session_id, "ok": False, "error": None, "steps": {}, "cached": [], "app": None,
+    }
+    started = time.perf_counter()
+
+    def step(name: str, action) -> None:
+        step_started = time.perf_counter()
+        action()
+        result["steps"][name] = time.perf_counter() - step_started
+        error = _first_error(app)
+        if error:
+            raise RuntimeError(f"{name}: {error}")
+
+    try:
+        app = AppTest.from_file(str(app_path), default_timeout=timeout)
+        result["app"] = app
+        step("load", app.run)
+        if not app.session_state["api_key_verified"]:
+            raise RuntimeError("load: klucz API nie został zweryfikowany")
+        uploaders = app.get("file_uploader")
+        if not uploaders:
+            raise RuntimeError("upload: brak pola przesyłania pliku")
+        uploaders[0].set_value((upload.name, upload.read_bytes(), "audio/mpeg"))
+        step("upload", app.run)
+        # Plik przetworzony wcześniej (np. ten sam plik w innej sesji) - gotowa transkrypcja
+        if not app.text_area:
+            if not _click(app, TRANSCRIBE_BUTTON):
+                raise RuntimeError("upload: brak przycisku transkrypcji")
+            step("transcribe", app.run)
+            if not app.text_area:
+                raise RuntimeError("transcribe: brak transkrypcji na stronie")
+        else:
+            result["cached"].append("transcribe")
+        if summarize:
+            if _click(app, SUMMARY_BUTTON):
+                step("summarize", app.run)
+            else:
+                result["cached"].append("summarize")
+            if not any(header.value == SUMMARY_HEADER for header in app.subheader):
+                raise RuntimeError("summarize: brak podsumowania na stronie")
+        result["ok"] = True
+    except (RuntimeError, OSError) as exc:
+        result["error"] = str(exc)
+    result["steps"]["total"] = time.perf_counter() - started
+    return result
+
+
+def run_load_test(
+    sessions: int = 10,
+    concurrency: Optional[int] = None,
+    audio_seconds: int = 60,
+    bitrate: str = "64k",
+    same_file: bool = False,
+    summarize: bool = True,
+    latency=0.1,
+    error_rate: float = 0.0,
+    ramp_up: float = 0.0,
+    timeout: float = 120.0,
+    app_path: Path = APP_PATH,
+    workdir: Optional[Path] = None,
+) -> Dict:
+    """
+    Uruchamia `sessions` sesji (najwyżej `concurrency` jednocześnie) i zwraca raport.
+
+    Args:
+        sessions (int): Liczba sesji użytkowników
+        concurrency (int, optional): Liczba równoczesnych sesji (domyślnie wszystkie)
+        audio_seconds (int): Długość przesyłanego nagrania
+        bitrate (str): Bitrate MP3 nagrania (wpływa na rozmiar przesyłanego pliku)
+        same_file (bool): Wszystkie sesje przesyłają ten sam plik (deduplikacja)
+        summarize (bool): Czy sesja generuje też podsumowanie
+        latency (float | str | LatencyModel): Opóźnienie fałszywego API
+        error_rate (float): Odsetek odpowiedzi 5xx fałszywego API
+        ramp_up (float): Czas (s), w którym startują kolejne sesje
+        timeout (float): Limit czasu jednego kroku sesji
+        app_path (Path): Ścieżka do `app.py`
+        workdir (Path, optional): Katalog roboczy aplikacji (domyślnie tymczasowy)
+
+    Returns:
+        dict: Raport - patrz `format_report()`
+    """
+    concurrency = max(1, min(concurrency or sessions, sessions))
+    with tempfile.TemporaryDirectory(prefix="audio2tekst_load_") as tmp:
+        tmp_path = Path(tmp)
+        workdir = Path(workdir) if workdir is not None else tmp_path / "app"
+        workdir.mkdir(parents=True, exist_ok=True)
+        samples_dir = tmp_path / "samples"
+        samples_dir.mkdir()
+        uploads = [
+            generate_sample(samples_dir / f"sesja_{i}.mp3", audio_seconds, 440 if same_file else 200 + 10 * i, bitrate)
+            for i in range(1 if same_file else sessions)
+        ]
+        if same_file:
+            uploads = uploads * sessions
+        upload_mb = uploads[0].stat().st_size / 1024 / 1024
+        # Osobne nagranie rozgrzewki - inaczej sesja z tym samym plikiem trafiłaby w gotową transkrypcję
+        warmup = generate_sample(samples_dir / "rozgrzewka.mp3", 5, 100, bitrate)
+
+        with FakeOpenAIServer(latency=latency, error_rate=error_rate) as server, \
+                _app_environment(workdir, server.url), _concurrent_sessions():
+            # Rozgrzewka: import modułów i zasoby `st.cache_resource` nie obciążają sesji
+            run_session(-1, warmup, app_path, timeout, summarize=False)
+            process = psutil.Process()
+            rss_start = process.memory_info().rss
+            started = time.perf_counter()
+            with _MemorySampler() as sampler, ThreadPoolExecutor(max_workers=concurrency) as pool:
+                futures = []
+                for i in range(sessions):
+                    futures.append(pool.submit(run_session, i, uploads[i], app_path, timeout, summarize))
+                    if ramp_up and i < sessions - 1:
+                        time.sleep(ramp_up / sessions)
+                results = [future.result() for future in futures]
+            wall_seconds = time.perf_counter() - started
+            # Obiekty AppTest są nadal w `results`, więc RSS obejmuje stan żywych sesji
+            rss_end = process.memory_info().rss
+            rss_peak = max(sampler.peak_rss, rss_end)
+            api_stats = server.stats()
+
+    failures = [r for r in results if not r["ok"]]
+    latency_report = {}
+    for name in STEPS:
+        values = [r["steps"][name] for r in results if r["ok"] and name in r["steps"]]
+        if values:
+            latency_report[name] = {f"p{q}": percentile(values, q) for q in PERCENTILES}
+            latency_report[name]["max"] = max(values)
+    return {
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "upload_mb": upload_mb,
+        "wall_seconds": wall_seconds,
+        "sessions_per_minute": 60 * (sessions - len(failures)) / wall_seconds if wall_seconds else 0.0,
+        "failures": len(failures),
+        "failure_rate": len(failures) / sessions,
+        "cached_sessions": sum(1 for r in results if r["cached"]),
+        "errors": [f"sesja {r['session']}: {r['error']}" for r in failures],
+        "latency": latency_report,
+        "rss_start_mb": rss_start / 1024 / 1024,
+        "rss_end_mb": rss_end / 1024 / 1024,
+        "rss_peak_mb": rss_peak / 1024 / 1024,
+        "rss_per_session_mb": max(rss_end - rss_start, 0) / sessions / 1024 / 1024,
+        "peak_rss_per_session_mb": max(rss_peak - rss_start, 0) / concurrency / 1024 / 1024,
+        "api": api_stats,
+        "scheduler": get_scheduler().stats(),
+    }
+
+
+def format_report(report: Dict) -> str:
+    """Zwraca raport testu obciążenia w postaci tekstowej tabeli."""
+    lines = [
+        f"Sesje: {report['sessions']} (równocześnie {report['concurrency']}), "
+        f"plik {report['upload_mb']:.2f} MB, czas {report['wall_seconds']:.1f} s, "
+        f"{report['sessions_per_minute']:.1f} sesji/min",
+        f"Błędy: {report['failures']} ({report['failure_rate']:.0%}), "
+        f"sesje z gotowym wynikiem: {report['cached_sessions']}",
+        "",
+        f"{'krok':<12}" + "".join(f"{f'p{q}':>9}" for q in PERCENTILES) + f"{'max':>9}",
+    ]
+    for name, stats in report["latency"].items():
+        lines.append(
+            f"{name:<12}" + "".join(f"{stats[f'p{q}']:>9.2f}" for q in PERCENTILES) + f"{stats['max']:>9.2f}"
+        )
+    lines += [
+        "",
+        f"RSS: start {report['rss_start_mb']:.0f} MB, koniec {report['rss_end_mb']:.0f} MB, "
+        f"szczyt {report['rss_peak_mb']:.0f} MB",
+        f"Przyrost RSS na sesję: {report['rss_per_session_mb']:.1f} MB (stan sesji), "
+        f"{report['peak_rss_per_session_mb']:.1f} MB (szczyt na równoczesną sesję)",
+        f"API: {sum(report['api']['requests'].values())} żądań, "
+        f"maks. {report['api']['peak_in_flight']} równocześnie, statusy {report['api']['statuses']}",
+        f"FFmpeg: maks. {report['scheduler']['peak_running']} procesów, "
+        f"maks. kolejka {report['scheduler']['peak_queued']}",
+    ]
+    lines += [f"  {error}" for error in report["errors"][:10]]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Test obciążenia aplikacji Audio2Tekst (AppTest)")
+    parser.add_argument("--sessions", type=int, default=10, help="Liczba sesji użytkowników")
+    parser.add_argument("--concurrency", type=int, default=None, help="Równoczesne sesje (domyślnie wszystkie)")
+    parser.add_argument("--audio-seconds", type=int, default=60, help="Długość przesyłanego nagrania (s)")
+    parser.add_argument("--bitrate", default="64k", help="Bitrate MP3 przesyłanego nagrania")
+    parser.add_argument("--same-file", action="store_true", help="Wszystkie sesje przesyłają ten sam plik")
+    parser.add_argument("--no-summary", action="store_true", help="Pomija generowanie podsumowania")
+    parser.add_argument("--latency", default="0.1", help="Opóźnienie API, np. 0.3 lub lognormal:0.8:0.4")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Odsetek odpowiedzi 5xx API")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="Czas startu wszystkich sesji (s)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Limit czasu kroku sesji (s)")
+    parser.add_argument("--app", type=Path, default=APP_PATH, help="Ścieżka do app.py")
+    parser.add_argument("--workdir", type=Path, default=None, help="Katalog roboczy aplikacji (domyślnie tymczasowy)")
+    parser.add_argument("--json", type=Path, default=None, help="Zapisz raport do pliku JSON")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    report = run_load_test(
+        sessions=args.sessions,
+        concurrency=args.concurrency,
+        audio_seconds=args.audio_seconds,
+        bitrate=args.bitrate,
+        same_file=args.same_file,
+        summarize=not args.no_summary,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        ramp_up=args.ramp_up,
+        timeout=args.timeout,
+        app_path=args.app.resolve(),
+        workdir=args.workdir.resolve() if args.workdir else None,
+    )
+    print(format_report(report))
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2, ensure_ascii=False, default=str), encoding="utf-8")
+    return 1 if report["failures"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
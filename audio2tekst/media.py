@@ -0,0 +1,640 @@
+"""
+Operacje na plikach audio/video wykonywane przez FFmpeg/FFprobe.
+
+Analiza pliku (długość, strumienie), wyodrębnianie ścieżki audio z plików
+video przy przyjęciu pliku oraz dzielenie audio na fragmenty dla Whisper API.
+FFmpeg przetwarza pliki strumieniowo, więc zużycie pamięci nie zależy od
+rozmiaru pliku; fragmenty trafiają do plików tymczasowych (`split_audio`)
+albo prosto do pamięci (`ChunkStream`, ograniczona liczba fragmentów naraz).
+
+Podział przyjmuje opcjonalny zakres nagrania (`start`, `end` w sekundach
+oryginału): fragmenty są wycinane tylko z tego zakresu z wyszukiwaniem po
+stronie wejścia, więc 10 minut z 3-godzinnego nagrania kosztuje 10 minut pracy.
+"""
+
+import contextvars
+import io
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import struct
+import subprocess  # nosec B404 # Bezpieczne wywoływanie FFmpeg
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+from audio2tekst import metrics
+from audio2tekst.scheduler import get_scheduler
+from audio2tekst.scratch import ScratchSpace
+from audio2tekst.system import check_dependencies
+
+logger = logging.getLogger(__name__)
+
+CHUNK_MS = 5 * 60 * 1000  # 5 minut w ms
+# Ścieżka audio z plików video: kopiowana bez rekompresji, gdy kodek pasuje
+# do kontenera akceptowanego przez Whisper API, w przeciwnym razie kodowana do MP3
+AUDIO_COPY_CONTAINERS = {"aac": ".m4a", "mp3": ".mp3", "opus": ".webm", "vorbis": ".webm"}
+AUDIO_TRANSCODE_ARGS = ["-c:a", "libmp3lame", "-ac", "1", "-b:a", "64k"]
+# Audio bez kompresji lub bezstratne (WAV, FLAC) albo o dużej przepływności jest
+# przy przyjęciu kodowane do MP3 - inaczej 5-minutowy fragment przekracza 25 MB
+LOSSLESS_CODECS = {"flac", "alac", "wavpack", "ape", "tta", "mlp", "truehd"}
+MAX_INGEST_BITRATE = 320_000  # b/s - więcej niż najwyższa przepływność MP3
+EXTRACT_TIMEOUT = 60 * 60  # 1 godzina na wyodrębnienie audio z dużego pliku
+MIN_TAIL_SEC = 1.0  # Najkrótszy samodzielny fragment na końcu nagrania
+# Kontenery, które FFmpeg zapisuje sekwencyjnie (do potoku) -> nazwa formatu wyjścia
+PIPE_MUXERS = {".mp3": "mp3", ".wav": "wav", ".webm": "webm"}
+STREAM_PREFETCH = 2  # Fragmenty wycinane do pamięci z wyprzedzeniem
+TIME_PATTERN = re.compile(r"^(?:(\d+):)?(?:(\d+):)?(\d+(?:[.,]\d+)?)$")
+
+
+def parse_time(value: Union[str, float, int, None]) -> Optional[float]:
+    """
+    Czas w sekundach z liczby albo tekstu `[[GG:]MM:]SS[.ms]` (pusty tekst lub None = brak).
+
+    Raises:
+        ValueError: Gdy wartość nie jest poprawnym czasem
+    """
+    if value is None or isinstance(value, (int, float)):
+        if value is not None and value < 0:
+            raise ValueError(f"Czas nie może być ujemny: {value}")
+        return None if value is None else float(value)
+    if not isinstance(value, str):
+        raise ValueError(f"Nieprawidłowy czas: {value!r}")
+    text = value.strip()
+    if not text:
+        return None
+    match = TIME_PATTERN.match(text)
+    if match is None:
+        raise ValueError(f"Nieprawidłowy czas: '{value}' (oczekiwano sekund lub GG:MM:SS)")
+    first, second, seconds = match.groups()
+    hours, minutes = (first, second) if second is not None else (None, first)
+    return int(hours or 0) * 3600 + int(minutes or 0) * 60 + float(seconds.replace(",", "."))
+
+
+def clip_range(duration: float, start: float = 0.0, end: Optional[float] = None) -> Tuple[float, float]:
+    """
+    Zakres nagrania (początek, koniec) w sekundach przycięty do jego długości.
+
+    Raises:
+        ValueError: Gdy zakres jest pusty (np. początek za końcem nagrania)
+    """
+    clipped_end = duration if end is None else min(end, duration)
+    if start < 0 or start >= clipped_end:
+        raise ValueError(
+            f"Pusty zakres nagrania: {start:.1f}-{clipped_end:.1f} s (długość nagrania: {duration:.1f} s)"
+        )
+    return start, clipped_end
+
+
+@metrics.timed("probe")
+def get_duration(file_path: Path, start: float = 0.0, end: Optional[float] = None) -> float:
+    """
+    Zwraca długość pliku audio/video w sekundach przy użyciu ffprobe.
+    
+    Funkcja wykorzystuje narzędzie ffprobe do analizy metadanych pliku
+    i wyciągnięcia informacji o długości trwania w sekundach.
+    
+    Args:
+        file_path (Path): Ścieżka do pliku audio/video
+        start (float): Początek zakresu w sekundach
+        end (float, optional): Koniec zakresu w sekundach (None = koniec nagrania)
+    
+    Returns:
+        float: Długość pliku (albo zakresu `start`-`end` przyciętego do pliku) w sekundach
+    
+    Raises:
+        RuntimeError: Gdy ffprobe nie jest dostępne lub wystąpi błąd podczas analizy
+        ValueError: Gdy zakres leży poza nagraniem
+    """
+    # Sprawdź dostępność ffprobe
+    dependencies_info = check_dependencies()
+    if not dependencies_info["ffprobe"]["available"]:
+        raise RuntimeError("FFprobe nie jest dostępne w systemie. Zainstaluj FFmpeg.")
+
+    ffprobe_cmd = duration_command(dependencies_info["ffprobe"]["path"], file_path)
+
+    try:
+        result = get_scheduler().run(
+            ffprobe_cmd,
+            capture_output=True,
+            text=True,
+            timeout=30,  # timeout dla bezpieczeństwa
+            check=True,
+        )
+        duration = float(result.stdout.strip())
+    except subprocess.TimeoutExpired as exc:
+        raise RuntimeError("Przekroczono czas oczekiwania na analizę pliku") from exc
+    except subprocess.CalledProcessError as exc:
+        raise RuntimeError(f"Błąd podczas analizy pliku: {exc}") from exc
+    except ValueError as exc:
+        raise RuntimeError(f"Nie można odczytać długości pliku: {exc}") from exc
+    if start or end is not None:
+        range_start, range_end = clip_range(duration, start, end)
+        return range_end - range_start
+    return duration
+
+
+def split_audio(
+    file_path: Path,
+    chunk_ms: int = CHUNK_MS,
+    scratch: Optional[ScratchSpace] = None,
+    start: float = 0.0,
+    end: Optional[float] = None,
+):
+    """
+    Dzieli długie pliki audio na mniejsze części do przetworzenia (chunking).
+
+    Każdy segment jest wycinany z wyszukiwaniem po stronie wejścia (`-ss` przed `-i`),
+    więc FFmpeg nie czyta pliku od początku dla każdego kolejnego fragmentu.
+    Z zakresem `start`-`end` (sekundy) dzielony jest tylko ten fragment nagrania.
+    Segmenty są wycinane równolegle przez wspólny harmonogram procesów
+    (`audio2tekst.scheduler`), który ogranicza łączną liczbę procesów FFmpeg.
+
+    Z przestrzenią roboczą zadania (`scratch`) fragmenty powstają w jej katalogu
+    (dysk lub tmpfs) w ramach jej limitu bajtów i są usuwane razem z nią;
+    bez niej - w katalogu tymczasowym systemu.
+
+    Raises:
+        RuntimeError: Gdy nie udało się wyciąć segmentu
+        ScratchQuotaExceeded: Gdy fragmenty przekroczyłyby limit przestrzeni roboczej
+        ValueError: Gdy zakres leży poza nagraniem
+    """
+    ffmpeg_exe_path = _ffmpeg_path()
+    duration = get_duration(file_path)
+    file_size = file_path.stat().st_size
+    planned = plan_segments(duration, chunk_ms, start, end)
+    segments = []
+    for i, (segment_start, length) in enumerate(planned):
+        if scratch is not None:
+            tmp_path = scratch.new_file(suffix=file_path.suffix)
+        else:
+            fd, tmp = tempfile.mkstemp(suffix=file_path.suffix, prefix="audio2tekst_")
+            os.close(fd)
+            tmp_path = Path(tmp)
+        segments.append((i, segment_start, length, tmp_path))
+
+    def cut_segment(segment) -> Path:
+        i, start, length, tmp_path = segment
+        ffmpeg_cmd = segment_command(ffmpeg_exe_path, file_path, start, length, tmp_path)
+        # Segment bez rekompresji zajmuje w przybliżeniu swoją część pliku źródłowego
+        estimate = int(file_size * length / duration) if duration else file_size
+        if scratch is not None:
+            scratch.reserve(estimate)
+        try:
+            get_scheduler().run(
+                ffmpeg_cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                timeout=300,
+                check=True,
+                text=True,
+            )
+        except subprocess.TimeoutExpired as exc:
+            raise RuntimeError(f"Przekroczono czas oczekiwania podczas dzielenia pliku (segment {i+1})") from exc
+        except subprocess.CalledProcessError as exc:
+            logger.error("FFmpeg error: %s", exc.stderr)
+            raise RuntimeError(f"Błąd podczas dzielenia pliku (segment {i+1}): {exc}") from exc
+        finally:
+            if scratch is not None:
+                scratch.unreserve(estimate)
+        if scratch is not None:
+            scratch.check_quota()
+        return tmp_path
+
+    # Z zakresem czytana jest tylko jego część pliku
+    range_bytes = int(file_size * sum(length for _, length in planned) / duration) if duration else file_size
+    with metrics.stage("split", bytes_in=range_bytes) as split_stage:
+        try:
+            parts = get_scheduler().map(cut_segment, segments)
+        except RuntimeError:
+            for _i, _start, _length, tmp_path in segments:
+                tmp_path.unlink(missing_ok=True)
+            raise
+        split_stage.bytes_out = sum(part.stat().st_size for part in parts)
+    return parts
+
+
+class AudioChunk(io.BytesIO):
+    """
+    Fragment audio w pamięci przekazywany silnikowi transkrypcji jak otwarty plik.
+
+    Atrybut `name` (np. 'chunk_0003.mp3') wyznacza nazwę pliku w żądaniu
+    do Whisper API, a `size` to rozmiar fragmentu w bajtach.
+    """
+
+    def __init__(self, data: bytes, name: str):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+    def __str__(self) -> str:
+        return self.name
+
+
+def _fix_wav_header(data: bytearray) -> None:
+    """Uzupełnia rozmiary RIFF i `data` w nagłówku WAV zapisanym do potoku (FFmpeg wpisuje 0xFFFFFFFF)."""
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return
+    struct.pack_into("<I", data, 4, len(data) - 8)
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id = bytes(data[offset:offset + 4])
+        if chunk_id == b"data":
+            struct.pack_into("<I", data, offset + 4, len(data) - offset - 8)
+            return
+        (chunk_size,) = struct.unpack_from("<I", data, offset + 4)
+        offset += 8 + chunk_size + (chunk_size & 1)
+
+
+def pipe_segment_command(ffmpeg_path: str, file_path: Path, start: float, length: float, muxer: str) -> List[str]:
+    """Polecenie FFmpeg wypisujące segment bez rekompresji na standardowe wyjście."""
+    return [
+        ffmpeg_path, "-v", "error", "-ss", str(start), "-i", str(file_path),
+        "-t", str(length), "-c", "copy", "-f", muxer, "pipe:1"
+    ]
+
+
+def can_stream(file_path: Path) -> bool:
+    """Czy fragmenty pliku można przesłać z FFmpeg przez potok (kontener zapisywany sekwencyjnie)."""
+    return file_path.suffix.lower() in PIPE_MUXERS
+
+
+class ChunkStream:
+    """
+    Fragmenty pliku audio wycinane przez FFmpeg prosto do pamięci, bez plików tymczasowych.
+
+    Każdy segment jest kopiowany (`-c copy`) na standardowe wyjście FFmpeg
+    i przekazywany dalej jako `AudioChunk`. Iteracja zwraca fragmenty
+    w kolejności odtwarzania, wycinając z wyprzedzeniem co najwyżej `prefetch`
+    kolejnych, więc w pamięci jest najwyżej `prefetch + 1` fragmentów
+    niezależnie od długości nagrania. Procesy FFmpeg działają w ramach
+    wspólnego harmonogramu (`audio2tekst.scheduler`).
+
+    Args:
+        file_path (Path): Plik audio w kontenerze z `PIPE_MUXERS`
+        chunk_ms (int): Długość fragmentu w ms
+        prefetch (int): Liczba fragmentów wycinanych z wyprzedzeniem
+        start (float): Początek zakresu nagrania w sekundach
+        end (float, optional): Koniec zakresu (None = koniec nagrania)
+
+    Raises:
+        ValueError: Gdy kontenera pliku nie da się zapisać do potoku lub zakres leży poza nagraniem
+        RuntimeError: Gdy FFmpeg/FFprobe nie jest dostępny lub analiza pliku się nie powiodła
+    """
+
+    def __init__(
+        self,
+        file_path: Path,
+        chunk_ms: int = CHUNK_MS,
+        prefetch: int = STREAM_PREFETCH,
+        start: float = 0.0,
+        end: Optional[float] = None,
+    ):
+        if not can_stream(file_path):
+            raise ValueError(f"Kontener {file_path.suffix} nie obsługuje zapisu do potoku")
+        self.file_path = file_path
+        self.muxer = PIPE_MUXERS[file_path.suffix.lower()]
+        self.prefetch = max(prefetch, 1)
+        self.ffmpeg_path = _ffmpeg_path()
+        self.duration = get_duration(file_path)
+        self.segments = plan_segments(self.duration, chunk_ms, start, end)
+        self.peak_in_flight = 0
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    def _cut(self, index: int) -> AudioChunk:
+        start, length = self.segments[index]
+        ffmpeg_cmd = pipe_segment_command(self.ffmpeg_path, self.file_path, start, length, self.muxer)
+        with metrics.stage("split") as split_stage:
+            try:
+                result = get_scheduler().run(ffmpeg_cmd, capture_output=True, timeout=300, check=True)
+            except subprocess.TimeoutExpired as exc:
+                raise RuntimeError(
+                    f"Przekroczono czas oczekiwania podczas dzielenia pliku (segment {index+1})"
+                ) from exc
+            except subprocess.CalledProcessError as exc:
+                logger.error("FFmpeg error: %s", exc.stderr.decode("utf-8", "replace"))
+                raise RuntimeError(f"Błąd podczas dzielenia pliku (segment {index+1}): {exc}") from exc
+            data = bytearray(result.stdout)
+            if self.muxer == "wav":
+                _fix_wav_header(data)
+            split_stage.bytes_out = len(data)
+        return AudioChunk(bytes(data), f"chunk_{index:04d}{self.file_path.suffix.lower()}")
+
+    def __iter__(self) -> Iterator[AudioChunk]:
+        pending: Deque[Future] = deque()
+        next_index = 0
+        executor = ThreadPoolExecutor(max_workers=self.prefetch, thread_name_prefix="audio2tekst-chunk")
+        try:
+            while pending or next_index < len(self.segments):
+                while next_index < len(self.segments) and len(pending) < self.prefetch:
+                    # Kopia kontekstu przypisuje pomiary podziału do bieżącego zadania
+                    pending.append(executor.submit(contextvars.copy_context().run, self._cut, next_index))
+                    next_index += 1
+                self.peak_in_flight = max(self.peak_in_flight, len(pending))
+                yield pending.popleft().result()
+        finally:
+            # Przerwana iteracja (błąd transkrypcji, zatrzymanie sesji) porzuca niewycięte fragmenty
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def use_streaming(file_path: Path, streaming: Optional[bool] = None) -> bool:
+    """Czy fragmenty pliku będą przesyłane strumieniowo (`CHUNK_STREAMING` i kontener pliku)."""
+    if streaming is None:
+        streaming = os.getenv("CHUNK_STREAMING", "true").lower() == "true"
+    return streaming and can_stream(file_path)
+
+
+def chunk_source(
+    file_path: Path,
+    chunk_ms: int = CHUNK_MS,
+    scratch: Optional[ScratchSpace] = None,
+    streaming: Optional[bool] = None,
+    start: float = 0.0,
+    end: Optional[float] = None,
+) -> Union[ChunkStream, List[Path]]:
+    """
+    Zwraca fragmenty pliku (albo jego zakresu `start`-`end`) dla `pipeline.transcribe_chunks`.
+
+    Gdy przesyłanie strumieniowe jest włączone (`CHUNK_STREAMING`, domyślnie
+    tak) i kontener pliku można zapisać do potoku, fragmenty trafiają
+    z FFmpeg prosto do pamięci (`ChunkStream`). W przeciwnym razie (np. M4A,
+    którego FFmpeg nie zapisze sekwencyjnie) plik jest dzielony na pliki
+    tymczasowe przez `split_audio`.
+    """
+    if use_streaming(file_path, streaming):
+        return ChunkStream(
+            file_path, chunk_ms, int(os.getenv("CHUNK_PREFETCH", str(STREAM_PREFETCH))), start=start, end=end
+        )
+    return split_audio(file_path, chunk_ms, scratch=scratch, start=start, end=end)
+
+
+def duration_command(ffprobe_path: str, file_path: Path) -> List[str]:
+    """Polecenie ffprobe wypisujące długość pliku w sekundach."""
+    return [
+        ffprobe_path,
+        "-v",
+        "error",
+        "-show_entries",
+        "format=duration",
+        "-of",
+        "default=noprint_wrappers=1:nokey=1",
+        str(file_path),
+    ]
+
+
+def plan_segments(
+    duration: float, chunk_ms: int = CHUNK_MS, start: float = 0.0, end: Optional[float] = None
+) -> List[Tuple[float, float]]:
+    """
+    Dzieli nagranie o długości `duration` sekund (albo jego zakres `start`-`end`)
+    na segmenty (początek w sekundach oryginału, długość).
+
+    Końcówka krótsza niż MIN_TAIL_SEC (np. wypełnienie kodera MP3) jest
+    dołączana do poprzedniego segmentu - Whisper API odrzuca tak krótkie pliki.
+
+    Raises:
+        ValueError: Gdy zakres leży poza nagraniem
+    """
+    if start or end is not None:
+        start, end = clip_range(duration, start, end)
+    else:
+        end = duration
+    length = end - start
+    seg_sec = chunk_ms / 1000
+    segment_count = math.ceil(length / seg_sec)
+    if segment_count > 1 and length - (segment_count - 1) * seg_sec < MIN_TAIL_SEC:
+        segment_count -= 1
+    segments = []
+    for i in range(segment_count):
+        offset = i * seg_sec
+        segments.append((start + offset, seg_sec if i < segment_count - 1 else length - offset))
+    return segments
+
+
+def segment_command(ffmpeg_path: str, file_path: Path, start: float, length: float, out_path: Path) -> List[str]:
+    """Polecenie FFmpeg wycinające segment bez rekompresji (wyszukiwanie przed `-i`)."""
+    return [
+        ffmpeg_path, "-y", "-ss", str(start), "-i", str(file_path),
+        "-t", str(length), "-c", "copy", str(out_path)
+    ]
+
+
+def cut_range(file_path: Path, start: float, end: Optional[float], scratch: ScratchSpace) -> Path:
+    """
+    Wycina zakres nagrania bez rekompresji do pliku w przestrzeni roboczej (np. przed VAD).
+
+    Raises:
+        RuntimeError: Gdy FFmpeg zakończy się błędem
+        ValueError: Gdy zakres leży poza nagraniem
+    """
+    start, end = clip_range(get_duration(file_path), start, end)
+    out_path = scratch.new_file(suffix=file_path.suffix, prefix="range_")
+    try:
+        with metrics.stage("split") as split_stage:
+            get_scheduler().run(
+                segment_command(_ffmpeg_path(), file_path, start, end - start, out_path),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                timeout=EXTRACT_TIMEOUT,
+                check=True,
+                text=True,
+            )
+            split_stage.bytes_out = out_path.stat().st_size
+    except subprocess.TimeoutExpired as exc:
+        raise RuntimeError("Przekroczono czas oczekiwania podczas wycinania zakresu nagrania") from exc
+    except subprocess.CalledProcessError as exc:
+        logger.error("FFmpeg error: %s", exc.stderr)
+        raise RuntimeError(f"Błąd podczas wycinania zakresu nagrania: {exc}") from exc
+    scratch.check_quota()
+    return out_path
+
+
+def _ffmpeg_path() -> str:
+    """Zwraca ścieżkę do FFmpeg lub zgłasza RuntimeError, gdy go brak."""
+    dependencies_info = check_dependencies()
+    if not dependencies_info["ffmpeg"]["available"]:
+        raise RuntimeError("FFmpeg nie jest dostępne w systemie. Zainstaluj FFmpeg.")
+    return dependencies_info["ffmpeg"]["path"]
+
+
+@metrics.timed("probe")
+def probe_streams(file_path: Path) -> List[Dict]:
+    """
+    Zwraca listę strumieni pliku (typ i kodek) przy użyciu ffprobe.
+
+    Returns:
+        list: Słowniki z kluczami 'codec_type' ('audio', 'video', ...), 'codec_name'
+            i 'bit_rate' (b/s, 0 = nieznana)
+
+    Raises:
+        RuntimeError: Gdy ffprobe nie jest dostępne lub wystąpi błąd podczas analizy
+    """
+    dependencies_info = check_dependencies()
+    if not dependencies_info["ffprobe"]["available"]:
+        raise RuntimeError("FFprobe nie jest dostępne w systemie. Zainstaluj FFmpeg.")
+    ffprobe_cmd = [
+        dependencies_info["ffprobe"]["path"],
+        "-v", "error",
+        "-show_entries", "stream=codec_type,codec_name,bit_rate:stream_disposition=attached_pic",
+        "-of", "json",
+        str(file_path),
+    ]
+    try:
+        result = get_scheduler().run(
+            ffprobe_cmd, capture_output=True, text=True, timeout=30, check=True
+        )
+        streams = json.loads(result.stdout or "{}").get("streams", [])
+    except subprocess.TimeoutExpired as exc:
+        raise RuntimeError("Przekroczono czas oczekiwania na analizę pliku") from exc
+    except subprocess.CalledProcessError as exc:
+        raise RuntimeError(f"Błąd podczas analizy pliku: {exc}") from exc
+    except ValueError as exc:
+        raise RuntimeError(f"Nie można odczytać strumieni pliku: {exc}") from exc
+    return [
+        {
+            "codec_type": stream.get("codec_type", ""),
+            "codec_name": stream.get("codec_name", ""),
+            "bit_rate": int(stream["bit_rate"]) if str(stream.get("bit_rate", "")).isdigit() else 0,
+        }
+        for stream in streams
+        # Okładki albumów w MP3/M4A są "video", ale nie są filmem
+        if not stream.get("disposition", {}).get("attached_pic")
+    ]
+
+
+def has_video(streams: List[Dict]) -> bool:
+    """Sprawdza, czy plik zawiera strumień video."""
+    return any(stream["codec_type"] == "video" for stream in streams)
+
+
+def needs_transcode(streams: List[Dict]) -> bool:
+    """
+    Sprawdza, czy pierwsza ścieżka audio jest zbyt obszerna, by przechowywać ją bez zmian.
+
+    Dotyczy audio bez kompresji (PCM), kodeków bezstratnych i przepływności
+    powyżej `MAX_INGEST_BITRATE` - ich fragmenty przekraczałyby limit Whisper API.
+    """
+    audio = [stream for stream in streams if stream["codec_type"] == "audio"]
+    if not audio:
+        return False
+    codec = audio[0]["codec_name"]
+    return (
+        codec.startswith("pcm_")
+        or codec in LOSSLESS_CODECS
+        or audio[0].get("bit_rate", 0) > MAX_INGEST_BITRATE
+    )
+
+
+def extract_audio(src_path: Path, dst_stem: Path, streams: List[Dict], transcode: bool = False) -> Path:
+    """
+    Wyodrębnia pierwszą ścieżkę audio z pliku video do osobnego pliku.
+
+    FFmpeg czyta plik strumieniowo i zapisuje wynik bezpośrednio na dysk,
+    więc pliki wielogigabajtowe są przetwarzane przy stałym zużyciu pamięci.
+    Gdy kodek audio pasuje do kontenera akceptowanego przez Whisper API,
+    strumień jest kopiowany bez rekompresji (chyba że `transcode` - wtedy
+    zawsze powstaje MP3 z `AUDIO_TRANSCODE_ARGS`). Wynik powstaje w pliku
+    tymczasowym obok miejsca docelowego i jest podmieniany atomowo, więc
+    równoczesne przyjęcie tego samego pliku nie zapisuje do wspólnej ścieżki.
+
+    Args:
+        src_path (Path): Plik źródłowy (video)
+        dst_stem (Path): Ścieżka wyniku bez rozszerzenia (rozszerzenie zależy od kodeka)
+        streams (list): Wynik `probe_streams(src_path)`
+        transcode (bool): Czy kodować audio do MP3 zamiast kopiować strumień
+
+    Returns:
+        Path: Ścieżka do pliku z samą ścieżką audio
+
+    Raises:
+        RuntimeError: Gdy plik nie ma ścieżki audio lub FFmpeg zakończy się błędem
+    """
+    audio_codecs = [s["codec_name"] for s in streams if s["codec_type"] == "audio"]
+    if not audio_codecs:
+        raise RuntimeError("Plik nie zawiera ścieżki audio.")
+    copy_ext = None if transcode else AUDIO_COPY_CONTAINERS.get(audio_codecs[0])
+    if copy_ext:
+        dst_path = dst_stem.with_suffix(copy_ext)
+        codec_args = ["-c:a", "copy"]
+    else:
+        dst_path = dst_stem.with_suffix(".mp3")
+        codec_args = AUDIO_TRANSCODE_ARGS
+    fd, part_name = tempfile.mkstemp(prefix=f".{dst_stem.name}.", suffix=dst_path.suffix, dir=dst_path.parent)
+    os.close(fd)
+    part_path = Path(part_name)
+    ffmpeg_cmd = [
+        _ffmpeg_path(), "-y", "-i", str(src_path),
+        "-map", "0:a:0", "-vn", *codec_args, str(part_path),
+    ]
+    try:
+        with metrics.stage("extract", bytes_in=src_path.stat().st_size) as extract_stage:
+            get_scheduler().run(
+                ffmpeg_cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                timeout=EXTRACT_TIMEOUT,
+                check=True,
+                text=True,
+            )
+            extract_stage.bytes_out = part_path.stat().st_size
+        os.replace(part_path, dst_path)
+    except subprocess.TimeoutExpired as exc:
+        raise RuntimeError("Przekroczono czas oczekiwania podczas wyodrębniania audio") from exc
+    except subprocess.CalledProcessError as exc:
+        logger.error("FFmpeg error: %s", exc.stderr)
+        raise RuntimeError(f"Błąd podczas wyodrębniania audio: {exc}") from exc
+    finally:
+        part_path.unlink(missing_ok=True)
+    return dst_path
+
+
+def ingest_media(src_path: Path, dst_stem: Path, move: bool = False) -> Path:
+    """
+    Przyjmuje plik do `uploads/originals`, zachowując tylko to, co potrzebne do transkrypcji.
+
+    Pliki video są zastępowane samą ścieżką audio (dużo mniejszą i gotową do
+    dzielenia). Audio bez kompresji, bezstratne lub o dużej przepływności
+    (`needs_transcode`) jest kodowane do MP3, żeby fragmenty mieściły się
+    w limicie Whisper API; pozostałe pliki audio są przenoszone lub kopiowane
+    bez zmian.
+
+    Args:
+        src_path (Path): Plik źródłowy (np. plik tymczasowy z uploadu lub plik na serwerze)
+        dst_stem (Path): Ścieżka docelowa bez rozszerzenia (np. uploads/originals/<uid>)
+        move (bool): Czy źródło można przenieść/usunąć (plik tymczasowy)
+
+    Returns:
+        Path: Ścieżka do przyjętego pliku audio
+    """
+    streams = probe_streams(src_path)
+    if has_video(streams) or needs_transcode(streams):
+        dst_path = extract_audio(src_path, dst_stem, streams, transcode=needs_transcode(streams))
+        logger.info(
+            "Wyodrębniono audio z %s: %d -> %d bajtów",
+            src_path.name, src_path.stat().st_size, dst_path.stat().st_size,
+        )
+        if move:
+            src_path.unlink(missing_ok=True)
+        return dst_path
+    dst_path = dst_stem.with_suffix(src_path.suffix.lower())
+    if move:
+        os.replace(src_path, dst_path)
+        return dst_path
+    # Kopia powstaje obok celu i jest podmieniana atomowo - przerwane
+    # kopiowanie nie zostawia w uploads/ uciętego oryginału
+    fd, part_name = tempfile.mkstemp(prefix=f".{dst_stem.name}.", suffix=dst_path.suffix, dir=dst_path.parent)
+    os.close(fd)
+    part_path = Path(part_name)
+    try:
+        shutil.copyfile(src_path, part_path)
+        os.replace(part_path, dst_path)
+    finally:
+        part_path.unlink(missing_ok=True)
+    return dst_path
@@ -0,0 +1,310 @@
+"""
+Pomiary etapów przetwarzania (czas, bajty, ponowienia, trafienia w cache).
+
+Każdy etap potoku (pobieranie, analiza, podział, transkrypcja fragmentu,
+podsumowanie, zapis na dysk) jest obejmowany menedżerem kontekstu `stage()`
+albo dekoratorem `timed()`. Zmierzony etap trafia do:
+
+- statystyk zadania (`job_breakdown()`) - zestawienie w panelu bocznym,
+- zagregowanych liczników procesu w formacie tekstowym Prometheusa
+  (`render_prometheus()`, opcjonalny serwer HTTP `start_metrics_server()`),
+- opcjonalnego pliku JSON lines (`configure(jsonl_path=...)`).
+
+Bieżące zadanie i etap są przechowywane w zmiennych kontekstu, więc funkcje
+niżej w stosie wywołań (np. `audio2tekst.media`) nie muszą ich przekazywać.
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Granice kubełków histogramu czasu etapu (sekundy)
+DURATION_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 1800.0)
+MAX_JOBS = 100  # Liczba zadań, dla których przechowywane są szczegółowe pomiary
+
+_current_job: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "audio2tekst_job", default=None
+)
+_current_stage: contextvars.ContextVar[Optional["StageRecord"]] = contextvars.ContextVar(
+    "audio2tekst_stage", default=None
+)
+
+_lock = threading.Lock()
+_totals: Dict[str, Dict] = {}
+_jobs: "OrderedDict[str, List[Dict]]" = OrderedDict()
+_jsonl_path: Optional[Path] = None
+
+
+class StageRecord:
+    """Pomiar jednego wykonania etapu; pola można uzupełniać wewnątrz bloku `stage()`."""
+
+    def __init__(self, name: str, job_id: Optional[str], bytes_in: int = 0):
+        self.name = name
+        self.job_id = job_id
+        self.bytes_in = bytes_in
+        self.bytes_out = 0
+        self.retries = 0
+        self.cache_hit: Optional[bool] = None
+        self.ok = True
+        self.seconds = 0.0
+        self.started_at = time.time()
+
+    def as_dict(self) -> Dict:
+        return {
+            "ts": self.started_at,
+            "job": self.job_id,
+            "stage": self.name,
+            "seconds": round(self.seconds, 6),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "retries": self.retries,
+            "cache_hit": self.cache_hit,
+            "ok": self.ok,
+        }
+
+
+def configure(jsonl_path: Optional[Path] = None) -> None:
+    """Ustawia plik JSON lines, do którego dopisywany jest każdy pomiar (None = wyłączone)."""
+    global _jsonl_path
+    if jsonl_path is not None:
+        jsonl_path = Path(jsonl_path)
+        jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+    with _lock:
+        _jsonl_path = jsonl_path
+
+
+@contextmanager
+def job(job_id: str) -> Iterator[None]:
+    """Przypisuje etapy mierzone w tym bloku do zadania `job_id`."""
+    token = _current_job.set(job_id)
+    try:
+        yield
+    finally:
+        _current_job.reset(token)
+
+
+@contextmanager
+def stage(
+    name: str,
+    bytes_in: int = 0,
+    job_id: Optional[str] = None,
+) -> Iterator[StageRecord]:
+    """
+    Mierzy czas etapu i zapisuje pomiar (również gdy etap zakończy się wyjątkiem).
+
+    Args:
+        name (str): Nazwa etapu, np. 'download', 'split', 'transcribe'
+        bytes_in (int): Rozmiar danych wejściowych
+        job_id (str, optional): Zadanie (domyślnie bieżące zadanie z `job()`)
+
+    Yields:
+        StageRecord: Pomiar, w którym można ustawić `bytes_out`, `cache_hit`
+            lub `job_id` (np. gdy UID jest znany dopiero po hashowaniu)
+    """
+    record = StageRecord(name, job_id or _current_job.get(), bytes_in)
+    token = _current_stage.set(record)
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException:
+        record.ok = False
+        raise
+    finally:
+        record.seconds = time.perf_counter() - started
+        _current_stage.reset(token)
+        _record(record)
+
+
+def timed(name: str) -> Callable:
+    """Dekorator mierzący każde wywołanie funkcji jako etap `name`."""
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def http_request_hook(request) -> None:
+    """
+    Hak zdarzeń klienta HTTP OpenAI: zlicza ponowienia żądań w bieżącym etapie.
+
+    Klient OpenAI oznacza każde ponowienie nagłówkiem `x-stainless-retry-count`.
+    Użycie: `openai.OpenAI(http_client=openai.DefaultHttpxClient(
+    event_hooks={"request": [metrics.http_request_hook]}))`.
+    """
+    record = _current_stage.get()
+    if record is not None and request.headers.get("x-stainless-retry-count", "0") != "0":
+        record.retries += 1
+
+
+async def async_http_request_hook(request) -> None:
+    """Wersja `http_request_hook` dla `openai.AsyncOpenAI` (`DefaultAsyncHttpxClient`)."""
+    http_request_hook(request)
+
+
+def _record(record: StageRecord) -> None:
+    entry = record.as_dict()
+    with _lock:
+        totals = _totals.setdefault(
+            record.name,
+            {
+                "count": 0, "errors": 0, "seconds": 0.0, "bytes_in": 0, "bytes_out": 0,
+                "retries": 0, "cache_hits": 0, "cache_misses": 0,
+                "buckets": [0] * len(DURATION_BUCKETS),
+            },
+        )
+        totals["count"] += 1
+        totals["errors"] += 0 if record.ok else 1
+        totals["seconds"] += record.seconds
+        totals["bytes_in"] += record.bytes_in
+        totals["bytes_out"] += record.bytes_out
+        totals["retries"] += record.retries
+        if record.cache_hit is not None:
+            totals["cache_hits" if record.cache_hit else "cache_misses"] += 1
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if record.seconds <= bound:
+                totals["buckets"][i] += 1
+        if record.job_id:
+            _jobs.setdefault(record.job_id, []).append(entry)
+            _jobs.move_to_end(record.job_id)
+            while len(_jobs) > MAX_JOBS:
+                _jobs.popitem(last=False)
+        jsonl_path = _jsonl_path
+        if jsonl_path is not None:
+            try:
+                with open(jsonl_path, "a", encoding="utf-8") as out:
+                    out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            except OSError as exc:
+                logger.warning("Nie udało się zapisać pomiaru do %s: %s", jsonl_path, exc)
+
+
+def link_job(alias: str, job_id: str) -> None:
+    """
+    Przenosi pomiary zapisane pod tymczasowym identyfikatorem do zadania `job_id`.
+
+    Używane, gdy etap wykonano, zanim znany był UID pliku (np. pobieranie
+    z YouTube rejestrowane pod identyfikatorem filmu).
+    """
+    with _lock:
+        records = _jobs.pop(alias, [])
+        if records:
+            for entry in records:
+                entry["job"] = job_id
+            _jobs[job_id] = records + _jobs.get(job_id, [])
+            _jobs.move_to_end(job_id)
+
+
+def job_records(job_id: str) -> List[Dict]:
+    """Zwraca pomiary zadania w kolejności wykonania."""
+    with _lock:
+        return list(_jobs.get(job_id, []))
+
+
+def job_breakdown(job_id: str) -> List[Dict]:
+    """
+    Zwraca zestawienie czasu zadania pogrupowane po etapach.
+
+    Returns:
+        list: [{'stage', 'count', 'seconds', 'bytes_in', 'bytes_out', 'retries',
+                'cache_hits', 'errors'}] w kolejności pierwszego wystąpienia etapu
+    """
+    rows: "OrderedDict[str, Dict]" = OrderedDict()
+    for entry in job_records(job_id):
+        row = rows.setdefault(
+            entry["stage"],
+            {"stage": entry["stage"], "count": 0, "seconds": 0.0, "bytes_in": 0,
+             "bytes_out": 0, "retries": 0, "cache_hits": 0, "errors": 0},
+        )
+        row["count"] += 1
+        row["seconds"] += entry["seconds"]
+        row["bytes_in"] += entry["bytes_in"]
+        row["bytes_out"] += entry["bytes_out"]
+        row["retries"] += entry["retries"]
+        row["cache_hits"] += 1 if entry["cache_hit"] else 0
+        row["errors"] += 0 if entry["ok"] else 1
+    return list(rows.values())
+
+
+def snapshot() -> Dict[str, Dict]:
+    """Zwraca kopię zagregowanych liczników procesu dla każdego etapu."""
+    with _lock:
+        return {name: {**totals, "buckets": list(totals["buckets"])} for name, totals in _totals.items()}
+
+
+def reset() -> None:
+    """Zeruje wszystkie liczniki i pomiary zadań."""
+    with _lock:
+        _totals.clear()
+        _jobs.clear()
+
+
+def render_prometheus() -> str:
+    """Zwraca liczniki procesu w formacie tekstowym Prometheusa."""
+    totals = snapshot()
+    lines = [
+        "# HELP audio2tekst_stage_duration_seconds Czas wykonania etapu potoku.",
+        "# TYPE audio2tekst_stage_duration_seconds histogram",
+    ]
+    for name, stats in sorted(totals.items()):
+        for bound, count in zip(DURATION_BUCKETS, stats["buckets"]):
+            lines.append(f'audio2tekst_stage_duration_seconds_bucket{{stage="{name}",le="{bound}"}} {count}')
+        lines.append(f'audio2tekst_stage_duration_seconds_bucket{{stage="{name}",le="+Inf"}} {stats["count"]}')
+        lines.append(f'audio2tekst_stage_duration_seconds_sum{{stage="{name}"}} {stats["seconds"]:.6f}')
+        lines.append(f'audio2tekst_stage_duration_seconds_count{{stage="{name}"}} {stats["count"]}')
+    counters = (
+        ("errors", "Liczba etapów zakończonych błędem."),
+        ("bytes_in", "Bajty danych wejściowych etapu."),
+        ("bytes_out", "Bajty danych wyjściowych etapu."),
+        ("retries", "Liczba ponowień żądań API w etapie."),
+        ("cache_hits", "Liczba trafień w pamięć podręczną."),
+        ("cache_misses", "Liczba chybień pamięci podręcznej."),
+    )
+    for key, help_text in counters:
+        metric = f"audio2tekst_stage_{key}_total"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        for name, stats in sorted(totals.items()):
+            lines.append(f'{metric}{{stage="{name}"}} {stats[key]}')
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):  # noqa: N802 - nazwa wymagana przez BaseHTTPRequestHandler
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # noqa: A002 - sygnatura klasy bazowej
+        logger.debug("metrics: " + format, *args)
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Uruchamia w tle serwer HTTP z endpointem `/metrics` (format Prometheusa)."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(
+        target=server.serve_forever, name="audio2tekst-metrics", daemon=True
+    )
+    thread.start()
+    logger.info("Endpoint metryk: http://%s:%d/metrics", host, server.server_address[1])
+    return server
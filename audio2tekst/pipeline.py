@@ -0,0 +1,388 @@
+"""
+Rdzeń potoku transkrypcji niezależny od interfejsu Streamlit.
+
+Transkrypcja fragmentów wybranym silnikiem (`audio2tekst.transcription`),
+czyszczenie tekstu i podsumowanie (map-reduce przez Chat Completions, również
+przyrostowo w trakcie transkrypcji - `RollingSummarizer`).
+Funkcje są używane przez aplikację, testy wydajności i tryby bez interfejsu.
+"""
+
+import contextvars
+import logging
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+import openai
+
+from audio2tekst import media, metrics, transcription
+
+logger = logging.getLogger(__name__)
+
+
+def clean_transcript(transcript_text: str) -> str:
+    """
+    Czyści transkrypcję z typowych artefaktów mowy.
+    """
+    cleaned_text = re.sub(r"\\b(?:em|yhm|um|uh|a{2,}|y{2,})\\b", "", transcript_text, flags=re.IGNORECASE)
+    cleaned_text = re.sub(r"\\s+", " ", cleaned_text)
+    return cleaned_text.strip()
+
+
+def transcribe_chunks(
+    audio_chunks: Union[Sequence[Path], media.ChunkStream],
+    backend: transcription.TranscriptionBackend,
+    language: str = "pl",
+    on_chunk: Optional[Callable[[int, int, Path, int], None]] = None,
+    on_text: Optional[Callable[[int, int, str], None]] = None,
+) -> str:
+    """
+    Transkrybuje kolejne fragmenty silnikiem `backend` i zwalnia je po użyciu.
+
+    Fragmenty to pliki tymczasowe (`media.split_audio`, usuwane po transkrypcji)
+    albo fragmenty w pamięci (`media.ChunkStream`, wycinane w trakcie
+    iteracji). Fragmenty puste są pomijane. Fragment za duży dla silnika lub
+    zakończony błędem przerywa transkrypcję - niepełny tekst (np. bez 5 minut
+    nagrania) nie może trafić do katalogu jako gotowa transkrypcja, a kolejne
+    fragmenty nie są już wysyłane do silnika.
+
+    Args:
+        audio_chunks (list | ChunkStream): Fragmenty w kolejności odtwarzania
+        backend (TranscriptionBackend): Silnik transkrypcji
+        language (str): Język nagrania
+        on_chunk (callable, optional): Wywoływana przed każdym fragmentem
+            z argumentami (numer od 0, liczba fragmentów, ścieżka lub nazwa, rozmiar w bajtach)
+        on_text (callable, optional): Wywoływana po transkrypcji fragmentu
+            z argumentami (numer od 0, liczba fragmentów, oczyszczony tekst)
+
+    Returns:
+        str: Transkrypcje fragmentów rozdzielone znakiem nowej linii
+
+    Raises:
+        RuntimeError: Gdy nie udało się wyciąć fragmentu przesyłanego strumieniowo
+        TranscriptionError: Gdy któryś fragment nie został przetranskrybowany
+    """
+    texts = []
+    chunk_count = len(audio_chunks)
+    chunk_iter = iter(audio_chunks)
+    try:
+        for audio_idx, audio_chunk in enumerate(chunk_iter):
+            in_memory = isinstance(audio_chunk, media.AudioChunk)
+            if in_memory:
+                chunk_size = audio_chunk.size
+            else:
+                chunk_size = audio_chunk.stat().st_size if audio_chunk.exists() else 0
+            if on_chunk is not None:
+                on_chunk(audio_idx, chunk_count, Path(str(audio_chunk)), chunk_size)
+            logger.info(
+                "Fragment %d: %s | Rozmiar: %d bajtów",
+                audio_idx + 1,
+                audio_chunk,
+                chunk_size,
+            )
+            try:
+                if chunk_size == 0:
+                    continue
+                if backend.max_chunk_bytes is not None and chunk_size > backend.max_chunk_bytes:
+                    raise transcription.TranscriptionError(
+                        f"rozmiar {chunk_size / 1024 / 1024:.1f} MB przekracza limit silnika "
+                        f"{backend.name} ({backend.max_chunk_bytes / 1024 / 1024:.0f} MB)"
+                    )
+                with metrics.stage("transcribe", bytes_in=chunk_size) as transcribe_stage:
+                    transcript_text = backend.transcribe(audio_chunk, language)
+                    transcribe_stage.bytes_out = len(transcript_text.encode("utf-8"))
+                texts.append(clean_transcript(transcript_text))
+                if on_text is not None:
+                    on_text(audio_idx, chunk_count, texts[-1])
+            except (OSError, openai.OpenAIError, transcription.TranscriptionError) as exc:
+                logger.error(
+                    "Błąd podczas transkrypcji fragmentu %s: %s",
+                    audio_chunk,
+                    str(exc),
+                )
+                raise transcription.TranscriptionError(
+                    f"Nie udało się przetranskrybować fragmentu {audio_idx + 1}/{chunk_count}: {exc}"
+                ) from exc
+            finally:
+                if in_memory:
+                    audio_chunk.close()
+                else:
+                    _remove_chunk_file(audio_chunk)
+    finally:
+        # Przerwana transkrypcja kończy wycinanie kolejnych fragmentów strumienia
+        close = getattr(chunk_iter, "close", None)
+        if close is not None:
+            close()
+        else:
+            # Pliki fragmentów, do których transkrypcja nie dotarła
+            for audio_chunk in chunk_iter:
+                _remove_chunk_file(audio_chunk)
+    return "\n".join(texts)
+
+
+def _remove_chunk_file(audio_chunk_file: Path) -> None:
+    try:
+        if audio_chunk_file.exists():
+            audio_chunk_file.unlink()
+    except OSError as cleanup_exc:
+        logger.warning(
+            "Nie udało się usunąć pliku tymczasowego %s: %s",
+            audio_chunk_file,
+            cleanup_exc,
+        )
+
+
+SUMMARY_CHUNK_CHARS = 8000  # Tekst dłuższy jest podsumowywany metodą map-reduce
+SUMMARY_ERROR_LOG = Path("logs/summary_errors.log")
+
+
+def completion_size(completion) -> int:
+    """Zwraca rozmiar treści odpowiedzi modelu w bajtach (0, gdy odpowiedź jest pusta)."""
+    if completion and completion.choices and completion.choices[0].message:
+        return len((completion.choices[0].message.content or "").encode("utf-8"))
+    return 0
+
+
+def map_prompt(text_idx: int, total: Optional[int], text_chunk: str) -> str:
+    """Prompt podsumowania części długiego tekstu (etap map; `total` jest nieznane w trakcie transkrypcji)."""
+    position = f"{text_idx+1}/{total}" if total is not None else f"{text_idx+1}"
+    return (
+        f"Podaj temat w jednym zdaniu i podsumowanie 3-5 zdaniami "
+        f"(fragment {position}):\n"
+        + text_chunk
+    )
+
+
+def reduce_prompt(partial_summaries: List[str]) -> str:
+    """Prompt łączący podsumowania części w podsumowanie całości (etap reduce)."""
+    return (
+        "Oto podsumowania fragmentów długiego tekstu. "
+        "Na ich podstawie podaj jeden temat i jedno podsumowanie całości (3-5 zdań):\n"
+        + "\n".join(partial_summaries)
+    )
+
+
+def single_prompt(input_text: str) -> str:
+    """Prompt podsumowania krótkiego tekstu (jedno zapytanie)."""
+    return "Podaj temat w jednym zdaniu i podsumowanie 3-5 zdaniami:\n" + input_text
+
+
+def parse_summary(content: Optional[str]) -> Tuple[str, str]:
+    """Rozdziela odpowiedź modelu na temat (pierwsza linia) i podsumowanie (reszta)."""
+    lines = content.splitlines() if content else []
+    topic = lines[0] if lines else "Nie udało się wygenerować tematu"
+    summary = " ".join(lines[1:]) if len(lines) > 1 else "Nie udało się wygenerować podsumowania"
+    return topic, summary
+
+
+def log_summary_error(message: str) -> None:
+    """Zapisuje błąd podsumowania do logu aplikacji i do `logs/summary_errors.log`."""
+    logger.error(message)
+    SUMMARY_ERROR_LOG.parent.mkdir(parents=True, exist_ok=True)
+    with open(SUMMARY_ERROR_LOG, "a", encoding="utf-8") as log_file:
+        log_file.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {message}")
+
+
+def is_quota_error(exc: Exception) -> bool:
+    """Sprawdza, czy błąd API oznacza brak środków lub przekroczony limit."""
+    text = str(exc).lower()
+    return (
+        "insufficient_quota" in text
+        or "you exceeded your current quota" in text
+        or "error code: 429" in text
+    )
+
+
+def summarize(
+    input_text: str,
+    openai_client,
+    model: str = "gpt-3.5-turbo",
+    max_tokens: int = 300,
+):
+    """
+    Generuje temat i podsumowanie tekstu (map-reduce dla długich tekstów).
+
+    Tekst dłuższy niż 8000 znaków jest dzielony na części; każda część jest
+    podsumowywana osobno, a wyniki łączone w jedno podsumowanie całości.
+
+    Returns:
+        tuple: (temat, podsumowanie); przy błędzie temat zaczyna się od
+            'Błąd', 'Brak środków' lub 'Nie udało się', a drugi element
+            zawiera opis błędu
+    """
+    logger.info("Rozpoczynam summarize() - długość tekstu: %s znaków", len(input_text))
+    class OpenAIAPIError(Exception):
+        pass
+    try:
+        if len(input_text) > SUMMARY_CHUNK_CHARS:
+            text_chunks = [
+                input_text[i : i + SUMMARY_CHUNK_CHARS] for i in range(0, len(input_text), SUMMARY_CHUNK_CHARS)
+            ]
+            partial_summaries = []
+            for text_idx, text_chunk in enumerate(text_chunks):
+                try:
+                    prompt = map_prompt(text_idx, len(text_chunks), text_chunk)
+                    with metrics.stage("summarize_map", bytes_in=len(prompt.encode("utf-8"))) as map_stage:
+                        completion = openai_client.chat.completions.create(
+                            model=model,
+                            messages=[{"role": "user", "content": prompt}],
+                            max_tokens=max_tokens,
+                        )
+                        map_stage.bytes_out = completion_size(completion)
+                    if completion and completion.choices and completion.choices[0].message:
+                        content = completion.choices[0].message.content
+                        partial_summaries.append(content)
+                    else:
+                        raise OpenAIAPIError("Brak odpowiedzi z modelu OpenAI")
+                except (openai.OpenAIError, OpenAIAPIError) as exc:
+                    log_summary_error(f"Błąd fragmentu {text_idx+1}: {exc}\n")
+                    return "Błąd podczas podsumowywania fragmentu", str(exc)
+            if not partial_summaries:
+                return (
+                    "Nie udało się wygenerować podsumowania",
+                    "Brak podsumowań fragmentów.",
+                )
+            try:
+                final_prompt = reduce_prompt(partial_summaries)
+                with metrics.stage("summarize_reduce", bytes_in=len(final_prompt.encode("utf-8"))) as reduce_stage:
+                    completion = openai_client.chat.completions.create(
+                        model=model,
+                        messages=[{"role": "user", "content": final_prompt}],
+                        max_tokens=max_tokens,
+                    )
+                    reduce_stage.bytes_out = completion_size(completion)
+                if completion and completion.choices and completion.choices[0].message:
+                    return parse_summary(completion.choices[0].message.content)
+                else:
+                    raise OpenAIAPIError("Brak odpowiedzi z modelu OpenAI (final)")
+            except (openai.OpenAIError, OpenAIAPIError) as exc:
+                log_summary_error(f"Błąd końcowego podsumowania: {exc}\n")
+                return "Błąd podczas generowania końcowego podsumowania", str(exc)
+        else:
+            try:
+                prompt = single_prompt(input_text)
+                with metrics.stage("summarize", bytes_in=len(prompt.encode("utf-8"))) as summary_stage:
+                    completion = openai_client.chat.completions.create(
+                        model=model,
+                        messages=[{"role": "user", "content": prompt}],
+                        max_tokens=max_tokens,
+                    )
+                    summary_stage.bytes_out = completion_size(completion)
+                if completion and completion.choices and completion.choices[0].message:
+                    return parse_summary(completion.choices[0].message.content)
+                else:
+                    raise OpenAIAPIError("Brak odpowiedzi z modelu OpenAI (krótki tekst)")
+            except (openai.OpenAIError, OpenAIAPIError) as exc:
+                log_summary_error(f"Błąd podsumowania krótkiego tekstu: {exc}\n")
+                return "Błąd podczas podsumowywania tekstu", str(exc)
+    except (openai.OpenAIError, OpenAIAPIError) as exc:
+        if is_quota_error(exc):
+            return "Brak środków na koncie OpenAI", str(exc)
+        log_summary_error(f"Błąd ogólny podsumowania: {exc}\n")
+        return "Błąd ogólny podczas podsumowywania", str(exc)
+    return (
+        "Nie udało się wygenerować podsumowania",
+        "Spróbuj ponownie lub skontaktuj się z administratorem",
+    )
+
+
+class RollingSummarizer:
+    """
+    Podsumowanie liczone przyrostowo, w trakcie transkrypcji.
+
+    Teksty kolejnych fragmentów są dopisywane przez `add()` (np. z `on_text`
+    w `transcribe_chunks`). Gdy zebrany tekst przekroczy SUMMARY_CHUNK_CHARS,
+    gotowa część jest podsumowywana w tle (etap map), więc po transkrypcji
+    ostatniego fragmentu zostaje tylko podsumowanie reszty i krótkie zapytanie
+    łączące (reduce). Części są wyznaczane tak samo jak w `summarize()`
+    dla całego tekstu, a wynik ma ten sam format.
+
+    Args:
+        openai_client: Klient OpenAI
+        model (str): Model podsumowań
+        max_tokens (int): Limit tokenów odpowiedzi
+        max_workers (int): Liczba równoczesnych zapytań etapu map
+    """
+
+    def __init__(self, openai_client, model: str = "gpt-3.5-turbo", max_tokens: int = 300, max_workers: int = 2):
+        self.client = openai_client
+        self.model = model
+        self.max_tokens = max_tokens
+        self._buffer: Optional[str] = None
+        self._maps: List[Future] = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="audio2tekst-summary")
+
+    @property
+    def maps_done(self) -> int:
+        """Liczba części podsumowanych w tle."""
+        return sum(future.done() for future in self._maps)
+
+    def add(self, text: str) -> None:
+        """Dopisuje tekst kolejnego fragmentu i zleca podsumowanie pełnych części."""
+        with self._lock:
+            self._buffer = text if self._buffer is None else f"{self._buffer}\n{text}"
+            while len(self._buffer) > SUMMARY_CHUNK_CHARS:
+                self._submit_map(self._buffer[:SUMMARY_CHUNK_CHARS])
+                self._buffer = self._buffer[SUMMARY_CHUNK_CHARS:]
+
+    def _submit_map(self, text_chunk: str) -> None:
+        text_idx = len(self._maps)
+        # Kopia kontekstu przypisuje pomiary etapu map do bieżącego zadania
+        self._maps.append(self._executor.submit(
+            contextvars.copy_context().run, self._complete, "summarize_map", map_prompt(text_idx, None, text_chunk)
+        ))
+
+    def _complete(self, stage_name: str, prompt: str) -> str:
+        with metrics.stage(stage_name, bytes_in=len(prompt.encode("utf-8"))) as summary_stage:
+            completion = self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=self.max_tokens,
+            )
+            summary_stage.bytes_out = completion_size(completion)
+        if completion and completion.choices and completion.choices[0].message:
+            return completion.choices[0].message.content
+        raise RuntimeError("Brak odpowiedzi z modelu OpenAI")
+
+    def finish(self) -> Tuple[str, str]:
+        """
+        Podsumowuje resztę tekstu, czeka na etap map i łączy wyniki.
+
+        Returns:
+            tuple: (temat, podsumowanie) jak w `summarize()`, również przy błędach
+        """
+        with self._lock:
+            input_text = self._buffer or ""
+            self._buffer = ""
+            short_text = not self._maps
+            if input_text and not short_text:
+                self._submit_map(input_text)
+        if short_text:
+            # Krótki tekst - jedno zapytanie jak w `summarize()`
+            self.cancel()
+            return summarize(input_text, self.client, model=self.model, max_tokens=self.max_tokens)
+        try:
+            partial_summaries = []
+            for text_idx, future in enumerate(self._maps):
+                try:
+                    partial_summaries.append(future.result())
+                except (openai.OpenAIError, RuntimeError) as exc:
+                    log_summary_error(f"Błąd fragmentu {text_idx+1}: {exc}\n")
+                    if is_quota_error(exc):
+                        return "Brak środków na koncie OpenAI", str(exc)
+                    return "Błąd podczas podsumowywania fragmentu", str(exc)
+            try:
+                return parse_summary(self._complete("summarize_reduce", reduce_prompt(partial_summaries)))
+            except (openai.OpenAIError, RuntimeError) as exc:
+                log_summary_error(f"Błąd końcowego podsumowania: {exc}\n")
+                return "Błąd podczas generowania końcowego podsumowania", str(exc)
+        finally:
+            self.cancel()
+
+    def cancel(self) -> None:
+        """Porzuca podsumowanie (np. po błędzie transkrypcji) - zapytania jeszcze nierozpoczęte są anulowane."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,208 @@
+"""
+Polityka retencji plików w `uploads/` (limity rozmiaru, LRU i TTL).
+
+Zamiast kasować wszystkie oryginały przy każdym uruchomieniu skryptu,
+menedżer retencji co pewien czas usuwa w tle najdawniej używane artefakty
+danego rodzaju, gdy przekroczony zostanie limit bajtów, oraz artefakty
+nieużywane dłużej niż zadany czas. Źródłem danych jest katalog artefaktów
+(`audio2tekst.catalog`), więc żaden przebieg nie skanuje katalogów.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from audio2tekst import catalog
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+DAY = 24 * 60 * 60
+
+# Domyślne limity: oryginały są tylko pamięcią podręczną, transkrypcje
+# i podsumowania są wynikami pracy, więc bez limitu i bez wygasania.
+DEFAULT_QUOTAS_MB = {"original": 2048, "transcript": 0, "summary": 0}
+DEFAULT_TTL_DAYS = {"original": 7, "transcript": 0, "summary": 0}
+# Świeżo przyjęty oryginał nie jest jeszcze używany przez zadanie (to zaczyna
+# się chwilę później), a pojedynczy duży plik sam przekracza limit - przez
+# ten czas od ostatniego dostępu artefakty nie są usuwane
+DEFAULT_GRACE_MINUTES = 30
+
+
+def load_policy_from_env() -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Buduje politykę retencji ze zmiennych środowiskowych.
+
+    Dla każdego rodzaju artefaktu odczytywane są `RETENTION_<FOLDER>_MB`
+    (limit rozmiaru) i `RETENTION_<FOLDER>_DAYS` (czas od ostatniego dostępu),
+    np. `RETENTION_ORIGINALS_MB=2048`. Wartość 0 oznacza brak limitu.
+    `RETENTION_GRACE_MINUTES` to okres ochronny od ostatniego dostępu.
+
+    Returns:
+        dict: {'quotas': {rodzaj: bajty | None}, 'ttl': {rodzaj: sekundy | None},
+               'grace': sekundy}
+    """
+    quotas: Dict[str, Optional[float]] = {}
+    ttl: Dict[str, Optional[float]] = {}
+    for kind, folder in catalog.KINDS.items():
+        quota_mb = float(os.getenv(f"RETENTION_{folder.upper()}_MB", DEFAULT_QUOTAS_MB[kind]))
+        ttl_days = float(os.getenv(f"RETENTION_{folder.upper()}_DAYS", DEFAULT_TTL_DAYS[kind]))
+        quotas[kind] = quota_mb * MB if quota_mb > 0 else None
+        ttl[kind] = ttl_days * DAY if ttl_days > 0 else None
+    grace = float(os.getenv("RETENTION_GRACE_MINUTES", DEFAULT_GRACE_MINUTES)) * 60
+    return {"quotas": quotas, "ttl": ttl, "grace": max(grace, 0.0)}
+
+
+def run_retention_pass(
+    policy: Dict[str, Dict[str, Optional[float]]],
+    max_evictions: int = 50,
+    db_path: Path = catalog.DB_PATH,
+    now: Optional[float] = None,
+) -> Dict[str, Dict[str, int]]:
+    """
+    Wykonuje jeden przyrostowy przebieg retencji.
+
+    Najpierw usuwane są artefakty, których TTL minął, a następnie - dopóki
+    rodzaj przekracza swój limit - artefakty w kolejności LRU. Pliki
+    z niezerowym licznikiem referencji (używane przez trwające zadania)
+    są zawsze pomijane - także gdy zadanie zacznie ich używać w trakcie
+    przebiegu - podobnie jak artefakty używane w okresie ochronnym
+    (`policy['grace']`, np. oryginał czekający na start zadania). Przebieg kończy się po `max_evictions` usunięciach,
+    żeby pojedyncze wywołanie nie blokowało wątku zbyt długo.
+
+    Returns:
+        dict: {rodzaj: {'ttl': liczba, 'quota': liczba, 'bytes': zwolnione bajty}}
+    """
+    now = time.time() if now is None else now
+    result = {kind: {"ttl": 0, "quota": 0, "bytes": 0} for kind in catalog.KINDS}
+    budget = max_evictions
+    grace = policy.get("grace") or 0
+    usage = catalog.usage_by_kind(db_path=db_path)
+    for kind in catalog.KINDS:
+        ttl = policy["ttl"].get(kind)
+        quota = policy["quotas"].get(kind)
+        if ttl is None and quota is None:
+            continue
+        used_bytes = usage[kind]["bytes"]
+        for entry in catalog.list_artefacts(kind, unreferenced_only=True, db_path=db_path):
+            if budget <= 0:
+                return result
+            if grace and entry["accessed_at"] > now - grace:
+                # Lista jest posortowana LRU - kolejne wpisy też są chronione
+                break
+            if ttl is not None and entry["accessed_at"] < now - ttl:
+                reason = "ttl"
+            elif quota is not None and used_bytes > quota:
+                reason = "quota"
+            else:
+                # Lista jest posortowana LRU - kolejne wpisy są nowsze
+                break
+            freed = catalog.evict(entry["uid"], kind, db_path=db_path)
+            if freed is None:
+                # Zadanie zaczęło używać artefaktu po odczytaniu listy
+                continue
+            used_bytes -= freed
+            result[kind][reason] += 1
+            result[kind]["bytes"] += freed
+            budget -= 1
+    return result
+
+
+class RetentionManager:
+    """
+    Wątek w tle wykonujący przebiegi retencji co `interval` sekund.
+
+    Obiekt przechowuje skumulowane statystyki usunięć, które panel boczny
+    wyświetla w raporcie (`report()`); sam raport jest tani, bo opiera się
+    na zapytaniu agregującym do katalogu.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[Dict[str, Dict[str, Optional[float]]]] = None,
+        interval: float = 60.0,
+        max_evictions: int = 50,
+        db_path: Path = catalog.DB_PATH,
+    ):
+        self.policy = policy if policy is not None else load_policy_from_env()
+        self.interval = interval
+        self.max_evictions = max_evictions
+        self.db_path = db_path
+        self.evictions = {kind: {"ttl": 0, "quota": 0, "bytes": 0} for kind in catalog.KINDS}
+        self.passes = 0
+        self.last_run: Optional[float] = None
+        self.last_error = ""
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "RetentionManager":
+        """Uruchamia wątek retencji (wywołanie ponowne nic nie robi)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="audio2tekst-retention", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Zatrzymuje wątek retencji."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self) -> Dict[str, Dict[str, int]]:
+        """Wykonuje jeden przebieg i dolicza jego wynik do statystyk."""
+        try:
+            result = run_retention_pass(self.policy, self.max_evictions, db_path=self.db_path)
+        except (sqlite3.Error, OSError) as exc:
+            logger.warning("Błąd przebiegu retencji: %s", exc)
+            with self._lock:
+                self.last_error = str(exc)
+            return {}
+        with self._lock:
+            for kind, counts in result.items():
+                for key, value in counts.items():
+                    self.evictions[kind][key] += value
+            self.passes += 1
+            self.last_run = time.time()
+            self.last_error = ""
+        evicted = sum(c["ttl"] + c["quota"] for c in result.values())
+        if evicted:
+            logger.info("Retencja: usunięto %d plików z uploads/", evicted)
+        return result
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            result = self.run_once()
+            # Jeśli wyczerpano budżet usunięć, kolejny przebieg rusza od razu
+            evicted = sum(c["ttl"] + c["quota"] for c in result.values())
+            if evicted < self.max_evictions:
+                self._stop.wait(self.interval)
+
+    def report(self) -> Dict:
+        """
+        Zwraca raport zajętości dysku i statystyk usunięć.
+
+        Returns:
+            dict: {'usage': {rodzaj: {'files', 'bytes', 'quota', 'ttl'}},
+                   'evictions': {rodzaj: {'ttl', 'quota', 'bytes'}},
+                   'passes': int, 'last_run': float | None, 'last_error': str}
+        """
+        usage = catalog.usage_by_kind(db_path=self.db_path)
+        for kind, stats in usage.items():
+            stats["quota"] = self.policy["quotas"].get(kind)
+            stats["ttl"] = self.policy["ttl"].get(kind)
+        with self._lock:
+            return {
+                "usage": usage,
+                "evictions": {kind: dict(c) for kind, c in self.evictions.items()},
+                "passes": self.passes,
+                "last_run": self.last_run,
+                "last_error": self.last_error,
+            }
@@ -0,0 +1,167 @@
+"""
+Wspólny harmonogram procesów FFmpeg/FFprobe i pracy CPU.
+
+Wszystkie sesje Streamlit działają w jednym procesie, więc jeden obiekt
+`ProcessScheduler` (zwracany przez `get_scheduler()`) ogranicza łączną
+liczbę równocześnie działających procesów potomnych do liczby rdzeni
+(lub `FFMPEG_MAX_PROCESSES`). Pięciu użytkowników dzielących plik na
+fragmenty nie uruchamia 5×N procesów FFmpeg walczących o CPU - nadmiarowe
+zadania czekają w kolejce. Harmonogram udostępnia też pulę procesów
+dla obliczeń w Pythonie, objętą tym samym limitem.
+"""
+
+import logging
+import os
+import subprocess  # nosec B404 # Bezpieczne wywoływanie FFmpeg
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+_SCHEDULER: Optional["ProcessScheduler"] = None
+_SCHEDULER_LOCK = threading.Lock()
+
+
+class ProcessScheduler:
+    """
+    Ogranicza liczbę równoczesnych procesów i zbiera statystyki obciążenia.
+
+    Args:
+        max_processes (int, optional): Limit równoczesnych procesów
+            (domyślnie liczba rdzeni CPU)
+    """
+
+    def __init__(self, max_processes: Optional[int] = None):
+        self.max_processes = max_processes or os.cpu_count() or 1
+        self._slots = threading.BoundedSemaphore(self.max_processes)
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._created = time.monotonic()
+        self.queued = 0
+        self.running = 0
+        self.peak_running = 0
+        self.peak_queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Zajmuje jedno miejsce (czeka w kolejce, gdy limit jest wyczerpany)."""
+        queued_at = time.monotonic()
+        with self._lock:
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+        self._slots.acquire()
+        started = time.monotonic()
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self.peak_running = max(self.peak_running, self.running)
+            self.wait_seconds += started - queued_at
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.busy_seconds += time.monotonic() - started
+                if failed:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+            self._slots.release()
+
+    def run(self, cmd: Sequence[str], **kwargs) -> subprocess.CompletedProcess:
+        """Uruchamia proces (`subprocess.run`) w ramach limitu równoczesnych procesów."""
+        with self.slot():
+            return subprocess.run(cmd, **kwargs)  # nosec B603 # Argumenty przygotowane przez wywołującego
+
+    def map(self, func: Callable, items: Iterable) -> List:
+        """
+        Wywołuje `func` dla każdego elementu równolegle i zwraca wyniki w kolejności.
+
+        Wątki tylko czekają na procesy potomne - liczbę równoczesnych procesów
+        ogranicza `run()`/`slot()`. Pierwszy wyjątek jest zgłaszany po
+        zakończeniu wszystkich wywołań.
+        """
+        items = list(items)
+        if len(items) <= 1:
+            return [func(item) for item in items]
+        workers = min(len(items), self.max_processes)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="audio2tekst-ffmpeg") as pool:
+            futures = [pool.submit(func, item) for item in items]
+        errors = [future.exception() for future in futures if future.exception()]
+        if errors:
+            raise errors[0]
+        return [future.result() for future in futures]
+
+    def call(self, func: Callable, *args, **kwargs):
+        """
+        Wykonuje funkcję CPU w puli procesów (poza GIL) w ramach tego samego limitu.
+
+        Funkcja i argumenty muszą dać się serializować (pickle).
+        """
+        with self.slot():
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.max_processes)
+                pool = self._pool
+            return pool.submit(func, *args, **kwargs).result()
+
+    def shutdown(self) -> None:
+        """Zamyka pulę procesów (jeśli była używana)."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def stats(self) -> Dict:
+        """
+        Zwraca stan kolejki i wykorzystanie miejsc.
+
+        Returns:
+            dict: {'max_processes', 'running', 'queued', 'peak_running', 'peak_queued',
+                   'completed', 'failed', 'busy_seconds', 'wait_seconds',
+                   'utilisation' (bieżąca, 0-1), 'average_utilisation' (od utworzenia, 0-1)}
+        """
+        with self._lock:
+            uptime = max(time.monotonic() - self._created, 1e-9)
+            return {
+                "max_processes": self.max_processes,
+                "running": self.running,
+                "queued": self.queued,
+                "peak_running": self.peak_running,
+                "peak_queued": self.peak_queued,
+                "completed": self.completed,
+                "failed": self.failed,
+                "busy_seconds": self.busy_seconds,
+                "wait_seconds": self.wait_seconds,
+                "utilisation": self.running / self.max_processes,
+                "average_utilisation": min(
+                    self.busy_seconds / (uptime * self.max_processes), 1.0
+                ),
+            }
+
+
+def get_scheduler() -> ProcessScheduler:
+    """
+    Zwraca wspólny harmonogram procesu (tworzony przy pierwszym użyciu).
+
+    Limit równoczesnych procesów pochodzi z `FFMPEG_MAX_PROCESSES`
+    (0 lub brak = liczba rdzeni CPU).
+    """
+    global _SCHEDULER
+    with _SCHEDULER_LOCK:
+        if _SCHEDULER is None:
+            limit = int(os.getenv("FFMPEG_MAX_PROCESSES", "0"))
+            _SCHEDULER = ProcessScheduler(limit or None)
+            logger.info("Limit równoczesnych procesów FFmpeg: %d", _SCHEDULER.max_processes)
+        return _SCHEDULER
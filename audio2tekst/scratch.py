@@ -0,0 +1,299 @@
+"""
+Przestrzeń robocza zadań na pliki krótkotrwałe (fragmenty audio, pobrania).
+
+Każde zadanie dostaje własny katalog `audio2tekst_<pid>_<zadanie>_*`
+(`ScratchSpace`), usuwany w całości po zakończeniu bloku `with` - również
+gdy między podziałem a transkrypcją wystąpi wyjątek albo sesja Streamlit
+zostanie przerwana. Katalogi pozostawione przez zakończony proces (awaria,
+restart kontenera) usuwa `sweep_orphans()` przy starcie aplikacji.
+
+Konfiguracja (zmienne środowiskowe):
+
+- `SCRATCH_DIR` - katalog bazowy (domyślnie katalog tymczasowy systemu),
+- `SCRATCH_TMPFS` - `true`: fragmenty w pamięci RAM (`/dev/shm`), jeśli jest
+  tam miejsce na przewidywany rozmiar zadania; inaczej katalog bazowy,
+- `SCRATCH_JOB_MB` - limit bajtów jednego zadania (0 = bez limitu),
+- `SCRATCH_ORPHAN_MINUTES` - wiek, po którym pliki `audio2tekst_*` bez
+  numeru procesu (starsze wersje) uznaje się za porzucone.
+"""
+
+import atexit
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "audio2tekst_"
+SHM_DIR = Path("/dev/shm")  # nosec B108 - tmpfs jest celowym wyborem konfiguracji
+SHM_HEADROOM = 1.2  # Zapas wolnego miejsca w tmpfs ponad przewidywany rozmiar zadania
+_PID_RE = re.compile(rf"^{PREFIX}(\d+)_")
+
+_ACTIVE: Dict[Path, "ScratchSpace"] = {}
+_ACTIVE_LOCK = threading.Lock()
+
+
+class ScratchQuotaExceeded(RuntimeError):
+    """Zadanie przekroczyło limit bajtów przestrzeni roboczej."""
+
+
+def base_dir() -> Path:
+    """Katalog bazowy przestrzeni roboczych na dysku (`SCRATCH_DIR` lub katalog tymczasowy)."""
+    return Path(os.getenv("SCRATCH_DIR") or tempfile.gettempdir())
+
+
+def tmpfs_enabled() -> bool:
+    """Czy konfiguracja pozwala na przestrzenie robocze w `/dev/shm`."""
+    return os.getenv("SCRATCH_TMPFS", "false").lower() == "true"
+
+
+def job_quota() -> int:
+    """Limit bajtów przestrzeni roboczej zadania z `SCRATCH_JOB_MB` (0 = bez limitu)."""
+    return int(float(os.getenv("SCRATCH_JOB_MB", "0")) * 1024 * 1024)
+
+
+def choose_root(expected_bytes: int = 0, tmpfs: Optional[bool] = None) -> Path:
+    """
+    Wybiera katalog nadrzędny przestrzeni roboczej.
+
+    `/dev/shm` jest wybierany tylko wtedy, gdy jest włączony, istnieje, da się
+    w nim pisać i ma wolne miejsce na `expected_bytes` z zapasem - pliki
+    w tmpfs zajmują pamięć RAM kontenera.
+    """
+    use_tmpfs = tmpfs_enabled() if tmpfs is None else tmpfs
+    if use_tmpfs and SHM_DIR.is_dir() and os.access(SHM_DIR, os.W_OK):
+        free_bytes = shutil.disk_usage(SHM_DIR).free
+        if free_bytes >= expected_bytes * SHM_HEADROOM:
+            return SHM_DIR
+        logger.info(
+            "Za mało miejsca w %s (%d MB wolne) - przestrzeń robocza na dysku",
+            SHM_DIR, free_bytes // (1024 * 1024),
+        )
+    return base_dir()
+
+
+class ScratchSpace:
+    """
+    Katalog roboczy jednego zadania z limitem bajtów i gwarantowanym sprzątaniem.
+
+    Args:
+        job_id (str): Identyfikator zadania (część nazwy katalogu, np. UID pliku)
+        expected_bytes (int): Przewidywany rozmiar plików (wybór tmpfs lub dysku)
+        quota (int, optional): Limit bajtów (domyślnie `SCRATCH_JOB_MB`; 0 = bez limitu)
+        tmpfs (bool, optional): Wymuszenie lub wyłączenie `/dev/shm` (domyślnie `SCRATCH_TMPFS`)
+    """
+
+    def __init__(
+        self,
+        job_id: str = "job",
+        expected_bytes: int = 0,
+        quota: Optional[int] = None,
+        tmpfs: Optional[bool] = None,
+    ):
+        self.quota = job_quota() if quota is None else quota
+        if self.quota and expected_bytes > self.quota:
+            raise ScratchQuotaExceeded(
+                f"Zadanie wymaga ok. {expected_bytes/1024/1024:.0f} MB przestrzeni roboczej, "
+                f"limit: {self.quota/1024/1024:.0f} MB (SCRATCH_JOB_MB)"
+            )
+        root = choose_root(expected_bytes, tmpfs)
+        root.mkdir(parents=True, exist_ok=True)
+        safe_job = re.sub(r"[^\w-]", "", job_id)[:32] or "job"
+        self.path = Path(tempfile.mkdtemp(prefix=f"{PREFIX}{os.getpid()}_{safe_job}_", dir=root))
+        self.in_memory = root == SHM_DIR
+        self.reserved = 0
+        self.peak_bytes = 0
+        self._lock = threading.Lock()
+        with _ACTIVE_LOCK:
+            _ACTIVE[self.path] = self
+
+    def __enter__(self) -> "ScratchSpace":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.cleanup()
+
+    def new_file(self, suffix: str = "", prefix: str = "chunk_") -> Path:
+        """Tworzy pusty plik w przestrzeni roboczej i zwraca jego ścieżkę."""
+        fd, name = tempfile.mkstemp(prefix=prefix, suffix=suffix, dir=self.path)
+        os.close(fd)
+        return Path(name)
+
+    def reserve(self, nbytes: int) -> None:
+        """
+        Rezerwuje miejsce na plik o przewidywanym rozmiarze `nbytes`.
+
+        Raises:
+            ScratchQuotaExceeded: Gdy zajęte i zarezerwowane bajty przekroczyłyby limit
+        """
+        with self._lock:
+            if self.quota and self.used_bytes() + self.reserved + nbytes > self.quota:
+                raise ScratchQuotaExceeded(
+                    f"Przekroczono limit przestrzeni roboczej zadania "
+                    f"({self.quota/1024/1024:.0f} MB, SCRATCH_JOB_MB)"
+                )
+            self.reserved += nbytes
+
+    def unreserve(self, nbytes: int) -> None:
+        """Zwalnia rezerwację (po zapisaniu pliku lub po błędzie)."""
+        with self._lock:
+            self.reserved = max(self.reserved - nbytes, 0)
+
+    def check_quota(self) -> None:
+        """
+        Sprawdza rzeczywiste zajęcie przestrzeni roboczej.
+
+        Raises:
+            ScratchQuotaExceeded: Gdy zapisane pliki przekroczyły limit
+        """
+        with self._lock:
+            used = self.used_bytes()
+            self.peak_bytes = max(self.peak_bytes, used)
+            if self.quota and used > self.quota:
+                raise ScratchQuotaExceeded(
+                    f"Pliki zadania zajmują {used/1024/1024:.0f} MB - więcej niż limit "
+                    f"przestrzeni roboczej ({self.quota/1024/1024:.0f} MB, SCRATCH_JOB_MB)"
+                )
+
+    def used_bytes(self) -> int:
+        """Łączny rozmiar plików w przestrzeni roboczej."""
+        total = 0
+        try:
+            entries = list(os.scandir(self.path))
+        except FileNotFoundError:
+            return 0  # Przestrzeń już usunięta
+        for entry in entries:
+            try:
+                total += entry.stat().st_size
+            except FileNotFoundError:
+                continue  # Plik usunięty w trakcie liczenia (np. po transkrypcji fragmentu)
+        return total
+
+    def cleanup(self) -> None:
+        """Usuwa katalog roboczy z całą zawartością (wywołanie ponowne nic nie robi)."""
+        with _ACTIVE_LOCK:
+            _ACTIVE.pop(self.path, None)
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def active_spaces() -> List[Dict]:
+    """Zwraca opis aktywnych przestrzeni roboczych procesu (ścieżka, tmpfs, zajęte bajty)."""
+    with _ACTIVE_LOCK:
+        spaces = list(_ACTIVE.values())
+    return [
+        {"path": str(space.path), "in_memory": space.in_memory, "bytes": space.used_bytes(), "quota": space.quota}
+        for space in spaces
+    ]
+
+
+def _pid_alive(pid: int) -> Optional[bool]:
+    """Czy proces o numerze `pid` działa (None, gdy nie da się tego sprawdzić)."""
+    if os.name == "nt":
+        return None  # os.kill na Windows kończy proces zamiast go sprawdzać
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _is_orphan(entry: Path, max_age: float, now: float) -> bool:
+    match = _PID_RE.match(entry.name)
+    pid = int(match.group(1)) if match else None
+    if pid == os.getpid():
+        # Katalog z numerem tego procesu, ale nieznany - pozostałość po poprzednim
+        # uruchomieniu z tym samym numerem (np. restart kontenera)
+        with _ACTIVE_LOCK:
+            return entry not in _ACTIVE
+    alive = _pid_alive(pid) if pid is not None else None
+    if alive is not None:
+        return not alive
+    try:
+        return now - entry.stat().st_mtime > max_age
+    except FileNotFoundError:
+        return False
+
+
+def sweep_orphans(roots: Optional[Iterable[Path]] = None, max_age: Optional[float] = None) -> Dict[str, int]:
+    """
+    Usuwa porzucone pliki i katalogi `audio2tekst_*` (np. po awarii procesu).
+
+    Katalog zadania jest porzucony, gdy proces z jego nazwy już nie działa.
+    Pliki bez numeru procesu (starsze wersje, np. fragmenty z `mkstemp`)
+    są usuwane, gdy są starsze niż `max_age` sekund.
+
+    Args:
+        roots (iterable, optional): Przeszukiwane katalogi (domyślnie katalog
+            bazowy, katalog tymczasowy systemu i `/dev/shm`)
+        max_age (float, optional): Wiek plików bez numeru procesu
+            (domyślnie `SCRATCH_ORPHAN_MINUTES`, 60 minut)
+
+    Returns:
+        dict: {'entries': liczba usuniętych wpisów, 'bytes': zwolnione bajty}
+    """
+    if max_age is None:
+        max_age = float(os.getenv("SCRATCH_ORPHAN_MINUTES", "60")) * 60
+    if roots is None:
+        roots = [base_dir(), Path(tempfile.gettempdir()), SHM_DIR]
+    now = time.time()
+    removed = {"entries": 0, "bytes": 0}
+    for root in dict.fromkeys(Path(root) for root in roots):
+        if not root.is_dir():
+            continue
+        try:
+            entries = [entry for entry in root.iterdir() if entry.name.startswith(PREFIX)]
+        except OSError as exc:
+            logger.warning("Nie udało się przejrzeć katalogu %s: %s", root, exc)
+            continue
+        for entry in entries:
+            if not _is_orphan(entry, max_age, now):
+                continue
+            size = _tree_size(entry)
+            try:
+                if entry.is_dir() and not entry.is_symlink():
+                    shutil.rmtree(entry)
+                else:
+                    entry.unlink()
+            except FileNotFoundError:
+                continue
+            except OSError as exc:
+                logger.warning("Nie udało się usunąć porzuconego pliku %s: %s", entry, exc)
+                continue
+            removed["entries"] += 1
+            removed["bytes"] += size
+    if removed["entries"]:
+        logger.info(
+            "Usunięto %d porzuconych plików roboczych (%.1f MB)",
+            removed["entries"], removed["bytes"] / 1024 / 1024,
+        )
+    return removed
+
+
+def _tree_size(path: Path) -> int:
+    if path.is_file() or path.is_symlink():
+        return path.lstat().st_size
+    total = 0
+    for dirpath, _dirnames, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += (Path(dirpath) / filename).lstat().st_size
+            except FileNotFoundError:
+                continue
+    return total
+
+
+@atexit.register
+def _cleanup_active() -> None:
+    """Przy zakończeniu procesu usuwa przestrzenie robocze zadań, które jeszcze trwały."""
+    with _ACTIVE_LOCK:
+        spaces = list(_ACTIVE.values())
+    for space in spaces:
+        space.cleanup()
@@ -0,0 +1,81 @@
+"""
+Ograniczenie pamięci zajmowanej przez sesje Streamlit.
+
+Stan sesji (`st.session_state`) żyje w procesie serwera tak długo, jak
+otwarta jest karta przeglądarki, więc trzymane w nim teksty i bajty rosną
+razem z liczbą sesji. Stan sesji przechowuje tylko małe uchwyty (UID pliku,
+flagi); transkrypcje i podsumowania są odczytywane z uploads/ przy każdym
+wyświetleniu. Komunikaty diagnostyczne trafiają do bufora cyklicznego
+o stałej długości (`add_message`), a `usage()` szacuje rozmiar stanu sesji
+na potrzeby panelu bocznego.
+
+Konfiguracja (zmienne środowiskowe):
+
+- `SESSION_LOG_LINES` - liczba ostatnich komunikatów diagnostycznych
+  pamiętanych w sesji.
+"""
+
+import os
+import sys
+from collections import deque
+from typing import Any, Dict, List, MutableMapping
+
+MESSAGES_KEY = "audio_info_msgs"
+DEFAULT_LOG_LINES = 200
+
+
+def log_lines() -> int:
+    """Liczba komunikatów diagnostycznych pamiętanych w jednej sesji."""
+    return max(1, int(os.getenv("SESSION_LOG_LINES", str(DEFAULT_LOG_LINES))))
+
+
+def add_message(state: MutableMapping[str, Any], message: str) -> None:
+    """Dopisuje komunikat do bufora sesji; najstarsze komunikaty są usuwane."""
+    messages = state.get(MESSAGES_KEY)
+    if not isinstance(messages, deque) or messages.maxlen != log_lines():
+        messages = deque(messages or (), maxlen=log_lines())
+        state[MESSAGES_KEY] = messages
+    messages.append(message)
+
+
+def messages(state: MutableMapping[str, Any]) -> List[str]:
+    """Komunikaty diagnostyczne sesji, od najstarszego."""
+    return list(state.get(MESSAGES_KEY) or ())
+
+
+def approx_size(value: Any) -> int:
+    """
+    Przybliżony rozmiar wartości w bajtach.
+
+    Dla tekstów i bajtów liczona jest zawartość, dla kolekcji suma elementów;
+    pozostałe obiekty (np. widżety Streamlit) - `sys.getsizeof`.
+    """
+    if isinstance(value, str):
+        return len(value.encode("utf-8", errors="replace"))
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(approx_size(key) + approx_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple, set, frozenset, deque)):
+        return sum(approx_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def usage(state: MutableMapping[str, Any]) -> Dict[str, Any]:
+    """
+    Szacuje zajętość pamięci przez stan sesji.
+
+    Returns:
+        dict: `total` (bajty), `entries` (lista `{"key", "bytes"}` od
+        największego wpisu) i `messages` (liczba komunikatów w buforze)
+    """
+    entries = sorted(
+        ({"key": str(key), "bytes": approx_size(value)} for key, value in state.items()),
+        key=lambda entry: entry["bytes"],
+        reverse=True,
+    )
+    return {
+        "total": sum(entry["bytes"] for entry in entries),
+        "entries": entries,
+        "messages": len(state.get(MESSAGES_KEY) or ()),
+    }
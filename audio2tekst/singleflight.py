@@ -0,0 +1,141 @@
+"""
+Łączenie równoczesnych, identycznych zadań w jedno wykonanie (single-flight).
+
+Wszystkie sesje Streamlit działają w jednym procesie, więc dwóch
+użytkowników przesyłających ten sam plik dostaje ten sam UID zawartości.
+Bez koordynacji obie sesje przyjmowałyby oryginał pod tę samą ścieżkę
+i wykonywałyby pełny podział oraz transkrypcję. `SingleFlight.do(key, fn)`
+wykonuje `fn` tylko w pierwszym wątku z danym kluczem; pozostałe czekają
+na jego zakończenie i dostają ten sam wynik (lub ten sam wyjątek).
+
+Klucze budują funkcje `ingest_key`, `transcription_key` i `summary_key`
+(UID pliku oraz model i język - różne modele dają różne wyniki).
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_COORDINATOR: Optional["SingleFlight"] = None
+_COORDINATOR_LOCK = threading.Lock()
+
+
+def ingest_key(uid: str) -> str:
+    """Klucz przyjęcia oryginału do uploads/originals."""
+    return f"ingest:{uid}"
+
+
+def transcription_key(uid: str, model: str, language: str) -> str:
+    """Klucz transkrypcji pliku danym modelem i w danym języku."""
+    return f"transcribe:{uid}:{model}:{language}"
+
+
+def summary_key(uid: str, model: str) -> str:
+    """Klucz podsumowania transkrypcji pliku danym modelem."""
+    return f"summary:{uid}:{model}"
+
+
+class _Call:
+    """Wykonanie w toku: wynik, wyjątek i zdarzenie zakończenia."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[Exception] = None
+        self.abandoned = False
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    Koordynator wykonań: jedno wykonanie na klucz w danej chwili.
+
+    Wykonanie przerwane wyjątkiem spoza `Exception` (np. zatrzymanie skryptu
+    Streamlit przy ponownym uruchomieniu sesji) nie jest przekazywane
+    oczekującym - pierwszy z nich wykonuje zadanie od nowa.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.executions = 0
+        self.shared = 0
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """
+        Wykonuje `fn` albo dołącza do trwającego wykonania z tym samym kluczem.
+
+        Args:
+            key (str): Klucz zadania
+            fn (callable): Funkcja bez argumentów wykonująca zadanie
+            timeout (float, optional): Maksymalny czas oczekiwania na cudze wykonanie
+
+        Returns:
+            tuple: (wynik, czy wynik pochodzi z cudzego wykonania)
+
+        Raises:
+            TimeoutError: Gdy cudze wykonanie nie zakończyło się w czasie `timeout`
+            Exception: Wyjątek zgłoszony przez `fn` (również oczekującym)
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                    self.executions += 1
+                else:
+                    call.followers += 1
+                    self.shared += 1
+            if leader:
+                return self._execute(key, call, fn), False
+            logger.info("Dołączono do trwającego zadania %s", key)
+            if not call.done.wait(timeout):
+                raise TimeoutError(f"Przekroczono czas oczekiwania na zadanie {key}")
+            if call.abandoned:
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+    def _execute(self, key: str, call: _Call, fn: Callable[[], Any]) -> Any:
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as exc:
+            call.error = exc
+            raise
+        except BaseException:
+            call.abandoned = True
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict:
+        """
+        Zwraca statystyki koordynatora.
+
+        Returns:
+            dict: {'in_flight': liczba wykonań w toku, 'waiting': liczba oczekujących,
+                   'executions': liczba wykonań, 'shared': liczba dołączeń}
+        """
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "waiting": sum(call.followers for call in self._calls.values()),
+                "executions": self.executions,
+                "shared": self.shared,
+            }
+
+
+def get_coordinator() -> SingleFlight:
+    """Zwraca wspólny koordynator procesu (tworzony przy pierwszym użyciu)."""
+    global _COORDINATOR
+    with _COORDINATOR_LOCK:
+        if _COORDINATOR is None:
+            _COORDINATOR = SingleFlight()
+        return _COORDINATOR
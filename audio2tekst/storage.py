@@ -0,0 +1,319 @@
+"""
+Przyjmowanie plików do uploads/ niezależne od interfejsu Streamlit.
+
+UID pliku to skrót zawartości (`audio2tekst.hashing`), więc ten sam plik
+przesłany ponownie trafia pod tę samą ścieżkę i korzysta z zapisanych już
+artefaktów (oryginał, transkrypcja, podsumowanie) zarejestrowanych
+w katalogu (`audio2tekst.catalog`). Używane przez `app.py` i serwer API.
+
+Transkrypcje i podsumowania są zapisywane przez `write_artefact` -
+skompresowane (`ARTEFACT_COMPRESSION`: `gzip`, `zstd` lub `none`, poziom
+w `ARTEFACT_COMPRESSION_LEVEL`) w formacie ramek z indeksem
+(`audio2tekst.framed`) jako `<uid>.txt.gz` / `<uid>.txt.zst`. Odczyt
+(`read_artefact`, `open_artefact`) przyjmuje ścieżkę `<uid>.txt` z
+`artefact_paths` lub ścieżkę z katalogu i rozpoznaje format po zawartości,
+więc pliki zapisane wcześniej bez kompresji są czytane bez zmian.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Tuple, Union
+
+from audio2tekst import catalog, framed, hashing, metrics, singleflight
+from audio2tekst.media import ingest_media
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path("uploads")
+FOLDERS = ("originals", "transcripts", "summaries")
+ALLOWED_EXT = {".mp3", ".wav", ".m4a", ".mp4", ".mov", ".avi", ".webm"}
+
+FileSource = Union[bytes, BinaryIO, Path]
+
+
+def ensure_dirs(base_dir: Path = BASE_DIR) -> None:
+    """Tworzy katalogi na oryginały, transkrypcje i podsumowania."""
+    for folder in FOLDERS:
+        (base_dir / folder).mkdir(parents=True, exist_ok=True)
+
+
+def artefact_paths(uid: str, base_dir: Path = BASE_DIR) -> Tuple[Path, Path]:
+    """Zwraca ścieżki (transkrypcja, podsumowanie) dla pliku o podanym UID."""
+    return base_dir / "transcripts" / f"{uid}.txt", base_dir / "summaries" / f"{uid}.txt"
+
+
+def range_uid(uid: str, start: float = 0.0, end: Optional[float] = None) -> str:
+    """
+    UID artefaktów transkrypcji zakresu `start`-`end` (sekundy) pliku o podanym UID.
+
+    Cały plik (brak zakresu) zachowuje swój UID, więc zapisane wcześniej
+    transkrypcje są nadal znajdowane.
+    """
+    if not start and end is None:
+        return uid
+    return f"{uid}_{round(start * 1000)}-{'end' if end is None else round(end * 1000)}"
+
+
+def write_text_atomic(path: Path, text: str, encoding: str = "utf-8") -> int:
+    """
+    Zapisuje tekst do pliku tymczasowego obok `path` i podmienia plik atomowo.
+
+    Czytelnik (inna sesja, serwer API) widzi starą albo nową zawartość,
+    nigdy częściowo zapisany plik.
+
+    Returns:
+        int: Rozmiar zapisanego pliku w bajtach
+    """
+    fd, part_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    part_path = Path(part_name)
+    try:
+        with os.fdopen(fd, "w", encoding=encoding) as part_file:
+            part_file.write(text)
+        size = part_path.stat().st_size
+        os.replace(part_path, path)
+        return size
+    finally:
+        part_path.unlink(missing_ok=True)
+
+
+def _write_bytes_atomic(path: Path, data: bytes) -> int:
+    fd, part_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    part_path = Path(part_name)
+    try:
+        with os.fdopen(fd, "wb") as part_file:
+            part_file.write(data)
+        os.replace(part_path, path)
+        return len(data)
+    finally:
+        part_path.unlink(missing_ok=True)
+
+
+def _variants(path: Path) -> List[Path]:
+    """Możliwe pliki artefaktu `<uid>.txt`: zwykły i skompresowane."""
+    for suffix in framed.SUFFIXES.values():
+        if path.name.endswith(suffix):
+            path = path.with_name(path.name[:-len(suffix)])
+    return [path] + [path.with_name(path.name + suffix) for suffix in framed.SUFFIXES.values()]
+
+
+def stored_path(path: Path) -> Optional[Path]:
+    """Plik na dysku dla ścieżki artefaktu (zwykły, `.gz` lub `.zst`) albo None."""
+    return next((variant for variant in _variants(Path(path)) if variant.exists()), None)
+
+
+def write_artefact(
+    path: Path,
+    text: str,
+    encoding: str = "utf-8",
+    codec: Optional[str] = None,
+    level: Optional[int] = None,
+) -> Tuple[Path, int]:
+    """
+    Zapisuje artefakt tekstowy atomowo, skompresowany wybranym kodekiem.
+
+    Inne warianty tego artefaktu (np. starszy plik bez kompresji) są usuwane.
+
+    Args:
+        path (Path): Ścieżka `<uid>.txt` z `artefact_paths`
+        text (str): Treść
+        encoding (str): Kodowanie tekstu przed kompresją
+        codec (str, optional): `gzip`, `zstd` lub `none` (domyślnie `ARTEFACT_COMPRESSION`)
+        level (int, optional): Poziom kompresji (domyślnie `ARTEFACT_COMPRESSION_LEVEL`)
+
+    Returns:
+        tuple: (ścieżka zapisanego pliku, rozmiar na dysku w bajtach)
+    """
+    if codec is None:
+        codec, level = framed.codec_from_env()
+    plain_path = _variants(Path(path))[0]
+    if codec == "none":
+        target, size = plain_path, write_text_atomic(plain_path, text, encoding=encoding)
+    else:
+        target = plain_path.with_name(plain_path.name + framed.SUFFIXES[codec])
+        size = _write_bytes_atomic(target, framed.compress(text.encode(encoding), codec, level))
+    for variant in _variants(plain_path):
+        if variant != target:
+            variant.unlink(missing_ok=True)
+    return target, size
+
+
+def open_artefact(path: Path) -> framed.Reader:
+    """
+    Czytelnik artefaktu z odczytem zakresów bajtów tekstu (`read`) i bloków (`iter_blocks`).
+
+    Raises:
+        FileNotFoundError: Gdy artefakt nie istnieje w żadnym wariancie
+    """
+    found = stored_path(path)
+    if found is None:
+        raise FileNotFoundError(f"Brak pliku artefaktu: {path}")
+    return framed.open_reader(found)
+
+
+def read_artefact(path: Path, encoding: str = "utf-8") -> str:
+    """Cała treść artefaktu tekstowego (skompresowanego lub nie)."""
+    return b"".join(open_artefact(path).iter_blocks()).decode(encoding)
+
+
+def read_summary(path: Path, encoding: str = "utf-8") -> Tuple[str, str]:
+    """
+    Odczytuje zapisane podsumowanie (temat w pierwszym wierszu, treść w kolejnych).
+
+    Returns:
+        tuple: (temat, podsumowanie)
+    """
+    summary_lines = read_artefact(path, encoding=encoding).splitlines()
+    return (summary_lines[0] if summary_lines else ""), " ".join(summary_lines[1:]).strip()
+
+
+def store_original(file_source: FileSource, file_extension: str, dst_stem: Path, move: bool = False) -> Path:
+    """
+    Zapisuje plik do uploads/originals strumieniowo (bez kopii całego pliku w pamięci).
+
+    Przesłany plik trafia najpierw do pliku tymczasowego obok miejsca docelowego,
+    a następnie jest przyjmowany przez `ingest_media` - z plików video zostaje
+    tylko ścieżka audio. Plik na serwerze jest czytany bezpośrednio.
+
+    Args:
+        file_source (bytes | BinaryIO | Path): Zawartość, otwarty plik lub ścieżka
+        file_extension (str): Rozszerzenie pliku (np. '.mp3')
+        dst_stem (Path): Ścieżka docelowa bez rozszerzenia (uploads/originals/<uid>)
+        move (bool): Czy plik wskazany ścieżką można przenieść (plik tymczasowy)
+
+    Returns:
+        Path: Ścieżka do zapisanego oryginału (rozszerzenie może się różnić od źródła)
+    """
+    if isinstance(file_source, Path):
+        return ingest_media(file_source, dst_stem, move=move)
+    fd, part_name = tempfile.mkstemp(
+        prefix=f".{dst_stem.name}.", suffix=file_extension, dir=dst_stem.parent
+    )
+    part_path = Path(part_name)
+    try:
+        with os.fdopen(fd, "wb") as part_file:
+            if isinstance(file_source, (bytes, bytearray, memoryview)):
+                part_file.write(file_source)
+            else:
+                file_source.seek(0)
+                shutil.copyfileobj(file_source, part_file, hashing.BLOCK_SIZE)
+        return ingest_media(part_path, dst_stem, move=True)
+    finally:
+        part_path.unlink(missing_ok=True)
+
+
+def source_size(file_source: FileSource) -> int:
+    """Zwraca rozmiar źródła pliku w bajtach (bajty, plik przesłany przez Streamlit lub ścieżka)."""
+    if isinstance(file_source, Path):
+        return file_source.stat().st_size
+    if isinstance(file_source, (bytes, bytearray, memoryview)):
+        return len(file_source)
+    size = getattr(file_source, "size", None)
+    if size is None and hasattr(file_source, "fileno"):
+        size = os.fstat(file_source.fileno()).st_size
+    return size or 0
+
+
+def _is_known(file_uid: str, catalog_db: Path) -> bool:
+    """Czy katalog zna oryginał lub transkrypcję pliku o danym UID."""
+    return any(
+        catalog.lookup(file_uid, kind, db_path=catalog_db) is not None for kind in ("original", "transcript")
+    )
+
+
+def prepare_source(
+    file_source: FileSource,
+    file_extension: str,
+    base_dir: Path = BASE_DIR,
+    catalog_db: Path = catalog.DB_PATH,
+    content_hash: str = "",
+    quick: bool = False,
+    move: bool = False,
+) -> Tuple[str, Path, Path, Path]:
+    """
+    Wyznacza UID pliku i zapisuje jego oryginał (jeśli katalog go jeszcze nie zna).
+
+    UID to skrót zawartości (algorytm `content_hash`, liczony strumieniowo).
+    Gdy katalog nie zna tego UID, sprawdzany jest jeszcze UID w starym
+    formacie (MD5) - pliki przetworzone przed zmianą algorytmu nie są
+    transkrybowane ponownie.
+    W trybie `quick` szybki identyfikator wskazuje kandydata w katalogu, ale
+    UID jest zawsze potwierdzany pełnym skrótem; przy zgodności pomijane jest
+    tylko ponowne przyjęcie pliku (zapis, FFmpeg). Nowy oryginał jest zapisywany przez
+    `store_original` i rejestrowany w katalogu artefaktów; jeśli katalog znał
+    ten sam UID pod inną ścieżką, stary plik jest usuwany. Równoczesne
+    przyjęcia tego samego pliku (np. dwie sesje) zapisują oryginał tylko raz
+    (`audio2tekst.singleflight`).
+
+    Args:
+        file_source (bytes | BinaryIO | Path): Zawartość pliku, otwarty plik
+            (np. przesłany przez Streamlit) lub ścieżka do pliku na serwerze
+        file_extension (str): Rozszerzenie pliku (np. '.mp3', '.wav')
+        base_dir (Path): Katalog uploads/
+        catalog_db (Path): Baza katalogu artefaktów
+        content_hash (str): Algorytm UID (pusty = domyślny)
+        quick (bool): Wstępne wyszukiwanie znanych plików po szybkim identyfikatorze
+        move (bool): Czy plik wskazany ścieżką można przenieść (plik tymczasowy)
+
+    Returns:
+        tuple: (uid, ścieżka oryginału, ścieżka transkrypcji, ścieżka podsumowania)
+
+    Raises:
+        RuntimeError: Gdy nie udało się przyjąć pliku (np. brak FFmpeg lub ścieżki audio)
+    """
+    if hasattr(file_source, "seek"):
+        file_source.seek(0)
+    with metrics.stage("hash", bytes_in=source_size(file_source)) as hash_stage:
+        if quick:
+            file_quick_id = hashing.quick_id(file_source)
+            candidate_uid = catalog.find_by_quick_id(file_quick_id, db_path=catalog_db)
+        file_uid = hashing.content_id(file_source, algorithm=content_hash)
+        if hashing.resolve_algorithm(content_hash) != hashing.LEGACY_ALGORITHM and not _is_known(
+            file_uid, catalog_db
+        ):
+            # Plik mógł zostać przetworzony pod UID sprzed zmiany algorytmu
+            if hasattr(file_source, "seek"):
+                file_source.seek(0)
+            legacy_uid = hashing.content_id(file_source, algorithm=hashing.LEGACY_ALGORITHM)
+            if _is_known(legacy_uid, catalog_db):
+                file_uid = legacy_uid
+        if quick:
+            # Szybki identyfikator wskazuje tylko kandydata - UID potwierdza pełny skrót
+            hash_stage.cache_hit = candidate_uid == file_uid
+            if not hash_stage.cache_hit:
+                catalog.register_quick_id(file_quick_id, file_uid, db_path=catalog_db)
+        hash_stage.job_id = file_uid
+    transcript_path, summary_path = artefact_paths(file_uid, base_dir)
+
+    def ingest() -> Tuple[Path, Optional[Path]]:
+        with metrics.stage("ingest") as ingest_stage:
+            known_original = catalog.lookup(file_uid, "original", db_path=catalog_db)
+            ingest_stage.cache_hit = known_original is not None
+            if known_original is not None:
+                return Path(known_original["path"]), None
+            ingest_stage.bytes_in = source_size(file_source)
+            stored_path = store_original(
+                file_source, file_extension, base_dir / "originals" / file_uid, move=move
+            )
+            ingest_stage.bytes_out = stored_path.stat().st_size
+            return stored_path, catalog.register(
+                file_uid, "original", stored_path, ingest_stage.bytes_out, db_path=catalog_db
+            )
+
+    with metrics.job(file_uid):
+        (orig_path, old_path), shared = singleflight.get_coordinator().do(
+            singleflight.ingest_key(file_uid), ingest
+        )
+    if shared:
+        # Oryginał zapisała inna sesja - stary plik usunęła ona
+        old_path = None
+    if old_path is not None:
+        try:
+            old_path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as cleanup_exc:
+            logger.warning("Nie udało się usunąć starego pliku %s: %s", old_path, cleanup_exc)
+    return file_uid, orig_path, transcript_path, summary_path
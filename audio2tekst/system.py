@@ -0,0 +1,81 @@
+"""
+Funkcje pomocnicze dla kompatybilności systemów (Windows, macOS, Linux).
+
+Wykrywanie platformy, wyszukiwanie narzędzi systemowych (FFmpeg/FFprobe)
+i dobór kodowania plików tekstowych.
+"""
+
+import platform
+import shutil
+from pathlib import Path
+from typing import Optional
+
+
+def get_system_info() -> dict:
+    """Zwraca informacje o systemie operacyjnym (platforma, architektura, wersja Pythona, itp.)."""
+    return {
+        "platform": platform.system().lower(),
+        "architecture": platform.machine(),
+        "python_version": platform.python_version(),
+        "is_windows": platform.system().lower() == "windows",
+        "is_macos": platform.system().lower() == "darwin",
+        "is_linux": platform.system().lower() == "linux",
+    }
+
+
+def find_executable(name: str) -> Optional[str]:
+    """Znajduje ścieżkę do pliku wykonywalnego w systemie (np. ffmpeg, ffprobe)."""
+    system_info = get_system_info()
+
+    # Na Windows dodaj .exe jeśli nie ma rozszerzenia
+    if system_info["is_windows"] and not name.endswith(".exe"):
+        name += ".exe"
+
+    # Sprawdź czy jest dostępny w PATH
+    if shutil.which(name):
+        return shutil.which(name)
+
+    # Sprawdź typowe lokalizacje
+    common_paths = []
+    if system_info["is_windows"]:
+        common_paths = [
+            "C:\\ffmpeg\\bin",
+            "C:\\Program Files\\ffmpeg\\bin",
+            "C:\\Program Files (x86)\\ffmpeg\\bin",
+        ]
+    elif system_info["is_macos"]:
+        common_paths = ["/usr/local/bin", "/opt/homebrew/bin", "/usr/bin"]
+    else:  # Linux
+        common_paths = ["/usr/bin", "/usr/local/bin", "/snap/bin"]
+
+    for path in common_paths:
+        full_path = Path(path) / name
+        if full_path.exists() and full_path.is_file():
+            return str(full_path)
+
+    return None
+
+
+def check_dependencies() -> dict:
+    """Sprawdza dostępność wymaganych narzędzi systemowych (FFmpeg, FFprobe)."""
+    dependencies = {
+        "ffmpeg": find_executable("ffmpeg"),
+        "ffprobe": find_executable("ffprobe"),
+    }
+
+    return {
+        name: {"available": path is not None, "path": path}
+        for name, path in dependencies.items()
+    }
+
+
+def get_safe_encoding() -> str:
+    """Zwraca bezpieczne kodowanie dla systemu (UTF-8 lub UTF-8-sig dla Windows)."""
+    system_info = get_system_info()
+
+    if system_info["is_windows"]:
+        # Windows może używać różnych kodowań
+        return "utf-8-sig"  # BOM dla lepszej kompatybilności
+    else:
+        # Unix-like systemy standardowo używają UTF-8
+        return "utf-8"
@@ -0,0 +1,235 @@
+"""
+Indeks pełnotekstowy transkrypcji i podsumowań (SQLite FTS5).
+
+Katalogi `uploads/transcripts` i `uploads/summaries` przechowują wyłącznie
+pliki `<uid>.txt`. Ten moduł utrzymuje obok nich bazę w katalogu `db/`
+z metadanymi zadania (źródło, długość, język, model, znaczniki czasu)
+oraz tabelą FTS5, dzięki czemu wyszukiwanie nie wymaga skanowania plików.
+"""
+
+import logging
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from audio2tekst import db, framed
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = Path("db") / "transcripts.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    id INTEGER PRIMARY KEY,
+    uid TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL DEFAULT '',
+    source_kind TEXT NOT NULL DEFAULT 'file',
+    duration REAL,
+    language TEXT NOT NULL DEFAULT '',
+    model TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    transcript TEXT NOT NULL DEFAULT '',
+    topic TEXT NOT NULL DEFAULT '',
+    summary TEXT NOT NULL DEFAULT ''
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS transcripts_fts USING fts5(
+    source, transcript, topic, summary,
+    content='transcripts', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS transcripts_ai AFTER INSERT ON transcripts BEGIN
+    INSERT INTO transcripts_fts(rowid, source, transcript, topic, summary)
+    VALUES (new.id, new.source, new.transcript, new.topic, new.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS transcripts_ad AFTER DELETE ON transcripts BEGIN
+    INSERT INTO transcripts_fts(transcripts_fts, rowid, source, transcript, topic, summary)
+    VALUES ('delete', old.id, old.source, old.transcript, old.topic, old.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS transcripts_au AFTER UPDATE ON transcripts BEGIN
+    INSERT INTO transcripts_fts(transcripts_fts, rowid, source, transcript, topic, summary)
+    VALUES ('delete', old.id, old.source, old.transcript, old.topic, old.summary);
+    INSERT INTO transcripts_fts(rowid, source, transcript, topic, summary)
+    VALUES (new.id, new.source, new.transcript, new.topic, new.summary);
+END;
+"""
+
+
+def _transaction(db_path: Path):
+    """Transakcja na bazie indeksu (schemat tworzony przy pierwszym użyciu)."""
+    return db.transaction(db_path, _SCHEMA)
+
+
+def index_transcript(
+    uid: str,
+    transcript: str,
+    source: str = "",
+    source_kind: str = "file",
+    duration: Optional[float] = None,
+    language: str = "",
+    model: str = "",
+    db_path: Path = DB_PATH,
+) -> None:
+    """
+    Dodaje lub aktualizuje transkrypcję w indeksie (wywoływane po zakończeniu zadania).
+
+    Args:
+        uid (str): Identyfikator pliku (ten sam co w nazwach plików w uploads/)
+        transcript (str): Pełny tekst transkrypcji
+        source (str): Nazwa pliku źródłowego lub ID filmu YouTube
+        source_kind (str): 'file' lub 'youtube'
+        duration (float, optional): Długość nagrania w sekundach
+        language (str): Język transkrypcji (np. 'pl')
+        model (str): Model użyty do transkrypcji (np. 'whisper-1')
+        db_path (Path): Ścieżka do bazy indeksu
+    """
+    now = time.time()
+    with _transaction(db_path) as conn:
+        conn.execute(
+            """
+            INSERT INTO transcripts
+                (uid, source, source_kind, duration, language, model,
+                 created_at, updated_at, transcript)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(uid) DO UPDATE SET
+                source = excluded.source,
+                source_kind = excluded.source_kind,
+                duration = COALESCE(excluded.duration, transcripts.duration),
+                language = excluded.language,
+                model = excluded.model,
+                updated_at = excluded.updated_at,
+                transcript = excluded.transcript
+            """,
+            (uid, source, source_kind, duration, language, model, now, now, transcript),
+        )
+
+
+def index_summary(uid: str, topic: str, summary: str, db_path: Path = DB_PATH) -> bool:
+    """
+    Zapisuje temat i podsumowanie dla już zaindeksowanej transkrypcji.
+
+    Returns:
+        bool: True, jeśli rekord o podanym UID istniał i został zaktualizowany
+    """
+    with _transaction(db_path) as conn:
+        cursor = conn.execute(
+            "UPDATE transcripts SET topic = ?, summary = ?, updated_at = ? WHERE uid = ?",
+            (topic, summary, time.time(), uid),
+        )
+        updated = cursor.rowcount > 0
+    return updated
+
+
+def remove_transcript(uid: str, db_path: Path = DB_PATH) -> None:
+    """Usuwa transkrypcję o podanym UID z indeksu."""
+    with _transaction(db_path) as conn:
+        conn.execute("DELETE FROM transcripts WHERE uid = ?", (uid,))
+
+
+def build_match_query(user_query: str) -> str:
+    """
+    Zamienia tekst wpisany przez użytkownika na bezpieczne zapytanie FTS5.
+
+    Każde słowo jest cytowane (cudzysłowy, operatory i nawiasy nie psują
+    składni), słowa są łączone operatorem AND, a ostatnie dostaje `*`,
+    żeby wyszukiwanie działało już w trakcie pisania.
+    """
+    words = re.findall(r"\w+", user_query, flags=re.UNICODE)
+    if not words:
+        return ""
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_transcripts(
+    query: str, limit: int = 20, db_path: Path = DB_PATH
+) -> List[Dict]:
+    """
+    Wyszukuje transkrypcje i podsumowania pasujące do zapytania.
+
+    Wyniki są sortowane według trafności (bm25), a fragment tekstu
+    z podświetleniem jest generowany przez SQLite (`snippet`).
+
+    Args:
+        query (str): Tekst wpisany przez użytkownika
+        limit (int): Maksymalna liczba wyników
+        db_path (Path): Ścieżka do bazy indeksu
+
+    Returns:
+        list: Lista słowników z kluczami uid, source, source_kind, duration,
+            language, model, created_at, topic, snippet
+    """
+    match_query = build_match_query(query)
+    if not match_query:
+        return []
+    with _transaction(db_path) as conn:
+        rows = conn.execute(
+            """
+            SELECT t.uid, t.source, t.source_kind, t.duration, t.language,
+                   t.model, t.created_at, t.topic,
+                   snippet(transcripts_fts, -1, '**', '**', ' … ', 16) AS snippet
+            FROM transcripts_fts
+            JOIN transcripts AS t ON t.id = transcripts_fts.rowid
+            WHERE transcripts_fts MATCH ?
+            ORDER BY bm25(transcripts_fts)
+            LIMIT ?
+            """,
+            (match_query, limit),
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def count_indexed(db_path: Path = DB_PATH) -> int:
+    """Zwraca liczbę zaindeksowanych transkrypcji."""
+    with _transaction(db_path) as conn:
+        (count,) = conn.execute("SELECT COUNT(*) FROM transcripts").fetchone()
+    return count
+
+
+def _read_artefact(path: Path) -> str:
+    """Treść transkrypcji lub podsumowania - zwykłej albo skompresowanej (`audio2tekst.framed`)."""
+    return b"".join(framed.open_reader(path).iter_blocks()).decode("utf-8-sig")
+
+
+def backfill_from_uploads(base_dir: Path, db_path: Path = DB_PATH) -> int:
+    """
+    Indeksuje transkrypcje zapisane wcześniej w `uploads/` bez metadanych.
+
+    Pliki już obecne w indeksie są pomijane, więc funkcję można wywoływać
+    przy każdym starcie aplikacji.
+
+    Returns:
+        int: Liczba nowo dodanych transkrypcji
+    """
+    transcripts_dir = base_dir / "transcripts"
+    if not transcripts_dir.exists():
+        return 0
+    with _transaction(db_path) as conn:
+        known = {row[0] for row in conn.execute("SELECT uid FROM transcripts")}
+    added = 0
+    for transcript_file in transcripts_dir.glob("*.txt*"):
+        uid = transcript_file.name.split(".")[0]
+        if uid in known or transcript_file.name.startswith("."):
+            continue
+        try:
+            transcript = _read_artefact(transcript_file)
+        except (OSError, RuntimeError) as exc:
+            logger.warning("Nie udało się odczytać %s: %s", transcript_file, exc)
+            continue
+        index_transcript(uid, transcript, db_path=db_path)
+        summary_file = next(iter(sorted((base_dir / "summaries").glob(f"{uid}.txt*"))), None)
+        if summary_file is not None:
+            lines = _read_artefact(summary_file).splitlines()
+            topic = lines[0] if lines else ""
+            index_summary(uid, topic, " ".join(lines[1:]).strip(), db_path=db_path)
+        known.add(uid)
+        added += 1
+    return added
+
+
+def clear_index(db_path: Path = DB_PATH) -> None:
+    """Usuwa wszystkie rekordy z indeksu (używane przy czyszczeniu pamięci aplikacji)."""
+    with _transaction(db_path) as conn:
+        conn.execute("DELETE FROM transcripts")
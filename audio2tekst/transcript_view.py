@@ -0,0 +1,203 @@
+"""
+Stronicowany podgląd i strumieniowy eksport zapisanych transkrypcji.
+
+Transkrypcja wielogodzinnego nagrania to setki KB lub kilka MB tekstu.
+`TranscriptPages` dzieli plik z uploads/transcripts na strony (granice na
+końcach wierszy, czyli tekstów kolejnych fragmentów) i odczytuje z dysku
+tylko wyświetlaną stronę - w pliku skompresowanym rozpakowywane są tylko
+obejmujące ją ramki (`storage.open_artefact`). Indeks stron (przesunięcia
+w bajtach tekstu) jest liczony raz dla danej wersji pliku (rozmiar, czas
+modyfikacji).
+
+Eksport (`iter_text`, `iter_json`, `iter_zip`) zwraca generatory bloków
+bajtów czytanych z dysku - serwer API wysyła je bez kopii całego pliku
+w pamięci, a aplikacja buduje plik do pobrania dopiero po kliknięciu.
+
+Konfiguracja (zmienne środowiskowe):
+
+- `TRANSCRIPT_PAGE_KB` - przybliżony rozmiar strony podglądu w KB.
+"""
+
+import codecs
+import functools
+import json
+import os
+import zipfile
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from audio2tekst import storage
+
+DEFAULT_PAGE_KB = 32
+FORMATS = {
+    "txt": "text/plain; charset=utf-8",
+    "json": "application/json; charset=utf-8",
+    "zip": "application/zip",
+}
+
+
+def page_bytes() -> int:
+    """Przybliżony rozmiar strony podglądu w bajtach."""
+    return max(1024, int(float(os.getenv("TRANSCRIPT_PAGE_KB", str(DEFAULT_PAGE_KB))) * 1024))
+
+
+def _char_boundary(data: bytes, position: int) -> int:
+    """Cofa pozycję do początku znaku UTF-8 (bajty kontynuacji to 10xxxxxx)."""
+    while 0 < position < len(data) and data[position] & 0xC0 == 0x80:
+        position -= 1
+    return position
+
+
+def _lines(blocks: Iterable[bytes]) -> Iterator[bytes]:
+    """Wiersze (z końcowym znakiem nowej linii) z kolejnych bloków bajtów."""
+    rest = b""
+    for block in blocks:
+        lines = (rest + block).split(b"\n")
+        rest = lines.pop()
+        for line in lines:
+            yield line + b"\n"
+    if rest:
+        yield rest
+
+
+@functools.lru_cache(maxsize=64)
+def _page_offsets(path: str, _size: int, _mtime_ns: int, limit: int) -> Tuple[int, ...]:
+    """Przesunięcia początków stron; rozmiar i czas modyfikacji pliku unieważniają cache."""
+    offsets = [0]
+    page_start = position = 0
+    for line in _lines(storage.open_artefact(Path(path)).iter_blocks()):
+        if position > page_start and position - page_start + len(line) > limit:
+            offsets.append(position)
+            page_start = position
+        # Wiersz dłuższy od strony (np. transkrypcja starszej wersji) dzielony na granicach znaków
+        while len(line) > limit:
+            cut = _char_boundary(line, limit) or limit
+            position += cut
+            line = line[cut:]
+            offsets.append(position)
+            page_start = position
+        position += len(line)
+    return tuple(offsets)
+
+
+class TranscriptPages:
+    """
+    Strony zapisanej transkrypcji odczytywane z dysku na żądanie.
+
+    Args:
+        path (Path): Plik transkrypcji (UTF-8, opcjonalnie z BOM; zwykły lub skompresowany)
+        limit (int, optional): Rozmiar strony w bajtach (domyślnie `TRANSCRIPT_PAGE_KB`)
+
+    Raises:
+        FileNotFoundError: Gdy transkrypcja nie istnieje
+    """
+
+    def __init__(self, path: Path, limit: Optional[int] = None):
+        self.reader = storage.open_artefact(path)
+        self.path = self.reader.path
+        stat = self.path.stat()
+        self.size = self.reader.size
+        self.offsets = _page_offsets(str(self.path), stat.st_size, stat.st_mtime_ns, limit or page_bytes())
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def page(self, index: int) -> str:
+        """Tekst strony o numerze `index` (od 0)."""
+        if not 0 <= index < len(self.offsets):
+            raise IndexError(f"Brak strony {index + 1} (stron: {len(self.offsets)})")
+        start = self.offsets[index]
+        end = self.offsets[index + 1] if index + 1 < len(self.offsets) else self.size
+        data = self.reader.read(start, end - start)
+        return data.decode("utf-8-sig" if index == 0 else "utf-8", errors="replace")
+
+
+def iter_text(path: Path) -> Iterator[bytes]:
+    """Tekst artefaktu (rozpakowany, jeśli plik jest skompresowany) blokami."""
+    return storage.open_artefact(path).iter_blocks()
+
+
+def _iter_json_string(path: Path) -> Iterator[bytes]:
+    """Zawartość pliku tekstowego jako treść napisu JSON (bez cudzysłowów), blokami."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    for data in iter_text(path):
+        text = decoder.decode(data)
+        if text:
+            yield json.dumps(text, ensure_ascii=False)[1:-1].encode("utf-8")
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield json.dumps(text, ensure_ascii=False)[1:-1].encode("utf-8")
+
+
+def iter_json(
+    uid: str,
+    transcript_path: Path,
+    summary: Optional[Tuple[str, str]] = None,
+) -> Iterator[bytes]:
+    """
+    Transkrypcja jako dokument JSON `{"uid", "topic", "summary", "transcript"}`.
+
+    Temat i podsumowanie są krótkie i trafiają do nagłówka dokumentu; tekst
+    transkrypcji jest kodowany blokami w trakcie odczytu.
+    """
+    topic, summary_text = summary or ("", "")
+    head = json.dumps({"uid": uid, "topic": topic, "summary": summary_text}, ensure_ascii=False)
+    yield head[:-1].encode("utf-8") + b', "transcript": "'
+    yield from _iter_json_string(transcript_path)
+    yield b'"}'
+
+
+class _ZipSink:
+    """Niepozycjonowalne wyjście `zipfile`: zapisane bajty są odbierane przez `drain()`."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._written = 0
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._written += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._written
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def iter_zip(members: Sequence[Tuple[str, Path]]) -> Iterator[bytes]:
+    """
+    Archiwum ZIP z plików `(nazwa w archiwum, ścieżka)`, generowane w trakcie odczytu.
+
+    Rozmiary i sumy kontrolne trafiają do deskryptorów za danymi, więc
+    archiwum nie wymaga pozycjonowania wyjścia ani bufora na cały plik.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, path in members:
+            with archive.open(name, "w") as member:
+                for data in iter_text(path):
+                    member.write(data)
+                    chunk = sink.drain()
+                    if chunk:
+                        yield chunk
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
+
+
+def bundle_members(uid: str, transcript_path: Path, summary_path: Optional[Path]) -> List[Tuple[str, Path]]:
+    """Pliki paczki ZIP: transkrypcja i (jeśli jest) podsumowanie."""
+    members = [(f"transkrypcja_{uid}.txt", transcript_path)]
+    if summary_path is not None:
+        members.append((f"podsumowanie_{uid}.txt", summary_path))
+    return members
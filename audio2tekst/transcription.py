@@ -0,0 +1,265 @@
+"""
+Silniki transkrypcji fragmentów audio.
+
+Każdy silnik implementuje ten sam interfejs (`TranscriptionBackend`):
+transkrypcję pojedynczego fragmentu (plik na dysku albo fragment w pamięci
+z `media.ChunkStream`) w zadanym języku. Dostępne są:
+
+- `openai` - Whisper API (fragmenty do 25 MB, jedno żądanie HTTP na fragment),
+- `local` - lokalny model Whisper na CPU (`faster-whisper`, kwantyzacja int8,
+  wsadowe dekodowanie segmentów mowy w obrębie fragmentu; kolejne fragmenty
+  są transkrybowane osobno); wagi modelu są ładowane raz na proces
+  i współdzielone przez wszystkie zadania i sesje.
+
+Silnik wybierany jest osobno dla każdego zadania (`create_backend`).
+"""
+
+import abc
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+try:  # Opcjonalna zależność - lokalna transkrypcja bez API
+    import faster_whisper
+except ImportError:  # pragma: no cover - zależy od środowiska
+    faster_whisper = None
+
+logger = logging.getLogger(__name__)
+
+OPENAI_MAX_CHUNK_BYTES = 25 * 1024 * 1024  # Limit pojedynczego pliku Whisper API
+
+BACKENDS = {
+    "openai": "OpenAI Whisper API",
+    "local": "Lokalny Whisper (CPU, faster-whisper)",
+}
+
+# Wczytane modele lokalne: (model, urządzenie, typ obliczeń, wątki) -> WhisperModel
+_LOCAL_MODELS: Dict[Tuple[str, str, str, int], object] = {}
+_LOCAL_MODELS_LOCK = threading.Lock()
+
+# Fragment: ścieżka pliku albo otwarty plik z atrybutem `name` (np. `media.AudioChunk`)
+AudioInput = Union[Path, BinaryIO]
+
+
+class TranscriptionError(RuntimeError):
+    """Błąd transkrypcji fragmentu zgłoszony przez silnik."""
+
+
+class TranscriptionBackend(abc.ABC):
+    """
+    Interfejs silnika transkrypcji.
+
+    Atrybut `max_chunk_bytes` określa największy obsługiwany plik fragmentu
+    (None = bez limitu); większe fragmenty są pomijane przez wywołującego.
+    """
+
+    name = ""
+    max_chunk_bytes: Optional[int] = None
+
+    @property
+    @abc.abstractmethod
+    def model_label(self) -> str:
+        """Nazwa modelu zapisywana w indeksie transkrypcji."""
+
+    @abc.abstractmethod
+    def transcribe(self, audio_path: AudioInput, language: str) -> str:
+        """
+        Zwraca tekst transkrypcji jednego fragmentu (ścieżka lub plik w pamięci).
+
+        Raises:
+            TranscriptionError: Gdy silnik nie zwrócił transkrypcji
+            OSError: Gdy plik fragmentu nie jest dostępny
+        """
+
+
+class OpenAIBackend(TranscriptionBackend):
+    """Transkrypcja przez Whisper API (`audio.transcriptions.create`)."""
+
+    name = "openai"
+    max_chunk_bytes = OPENAI_MAX_CHUNK_BYTES
+
+    def __init__(self, openai_client, model: str = "whisper-1"):
+        self.client = openai_client
+        self.model = model
+
+    @property
+    def model_label(self) -> str:
+        return self.model
+
+    def transcribe(self, audio_path: AudioInput, language: str) -> str:
+        if not isinstance(audio_path, Path):
+            # Fragment w pamięci - nazwa pliku w żądaniu pochodzi z atrybutu `name`
+            audio_path.seek(0)
+            return self._create(audio_path, language)
+        with open(audio_path, "rb") as audio_file:
+            return self._create(audio_file, language)
+
+    def _create(self, audio_file: BinaryIO, language: str) -> str:
+        transcript_text = self.client.audio.transcriptions.create(
+            model=self.model,
+            file=audio_file,
+            language=language,
+            response_format="text",
+        )
+        return str(transcript_text)
+
+
+def load_local_model(
+    model_size: str = "small",
+    device: str = "cpu",
+    compute_type: str = "int8",
+    cpu_threads: int = 0,
+):
+    """
+    Zwraca model `faster_whisper.WhisperModel`, wczytując go tylko raz na proces.
+
+    Kolejne wywołania z tymi samymi parametrami zwracają ten sam obiekt, więc
+    wagi modelu zajmują pamięć jeden raz niezależnie od liczby sesji i zadań.
+
+    Raises:
+        TranscriptionError: Gdy pakiet `faster-whisper` nie jest zainstalowany
+    """
+    if faster_whisper is None:
+        raise TranscriptionError(
+            "Lokalna transkrypcja wymaga pakietu faster-whisper (pip install faster-whisper)"
+        )
+    key = (model_size, device, compute_type, cpu_threads)
+    with _LOCAL_MODELS_LOCK:
+        model = _LOCAL_MODELS.get(key)
+        if model is None:
+            started = time.perf_counter()
+            model = faster_whisper.WhisperModel(
+                model_size,
+                device=device,
+                compute_type=compute_type,
+                cpu_threads=cpu_threads,
+            )
+            _LOCAL_MODELS[key] = model
+            logger.info(
+                "Wczytano lokalny model Whisper %s (%s, %s) w %.1f s",
+                model_size, device, compute_type, time.perf_counter() - started,
+            )
+    return model
+
+
+class LocalWhisperBackend(TranscriptionBackend):
+    """
+    Transkrypcja lokalnym modelem Whisper (faster-whisper / CTranslate2).
+
+    Model jest kwantyzowany do int8, a segmenty mowy jednego fragmentu
+    dekoduje wsadowo (`batch_size` naraz, `BatchedInferencePipeline`);
+    fragmenty nie są łączone w jeden wsad - każde wywołanie `transcribe`
+    to jeden fragment. Silnik nie ma limitu rozmiaru fragmentu ani limitów
+    zapytań API.
+    """
+
+    name = "local"
+    max_chunk_bytes = None
+
+    def __init__(
+        self,
+        model_size: str = "small",
+        device: str = "cpu",
+        compute_type: str = "int8",
+        cpu_threads: int = 0,
+        batch_size: int = 8,
+    ):
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.batch_size = batch_size
+
+    @property
+    def model_label(self) -> str:
+        return f"faster-whisper-{self.model_size}-{self.compute_type}"
+
+    def _pipeline(self):
+        model = load_local_model(self.model_size, self.device, self.compute_type, self.cpu_threads)
+        batched_cls = getattr(faster_whisper, "BatchedInferencePipeline", None)
+        if self.batch_size > 1 and batched_cls is not None:
+            return batched_cls(model=model), {"batch_size": self.batch_size}
+        return model, {}
+
+    def transcribe(self, audio_path: AudioInput, language: str) -> str:
+        pipeline, options = self._pipeline()
+        if isinstance(audio_path, Path):
+            audio_input = str(audio_path)
+        else:
+            # faster-whisper dekoduje również otwarty plik (PyAV)
+            audio_path.seek(0)
+            audio_input = audio_path
+        try:
+            segments, _info = pipeline.transcribe(
+                audio_input, language=language or None, **options
+            )
+            # Segmenty są generatorem - dekodowanie odbywa się podczas iteracji
+            return " ".join(segment.text.strip() for segment in segments).strip()
+        except (RuntimeError, ValueError) as exc:
+            raise TranscriptionError(f"Błąd lokalnej transkrypcji {audio_path}: {exc}") from exc
+
+
+def available_backends() -> List[str]:
+    """Zwraca nazwy silników możliwych do użycia w tym środowisku."""
+    names = ["openai"]
+    if faster_whisper is not None:
+        names.append("local")
+    return names
+
+
+def local_options_from_env() -> Dict:
+    """Parametry lokalnego silnika ze zmiennych `LOCAL_WHISPER_*`."""
+    return {
+        "model_size": os.getenv("LOCAL_WHISPER_MODEL", "small"),
+        "device": os.getenv("LOCAL_WHISPER_DEVICE", "cpu"),
+        "compute_type": os.getenv("LOCAL_WHISPER_COMPUTE_TYPE", "int8"),
+        "cpu_threads": int(os.getenv("LOCAL_WHISPER_CPU_THREADS", "0")),
+        "batch_size": int(os.getenv("LOCAL_WHISPER_BATCH_SIZE", "8")),
+    }
+
+
+def create_backend(
+    name: str,
+    openai_client=None,
+    openai_model: str = "whisper-1",
+    local_options: Optional[Dict] = None,
+) -> TranscriptionBackend:
+    """
+    Tworzy silnik transkrypcji o podanej nazwie.
+
+    Raises:
+        ValueError: Gdy nazwa silnika jest nieznana albo brakuje klienta OpenAI
+    """
+    if name == "openai":
+        if openai_client is None:
+            raise ValueError("Silnik 'openai' wymaga klienta OpenAI")
+        return OpenAIBackend(openai_client, model=openai_model)
+    if name == "local":
+        options = local_options if local_options is not None else local_options_from_env()
+        return LocalWhisperBackend(**options)
+    raise ValueError(f"Nieznany silnik transkrypcji: {name}. Dostępne: {', '.join(BACKENDS)}")
+
+
+def measure_real_time_factor(
+    backend: TranscriptionBackend, audio_path: Path, audio_seconds: float, language: str = "pl"
+) -> Dict[str, float]:
+    """
+    Mierzy współczynnik czasu rzeczywistego (RTF) silnika dla jednego pliku.
+
+    RTF = czas transkrypcji / długość nagrania; wartość poniżej 1 oznacza
+    transkrypcję szybszą niż odtwarzanie.
+
+    Returns:
+        dict: {'seconds': czas transkrypcji, 'audio_seconds': długość nagrania, 'rtf': RTF}
+    """
+    started = time.perf_counter()
+    backend.transcribe(audio_path, language)
+    elapsed = time.perf_counter() - started
+    return {
+        "seconds": elapsed,
+        "audio_seconds": audio_seconds,
+        "rtf": elapsed / audio_seconds if audio_seconds else float("inf"),
+    }
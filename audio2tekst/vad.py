@@ -0,0 +1,336 @@
+"""
+Wykrywanie mowy (VAD) i usuwanie ciszy przed podziałem na fragmenty.
+
+Nagrania spotkań i wykładów zawierają długie fragmenty ciszy lub muzyki,
+za które Whisper API nalicza opłatę jak za mowę. `trim_silence()` dekoduje
+plik przez FFmpeg do PCM (mono, 16 kHz) i strumieniowo, ramka po ramce
+(30 ms), liczy w NumPy energię i liczbę przejść przez zero:
+
+- ramka jest mową, gdy jej energia przekracza poziom szumu tła
+  (10. percentyl energii) o `VAD_MARGIN_DB` (szum szerokopasmowy o dużej
+  liczbie przejść przez zero musi być dodatkowo głośniejszy),
+- okna 1 s o prawie stałej energii (ton, podkład muzyczny) nie są mową -
+  energia mowy zmienia się z rytmem sylab,
+- przerwy krótsze niż `VAD_MIN_SILENCE` są łączone, a odcinki mowy
+  poszerzane o margines `VAD_PADDING`.
+
+Odcinki mowy są sklejane (demuxer concat FFmpeg) do pliku MP3 w przestrzeni
+roboczej zadania, a `SpeechMap` przelicza czas w skróconym nagraniu na czas
+w oryginale, więc znaczniki czasu odnoszą się do oryginalnej osi czasu.
+
+Etap jest opcjonalny (`VAD_ENABLED`, domyślnie wyłączony) i wymaga NumPy
+(instalowanego razem ze Streamlit).
+"""
+
+import bisect
+import logging
+import os
+import subprocess  # nosec B404 # Bezpieczne wywoływanie FFmpeg
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+try:  # Zależność Streamlit - bez niej etap VAD jest pomijany
+    import numpy as np
+except ImportError:  # pragma: no cover - zależy od środowiska
+    np = None
+
+from audio2tekst import metrics
+from audio2tekst.media import AUDIO_TRANSCODE_ARGS, get_duration
+from audio2tekst.scheduler import get_scheduler
+from audio2tekst.scratch import ScratchSpace
+from audio2tekst.system import check_dependencies
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+FRAME_SEC = 0.03
+FRAME_SAMPLES = int(SAMPLE_RATE * FRAME_SEC)
+WINDOW_FRAMES = int(1.0 / FRAME_SEC)  # Okno oceny zmienności energii (ok. 1 s)
+READ_FRAMES = 2000  # Ramki odczytywane z FFmpeg naraz (ok. 1 min, 1,9 MB)
+SILENCE_DB = -200.0  # Energia ramki zerowej (cisza cyfrowa)
+MIN_SPEECH_DB = -50.0  # Najniższy próg mowy niezależnie od poziomu szumu
+NOISE_ZCR = 0.35  # Udział przejść przez zero typowy dla szumu szerokopasmowego
+NOISE_EXTRA_DB = 10.0  # O ile głośniejszy musi być taki szum, żeby uznać go za mowę
+MIN_SPEECH_SEC = 0.25  # Krótsze odcinki mowy (trzaski) są pomijane
+DECODE_TIMEOUT = 60 * 60
+
+
+class SpeechMap:
+    """
+    Odcinki mowy w oryginalnym nagraniu i przeliczanie czasu skróconego nagrania.
+
+    Args:
+        spans (list): Odcinki mowy (początek, koniec) w sekundach oryginału, rosnąco
+        duration (float): Długość oryginalnego nagrania w sekundach
+    """
+
+    def __init__(self, spans: Sequence[Tuple[float, float]], duration: float):
+        self.spans = [(float(start), float(end)) for start, end in spans]
+        self.duration = duration
+        # Początek każdego odcinka na osi czasu skróconego nagrania
+        self._trimmed_starts = []
+        position = 0.0
+        for start, end in self.spans:
+            self._trimmed_starts.append(position)
+            position += end - start
+        self.speech_seconds = position
+
+    @property
+    def removed_seconds(self) -> float:
+        """Usunięte sekundy ciszy i muzyki."""
+        return max(self.duration - self.speech_seconds, 0.0)
+
+    def to_original(self, trimmed_time: float) -> float:
+        """Przelicza czas w skróconym nagraniu na czas w oryginale."""
+        if not self.spans:
+            return trimmed_time
+        index = max(bisect.bisect_right(self._trimmed_starts, trimmed_time) - 1, 0)
+        start, end = self.spans[index]
+        return min(start + trimmed_time - self._trimmed_starts[index], end)
+
+    def as_dict(self) -> dict:
+        return {
+            "duration": self.duration,
+            "speech_seconds": self.speech_seconds,
+            "removed_seconds": self.removed_seconds,
+            "spans": [list(span) for span in self.spans],
+        }
+
+
+def enabled() -> bool:
+    """Czy etap VAD jest włączony (`VAD_ENABLED`) i dostępny (NumPy)."""
+    return os.getenv("VAD_ENABLED", "false").lower() == "true" and np is not None
+
+
+def decode_command(ffmpeg_path: str, file_path: Path) -> List[str]:
+    """Polecenie FFmpeg dekodujące ścieżkę audio do PCM s16le, mono, 16 kHz na standardowe wyjście."""
+    return [
+        ffmpeg_path, "-v", "error", "-i", str(file_path), "-vn",
+        "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "pipe:1",
+    ]
+
+
+def frame_features(file_path: Path) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Dekoduje plik strumieniowo i zwraca energię (dBFS) i udział przejść przez zero każdej ramki.
+
+    W pamięci jest jednocześnie najwyżej `READ_FRAMES` ramek PCM, więc
+    wielogodzinne nagrania nie są dekodowane w całości do RAM.
+
+    Raises:
+        RuntimeError: Gdy FFmpeg nie jest dostępny lub dekodowanie się nie powiodło
+    """
+    dependencies_info = check_dependencies()
+    if not dependencies_info["ffmpeg"]["available"]:
+        raise RuntimeError("FFmpeg nie jest dostępne w systemie. Zainstaluj FFmpeg.")
+    ffmpeg_cmd = decode_command(dependencies_info["ffmpeg"]["path"], file_path)
+    energies: List["np.ndarray"] = []
+    crossings: List["np.ndarray"] = []
+    frame_bytes = FRAME_SAMPLES * 2
+    with get_scheduler().slot():
+        process = subprocess.Popen(  # nosec B603 # Argumenty przygotowane przez decode_command
+            ffmpeg_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        try:
+            while True:
+                block = process.stdout.read(frame_bytes * READ_FRAMES)
+                usable = len(block) - len(block) % frame_bytes
+                if usable:
+                    samples = np.frombuffer(block[:usable], dtype="<i2").astype(np.float32) / 32768.0
+                    frames = samples.reshape(-1, FRAME_SAMPLES)
+                    rms = np.sqrt(np.mean(frames * frames, axis=1))
+                    energies.append(np.where(rms > 0, 20 * np.log10(np.maximum(rms, 1e-10)), SILENCE_DB))
+                    signs = np.signbit(frames)
+                    crossings.append(np.mean(signs[:, 1:] != signs[:, :-1], axis=1))
+                if len(block) < frame_bytes * READ_FRAMES:
+                    break  # Koniec strumienia (niepełna ostatnia ramka jest pomijana)
+            stderr = process.stderr.read()
+            returncode = process.wait(timeout=DECODE_TIMEOUT)
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+    if returncode != 0:
+        raise RuntimeError(f"Błąd dekodowania audio do analizy mowy: {stderr.decode('utf-8', 'replace')}")
+    if not energies:
+        return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+    return np.concatenate(energies), np.concatenate(crossings)
+
+
+def speech_frames(
+    energy_db: "np.ndarray",
+    zcr: "np.ndarray",
+    margin_db: float = 12.0,
+    min_modulation_db: float = 3.0,
+) -> "np.ndarray":
+    """
+    Klasyfikuje ramki jako mowę (True) lub ciszę/muzykę (False).
+
+    Args:
+        energy_db: Energia ramek w dBFS
+        zcr: Udział przejść przez zero w ramkach (0-1)
+        margin_db (float): Nadwyżka energii ponad szum tła uznawana za mowę
+        min_modulation_db (float): Najmniejsze odchylenie standardowe energii
+            w oknie 1 s, poniżej którego okno uznaje się za ton lub muzykę (0 = wyłączone)
+    """
+    if energy_db.size == 0:
+        return np.zeros(0, dtype=bool)
+    noise_floor = float(np.percentile(energy_db, 10))
+    threshold = max(noise_floor + margin_db, MIN_SPEECH_DB)
+    speech = (energy_db > threshold) & ((zcr < NOISE_ZCR) | (energy_db > threshold + NOISE_EXTRA_DB))
+    if min_modulation_db > 0:
+        window_count = energy_db.size // WINDOW_FRAMES
+        if window_count:
+            # Zmienność energii liczona tylko po ramkach głośnych - okno z początkiem
+            # tonu po ciszy nie jest przez to uznawane za zmienne
+            size = window_count * WINDOW_FRAMES
+            windows = energy_db[:size].reshape(window_count, WINDOW_FRAMES)
+            voiced = speech[:size].reshape(window_count, WINDOW_FRAMES)
+            counts = np.maximum(voiced.sum(axis=1), 1)
+            mean = (windows * voiced).sum(axis=1) / counts
+            spread = np.sqrt((((windows - mean[:, None]) * voiced) ** 2).sum(axis=1) / counts)
+            steady = (voiced.sum(axis=1) >= WINDOW_FRAMES // 4) & (spread < min_modulation_db)
+            speech[:size] &= ~np.repeat(steady, WINDOW_FRAMES)
+    return speech
+
+
+def frames_to_spans(
+    speech: "np.ndarray",
+    duration: float,
+    min_silence: float = 1.0,
+    padding: float = 0.2,
+) -> List[Tuple[float, float]]:
+    """
+    Zamienia maskę ramek mowy na odcinki (początek, koniec) w sekundach.
+
+    Przerwy krótsze niż `min_silence` są łączone, odcinki krótsze niż
+    `MIN_SPEECH_SEC` pomijane, a pozostałe poszerzane o `padding` z obu stron.
+    """
+    if speech.size == 0 or not speech.any():
+        return []
+    edges = np.diff(np.concatenate(([0], speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1) * FRAME_SEC
+    ends = np.flatnonzero(edges == -1) * FRAME_SEC
+    spans: List[List[float]] = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        if spans and start - spans[-1][1] < min_silence:
+            spans[-1][1] = end
+        else:
+            spans.append([start, end])
+    padded: List[Tuple[float, float]] = []
+    for start, end in spans:
+        if end - start < MIN_SPEECH_SEC:
+            continue
+        start, end = max(start - padding, 0.0), min(end + padding, duration)
+        if padded and start <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], end)
+        else:
+            padded.append((start, end))
+    return padded
+
+
+def detect_speech(file_path: Path, duration: Optional[float] = None) -> SpeechMap:
+    """
+    Wyznacza odcinki mowy w pliku (parametry z `VAD_MARGIN_DB`, `VAD_MIN_MODULATION_DB`,
+    `VAD_MIN_SILENCE`, `VAD_PADDING`).
+
+    Raises:
+        RuntimeError: Gdy NumPy lub FFmpeg nie jest dostępny albo dekodowanie się nie powiodło
+    """
+    if np is None:
+        raise RuntimeError("Wykrywanie mowy wymaga pakietu numpy (pip install numpy)")
+    if duration is None:
+        duration = get_duration(file_path)
+    energy_db, zcr = frame_features(file_path)
+    speech = speech_frames(
+        energy_db,
+        zcr,
+        margin_db=float(os.getenv("VAD_MARGIN_DB", "12")),
+        min_modulation_db=float(os.getenv("VAD_MIN_MODULATION_DB", "3")),
+    )
+    spans = frames_to_spans(
+        speech,
+        duration,
+        min_silence=float(os.getenv("VAD_MIN_SILENCE", "1.0")),
+        padding=float(os.getenv("VAD_PADDING", "0.2")),
+    )
+    return SpeechMap(spans, duration)
+
+
+def _concat_line(file_path: Path, start: float, end: float) -> str:
+    quoted = str(file_path.resolve()).replace("'", "'\\''")
+    return f"file '{quoted}'\ninpoint {start:.3f}\noutpoint {end:.3f}\n"
+
+
+def cut_speech(file_path: Path, speech_map: SpeechMap, scratch: ScratchSpace) -> Path:
+    """
+    Skleja odcinki mowy z `speech_map` w jeden plik MP3 w przestrzeni roboczej.
+
+    Raises:
+        RuntimeError: Gdy FFmpeg zakończy się błędem
+    """
+    dependencies_info = check_dependencies()
+    if not dependencies_info["ffmpeg"]["available"]:
+        raise RuntimeError("FFmpeg nie jest dostępne w systemie. Zainstaluj FFmpeg.")
+    list_path = scratch.new_file(suffix=".txt", prefix="speech_")
+    list_path.write_text(
+        "".join(_concat_line(file_path, start, end) for start, end in speech_map.spans), encoding="utf-8"
+    )
+    out_path = scratch.new_file(suffix=".mp3", prefix="speech_")
+    ffmpeg_cmd = [
+        dependencies_info["ffmpeg"]["path"], "-y", "-v", "error",
+        "-f", "concat", "-safe", "0", "-i", str(list_path),
+        "-vn", *AUDIO_TRANSCODE_ARGS, str(out_path),
+    ]
+    try:
+        get_scheduler().run(
+            ffmpeg_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            timeout=DECODE_TIMEOUT, check=True, text=True,
+        )
+    except subprocess.TimeoutExpired as exc:
+        raise RuntimeError("Przekroczono czas oczekiwania podczas usuwania ciszy") from exc
+    except subprocess.CalledProcessError as exc:
+        logger.error("FFmpeg error: %s", exc.stderr)
+        raise RuntimeError(f"Błąd podczas usuwania ciszy: {exc}") from exc
+    finally:
+        list_path.unlink(missing_ok=True)
+    scratch.check_quota()
+    return out_path
+
+
+def trim_silence(
+    file_path: Path,
+    scratch: ScratchSpace,
+    duration: Optional[float] = None,
+    min_removed: Optional[float] = None,
+) -> Tuple[Path, Optional[SpeechMap]]:
+    """
+    Usuwa ciszę i muzykę z nagrania przed podziałem na fragmenty.
+
+    Gdy usunięto mniej niż `min_removed` sekund (`VAD_MIN_REMOVED`, domyślnie
+    10 s) albo nie wykryto mowy wcale, zwracany jest oryginał - ponowne
+    kodowanie nie byłoby warte zysku, a brak mowy może oznaczać błąd detekcji.
+
+    Returns:
+        tuple: (plik do podziału, mapa odcinków mowy lub None, gdy użyto oryginału)
+
+    Raises:
+        RuntimeError: Gdy analiza lub sklejanie odcinków się nie powiodło
+    """
+    if min_removed is None:
+        min_removed = float(os.getenv("VAD_MIN_REMOVED", "10"))
+    with metrics.stage("vad", bytes_in=file_path.stat().st_size) as vad_stage:
+        speech_map = detect_speech(file_path, duration)
+        if not speech_map.spans or speech_map.removed_seconds < min_removed:
+            logger.info(
+                "VAD: %.1f s do usunięcia z %.1f s - transkrypcja całego nagrania",
+                speech_map.removed_seconds, speech_map.duration,
+            )
+            return file_path, None
+        trimmed_path = cut_speech(file_path, speech_map, scratch)
+        vad_stage.bytes_out = trimmed_path.stat().st_size
+    logger.info(
+        "VAD: usunięto %.1f s ciszy z %.1f s nagrania (%d odcinków mowy)",
+        speech_map.removed_seconds, speech_map.duration, len(speech_map.spans),
+    )
+    return trimmed_path, speech_map
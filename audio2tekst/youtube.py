@@ -0,0 +1,327 @@
+"""
+Pobieranie audio z YouTube (yt-dlp) niezależne od interfejsu Streamlit.
+
+Błędy są zgłaszane wyjątkami; `app.py` zamienia je na komunikaty
+w interfejsie, a serwer API na status zadania.
+
+Playlisty i kanały są rozwijane do listy filmów samymi metadanymi
+(`expand_playlist`, bez pobierania), a `download_concurrently` pobiera
+filmy przez ograniczoną pulę wątków i zwraca je w kolejności ukończenia,
+więc transkrypcja pierwszego filmu rusza, zanim pobiorą się następne.
+Film przyjęty wcześniej jest rozpoznawany po identyfikatorze filmu
+(`cached_uid`) bez ponownego pobierania. Zakres filmu (`start`, `end`)
+jest pobierany sam (`download_audio`), chyba że cały film jest już
+w uploads/ (`cached_original`) - wtedy zakres wycina się lokalnie.
+"""
+
+import logging
+import math
+import re
+import subprocess  # nosec B404 # Bezpieczne wywoływanie FFmpeg
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import yt_dlp
+
+from audio2tekst import catalog
+from audio2tekst.scheduler import get_scheduler
+from audio2tekst.scratch import ScratchSpace
+from audio2tekst.storage import ALLOWED_EXT, range_uid
+from audio2tekst.system import check_dependencies
+
+logger = logging.getLogger(__name__)
+
+YOUTUBE_PATTERNS = (
+    r"(?:https?://)?(?:www\.)?youtube\.com/watch\?v=[\w-]+",
+    r"(?:https?://)?(?:www\.)?youtu\.be/[\w-]+",
+    r"(?:https?://)?(?:www\.)?youtube\.com/embed/[\w-]+",
+    r"(?:https?://)?(?:www\.)?youtube\.com/v/[\w-]+",
+    r"(?:https?://)?(?:www\.)?youtube\.com/shorts/[\w-]+",
+    r"(?:https?://)?(?:m\.)?youtube\.com/watch\?v=[\w-]+",
+)
+# Adres filmu z parametrem list= pozostaje adresem pojedynczego filmu
+PLAYLIST_PATTERNS = (
+    r"(?:https?://)?(?:www\.|m\.)?youtube\.com/playlist\?(?:[^#]*&)?list=[\w-]+",
+    r"(?:https?://)?(?:www\.|m\.)?youtube\.com/(?:@[\w.-]+|channel/[\w-]+|c/[\w.-]+|user/[\w.-]+)"
+    r"(?:/(?:videos|streams|shorts|featured))?/?(?:[?#].*)?$",
+)
+CHANNEL_TABS = ("videos", "streams", "shorts")
+VIDEO_ID = re.compile(r"^[\w-]{11}$")
+DEFAULT_DOWNLOAD_WORKERS = 3
+DEFAULT_PLAYLIST_LIMIT = 100
+
+Downloaded = Tuple[bytes, str]
+
+
+def validate_youtube_url(url: str) -> bool:
+    """Sprawdza czy URL jest prawidłowym adresem YouTube (różne formaty linków)."""
+    return any(re.match(pattern, url.strip()) for pattern in YOUTUBE_PATTERNS)
+
+
+def extract_youtube_id(url: str) -> str:
+    """Zwraca identyfikator filmu z adresu YouTube (lub sam adres, gdy nie da się go wyciągnąć)."""
+    match = re.search(r"(?:v=|youtu\.be/|embed/|/v/|shorts/)([\w-]{11})", url)
+    return match.group(1) if match else url.strip()
+
+
+def is_playlist_url(url: str) -> bool:
+    """Sprawdza czy URL jest adresem playlisty lub kanału YouTube."""
+    return any(re.match(pattern, url.strip()) for pattern in PLAYLIST_PATTERNS)
+
+
+def source_key(video_id: str, start: float = 0.0, end: Optional[float] = None) -> str:
+    """Identyfikator filmu (lub jego zakresu) w katalogu artefaktów (tabela szybkich identyfikatorów)."""
+    return range_uid(f"youtube:{video_id}", start, end)
+
+
+def cached_uid(
+    video_id: str, db_path: Path = catalog.DB_PATH, start: float = 0.0, end: Optional[float] = None
+) -> Optional[str]:
+    """
+    UID pliku przyjętego wcześniej z tego filmu, jeśli jego transkrypcja lub oryginał są w uploads/.
+
+    Taki film nie musi być pobierany ponownie. Z zakresem `start`-`end`
+    szukany jest plik pobrany dla tego zakresu.
+    """
+    uid = catalog.find_by_quick_id(source_key(video_id, start, end), db_path=db_path)
+    if uid is None:
+        return None
+    if catalog.lookup(uid, "transcript", db_path=db_path) or catalog.lookup(uid, "original", db_path=db_path):
+        return uid
+    return None
+
+
+def cached_original(video_id: str, db_path: Path = catalog.DB_PATH) -> Optional[str]:
+    """UID całego pobranego wcześniej filmu, jeśli jego oryginał jest w uploads/ (zakres wycina się lokalnie)."""
+    uid = catalog.find_by_quick_id(source_key(video_id), db_path=db_path)
+    if uid is not None and catalog.lookup(uid, "original", db_path=db_path):
+        return uid
+    return None
+
+
+def remember_video(
+    video_id: str, uid: str, db_path: Path = catalog.DB_PATH, start: float = 0.0, end: Optional[float] = None
+) -> None:
+    """Zapamiętuje UID pliku pobranego z filmu (`cached_uid` rozpozna go przy kolejnym zgłoszeniu)."""
+    catalog.register_quick_id(source_key(video_id, start, end), uid, db_path=db_path)
+
+
+def extract_info(url: str, options: Dict) -> Dict:
+    """
+    Metadane yt-dlp bez pobierania plików (domyślny ekstraktor `expand_playlist`).
+
+    Raises:
+        RuntimeError: Gdy yt-dlp nie odczyta metadanych (np. prywatna playlista)
+    """
+    try:
+        with yt_dlp.YoutubeDL(options) as ydl:
+            return ydl.extract_info(url, download=False) or {}
+    except yt_dlp.utils.DownloadError as download_exc:
+        raise RuntimeError(str(download_exc)) from download_exc
+
+
+def fetch_text(url: str) -> str:
+    """
+    Pobiera plik tekstowy (np. napisy) przez sieciową warstwę yt-dlp (nagłówki, ciasteczka, proxy).
+
+    Raises:
+        RuntimeError: Gdy pobieranie się nie powiodło
+    """
+    try:
+        with yt_dlp.YoutubeDL({"quiet": True}) as ydl:
+            return ydl.urlopen(url).read().decode("utf-8", errors="replace")
+    except (yt_dlp.utils.DownloadError, yt_dlp.networking.exceptions.RequestError, OSError) as fetch_exc:
+        raise RuntimeError(f"Nie udało się pobrać napisów: {fetch_exc}") from fetch_exc
+
+
+def _flat_entries(info: Dict) -> Iterator[Dict]:
+    """Wpisy playlisty; zagnieżdżone listy (zakładki kanału) są rozwijane."""
+    for entry in info.get("entries") or ():
+        if not entry:  # Film niedostępny (ignoreerrors)
+            continue
+        if entry.get("entries") is not None:
+            yield from _flat_entries(entry)
+        else:
+            yield entry
+
+
+def expand_playlist(
+    url: str,
+    extractor: Optional[Callable[[str, Dict], Dict]] = None,
+    limit: int = DEFAULT_PLAYLIST_LIMIT,
+) -> List[Dict]:
+    """
+    Rozwija playlistę lub kanał YouTube do listy filmów (tylko metadane, bez pobierania).
+
+    Args:
+        url (str): Adres playlisty lub kanału
+        extractor (callable, optional): Funkcja `(url, opcje yt-dlp) -> metadane`
+            (domyślnie `extract_info`; w testach zastępowana atrapą)
+        limit (int): Najwyższa liczba filmów
+
+    Returns:
+        list: Słowniki `{"id", "url", "title", "duration"}` w kolejności playlisty,
+        bez powtórzeń i wpisów niebędących filmami
+
+    Raises:
+        ValueError: Gdy URL nie jest adresem playlisty ani kanału
+        RuntimeError: Gdy nie udało się odczytać metadanych
+    """
+    url = url.strip()
+    if not is_playlist_url(url):
+        raise ValueError("Nieprawidłowy adres playlisty lub kanału YouTube.")
+    path = url.split("?")[0].split("#")[0].rstrip("/")
+    if "/playlist" not in path and not path.endswith(CHANNEL_TABS):
+        # Sam adres kanału zwraca zakładki, a nie filmy
+        url = path + "/videos"
+    options = {
+        "quiet": True,
+        "extract_flat": "in_playlist",
+        "skip_download": True,
+        "ignoreerrors": True,
+        "playlistend": limit,
+    }
+    info = (extractor or extract_info)(url, options)
+    videos: List[Dict] = []
+    seen = set()
+    for entry in _flat_entries(info):
+        video_id = str(entry.get("id") or "")
+        if not VIDEO_ID.match(video_id) or video_id in seen:
+            continue
+        seen.add(video_id)
+        videos.append({
+            "id": video_id,
+            "url": f"https://www.youtube.com/watch?v={video_id}",
+            "title": entry.get("title") or video_id,
+            "duration": entry.get("duration"),
+        })
+        if len(videos) >= limit:
+            break
+    logger.info("Playlista %s: %d filmów", url, len(videos))
+    return videos
+
+
+def download_concurrently(
+    videos: Iterable[Dict],
+    workers: int = DEFAULT_DOWNLOAD_WORKERS,
+    download: Optional[Callable[[str], Downloaded]] = None,
+) -> Iterator[Tuple[Dict, Optional[Downloaded], Optional[Exception]]]:
+    """
+    Pobiera filmy równolegle i zwraca je w kolejności ukończenia pobierania.
+
+    W toku jest najwyżej `workers` pobrań, a kolejne rusza dopiero po odebraniu
+    wyniku, więc w pamięci czeka najwyżej `workers` pobranych plików, nawet gdy
+    odbiorca (transkrypcja) jest wolniejszy od pobierania.
+
+    Args:
+        videos (iterable): Filmy z `expand_playlist` (wymagany klucz `url`)
+        workers (int): Liczba równoczesnych pobrań
+        download (callable, optional): Funkcja pobierająca (domyślnie `download_audio`)
+
+    Yields:
+        tuple: (film, (file_data, file_extension) lub None, wyjątek lub None)
+    """
+    download = download or download_audio
+    pending = iter(videos)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="audio2tekst-youtube") as pool:
+        def start_next() -> None:
+            video = next(pending, None)
+            if video is not None:
+                running[pool.submit(download, video["url"])] = video
+
+        for _ in range(max(workers, 1)):
+            start_next()
+        try:
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    video = running.pop(future)
+                    error = future.exception()
+                    yield video, None if error else future.result(), error
+                    start_next()
+        finally:
+            # Przerwanie odbioru (np. zamknięcie generatora) anuluje niezaczęte pobrania
+            for future in running:
+                future.cancel()
+
+
+def download_audio(url: str, start: float = 0.0, end: Optional[float] = None) -> Tuple[bytes, str]:
+    """
+    Pobiera audio z filmu YouTube i konwertuje do formatu MP3, jeśli to konieczne.
+
+    Pobierany jest najlepszy dostępny format audio; plik inny niż mp3/wav
+    jest konwertowany do MP3 przez wspólny harmonogram procesów FFmpeg.
+    Z zakresem `start`-`end` yt-dlp pobiera tylko ten fragment filmu
+    (`download_ranges`), a zwrócony plik zaczyna się w sekundzie `start`.
+
+    Args:
+        url (str): URL filmu YouTube do pobrania
+        start (float): Początek zakresu w sekundach
+        end (float, optional): Koniec zakresu w sekundach (None = koniec filmu)
+
+    Returns:
+        tuple: (file_data, file_extension)
+            - file_data (bytes): Zawartość pliku audio
+            - file_extension (str): Rozszerzenie pliku (np. '.mp3', '.wav')
+
+    Raises:
+        ValueError: Gdy URL jest nieprawidłowy
+        RuntimeError: Gdy wystąpi błąd podczas pobierania lub konwersji
+        FileNotFoundError: Gdy nie znaleziono pliku audio
+    """
+    if not validate_youtube_url(url):
+        raise ValueError(
+            "Nieprawidłowy adres YouTube. Wklej prawidłowy link do filmu YouTube."
+        )
+
+    # Pobranie w przestrzeni roboczej na dysku (rozmiar filmu nie jest znany z góry)
+    with ScratchSpace("youtube", tmpfs=False) as scratch_space:
+        output_template = str(scratch_space.path / "%(id)s.%(ext)s")
+        ydl_opts = {
+            "format": "bestaudio[ext=webm]/bestaudio",
+            "outtmpl": output_template,
+            "quiet": True,
+            "noplaylist": True,
+            "extractaudio": True,
+            "audioformat": "webm",
+            "prefer_ffmpeg": True,
+        }
+        if start or end is not None:
+            ydl_opts["download_ranges"] = yt_dlp.utils.download_range_func(
+                None, [(start, math.inf if end is None else end)]
+            )
+            ydl_opts["force_keyframes_at_cuts"] = True
+        try:
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                ydl.download([url])
+        except yt_dlp.utils.DownloadError as download_exc:
+            raise RuntimeError(str(download_exc)) from download_exc
+
+        for yt_file in scratch_space.path.iterdir():
+            if yt_file.suffix.lower() in ALLOWED_EXT and yt_file.is_file():
+                # Jeśli plik jest już mp3 lub wav, zwróć bez konwersji
+                if yt_file.suffix.lower() in [".mp3", ".wav"]:
+                    return yt_file.read_bytes(), yt_file.suffix.lower()
+                # W przeciwnym razie konwertuj do mp3
+                ffmpeg_deps = check_dependencies()
+                if not ffmpeg_deps["ffmpeg"]["available"]:
+                    raise RuntimeError("FFmpeg nie jest dostępne w systemie. Zainstaluj FFmpeg.")
+                yt_mp3_path = yt_file.with_suffix(".mp3")
+                ffmpeg_cmd = [ffmpeg_deps["ffmpeg"]["path"], "-y", "-i", str(yt_file), str(yt_mp3_path)]
+                try:
+                    get_scheduler().run(
+                        ffmpeg_cmd,
+                        stdout=subprocess.DEVNULL,
+                        stderr=subprocess.DEVNULL,
+                        check=True,
+                    )
+                except subprocess.CalledProcessError as conversion_exc:
+                    raise RuntimeError(
+                        f"Błąd konwersji do MP3: {conversion_exc}"
+                    ) from conversion_exc
+                if not yt_mp3_path.exists():
+                    raise RuntimeError("Konwersja do MP3 nie powiodła się.")
+                return yt_mp3_path.read_bytes(), ".mp3"
+        raise FileNotFoundError("Nie znaleziono pliku audio z YouTube")
@@ -0,0 +1,418 @@
+"""
+Audio2Tekst - Testy serwera HTTP API
+====================================
+
+Testy modułu audio2tekst.api_server: zlecanie zadań, strumień SSE,
+deduplikacja identycznych zgłoszeń i limit kolejki. Zapytania do OpenAI
+obsługuje lokalny `FakeOpenAIServer`.
+"""
+
+import http.client
+import io
+import json
+import subprocess  # nosec B404
+import time
+import urllib.error
+import urllib.request
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+import pytest
+
+from audio2tekst import catalog, storage, youtube
+from audio2tekst.api_server import ApiServer, Job, JobManager
+from audio2tekst.fake_openai import FakeOpenAIServer
+from audio2tekst.system import check_dependencies
+
+DEPS = check_dependencies()
+requires_ffmpeg = pytest.mark.skipif(
+    not (DEPS["ffmpeg"]["available"] and DEPS["ffprobe"]["available"]),
+    reason="FFmpeg/FFprobe niedostępne",
+)
+
+
+def make_recording(path, frequency=440, seconds=25):
+    """Nagranie MP3 (ton sinusoidalny); różne częstotliwości dają różne UID."""
+    subprocess.run(  # nosec B603
+        [DEPS["ffmpeg"]["path"], "-y", "-v", "error", "-f", "lavfi",
+         "-i", f"sine=frequency={frequency}:duration={seconds}", "-c:a", "libmp3lame", str(path)],
+        check=True,
+    )
+    return path
+
+
+@pytest.fixture
+def recording(temp_dir):
+    return make_recording(temp_dir / "nagranie.mp3")
+
+
+@pytest.fixture
+def api(temp_dir):
+    """Fabryka serwera API podłączonego do serwera testowego OpenAI."""
+    started = []
+
+    def start(latency=0.0, **manager_options):
+        fake = FakeOpenAIServer(latency=latency).start()
+        manager = JobManager(
+            openai_client=openai.OpenAI(base_url=fake.url, api_key="test", max_retries=0),
+            base_dir=temp_dir / "uploads",
+            catalog_db=temp_dir / "catalog.sqlite3",
+            index_db=temp_dir / "transcripts.sqlite3",
+            chunk_ms=10_000,
+            **manager_options,
+        )
+        server = ApiServer(manager).start()
+        started.append((fake, manager, server))
+        return fake, server
+
+    yield start
+    for fake, manager, server in started:
+        server.stop()
+        manager.shutdown()
+        fake.stop()
+
+
+def request(method, url, data=None, headers=None):
+    """Wysyła żądanie i zwraca (kod, odpowiedź JSON), również dla kodów błędów."""
+    req = urllib.request.Request(url, data=data, method=method, headers=headers or {})
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:  # nosec B310
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+def submit(server, path, summarize=False):
+    query = f"?filename={path.name}" + ("&summarize=1" if summarize else "")
+    return request("POST", f"{server.url}/jobs{query}", data=path.read_bytes())
+
+
+def read_events(server, job_id):
+    """Czyta strumień SSE zadania do końca i zwraca listę (nazwa, dane)."""
+    events = []
+    with urllib.request.urlopen(f"{server.url}/jobs/{job_id}/events", timeout=30) as response:  # nosec B310
+        assert response.headers["Content-Type"].startswith("text/event-stream")
+        name = None
+        for raw_line in response:
+            line = raw_line.decode("utf-8").rstrip("\n")
+            if line.startswith("event: "):
+                name = line[len("event: "):]
+            elif line.startswith("data: "):
+                events.append((name, json.loads(line[len("data: "):])))
+    return events
+
+
+@requires_ffmpeg
+class TestJobs:
+    """Testy zlecania zadań i strumienia postępu."""
+
+    def test_upload_streams_chunks_and_summary(self, api, recording, temp_dir):
+        fake, server = api()
+        status, job = submit(server, recording, summarize=True)
+        assert status == 202
+        events = read_events(server, job["id"])
+        chunks = [data for name, data in events if name == "chunk"]
+        assert [chunk["index"] for chunk in chunks] == [0, 1, 2]
+        assert all(chunk["text"] == fake.transcript_text for chunk in chunks)
+        assert events[-1][0] == "done"
+
+        status, result = request("GET", f"{server.url}/jobs/{job['id']}")
+        assert status == 200
+        assert result["status"] == "done"
+        assert result["progress"] == {"chunks_done": 3, "chunks_total": 3}
+        assert result["result"]["transcript"].splitlines() == [fake.transcript_text] * 3
+        assert result["result"]["topic"] == fake.summary_text.splitlines()[0]
+        db = temp_dir / "catalog.sqlite3"
+        assert catalog.lookup(result["uid"], "transcript", db_path=db) is not None
+        assert catalog.lookup(result["uid"], "summary", db_path=db) is not None
+
+    def test_failed_transcription_is_not_stored(self, api, recording, temp_dir):
+        fake, server = api()
+        fake.fail_next(3, status=400)
+        status, job = submit(server, recording)
+        assert status == 202
+        assert read_events(server, job["id"])[-1][0] == "error"
+        status, result = request("GET", f"{server.url}/jobs/{job['id']}")
+        assert result["status"] == "failed" and result["error"]
+        assert catalog.lookup(result["uid"], "transcript", db_path=temp_dir / "catalog.sqlite3") is None
+        assert not list((temp_dir / "uploads" / "transcripts").iterdir())
+
+    def test_identical_submissions_share_one_job(self, api, recording):
+        fake, server = api(latency=0.2)
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            responses = list(pool.map(lambda _: submit(server, recording), range(3)))
+        assert {job["id"] for _, job in responses} == {responses[0][1]["id"]}
+        read_events(server, responses[0][1]["id"])
+        assert fake.stats()["requests"]["/v1/audio/transcriptions"] == 3
+
+        # Zapisana transkrypcja - nowe zgłoszenie kończy się od razu, bez zapytań do API
+        status, cached = submit(server, recording)
+        assert status == 200
+        assert cached["status"] == "done" and cached["cached"]
+        assert cached["id"] != responses[0][1]["id"]
+        assert fake.stats()["requests"]["/v1/audio/transcriptions"] == 3
+        status, health = request("GET", f"{server.url}/health")
+        assert health["jobs"]["deduplicated"] == 2
+        assert health["jobs"]["cache_hits"] == 1
+
+    def test_full_queue_is_rejected(self, api, recording, temp_dir):
+        _, server = api(latency=0.3, workers=1, max_queue=0)
+        other = make_recording(temp_dir / "inne.mp3", frequency=880)
+        status, first = submit(server, recording)
+        assert status == 202
+        status, error = submit(server, other)
+        assert status == 503
+        assert "Kolejka" in error["error"]
+        read_events(server, first["id"])
+        status, second = submit(server, other)
+        assert status == 202
+
+
+@requires_ffmpeg
+class TestPlaylists:
+    """Testy przyjmowania playlist YouTube (atrapy ekstraktora i pobierania)."""
+
+    def test_playlist_downloads_each_video_once(self, api, temp_dir):
+        recordings = {
+            "aaaaaaaaaaa": make_recording(temp_dir / "a.mp3", frequency=440, seconds=5).read_bytes(),
+            "bbbbbbbbbbb": make_recording(temp_dir / "b.mp3", frequency=880, seconds=5).read_bytes(),
+        }
+        downloads = []
+
+        def extractor(url, options):
+            assert url.endswith("/videos") and options["extract_flat"] == "in_playlist"
+            return {"entries": [{"id": "aaaaaaaaaaa"}, None, {"id": "bbbbbbbbbbb"}, {"id": "aaaaaaaaaaa"}]}
+
+        def downloader(url):
+            downloads.append(url)
+            return recordings[url[-11:]], ".mp3"
+
+        _, server = api(extractor=extractor, downloader=downloader, download_workers=2, max_queue=0)
+        body = json.dumps({"youtube_url": "https://www.youtube.com/@wyklady"}).encode()
+        headers = {"Content-Type": "application/json"}
+        status, playlist = request("POST", f"{server.url}/jobs", data=body, headers=headers)
+        assert status == 202
+        assert [job["source"][-11:] for job in playlist["jobs"]] == ["aaaaaaaaaaa", "bbbbbbbbbbb"]
+        for job in playlist["jobs"]:
+            statuses = [data["status"] for name, data in read_events(server, job["id"]) if name == "status"]
+            assert statuses[:3] == ["queued", "downloading", "queued"]
+        assert len(downloads) == 2
+
+        # Filmy z zapisaną transkrypcją nie są pobierane ponownie
+        status, again = request("POST", f"{server.url}/jobs", data=body, headers=headers)
+        assert status == 202
+        assert all(job["status"] == "done" and job["cached"] for job in again["jobs"])
+        assert len(downloads) == 2
+
+
+    def test_unexpected_download_error_fails_job(self, api):
+        def downloader(url):
+            raise KeyError("url")
+
+        _, server = api(downloader=downloader)
+        body = json.dumps({"youtube_url": "https://youtu.be/abcdefghijk"}).encode()
+        status, job = request("POST", f"{server.url}/jobs", data=body, headers={"Content-Type": "application/json"})
+        assert status == 202
+        read_events(server, job["id"])
+        status, job = request("GET", f"{server.url}/jobs/{job['id']}")
+        assert job["status"] == "failed" and job["error"]
+        # Nieudane zadanie nie blokuje ponownego zgłoszenia
+        status, again = request("POST", f"{server.url}/jobs", data=body, headers={"Content-Type": "application/json"})
+        assert status == 202 and again["id"] != job["id"]
+
+
+class TestCaptions:
+    """Testy szybkiej ścieżki z napisów YouTube (bez pobierania audio)."""
+
+    def test_captions_replace_download(self, api, monkeypatch):
+        vtt = "WEBVTT\n\n00:00:00.000 --> 00:00:02.000\nwitam na wykładzie\n"
+        monkeypatch.setattr(youtube, "fetch_text", lambda url: vtt)
+
+        def extractor(url, options):
+            return {"duration": 2, "subtitles": {"pl": [{"ext": "vtt", "url": "https://example.com/pl.vtt"}]}}
+
+        def downloader(url):
+            raise AssertionError("Film z napisami nie powinien być pobierany")
+
+        fake, server = api(extractor=extractor, downloader=downloader)
+        body = json.dumps({"youtube_url": "https://youtu.be/abcdefghijk", "captions": "manual"}).encode()
+        headers = {"Content-Type": "application/json"}
+        status, job = request("POST", f"{server.url}/jobs", data=body, headers=headers)
+        assert status == 202
+        read_events(server, job["id"])
+        status, job = request("GET", f"{server.url}/jobs/{job['id']}")
+        assert job["status"] == "done" and not job["cached"]
+        assert job["captions"] == {"language": "pl", "kind": "subtitles"}
+        assert job["result"]["transcript"] == "witam na wykładzie"
+        assert fake.stats()["requests"].get("/v1/audio/transcriptions", 0) == 0
+
+        status, again = request("POST", f"{server.url}/jobs", data=body, headers=headers)
+        assert status == 200 and again["cached"]
+
+
+@requires_ffmpeg
+class TestRanges:
+    """Testy transkrypcji zakresu nagrania."""
+
+    def test_file_range_has_own_artefacts_and_timestamps(self, api, recording, temp_dir):
+        _, server = api()
+        status, job = request(
+            "POST", f"{server.url}/jobs?filename={recording.name}&start=5&end=0:17", data=recording.read_bytes()
+        )
+        assert status == 202
+        chunks = [data for name, data in read_events(server, job["id"]) if name == "chunk"]
+        assert [(chunk["start"], chunk["end"]) for chunk in chunks] == [(5, 15), (15, pytest.approx(17))]
+        status, job = request("GET", f"{server.url}/jobs/{job['id']}")
+        assert job["range"] == {"start": 5, "end": 17} and job["uid"].endswith("_5000-17000")
+        assert catalog.lookup(job["uid"], "transcript", db_path=temp_dir / "catalog.sqlite3") is not None
+        status, whole = submit(server, recording)
+        assert status == 202 and whole["uid"] != job["uid"] and whole["range"] is None
+        status, error = request(
+            "POST", f"{server.url}/jobs?filename={recording.name}&start=30", data=recording.read_bytes()
+        )
+        assert status == 400
+
+    def test_youtube_range_downloads_only_range(self, api, temp_dir):
+        clip = make_recording(temp_dir / "clip.mp3", seconds=12).read_bytes()
+        whole = make_recording(temp_dir / "whole.mp3", frequency=880, seconds=25).read_bytes()
+        downloads = []
+
+        def downloader(url, start=0.0, end=None):
+            downloads.append((url[-11:], start, end))
+            return (clip if start or end is not None else whole), ".mp3"
+
+        _, server = api(downloader=downloader)
+        headers = {"Content-Type": "application/json"}
+
+        def post(video_id, **fields):
+            body = json.dumps({"youtube_url": f"https://youtu.be/{video_id}", **fields}).encode()
+            status, job = request("POST", f"{server.url}/jobs", data=body, headers=headers)
+            chunks = [data for name, data in read_events(server, job["id"]) if name == "chunk"]
+            return status, chunks
+
+        status, chunks = post("aaaaaaaaaaa", start="1:00:00", end=3612)
+        assert status == 202 and downloads == [("aaaaaaaaaaa", 3600, 3612)]
+        assert [chunk["start"] for chunk in chunks] == [3600, 3610]
+        status, _ = post("aaaaaaaaaaa", start=3600, end="1:00:12")
+        assert status == 200 and len(downloads) == 1
+
+        # Zakres filmu pobranego wcześniej w całości jest wycinany bez pobierania
+        post("bbbbbbbbbbb")
+        status, chunks = post("bbbbbbbbbbb", start=5, end=15)
+        assert status == 202 and downloads[1:] == [("bbbbbbbbbbb", 0.0, None)]
+        assert [(chunk["start"], chunk["end"]) for chunk in chunks] == [(5, 15)]
+
+
+@requires_ffmpeg
+class TestLive:
+    """Testy sesji transkrypcji na żywo."""
+
+    def test_chunked_stream_is_transcribed_while_sent(self, api, temp_dir, monkeypatch):
+        monkeypatch.setenv("LIVE_MIN_SEGMENT_SEC", "1")
+        recording = temp_dir / "mikrofon.wav"
+        # Ton 2 s, pauza 1 s - trzy wypowiedzi w 9 s
+        subprocess.run(  # nosec B603
+            [DEPS["ffmpeg"]["path"], "-v", "error", "-f", "lavfi",
+             "-i", "aevalsrc=exprs='0.5*sin(2*PI*440*t)*lt(mod(t\\,3)\\,2)':d=9:s=16000", str(recording)],
+            check=True,
+        )
+        fake, server = api(live_sessions=1)
+        status, job = request("POST", f"{server.url}/live", data=b'{"source": "mikrofon"}',
+                              headers={"Content-Type": "application/json"})
+        assert status == 201 and job["source_kind"] == "live"
+        assert request("POST", f"{server.url}/live")[0] == 503
+
+        data = recording.read_bytes()
+
+        def blocks():
+            for offset in range(0, len(data), 16000):
+                yield data[offset:offset + 16000]
+                time.sleep(0.02)
+
+        connection = http.client.HTTPConnection(server.url.split("//")[1], timeout=30)
+        connection.request("PUT", f"/live/{job['id']}", body=blocks(), encode_chunked=True)
+        response = connection.getresponse()
+        result = json.loads(response.read())
+        connection.close()
+        assert response.status == 200 and result["status"] == "done"
+        chunks = [data for name, data in read_events(server, job["id"]) if name == "chunk"]
+        assert [round(chunk["start"]) for chunk in chunks] == [0, 3, 6]
+        assert all(chunk["text"] == fake.transcript_text and chunk["latency"] >= 0 for chunk in chunks)
+        assert result["result"]["transcript"].splitlines() == [fake.transcript_text] * 3
+        assert catalog.lookup(result["uid"], "transcript", db_path=temp_dir / "catalog.sqlite3") is not None
+        assert request("PUT", f"{server.url}/live/{job['id']}", data=data)[0] == 409
+        assert request("POST", f"{server.url}/live")[0] == 201
+
+    def test_event_history_is_bounded(self):
+        job = Job("live:test", "mikrofon", "live", False, max_events=3)
+        for index in range(5):
+            job.emit("chunk", {"index": index})
+        assert [event["id"] for event in job.events] == [2, 3, 4]
+        assert [event["id"] for event in job.wait_events(-1, 0)] == [2, 3, 4]
+        assert [event["id"] for event in job.wait_events(3, 0)] == [4]
+
+
+class TestValidation:
+    """Testy odrzucania błędnych zgłoszeń."""
+
+    def test_invalid_requests(self, api):
+        _, server = api()
+        status, error = request("POST", f"{server.url}/jobs?filename=notatki.txt", data=b"abc")
+        assert status == 415
+        status, error = request(
+            "POST", f"{server.url}/jobs", data=json.dumps({"youtube_url": "https://example.com/x"}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        assert status == 400
+        assert "YouTube" in error["error"]
+        status, error = request(
+            "POST", f"{server.url}/jobs",
+            data=json.dumps({"youtube_url": "https://youtu.be/abcdefghijk", "captions": "wszystkie"}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        assert status == 400
+        assert "napisów" in error["error"]
+        status, error = request(
+            "POST", f"{server.url}/jobs",
+            data=json.dumps({"youtube_url": "https://youtu.be/abcdefghijk", "start": 60, "end": "0:30"}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        assert status == 400
+        assert "zakresu" in error["error"]
+        status, error = request("GET", f"{server.url}/jobs/nieznane")
+        assert status == 404
+
+
+class TestTranscripts:
+    """Testy stron i pobierania zapisanych transkrypcji."""
+
+    def test_pages_and_downloads(self, api, temp_dir, monkeypatch):
+        monkeypatch.setenv("TRANSCRIPT_PAGE_KB", "1")
+        _, server = api()
+        transcript_path, summary_path = storage.artefact_paths("abc123", temp_dir / "uploads")
+        text = "\n".join(f"Fragment {i}: zażółć gęślą jaźń " * 5 for i in range(40))
+        transcript_path.write_text(text, encoding="utf-8")
+        summary_path.write_text("Temat\nPodsumowanie.", encoding="utf-8")
+        db = temp_dir / "catalog.sqlite3"
+        catalog.register("abc123", "transcript", transcript_path, transcript_path.stat().st_size, db_path=db)
+
+        status, first = request("GET", f"{server.url}/transcripts/abc123")
+        assert status == 200 and first["page"] == 1 and first["pages"] > 1
+        pages = [request("GET", f"{server.url}/transcripts/abc123?page={n}")[1]["text"]
+                 for n in range(1, first["pages"] + 1)]
+        assert "".join(pages) == text
+        assert request("GET", f"{server.url}/transcripts/abc123?page=0")[0] == 400
+        assert request("GET", f"{server.url}/transcripts/nieznane")[0] == 404
+
+        with urllib.request.urlopen(f"{server.url}/transcripts/abc123/download", timeout=30) as response:  # nosec B310
+            assert response.read().decode("utf-8") == text
+        # Bez podsumowania w katalogu JSON i ZIP zawierają tylko transkrypcję
+        with urllib.request.urlopen(f"{server.url}/transcripts/abc123/download?format=json", timeout=30) as response:  # nosec B310
+            assert response.headers["Transfer-Encoding"] == "chunked"
+            assert json.loads(response.read()) == {"uid": "abc123", "topic": "", "summary": "", "transcript": text}
+        catalog.register("abc123", "summary", summary_path, summary_path.stat().st_size, db_path=db)
+        with urllib.request.urlopen(f"{server.url}/transcripts/abc123/download?format=zip", timeout=30) as response:  # nosec B310
+            archive = zipfile.ZipFile(io.BytesIO(response.read()))
+        assert archive.read("transkrypcja_abc123.txt").decode("utf-8") == text
+        assert archive.read("podsumowanie_abc123.txt") == b"Temat\nPodsumowanie."
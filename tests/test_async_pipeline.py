@@ -0,0 +1,156 @@
+"""
+Audio2Tekst - Testy asynchronicznego potoku
+===========================================
+
+Testy modułu audio2tekst.async_pipeline z klientem `openai.AsyncOpenAI`
+podłączonym do lokalnego serwera `FakeOpenAIServer`.
+"""
+
+import asyncio
+import subprocess  # nosec B404
+
+import openai
+import pytest
+
+from audio2tekst import transcription
+from audio2tekst.async_pipeline import AsyncPipeline
+from audio2tekst.fake_openai import FakeOpenAIServer
+from audio2tekst.system import check_dependencies
+
+DEPS = check_dependencies()
+requires_ffmpeg = pytest.mark.skipif(
+    not (DEPS["ffmpeg"]["available"] and DEPS["ffprobe"]["available"]),
+    reason="FFmpeg/FFprobe niedostępne",
+)
+
+
+@pytest.fixture
+def recording(temp_dir):
+    """Nagranie MP3 o długości 25 s (ton sinusoidalny)."""
+    path = temp_dir / "nagranie.mp3"
+    subprocess.run(  # nosec B603
+        [DEPS["ffmpeg"]["path"], "-y", "-v", "error", "-f", "lavfi",
+         "-i", "sine=frequency=440:duration=25", "-c:a", "libmp3lame", str(path)],
+        check=True,
+    )
+    return path
+
+
+def make_client(server):
+    return openai.AsyncOpenAI(base_url=server.url, api_key="test", max_retries=0)
+
+
+@requires_ffmpeg
+class TestAsyncPipeline:
+    """Testy pełnego potoku i limitów etapów."""
+
+    def test_run(self, recording):
+        async def scenario(server):
+            pipeline = AsyncPipeline(make_client(server))
+            seen = []
+            result = await pipeline.run(
+                recording, chunk_ms=10_000, on_chunk=lambda idx, total, path, size: seen.append(path)
+            )
+            return result, seen
+
+        with FakeOpenAIServer() as server:
+            result, seen = asyncio.run(scenario(server))
+            assert server.requests["/v1/audio/transcriptions"] == 3
+            assert server.requests["/v1/chat/completions"] == 1
+        assert result["duration"] == pytest.approx(25, abs=0.2)
+        assert result["chunks"] == 3
+        assert result["transcript"].splitlines() == [server.transcript_text] * 3
+        assert not result["topic"].startswith(("Błąd", "Brak środków", "Nie udało się"))
+        assert len(seen) == 3 and not any(path.exists() for path in seen)
+
+    def test_stage_limits_across_jobs(self, recording):
+        async def scenario(server):
+            pipeline = AsyncPipeline(make_client(server), ffmpeg_limit=2, transcribe_limit=3)
+            results = await asyncio.gather(
+                *(pipeline.run(recording, chunk_ms=5_000, summarize=False) for _ in range(4))
+            )
+            return pipeline.stats(), results
+
+        with FakeOpenAIServer(latency=0.1) as server:
+            stats, results = asyncio.run(scenario(server))
+            assert server.requests["/v1/audio/transcriptions"] == 4 * 5
+            assert server.stats()["peak_in_flight"] <= 3
+        assert all(result["chunks"] == 5 for result in results)
+        assert stats["transcribe"]["peak_active"] == 3
+        assert stats["ffmpeg"]["peak_active"] == 2
+        assert all(stage["active"] == stage["waiting"] == 0 for stage in stats.values())
+
+    def test_cancel_removes_chunks(self, recording):
+        async def scenario(server):
+            pipeline = AsyncPipeline(make_client(server), transcribe_limit=1)
+            chunks = await pipeline.split(recording, chunk_ms=5_000)
+            task = asyncio.create_task(pipeline.transcribe(chunks))
+            await asyncio.sleep(0.3)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return chunks
+
+        with FakeOpenAIServer(latency=1.0) as server:
+            chunks = asyncio.run(scenario(server))
+        assert len(chunks) == 5
+        assert not any(chunk.exists() for chunk in chunks)
+
+    def test_split_error(self, temp_dir):
+        broken = temp_dir / "uszkodzony.mp3"
+        broken.write_bytes(b"to nie jest audio")
+        with pytest.raises(RuntimeError):
+            asyncio.run(AsyncPipeline().split(broken))
+
+
+class TestAsyncTranscribeErrors:
+    """Porzucony fragment przerywa transkrypcję zamiast dać pusty tekst."""
+
+    @staticmethod
+    def write_chunks(temp_dir, sizes):
+        chunks = []
+        for idx, size in enumerate(sizes):
+            chunk = temp_dir / f"fragment_{idx:03d}.mp3"
+            chunk.write_bytes(b"x" * size)
+            chunks.append(chunk)
+        return chunks
+
+    def test_every_chunk_failed(self, temp_dir):
+        chunks = self.write_chunks(temp_dir, [100, 100, 100])
+        with FakeOpenAIServer(error_rate=1.0, error_statuses=[500]) as server:
+            pipeline = AsyncPipeline(make_client(server))
+            with pytest.raises(transcription.TranscriptionError, match="fragmentu"):
+                asyncio.run(pipeline.transcribe(chunks))
+        assert not any(chunk.exists() for chunk in chunks)
+
+    def test_chunk_over_limit(self, temp_dir, monkeypatch):
+        monkeypatch.setattr(transcription, "OPENAI_MAX_CHUNK_BYTES", 150)
+        chunks = self.write_chunks(temp_dir, [100, 200])
+        with FakeOpenAIServer() as server:
+            pipeline = AsyncPipeline(make_client(server), transcribe_limit=1)
+            with pytest.raises(transcription.TranscriptionError, match="przekracza limit"):
+                asyncio.run(pipeline.transcribe(chunks))
+        assert not any(chunk.exists() for chunk in chunks)
+
+
+class TestAsyncSummarize:
+    """Testy podsumowania map-reduce."""
+
+    def test_long_text_map_reduce(self):
+        with FakeOpenAIServer(latency=0.1) as server:
+            pipeline = AsyncPipeline(make_client(server), summarize_limit=3)
+            topic, summary = asyncio.run(pipeline.summarize("słowo " * 5000))
+            assert server.requests["/v1/chat/completions"] == 4 + 1
+            assert server.stats()["peak_in_flight"] == 3
+        assert (topic, summary) != ("", "")
+        assert not topic.startswith(("Błąd", "Brak środków", "Nie udało się"))
+
+    def test_errors(self, temp_dir, monkeypatch):
+        monkeypatch.chdir(temp_dir)
+        with FakeOpenAIServer(error_rate=1.0, error_statuses=[500]) as server:
+            topic, _ = asyncio.run(AsyncPipeline(make_client(server)).summarize("krótki tekst"))
+        assert topic == "Błąd podczas podsumowywania tekstu"
+        assert (temp_dir / "logs" / "summary_errors.log").exists()
+        with FakeOpenAIServer(error_rate=1.0, error_statuses=[429]) as server:
+            topic, _ = asyncio.run(AsyncPipeline(make_client(server)).summarize("x" * 9000))
+        assert topic == "Brak środków na koncie OpenAI"
@@ -0,0 +1,119 @@
+"""
+Audio2Tekst - Testy napisów YouTube
+===================================
+
+Testy modułu audio2tekst.captions: wybór napisów z metadanych yt-dlp,
+parsowanie WebVTT (również powtórzeń w napisach automatycznych) i zapis
+transkrypcji z napisów (atrapy ekstraktora i pobierania).
+"""
+
+from audio2tekst import captions, storage, transcript_index, youtube
+
+AUTO_VTT = """WEBVTT
+Kind: captions
+Language: pl
+
+00:00:00.000 --> 00:00:02.000 align:start position:0%
+dzień<00:00:00.500><c> dobry</c>
+
+00:00:02.000 --> 00:00:02.010 align:start position:0%
+dzień dobry
+
+00:00:02.010 --> 00:00:05.000 align:start position:0%
+dzień dobry
+witam na &amp; wykładzie
+
+00:05:01.000 --> 00:05:03.000
+część druga
+"""
+
+
+def track(ext="vtt"):
+    return [{"ext": "json3", "url": "https://example.com/json3"}, {"ext": ext, "url": f"https://example.com/{ext}"}]
+
+
+class TestPickTrack:
+    """Testy wyboru napisów."""
+
+    def test_manual_subtitles_are_preferred(self):
+        info = {
+            "subtitles": {"en": track(), "pl-PL": track()},
+            "automatic_captions": {"pl-orig": track()},
+        }
+        picked = captions.pick_track(info, "pl")
+        assert picked["kind"] == "subtitles" and picked["language"] == "pl-PL"
+        assert picked["url"] == "https://example.com/vtt"
+
+    def test_automatic_captions_only_in_video_language(self):
+        translated = {"language": "en", "automatic_captions": {"pl": track(), "en-orig": track()}}
+        assert captions.pick_track(translated, "pl") is None
+        original = {"language": "pl", "automatic_captions": {"pl": track()}}
+        assert captions.pick_track(original, "pl")["kind"] == "automatic_captions"
+        assert captions.pick_track(original, "pl", allow_auto=False) is None
+        assert captions.pick_track({"subtitles": {"pl": track("srt")}}, "pl") is None
+
+
+class TestParseVtt:
+    """Testy zamiany WebVTT na transkrypcję."""
+
+    def test_tags_and_repeated_lines_are_removed(self):
+        assert captions.parse_vtt(AUTO_VTT) == [
+            (0.0, "dzień dobry"),
+            (2.01, "witam na & wykładzie"),
+            (301.0, "część druga"),
+        ]
+
+    def test_transcript_has_one_line_per_chunk(self):
+        transcript = captions.to_transcript(captions.parse_vtt(AUTO_VTT), chunk_ms=5 * 60 * 1000)
+        assert transcript == "dzień dobry witam na & wykładzie\nczęść druga"
+
+
+class TestCaptionTranscript:
+    """Testy szybkiej ścieżki z atrapami yt-dlp."""
+
+    def test_transcript_is_stored_and_remembered(self, temp_dir):
+        def extractor(url, options):
+            assert options["skip_download"]
+            return {"duration": 310, "subtitles": {"pl": track()}}
+
+        result = captions.caption_transcript(
+            "https://youtu.be/abcdefghijk", "pl", extractor=extractor, fetch=lambda url: AUTO_VTT
+        )
+        assert result is not None
+        transcript, picked = result
+        assert picked["duration"] == 310
+        catalog_db = temp_dir / "catalog.sqlite3"
+        index_db = temp_dir / "transcripts.sqlite3"
+        storage.ensure_dirs(temp_dir / "uploads")
+        uid = captions.store_transcript(
+            "abcdefghijk", transcript, picked, language="pl",
+            base_dir=temp_dir / "uploads", catalog_db=catalog_db, index_db=index_db,
+        )
+        transcript_path, _ = storage.artefact_paths(uid, temp_dir / "uploads")
+        assert storage.read_artefact(transcript_path) == transcript
+        assert youtube.cached_uid("abcdefghijk", db_path=catalog_db) == uid
+        assert transcript_index.search_transcripts("wykładzie", db_path=index_db)[0]["model"] == "youtube-captions"
+
+    def test_range_keeps_only_its_captions(self, temp_dir):
+        def extractor(url, options):
+            return {"duration": 310, "subtitles": {"pl": track()}}
+
+        transcript, picked = captions.caption_transcript(
+            "https://youtu.be/abcdefghijk", "pl", chunk_ms=60_000, extractor=extractor,
+            fetch=lambda url: AUTO_VTT, start=2, end=302,
+        )
+        assert transcript == "witam na & wykładzie\nczęść druga"
+        assert picked["duration"] == 300
+        catalog_db = temp_dir / "catalog.sqlite3"
+        storage.ensure_dirs(temp_dir / "uploads")
+        uid = captions.store_transcript(
+            "abcdefghijk", transcript, picked, base_dir=temp_dir / "uploads", catalog_db=catalog_db,
+            index_db=temp_dir / "transcripts.sqlite3", start=2, end=302,
+        )
+        assert youtube.cached_uid("abcdefghijk", db_path=catalog_db, start=2, end=302) == uid
+        assert youtube.cached_uid("abcdefghijk", db_path=catalog_db) is None
+
+    def test_video_without_captions(self):
+        assert captions.caption_transcript(
+            "https://youtu.be/abcdefghijk", "pl", extractor=lambda url, options: {"subtitles": {}}
+        ) is None
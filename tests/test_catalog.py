@@ -0,0 +1,106 @@
+"""
+Audio2Tekst - Testy katalogu artefaktów
+=======================================
+
+Testy modułu audio2tekst.catalog.
+"""
+
+import pytest
+
+from audio2tekst import catalog
+
+
+@pytest.fixture
+def catalog_db(temp_dir):
+    """Ścieżka do pustej bazy katalogu w katalogu tymczasowym."""
+    return temp_dir / "db" / "catalog.sqlite3"
+
+
+def write_file(path, size):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    return path
+
+
+class TestCatalog:
+    """Testy rejestracji, wyszukiwania i usuwania artefaktów."""
+
+    def test_register_and_lookup(self, temp_dir, catalog_db):
+        orig = write_file(temp_dir / "originals" / "abc.mp3", 10)
+        assert catalog.register("abc", "original", orig, 10, db_path=catalog_db) is None
+        entry = catalog.lookup("abc", "original", db_path=catalog_db)
+        assert entry["path"] == str(orig)
+        assert entry["size"] == 10
+        assert entry["refcount"] == 0
+        assert catalog.lookup("abc", "transcript", db_path=catalog_db) is None
+
+    def test_register_returns_previous_path(self, temp_dir, catalog_db):
+        mp3 = write_file(temp_dir / "originals" / "abc.mp3", 10)
+        wav = write_file(temp_dir / "originals" / "abc.wav", 20)
+        catalog.register("abc", "original", mp3, 10, db_path=catalog_db)
+        assert catalog.register("abc", "original", wav, 20, db_path=catalog_db) == mp3
+        assert catalog.usage_by_kind(db_path=catalog_db)["original"] == {"files": 1, "bytes": 20}
+
+    def test_unknown_kind(self, temp_dir, catalog_db):
+        with pytest.raises(ValueError):
+            catalog.register("abc", "video", temp_dir / "x", 0, db_path=catalog_db)
+
+    def test_lru_order_and_refcount(self, temp_dir, catalog_db):
+        for uid in ("a", "b", "c"):
+            path = write_file(temp_dir / "originals" / f"{uid}.mp3", 1)
+            catalog.register(uid, "original", path, 1, db_path=catalog_db)
+        catalog.lookup("a", "original", db_path=catalog_db)
+        assert [e["uid"] for e in catalog.list_artefacts("original", db_path=catalog_db)] == ["b", "c", "a"]
+        catalog.acquire("b", "original", db_path=catalog_db)
+        unreferenced = catalog.list_artefacts("original", unreferenced_only=True, db_path=catalog_db)
+        assert [e["uid"] for e in unreferenced] == ["c", "a"]
+        catalog.release("b", "original", db_path=catalog_db)
+        catalog.release("b", "original", db_path=catalog_db)
+        assert catalog.lookup("b", "original", db_path=catalog_db)["refcount"] == 0
+
+    def test_purge_skips_referenced(self, temp_dir, catalog_db):
+        used = write_file(temp_dir / "originals" / "used.mp3", 5)
+        idle = write_file(temp_dir / "originals" / "idle.mp3", 5)
+        catalog.register("used", "original", used, 5, db_path=catalog_db)
+        catalog.register("idle", "original", idle, 5, db_path=catalog_db)
+        catalog.acquire("used", "original", db_path=catalog_db)
+        assert catalog.purge(["original"], db_path=catalog_db) == 1
+        assert used.exists() and not idle.exists()
+
+    def test_remove_returns_freed_bytes(self, temp_dir, catalog_db):
+        path = write_file(temp_dir / "transcripts" / "abc.txt", 42)
+        catalog.register("abc", "transcript", path, 42, db_path=catalog_db)
+        assert catalog.remove("abc", "transcript", db_path=catalog_db) == 42
+        assert not path.exists()
+        assert catalog.remove("abc", "transcript", db_path=catalog_db) == 0
+
+    def test_acquire_and_evict_are_atomic(self, temp_dir, catalog_db):
+        path = write_file(temp_dir / "originals" / "abc.mp3", 7)
+        assert catalog.acquire("abc", "original", db_path=catalog_db) is None
+        catalog.register("abc", "original", path, 7, db_path=catalog_db)
+        assert catalog.acquire("abc", "original", db_path=catalog_db)["refcount"] == 1
+        assert catalog.evict("abc", "original", db_path=catalog_db) is None
+        assert path.exists()
+        catalog.release("abc", "original", db_path=catalog_db)
+        assert catalog.evict("abc", "original", db_path=catalog_db) == 7
+        assert not path.exists()
+
+    def test_sync_with_disk(self, temp_dir, catalog_db):
+        write_file(temp_dir / "originals" / "abc.mp3", 3)
+        write_file(temp_dir / "transcripts" / "abc.txt", 4)
+        write_file(temp_dir / "summaries" / "abc.txt.gz", 5)
+        write_file(temp_dir / "summaries" / ".gitkeep", 0)
+        gone = temp_dir / "summaries" / "gone.txt"
+        catalog.register("gone", "summary", gone, 1, db_path=catalog_db)
+        assert catalog.sync_with_disk(temp_dir, db_path=catalog_db) == {"added": 3, "dropped": 1}
+        assert catalog.sync_with_disk(temp_dir, db_path=catalog_db) == {"added": 0, "dropped": 0}
+        assert catalog.lookup("abc", "transcript", db_path=catalog_db)["size"] == 4
+        assert catalog.lookup("abc", "summary", db_path=catalog_db)["size"] == 5
+
+    def test_quick_id_lookup(self, temp_dir, catalog_db):
+        catalog.register_quick_id("a0-ff", "abc", db_path=catalog_db)
+        assert catalog.find_by_quick_id("a0-ff", db_path=catalog_db) is None
+        orig = write_file(temp_dir / "originals" / "abc.mp3", 10)
+        catalog.register("abc", "original", orig, 10, db_path=catalog_db)
+        assert catalog.find_by_quick_id("a0-ff", db_path=catalog_db) == "abc"
+        assert catalog.find_by_quick_id("00-00", db_path=catalog_db) is None
@@ -0,0 +1,126 @@
+"""
+Audio2Tekst - Testy serwera zastępującego OpenAI API
+====================================================
+
+Testy modułu audio2tekst.fake_openai z prawdziwym klientem `openai.OpenAI`
+(wysyłka multipart, ponowienia, limity zapytań, równoległe żądania).
+"""
+
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+import pytest
+
+from audio2tekst import transcription
+from audio2tekst.fake_openai import FakeOpenAIServer, LatencyModel
+
+
+@pytest.fixture
+def chunk(temp_dir):
+    """Plik fragmentu audio (treść nie ma znaczenia dla serwera testowego)."""
+    path = temp_dir / "chunk.mp3"
+    path.write_bytes(b"ID3" + bytes(64 * 1024))
+    return path
+
+
+def make_client(server, max_retries=0):
+    return openai.OpenAI(base_url=server.url, api_key="test", max_retries=max_retries)
+
+
+class TestEndpoints:
+    """Testy zgodności odpowiedzi z klientem OpenAI."""
+
+    def test_models_transcription_and_chat(self, chunk):
+        with FakeOpenAIServer() as server:
+            client = make_client(server)
+            assert "whisper-1" in [model.id for model in client.models.list()]
+            backend = transcription.OpenAIBackend(client)
+            assert backend.transcribe(chunk, "pl") == server.transcript_text
+            with open(chunk, "rb") as audio_file:
+                result = client.audio.transcriptions.create(model="whisper-1", file=audio_file)
+            assert result.text == server.transcript_text
+            completion = client.chat.completions.create(
+                model="gpt-3.5-turbo", messages=[{"role": "user", "content": "x"}]
+            )
+            assert completion.choices[0].message.content == server.summary_text
+            stats = server.stats()
+        assert stats["requests"]["/v1/audio/transcriptions"] == 2
+        assert stats["bytes_received"] > 2 * 64 * 1024
+        assert stats["statuses"] == {200: 4}
+
+    def test_multipart_without_file_is_rejected(self):
+        with FakeOpenAIServer() as server:
+            request = urllib.request.Request(
+                f"{server.url}/audio/transcriptions", data=b"x", method="POST",
+                headers={"Content-Type": "multipart/form-data; boundary=b"},
+            )
+            with pytest.raises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(request, timeout=5)  # nosec B310
+        assert error.value.code == 400
+
+
+class TestFaults:
+    """Testy wstrzykiwania błędów i limitów."""
+
+    def test_client_retries_injected_errors(self, chunk):
+        with FakeOpenAIServer() as server:
+            server.fail_next(1, status=503)
+            backend = transcription.OpenAIBackend(make_client(server, max_retries=2))
+            assert backend.transcribe(chunk, "pl") == server.transcript_text
+            assert server.stats()["statuses"] == {503: 1, 200: 1}
+
+    def test_error_rate(self):
+        with FakeOpenAIServer(error_rate=1.0, error_statuses=[500]) as server:
+            with pytest.raises(openai.InternalServerError):
+                make_client(server).models.list()
+
+    def test_requests_per_minute(self):
+        with FakeOpenAIServer(requests_per_minute=2) as server:
+            client = make_client(server)
+            client.models.list()
+            client.models.list()
+            with pytest.raises(openai.RateLimitError) as error:
+                client.models.list()
+        assert float(error.value.response.headers["retry-after"]) > 50
+
+    def test_parallel_requests_and_concurrency_limit(self, chunk):
+        with FakeOpenAIServer(latency=0.2) as server:
+            backend = transcription.OpenAIBackend(make_client(server))
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                texts = list(pool.map(lambda _: backend.transcribe(chunk, "pl"), range(8)))
+            elapsed = time.perf_counter() - started
+            assert texts == [server.transcript_text] * 8
+            assert server.stats()["peak_in_flight"] > 1
+            assert elapsed < 8 * 0.2
+        with FakeOpenAIServer(latency=0.2, max_concurrency=1) as server:
+            backend = transcription.OpenAIBackend(make_client(server))
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                futures = [pool.submit(backend.transcribe, chunk, "pl") for _ in range(4)]
+            errors = [f.exception() for f in futures if f.exception() is not None]
+            assert errors and all(isinstance(e, openai.RateLimitError) for e in errors)
+
+
+class TestLatencyModel:
+    """Testy rozkładów opóźnienia."""
+
+    def test_parse_and_sample(self):
+        assert LatencyModel.parse("0.25").sample() == 0.25
+        uniform = LatencyModel.parse("uniform:0.1:0.3", seed=1)
+        assert all(0.1 <= uniform.sample() <= 0.3 for _ in range(100))
+        normal = LatencyModel.parse("normal:0:1", seed=1)
+        assert all(normal.sample() >= 0 for _ in range(100))
+        upload = LatencyModel.parse("0.1+2/mb")
+        assert upload.sample(512 * 1024) == pytest.approx(1.1)
+        with pytest.raises(ValueError):
+            LatencyModel.parse("pareto:1:2")
+
+    def test_seeded_lognormal_is_reproducible(self):
+        first = LatencyModel.parse("lognormal:0.5:0.4", seed=7)
+        second = LatencyModel.parse("lognormal:0.5:0.4", seed=7)
+        samples = [first.sample() for _ in range(200)]
+        assert samples == [second.sample() for _ in range(200)]
+        assert sorted(samples)[100] == pytest.approx(0.5, rel=0.2)
@@ -0,0 +1,56 @@
+"""
+Audio2Tekst - Testy skompresowanych artefaktów
+==============================================
+
+Testy modułu audio2tekst.framed (ramki z indeksem, odczyt zakresów, zgodność z gzip/zstd).
+"""
+
+import gzip
+
+import pytest
+
+from audio2tekst import framed
+
+TEXT = "\n".join(f"Fragment {i}: zażółć gęślą jaźń. " * 20 for i in range(2000)).encode("utf-8")
+
+
+def codecs():
+    return [codec for codec in framed.available_codecs() if codec != "none"]
+
+
+class TestFramed:
+    """Testy zapisu i odczytu ramek."""
+
+    @pytest.mark.parametrize("codec", codecs())
+    def test_range_reads(self, temp_dir, codec):
+        path = temp_dir / f"transkrypcja.txt{framed.SUFFIXES[codec]}"
+        path.write_bytes(framed.compress(TEXT, codec, frame_bytes=16 * 1024))
+        assert path.stat().st_size * 5 < len(TEXT)
+        reader = framed.open_reader(path)
+        assert reader.codec == codec and reader.size == len(TEXT)
+        for start, length in [(0, 10), (16 * 1024 - 3, 10), (100_000, 200_000), (len(TEXT) - 5, 50)]:
+            assert reader.read(start, length) == TEXT[start:start + length]
+        assert b"".join(reader.iter_blocks()) == TEXT
+
+    def test_gzip_tools_skip_index(self, temp_dir):
+        data = framed.compress(TEXT, "gzip", level=1, frame_bytes=64 * 1024)
+        # Zwykły dekompresor widzi pusty człon z indeksem i kolejne człony z tekstem
+        assert gzip.decompress(data) == TEXT
+        external = temp_dir / "zewnetrzny.gz"
+        external.write_bytes(gzip.compress(TEXT))
+        assert framed.open_reader(external).read(5, 20) == TEXT[5:25]
+
+    def test_plain_and_codec_selection(self, temp_dir, monkeypatch):
+        plain = temp_dir / "stary.txt"
+        plain.write_bytes(TEXT[:1000])
+        reader = framed.open_reader(plain)
+        assert reader.codec == "none" and reader.read(10, 5) == TEXT[10:15]
+        monkeypatch.setenv("ARTEFACT_COMPRESSION", "zstd")
+        monkeypatch.setenv("ARTEFACT_COMPRESSION_LEVEL", "9")
+        expected = "zstd" if "zstd" in framed.available_codecs() else "gzip"
+        assert framed.codec_from_env() == (expected, 9)
+        monkeypatch.setenv("ARTEFACT_COMPRESSION", "none")
+        monkeypatch.delenv("ARTEFACT_COMPRESSION_LEVEL")
+        assert framed.codec_from_env() == ("none", None)
+        with pytest.raises(ValueError):
+            framed.compress(TEXT, "brotli")
@@ -0,0 +1,85 @@
+"""
+Audio2Tekst - Testy identyfikatorów zawartości
+==============================================
+
+Testy modułu audio2tekst.hashing.
+"""
+
+import hashlib
+import io
+
+import pytest
+
+from audio2tekst import hashing
+
+
+@pytest.fixture
+def payload():
+    """Dane większe niż kilka bloków odczytu."""
+    return bytes(range(256)) * 20_000  # ~5 MB
+
+
+class TestContentId:
+    """Testy pełnego skrótu liczonego strumieniowo."""
+
+    def test_md5_matches_legacy_uid(self, payload):
+        expected = hashlib.md5(payload, usedforsecurity=False).hexdigest()
+        assert hashing.content_id(payload, algorithm="md5") == expected
+
+    def test_sources_give_same_id(self, temp_dir, payload):
+        path = temp_dir / "audio.mp3"
+        path.write_bytes(payload)
+        from_bytes = hashing.content_id(payload, algorithm="blake2b")
+        assert hashing.content_id(path, algorithm="blake2b") == from_bytes
+        assert hashing.content_id(str(path), algorithm="blake2b", prefetch=False) == from_bytes
+        assert hashing.content_id(io.BytesIO(payload), algorithm="blake2b", block_size=4096) == from_bytes
+        assert len(from_bytes) == 32
+
+    def test_default_and_unknown_algorithm(self, payload):
+        # Domyślny UID nie zależy od zainstalowanych pakietów (np. xxhash)
+        assert hashing.default_algorithm() == "blake2b"
+        assert hashing.resolve_algorithm("") == hashing.default_algorithm()
+        assert hashing.content_id(payload) == hashing.content_id(payload, algorithm=hashing.default_algorithm())
+        with pytest.raises(ValueError):
+            hashing.content_id(payload, algorithm="sha0")
+
+    def test_reader_error_is_raised(self):
+        class BrokenFile(io.RawIOBase):
+            def read(self, size=-1):
+                raise OSError("dysk odłączony")
+
+        with pytest.raises(OSError, match="dysk odłączony"):
+            hashing.content_id(BrokenFile(), prefetch=True)
+
+    def test_unexpected_reader_error_is_raised(self):
+        class BadStream(io.RawIOBase):
+            def read(self, size=-1):
+                raise ValueError("I/O operation on closed file")
+
+        with pytest.raises(ValueError, match="closed file"):
+            hashing.content_id(BadStream(), prefetch=True)
+
+
+class TestQuickId:
+    """Testy szybkiego identyfikatora z próbek."""
+
+    def test_quick_id_is_stable_and_size_aware(self, temp_dir, payload):
+        path = temp_dir / "audio.mp3"
+        path.write_bytes(payload)
+        quick = hashing.quick_id(payload)
+        assert hashing.quick_id(path) == quick
+        assert quick.startswith(f"{len(payload):x}-")
+        assert hashing.quick_id(payload + b"\x00") != quick
+
+    def test_quick_id_sees_sampled_regions(self, payload):
+        changed_head = b"\xff" + payload[1:]
+        assert hashing.quick_id(changed_head) != hashing.quick_id(payload)
+
+    def test_quick_id_restores_position(self, payload):
+        stream = io.BytesIO(payload)
+        stream.seek(10)
+        hashing.quick_id(stream)
+        assert stream.tell() == 10
+
+    def test_small_file(self):
+        assert hashing.quick_id(b"abc") == hashing.quick_id(io.BytesIO(b"abc"))
@@ -0,0 +1,203 @@
+"""
+Audio2Tekst - Testy transkrypcji na żywo
+========================================
+
+Testy modułu audio2tekst.live: cięcie strumienia PCM w pauzach, stała
+pamięć bufora, odtwarzanie pliku w tempie nagrania i śledzenie pliku
+w trakcie zapisu (atrapa silnika transkrypcji).
+"""
+
+import subprocess  # nosec B404
+import threading
+import time
+
+import openai
+import pytest
+
+from audio2tekst import catalog, live, storage, transcript_index
+from audio2tekst.system import check_dependencies
+from audio2tekst.transcription import TranscriptionBackend
+
+np = pytest.importorskip("numpy")
+
+DEPS = check_dependencies()
+requires_ffmpeg = pytest.mark.skipif(not DEPS["ffmpeg"]["available"], reason="FFmpeg niedostępne")
+
+# Ton 2 s, pauza 1 s - trzy wypowiedzi w 9 s
+RECORDING = "aevalsrc=exprs='0.5*sin(2*PI*440*t)*lt(mod(t\\,3)\\,2)':d=9:s=16000"
+
+
+def pcm(*parts):
+    """PCM z odcinków (sekundy, amplituda): ton 440 Hz albo cisza."""
+    blocks = []
+    for seconds, amplitude in parts:
+        t = np.arange(int(seconds * live.SAMPLE_RATE)) / live.SAMPLE_RATE
+        blocks.append((amplitude * 32767 * np.sin(2 * np.pi * 440 * t)).astype("<i2").tobytes())
+    return b"".join(blocks)
+
+
+def feed_all(segmenter, data, block=3840):
+    segments = []
+    for offset in range(0, len(data), block):
+        segments += segmenter.feed(data[offset:offset + block])
+    final = segmenter.flush()
+    return segments + ([final] if final else [])
+
+
+class EchoBackend(TranscriptionBackend):
+    """Atrapa silnika: tekst to numer segmentu."""
+
+    name = "echo"
+    model_label = "echo"
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio_path, language):
+        self.calls.append(audio_path.name)
+        return f"segment {len(self.calls)}"
+
+
+class FailingBackend(EchoBackend):
+    """Atrapa silnika: błąd API dla pierwszego segmentu, nieoczekiwany błąd dla drugiego."""
+
+    def transcribe(self, audio_path, language):
+        self.calls.append(audio_path.name)
+        if len(self.calls) == 1:
+            raise openai.APIConnectionError(request=None)
+        if len(self.calls) == 2:
+            raise KeyError("text")
+        return "segment 3"
+
+
+class TestSegmenter:
+    """Testy podziału strumienia w pauzach."""
+
+    def test_cuts_in_pauses_and_drops_leading_silence(self):
+        segmenter = live.Segmenter(min_segment=1.0, max_segment=10.0, silence=0.3)
+        segments = feed_all(segmenter, pcm((2, 0), (1.5, 0.5), (1, 0), (2, 0.5), (1, 0), (1, 0.5)))
+        assert [segment.index for segment in segments] == [0, 1, 2]
+        starts = [segment.start for segment in segments]
+        assert starts[0] == pytest.approx(1.7, abs=0.1)  # Cisza przed mową odcięta (zostaje 0,3 s)
+        # Cięcia w pauzach, zaraz po osiągnięciu 0,3 s ciszy
+        assert 3.5 < segments[0].end < 3.8
+        assert segments[1].start == pytest.approx(4.2, abs=0.1)
+        assert 6.5 < segments[1].end < 6.8
+        assert len(segments[0].pcm) == round((segments[0].end - segments[0].start) * live.SAMPLE_RATE) * 2
+
+    def test_long_speech_is_cut_at_max_segment_with_bounded_buffer(self):
+        segmenter = live.Segmenter(min_segment=1.0, max_segment=4.0, silence=0.3)
+        segments = feed_all(segmenter, pcm((20, 0.5)))
+        assert len(segments) >= 5
+        assert all(segment.end - segment.start <= 4.0 + 1e-6 for segment in segments)
+        assert segmenter.peak_buffer <= 4.0 * live.SAMPLE_RATE * 2 + live.READ_BYTES
+
+    def test_silence_is_not_transcribed(self):
+        segmenter = live.Segmenter(min_segment=1.0, max_segment=4.0, silence=0.3)
+        assert feed_all(segmenter, pcm((30, 0))) == []
+        assert segmenter.peak_buffer < live.SAMPLE_RATE * 2
+
+
+class TestLiveSession:
+    """Testy transkrypcji segmentów i zapisu wyniku."""
+
+    def test_segments_are_appended_and_stored(self, temp_dir):
+        backend = EchoBackend()
+        seen = []
+        session = live.LiveSession(
+            backend, temp_dir / "live.txt", segmenter=live.Segmenter(1.0, 10.0, 0.3),
+            on_segment=lambda segment, text, latency: seen.append((segment.index, text)), recent_lines=1,
+        )
+        session.feed(pcm((1.5, 0.5), (1, 0), (1.5, 0.5)))
+        session.finish()
+        assert seen == [(0, "segment 1"), (1, "segment 2")]
+        assert backend.calls == ["live_00000.wav", "live_00001.wav"]
+        assert (temp_dir / "live.txt").read_text(encoding="utf-8") == "segment 1\nsegment 2\n"
+        assert [line["text"] for line in session.recent] == ["segment 2"]
+        assert session.stats()["segments"] == 2
+        storage.ensure_dirs(temp_dir / "uploads")
+        uid = session.store(
+            "mikrofon", base_dir=temp_dir / "uploads", catalog_db=temp_dir / "catalog.sqlite3",
+            index_db=temp_dir / "transcripts.sqlite3",
+        )
+        transcript_path, _ = storage.artefact_paths(uid, temp_dir / "uploads")
+        assert storage.read_artefact(transcript_path) == "segment 1\nsegment 2"
+        assert catalog.lookup(uid, "transcript", db_path=temp_dir / "catalog.sqlite3")
+        found = transcript_index.search_transcripts("segment", db_path=temp_dir / "transcripts.sqlite3")
+        assert found[0]["source_kind"] == "live"
+
+    def test_failing_segments_do_not_stop_session(self, temp_dir):
+        session = live.LiveSession(
+            FailingBackend(), temp_dir / "live.txt", segmenter=live.Segmenter(1.0, 10.0, 0.3), queue_size=1
+        )
+        feeder = threading.Thread(
+            target=session.feed, args=(pcm((1.5, 0.5), (1, 0), (1.5, 0.5), (1, 0), (1.5, 0.5), (1, 0)),)
+        )
+        feeder.start()
+        feeder.join(timeout=10)
+        assert not feeder.is_alive()
+        session.finish()
+        assert session.stats()["failed"] == 2 and session.stats()["segments"] == 1
+        assert (temp_dir / "live.txt").read_text(encoding="utf-8") == "segment 3\n"
+
+
+@requires_ffmpeg
+class TestDecoder:
+    """Testy dekodowania strumienia przez FFmpeg."""
+
+    def test_replay_in_real_time(self, temp_dir):
+        recording = temp_dir / "nagranie.wav"
+        subprocess.run(  # nosec B603
+            [DEPS["ffmpeg"]["path"], "-v", "error", "-f", "lavfi", "-i", RECORDING, str(recording)], check=True
+        )
+        backend = EchoBackend()
+        arrivals = []
+        started = time.monotonic()
+        session = live.LiveSession(
+            backend, temp_dir / "live.txt", segmenter=live.Segmenter(1.0, 10.0, 0.3),
+            on_segment=lambda segment, text, latency: arrivals.append((segment, time.monotonic() - started)),
+        )
+        decoder = live.start_decoder(session, recording, readrate=4)
+        decoder.wait()
+        session.finish()
+        assert [round(segment.start) for segment, _ in arrivals] == [0, 3, 6]
+        # Segment trafia do transkrypcji w trakcie odtwarzania, nie po jego końcu
+        first_segment, first_arrival = arrivals[0]
+        assert first_arrival < 9 / 4
+        assert session.stats()["max_latency"] < 1.0
+
+    def test_growing_file_is_followed(self, temp_dir):
+        recording = temp_dir / "nagranie.wav"
+        subprocess.run(  # nosec B603
+            [DEPS["ffmpeg"]["path"], "-v", "error", "-f", "lavfi", "-i", RECORDING, str(recording)], check=True
+        )
+        data = recording.read_bytes()
+        growing = temp_dir / "obs.wav"
+        growing.write_bytes(data[:len(data) // 3])
+
+        def write_rest():
+            for part in (2, 3):
+                time.sleep(0.3)
+                with open(growing, "ab") as output:
+                    output.write(data[len(data) * (part - 1) // 3:len(data) * part // 3])
+
+        writer = threading.Thread(target=write_rest)
+        writer.start()
+        session = live.LiveSession(
+            EchoBackend(), temp_dir / "live.txt", segmenter=live.Segmenter(1.0, 10.0, 0.3)
+        )
+        decoder = live.start_decoder(session, growing, follow=True, idle_timeout=1.0)
+        decoder.wait()
+        session.finish()
+        writer.join()
+        assert session.audio_seconds == pytest.approx(9.0, abs=0.1)
+        assert session.stats()["segments"] == 3
+
+    def test_microphone_clip_is_decoded(self, temp_dir):
+        clip = subprocess.run(  # nosec B603
+            [DEPS["ffmpeg"]["path"], "-v", "error", "-f", "lavfi", "-i", "sine=duration=2", "-f", "wav", "-"],
+            capture_output=True, check=True,
+        ).stdout
+        assert len(live.decode_clip(clip)) == 2 * live.SAMPLE_RATE * 2
+        with pytest.raises(RuntimeError):
+            live.decode_clip(b"to nie jest nagranie")
@@ -0,0 +1,74 @@
+"""
+Audio2Tekst - Testy testu obciążenia
+====================================
+
+Testy modułu audio2tekst.loadtest (równoczesne sesje AppTest z `app.py`
+i serwerem `FakeOpenAIServer`). Test obciążenia działa w osobnym procesie,
+żeby import Streamlit i jego pamięć nie wpływały na pozostałe testy
+(np. pomiar RSS w benchmarku potoku).
+"""
+
+import json
+import subprocess  # nosec B404
+import sys
+
+import pytest
+
+from audio2tekst import loadtest
+from audio2tekst.system import check_dependencies
+
+
+@pytest.fixture
+def require_ffmpeg():
+    deps = check_dependencies()
+    if not (deps["ffmpeg"]["available"] and deps["ffprobe"]["available"]):
+        pytest.skip("FFmpeg/FFprobe niedostępne")
+
+
+def run_cli(temp_dir, *args):
+    report_path = temp_dir / "raport.json"
+    process = subprocess.run(  # nosec B603
+        [sys.executable, "-m", "audio2tekst.loadtest", "--workdir", str(temp_dir / "app"),
+         "--json", str(report_path), *args],
+        capture_output=True, text=True, encoding="utf-8", timeout=300,
+    )
+    return process, json.loads(report_path.read_text(encoding="utf-8"))
+
+
+@pytest.mark.usefixtures("require_ffmpeg")
+class TestLoadTest:
+    """Testy pełnej ścieżki sesji i raportu."""
+
+    def test_concurrent_sessions_report(self, temp_dir):
+        process, report = run_cli(temp_dir, "--sessions", "3", "--audio-seconds", "5", "--latency", "0.05")
+        assert process.returncode == 0, report["errors"]
+        assert report["failures"] == 0
+        assert report["cached_sessions"] == 0
+        assert set(report["latency"]) == set(loadtest.STEPS)
+        total = report["latency"]["total"]
+        assert 0 < total["p50"] <= total["p95"] <= total["max"]
+        assert report["rss_peak_mb"] >= report["rss_start_mb"] > 0
+        # Rozgrzewka + 3 sesje: transkrypcje i podsumowania przez serwer testowy
+        assert report["api"]["requests"]["/v1/audio/transcriptions"] == 4
+        assert report["api"]["requests"]["/v1/chat/completions"] == 3
+        uploads = temp_dir / "app" / "uploads"
+        assert len(list((uploads / "transcripts").iterdir())) == 4
+        assert len(list((uploads / "summaries").iterdir())) == 3
+        assert "p95" in process.stdout
+
+    def test_api_failures_are_reported(self, temp_dir):
+        process, report = run_cli(temp_dir, "--sessions", "2", "--audio-seconds", "2", "--error-rate", "1")
+        assert process.returncode == 1
+        assert report["failure_rate"] == 1.0
+        assert all("klucz API" in error for error in report["errors"])
+        assert report["latency"] == {}
+
+
+class TestPercentile:
+    """Testy obliczania percentyli."""
+
+    def test_percentile(self):
+        assert loadtest.percentile([], 50) == 0.0
+        assert loadtest.percentile([3.0, 1.0, 2.0], 50) == 2.0
+        assert loadtest.percentile([1.0, 2.0], 90) == pytest.approx(1.9)
+        assert loadtest.percentile([5.0], 99) == 5.0
@@ -0,0 +1,187 @@
+"""
+Audio2Tekst - Testy operacji FFmpeg
+===================================
+
+Testy modułu audio2tekst.media na plikach generowanych przez FFmpeg
+(źródła lavfi `sine` i `testsrc`). Wymagają FFmpeg i FFprobe w systemie.
+"""
+
+import subprocess  # nosec B404
+import wave
+from pathlib import Path
+
+import pytest
+
+from audio2tekst import media
+from audio2tekst.scratch import ScratchSpace
+from audio2tekst.system import check_dependencies
+
+DEPS = check_dependencies()
+pytestmark = pytest.mark.skipif(
+    not (DEPS["ffmpeg"]["available"] and DEPS["ffprobe"]["available"]),
+    reason="FFmpeg/FFprobe niedostępne",
+)
+
+
+def generate(path, seconds, video=False, audio_args=("-c:a", "libmp3lame")):
+    """Generuje plik testowy z tonem sinusoidalnym (i opcjonalnie obrazem)."""
+    cmd = [DEPS["ffmpeg"]["path"], "-y", "-v", "error",
+           "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}"]
+    if video:
+        cmd += ["-f", "lavfi", "-i", f"testsrc=size=320x240:rate=10:duration={seconds}",
+                "-c:v", "libx264", "-pix_fmt", "yuv420p"]
+    cmd += [*audio_args, "-shortest", str(path)]
+    subprocess.run(cmd, check=True)  # nosec B603
+    return path
+
+
+class TestProbeAndIngest:
+    """Testy analizy pliku i przyjmowania do uploads/originals."""
+
+    def test_video_is_replaced_by_audio_stream(self, temp_dir):
+        video = generate(temp_dir / "film.mp4", 3, video=True, audio_args=("-c:a", "aac"))
+        streams = media.probe_streams(video)
+        assert media.has_video(streams)
+        result = media.ingest_media(video, temp_dir / "uid123", move=True)
+        assert result == temp_dir / "uid123.m4a"
+        assert not video.exists()
+        assert not media.has_video(media.probe_streams(result))
+        assert media.get_duration(result) == pytest.approx(3, abs=0.2)
+
+    def test_unknown_codec_is_transcoded(self, temp_dir):
+        video = generate(temp_dir / "film.avi", 2, video=True, audio_args=("-c:a", "pcm_s16le"))
+        result = media.ingest_media(video, temp_dir / "uid", move=False)
+        assert result.suffix == ".mp3"
+        assert video.exists()
+
+    def test_audio_file_is_copied(self, temp_dir):
+        audio = generate(temp_dir / "Nagranie.MP3", 2)
+        result = media.ingest_media(audio, temp_dir / "uid")
+        assert result == temp_dir / "uid.mp3"
+        assert result.read_bytes() == audio.read_bytes()
+        assert not list(temp_dir.glob(".uid.*"))  # Plik częściowy podmieniony atomowo
+
+    def test_uncompressed_audio_is_transcoded(self, temp_dir):
+        wav = generate(temp_dir / "nagranie.wav", 4, audio_args=("-c:a", "pcm_s16le", "-ac", "2", "-ar", "44100"))
+        assert media.needs_transcode(media.probe_streams(wav))
+        result = media.ingest_media(wav, temp_dir / "uid", move=True)
+        assert result == temp_dir / "uid.mp3"
+        assert not wav.exists()
+        # 64 kb/s zamiast 1411 kb/s - 5 minut to ok. 2,4 MB zamiast 53 MB
+        assert result.stat().st_size < 4 * 64_000 / 8 * 1.2
+        assert media.get_duration(result) == pytest.approx(4, abs=0.2)
+
+    def test_interrupted_copy_leaves_no_original(self, temp_dir, monkeypatch):
+        audio = temp_dir / "nagranie.mp3"
+        audio.write_bytes(b"x" * 1024)
+        monkeypatch.setattr(media, "probe_streams", lambda path: [])
+
+        def broken_copy(src, dst):
+            Path(dst).write_bytes(b"x" * 10)
+            raise OSError("brak miejsca na dysku")
+
+        monkeypatch.setattr(media.shutil, "copyfile", broken_copy)
+        with pytest.raises(OSError):
+            media.ingest_media(audio, temp_dir / "uid")
+        assert not (temp_dir / "uid.mp3").exists()
+        assert not list(temp_dir.glob(".uid.*"))
+
+    def test_video_without_audio(self, temp_dir):
+        video = temp_dir / "cisza.mp4"
+        subprocess.run(  # nosec B603
+            [DEPS["ffmpeg"]["path"], "-y", "-v", "error", "-f", "lavfi",
+             "-i", "testsrc=size=64x64:rate=5:duration=1", str(video)],
+            check=True,
+        )
+        with pytest.raises(RuntimeError, match="ścieżki audio"):
+            media.ingest_media(video, temp_dir / "uid")
+
+
+class TestSplitAudio:
+    """Testy dzielenia audio na fragmenty."""
+
+    def test_split_covers_whole_file(self, temp_dir):
+        audio = generate(temp_dir / "audio.mp3", 25)
+        parts = media.split_audio(audio, chunk_ms=10_000)
+        try:
+            assert len(parts) == 3
+            durations = [media.get_duration(part) for part in parts]
+            assert sum(durations) == pytest.approx(25, abs=0.5)
+        finally:
+            for part in parts:
+                part.unlink()
+
+
+class TestChunkStream:
+    """Testy fragmentów wycinanych przez FFmpeg prosto do pamięci."""
+
+    def test_wav_chunks_in_memory(self, temp_dir):
+        audio = generate(temp_dir / "audio.wav", 5, audio_args=("-c:a", "pcm_s16le", "-ar", "16000"))
+        stream = media.ChunkStream(audio, chunk_ms=2000, prefetch=1)
+        assert len(stream) == 3
+        chunks = list(stream)
+        assert [chunk.name for chunk in chunks] == ["chunk_0000.wav", "chunk_0001.wav", "chunk_0002.wav"]
+        assert stream.peak_in_flight == 1
+        # Nagłówek WAV z poprawnymi rozmiarami, mimo zapisu do potoku
+        frames = []
+        for chunk in chunks:
+            assert chunk.size == len(chunk.getvalue())
+            with wave.open(chunk) as wav_file:
+                frames.append(wav_file.getnframes())
+        assert sum(frames) == pytest.approx(5 * 16000, abs=1600)
+        assert list(temp_dir.iterdir()) == [audio]
+
+    def test_mp3_chunks_decode(self, temp_dir):
+        audio = generate(temp_dir / "audio.mp3", 25)
+        chunk = next(iter(media.ChunkStream(audio, chunk_ms=10_000)))
+        part = temp_dir / chunk.name
+        part.write_bytes(chunk.getvalue())
+        assert media.get_duration(part) == pytest.approx(10, abs=0.5)
+
+    def test_chunk_source_fallback(self, temp_dir, monkeypatch):
+        audio = generate(temp_dir / "audio.m4a", 3, audio_args=("-c:a", "aac"))
+        assert not media.can_stream(audio)
+        parts = media.chunk_source(audio, chunk_ms=10_000)
+        assert isinstance(parts, list) and parts[0].exists()
+        parts[0].unlink()
+        mp3 = generate(temp_dir / "audio.mp3", 3)
+        assert isinstance(media.chunk_source(mp3), media.ChunkStream)
+        monkeypatch.setenv("CHUNK_STREAMING", "false")
+        parts = media.chunk_source(mp3)
+        assert isinstance(parts, list)
+        parts[0].unlink()
+
+
+class TestRanges:
+    """Testy transkrypcji zakresu nagrania (wyszukiwanie po stronie wejścia)."""
+
+    def test_parse_time_and_plan(self):
+        assert media.parse_time("1:02:03") == 3723
+        assert media.parse_time("05:30,5") == 330.5
+        assert media.parse_time(" ") is None
+        with pytest.raises(ValueError):
+            media.parse_time("10 minut")
+        # 10 minut z 3-godzinnego nagrania - tylko dwa fragmenty z czasem oryginału
+        assert media.plan_segments(10_800, 300_000, 600, 1200) == [(600, 300), (900, 300)]
+        assert media.plan_segments(100, 30_000, 90, 500) == [(90, 10)]
+        with pytest.raises(ValueError):
+            media.plan_segments(100, 30_000, 120)
+
+    def test_split_and_stream_only_range(self, temp_dir):
+        audio = generate(temp_dir / "audio.mp3", 25)
+        assert media.get_duration(audio, 5, 17) == pytest.approx(12)
+        parts = media.split_audio(audio, chunk_ms=10_000, start=5, end=17)
+        try:
+            assert len(parts) == 2
+            assert sum(media.get_duration(part) for part in parts) == pytest.approx(12, abs=0.5)
+        finally:
+            for part in parts:
+                part.unlink()
+        stream = media.ChunkStream(audio, chunk_ms=10_000, start=20)
+        assert stream.segments == [(20, pytest.approx(5, abs=0.1))]
+
+    def test_cut_range(self, temp_dir):
+        audio = generate(temp_dir / "audio.mp3", 25)
+        with ScratchSpace("range") as scratch:
+            clip = media.cut_range(audio, 10, None, scratch)
+            assert media.get_duration(clip) == pytest.approx(15, abs=0.5)
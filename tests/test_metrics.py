@@ -0,0 +1,100 @@
+"""
+Audio2Tekst - Testy pomiarów etapów
+===================================
+
+Testy modułu audio2tekst.metrics (czasy etapów, eksport Prometheus i JSON lines).
+"""
+
+import json
+import urllib.request
+from types import SimpleNamespace
+
+import pytest
+
+from audio2tekst import metrics
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    """Każdy test zaczyna od pustych liczników."""
+    metrics.reset()
+    yield
+    metrics.configure(jsonl_path=None)
+    metrics.reset()
+
+
+class TestStages:
+    """Testy pomiaru etapów i zestawienia dla zadania."""
+
+    def test_job_breakdown(self):
+        with metrics.job("uid1"):
+            for size in (100, 200):
+                with metrics.stage("transcribe", bytes_in=size) as record:
+                    record.bytes_out = size // 10
+            with metrics.stage("ingest") as record:
+                record.cache_hit = True
+        rows = metrics.job_breakdown("uid1")
+        assert [row["stage"] for row in rows] == ["transcribe", "ingest"]
+        assert rows[0]["count"] == 2
+        assert rows[0]["bytes_in"] == 300
+        assert rows[0]["bytes_out"] == 30
+        assert rows[1]["cache_hits"] == 1
+        assert metrics.job_breakdown("inny") == []
+
+    def test_errors_and_decorator(self):
+        @metrics.timed("probe")
+        def failing_probe():
+            raise RuntimeError("błąd")
+
+        with pytest.raises(RuntimeError):
+            with metrics.job("uid1"):
+                failing_probe()
+        totals = metrics.snapshot()["probe"]
+        assert totals["count"] == 1
+        assert totals["errors"] == 1
+        assert metrics.job_records("uid1")[0]["ok"] is False
+
+    def test_retry_hook_counts_retries(self):
+        with metrics.stage("summarize", job_id="uid1"):
+            for attempt in ("0", "1", "2"):
+                metrics.http_request_hook(SimpleNamespace(headers={"x-stainless-retry-count": attempt}))
+        # Poza etapem hak nic nie zapisuje
+        metrics.http_request_hook(SimpleNamespace(headers={"x-stainless-retry-count": "1"}))
+        assert metrics.job_breakdown("uid1")[0]["retries"] == 2
+
+    def test_link_job(self):
+        with metrics.stage("download", job_id="youtube:abc"):
+            pass
+        with metrics.stage("ingest", job_id="uid1"):
+            pass
+        metrics.link_job("youtube:abc", "uid1")
+        assert [r["stage"] for r in metrics.job_records("uid1")] == ["download", "ingest"]
+        assert metrics.job_records("youtube:abc") == []
+
+
+class TestExport:
+    """Testy eksportu pomiarów."""
+
+    def test_jsonl_export(self, temp_dir):
+        path = temp_dir / "logs" / "metrics.jsonl"
+        metrics.configure(jsonl_path=path)
+        with metrics.stage("split", bytes_in=10, job_id="uid1"):
+            pass
+        entry = json.loads(path.read_text(encoding="utf-8").splitlines()[0])
+        assert entry["stage"] == "split"
+        assert entry["job"] == "uid1"
+        assert entry["bytes_in"] == 10
+
+    def test_prometheus_endpoint(self):
+        with metrics.stage("split", bytes_in=10):
+            pass
+        text = metrics.render_prometheus()
+        assert 'audio2tekst_stage_duration_seconds_count{stage="split"} 1' in text
+        assert 'audio2tekst_stage_bytes_in_total{stage="split"} 10' in text
+        server = metrics.start_metrics_server(0)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url, timeout=5) as response:  # nosec B310
+                assert response.read().decode("utf-8") == metrics.render_prometheus()
+        finally:
+            server.shutdown()
@@ -5,6 +5,7 @@ Audio2Tekst - Performance Tests
 Testy wydajności i obciążenia dla aplikacji Audio2Tekst.
 """
 
+import os
 import tempfile
 import time
 from pathlib import Path
@@ -14,6 +15,16 @@ import pytest
 import queue
 import threading
 import shutil
+import subprocess  # nosec B404
+
+import json
+
+import openai
+
+from audio2tekst import hashing, media, metrics, pipeline, transcription
+from audio2tekst.fake_openai import FakeOpenAIServer
+from audio2tekst.scheduler import get_scheduler
+from audio2tekst.system import check_dependencies
 
 # --- Funkcje pomocnicze do testów wydajnościowych ---
 def mock_youtube_download(url, timeout=30):
@@ -256,6 +267,267 @@ class TestCachePerformance:
         ), f"Cache size {len(cache)} exceeds limit {MAX_CACHE_SIZE}"
 
 
+class TestHashingPerformance:
+    """Benchmark identyfikatorów zawartości (UID) dla plików 25 MB - 2 GB."""
+
+    MB = 1024 * 1024
+    # Duże pliki tylko na żądanie: BENCHMARK_LARGE_FILES=1 pytest -s -k Hashing
+    SIZES_MB = [25] + ([200, 2048] if os.getenv("BENCHMARK_LARGE_FILES") == "1" else [])
+
+    @pytest.fixture(params=SIZES_MB, ids=lambda size: f"{size}MB")
+    def media_file(self, request, temp_dir):
+        size = request.param * self.MB
+        path = temp_dir / "media.bin"
+        block = os.urandom(self.MB)
+        with open(path, "wb") as out:
+            for _ in range(request.param):
+                out.write(block)
+        return path, size
+
+    def _throughput(self, func, size):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        return size / self.MB / elapsed, elapsed
+
+    def test_hash_throughput(self, media_file):
+        """Porównanie przepustowości algorytmów i trybów odczytu."""
+        path, size = media_file
+        results = {}
+        for algorithm in sorted(hashing.HASHERS):
+            for prefetch in (False, True):
+                label = f"{algorithm}{' +prefetch' if prefetch else ''}"
+                results[label] = self._throughput(
+                    lambda: hashing.content_id(path, algorithm=algorithm, prefetch=prefetch), size
+                )
+        results["quick_id"] = self._throughput(lambda: hashing.quick_id(path), size)
+
+        print(f"\nUID dla pliku {size // self.MB} MB:")
+        for label, (mb_per_s, elapsed) in results.items():
+            print(f"  {label:<20} {mb_per_s:10.0f} MB/s  {elapsed:8.3f} s")
+
+        # Szybki identyfikator nie czyta całego pliku
+        assert results["quick_id"][1] < results["md5"][1]
+        # Domyślny algorytm nie jest wyraźnie wolniejszy od MD5 (zapas na szum pomiaru)
+        default = hashing.default_algorithm()
+        best_default = max(results[default][0], results[f"{default} +prefetch"][0])
+        assert best_default > results["md5"][0] * 0.5
+
+
+class TestTranscriptionBackendPerformance:
+    """Współczynnik czasu rzeczywistego (RTF) silników transkrypcji."""
+
+    AUDIO_SECONDS = 60
+
+    @pytest.fixture
+    def speech_file(self, temp_dir):
+        deps = check_dependencies()
+        if not deps["ffmpeg"]["available"]:
+            pytest.skip("FFmpeg niedostępny")
+        path = temp_dir / "sample.mp3"
+        subprocess.run(  # nosec B603
+            [deps["ffmpeg"]["path"], "-y", "-v", "error", "-f", "lavfi",
+             "-i", f"anoisesrc=duration={self.AUDIO_SECONDS}:amplitude=0.1", str(path)],
+            check=True,
+        )
+        return path
+
+    def _report(self, backend, result):
+        print(
+            f"\n{backend.name} ({backend.model_label}): {result['seconds']:.1f} s "
+            f"dla {result['audio_seconds']:.0f} s audio, RTF {result['rtf']:.3f}"
+        )
+
+    def test_local_backend_rtf(self, speech_file):
+        """Lokalny model int8 na CPU musi transkrybować szybciej niż w czasie rzeczywistym."""
+        if "local" not in transcription.available_backends():
+            pytest.skip("Pakiet faster-whisper nie jest zainstalowany")
+        backend = transcription.create_backend("local")
+        # Pierwsze wywołanie wczytuje model - nie wliczamy go do pomiaru
+        transcription.load_local_model(
+            backend.model_size, backend.device, backend.compute_type, backend.cpu_threads
+        )
+        result = transcription.measure_real_time_factor(backend, speech_file, self.AUDIO_SECONDS)
+        self._report(backend, result)
+        assert result["rtf"] < 1.0
+
+    @pytest.mark.skipif(
+        os.getenv("BENCHMARK_OPENAI") != "1" or not os.getenv("OPENAI_API_KEY"),
+        reason="Pomiar Whisper API na żądanie: BENCHMARK_OPENAI=1 i OPENAI_API_KEY",
+    )
+    def test_openai_backend_rtf(self, speech_file):
+        """Punkt odniesienia: RTF ścieżki przez Whisper API (z opóźnieniem sieci)."""
+        backend = transcription.create_backend("openai", openai_client=openai.OpenAI())
+        result = transcription.measure_real_time_factor(backend, speech_file, self.AUDIO_SECONDS)
+        self._report(backend, result)
+
+
+class ResourceMonitor:
+    """
+    Próbkuje w tle RSS procesu testów i liczbę procesów potomnych (np. FFmpeg).
+
+    `peak_growth` to przyrost RSS ponad stan z początku pomiaru - w odróżnieniu
+    od `peak_rss` nie zależy od modułów zaimportowanych wcześniej przez inne testy.
+    """
+
+    def __init__(self, interval=0.02):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.start_rss = self.process.memory_info().rss
+        self.peak_rss = self.start_rss
+        self.peak_children = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.is_set():
+            try:
+                self.peak_rss = max(self.peak_rss, self.process.memory_info().rss)
+                self.peak_children = max(
+                    self.peak_children, len(self.process.children(recursive=True))
+                )
+            except psutil.Error:
+                pass
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    @property
+    def peak_growth(self):
+        return max(self.peak_rss - self.start_rss, 0)
+
+
+PIPELINE_BASELINE_PATH = Path(__file__).parent / "performance_baseline.json"
+
+
+@pytest.fixture(scope="module")
+def pipeline_baseline():
+    """Linia bazowa benchmarku potoku i słownik na wyniki bieżącego uruchomienia."""
+    data = json.loads(PIPELINE_BASELINE_PATH.read_text()) if PIPELINE_BASELINE_PATH.exists() else {}
+    results = {}
+    yield data, results
+    if os.getenv("BENCHMARK_UPDATE_BASELINE") == "1" and results:
+        data.update(results)
+        PIPELINE_BASELINE_PATH.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+class TestPipelineBenchmark:
+    """
+    Benchmark prawdziwego potoku: podział FFmpeg, transkrypcja i podsumowanie
+    przez klienta OpenAI podłączonego do lokalnego serwera `FakeOpenAIServer`.
+
+    Liczby bezwzględne zależą od maszyny, więc porównanie z `performance_baseline.json`
+    jest tylko na żądanie (BENCHMARK_BASELINE=1, na maszynie, na której zapisano
+    linię bazową): spadek przepustowości lub wzrost pamięci zajętej w trakcie
+    potoku ponad tolerancję (BENCHMARK_TOLERANCE, domyślnie 0.5) kończy test
+    błędem. Nowa linia bazowa: BENCHMARK_UPDATE_BASELINE=1.
+    Długie nagrania (10 min - 3 h) na żądanie: BENCHMARK_LONG_AUDIO=1.
+    """
+
+    COMPARE_BASELINE = os.getenv("BENCHMARK_BASELINE") == "1"
+    TOLERANCE = float(os.getenv("BENCHMARK_TOLERANCE", "0.5"))
+    API_LATENCY = 0.05  # s na żądanie do fałszywego API
+    # Bezwzględny zapas przyrostu RSS: przyrost to zwykle kilka MB, a regresje, które
+    # mają znaczenie (np. wczytanie nagrania do pamięci), to dziesiątki MB
+    RSS_SLACK_MB = 16
+    # (długość nagrania w s, długość fragmentu w ms)
+    CASES = [(60, 10_000)] + (
+        [(600, media.CHUNK_MS), (3600, media.CHUNK_MS), (3 * 3600, media.CHUNK_MS)]
+        if os.getenv("BENCHMARK_LONG_AUDIO") == "1"
+        else []
+    )
+
+    @pytest.fixture(params=CASES, ids=lambda case: f"{case[0]}s")
+    def synthetic_audio(self, request, temp_dir):
+        deps = check_dependencies()
+        if not (deps["ffmpeg"]["available"] and deps["ffprobe"]["available"]):
+            pytest.skip("FFmpeg/FFprobe niedostępne")
+        seconds, chunk_ms = request.param
+        path = temp_dir / f"synthetic_{seconds}s.mp3"
+        subprocess.run(  # nosec B603
+            [deps["ffmpeg"]["path"], "-y", "-v", "error",
+             "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+             "-f", "lavfi", "-i", f"anoisesrc=duration={seconds}:amplitude=0.05",
+             "-filter_complex", "amix=inputs=2:duration=shortest",
+             "-ac", "1", "-b:a", "64k", str(path)],
+            check=True,
+        )
+        return path, seconds, chunk_ms
+
+    def _compare(self, name, value, baseline, higher_is_better, slack=0.0):
+        reference = baseline.get(name)
+        if reference is None:
+            return None
+        if higher_is_better and value < reference * (1 - self.TOLERANCE):
+            return f"{name}: {value:.2f} < {reference:.2f} (linia bazowa)"
+        if not higher_is_better and value > reference * (1 + self.TOLERANCE) + slack:
+            return f"{name}: {value:.2f} > {reference:.2f} (linia bazowa)"
+        return None
+
+    def test_split_transcribe_summarize(self, synthetic_audio, pipeline_baseline):
+        path, seconds, chunk_ms = synthetic_audio
+        stored, results = pipeline_baseline
+        scheduler = get_scheduler()
+        metrics.reset()
+        with FakeOpenAIServer(latency=self.API_LATENCY) as server, ResourceMonitor() as monitor:
+            client = openai.OpenAI(base_url=server.url, api_key="test", max_retries=0)
+            backend = transcription.OpenAIBackend(client)
+
+            started = time.perf_counter()
+            chunks = media.split_audio(path, chunk_ms=chunk_ms)
+            split_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            transcript = pipeline.transcribe_chunks(chunks, backend, language="pl")
+            transcribe_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            topic, _summary = pipeline.summarize(transcript, client)
+            summarize_seconds = time.perf_counter() - started
+
+        expected_chunks = seconds * 1000 // chunk_ms
+        assert len(chunks) == expected_chunks
+        assert server.requests["/v1/audio/transcriptions"] == expected_chunks
+        assert not any(chunk.exists() for chunk in chunks)
+        assert not topic.startswith(("Błąd", "Brak środków", "Nie udało się"))
+        # Limit procesów FFmpeg obowiązuje niezależnie od liczby fragmentów
+        assert monitor.peak_children <= scheduler.max_processes
+
+        key = f"{seconds}s"
+        measured = {
+            f"{key}.split_x_realtime": seconds / split_seconds,
+            f"{key}.transcribe_x_realtime": seconds / transcribe_seconds,
+            f"{key}.summarize_seconds": summarize_seconds,
+            f"{key}.rss_growth_mb": monitor.peak_growth / 1024 / 1024,
+        }
+        results.update(measured)
+        print(
+            f"\nPotok dla {seconds} s audio ({len(chunks)} fragmentów, "
+            f"{path.stat().st_size / 1024 / 1024:.1f} MB):"
+        )
+        for name, value in measured.items():
+            print(f"  {name:<32} {value:10.2f}")
+        print(f"  {'peak_ffmpeg_processes':<32} {monitor.peak_children:10d}")
+
+        if not self.COMPARE_BASELINE:
+            return
+        regressions = [
+            self._compare(f"{key}.split_x_realtime", measured[f"{key}.split_x_realtime"], stored, True),
+            self._compare(f"{key}.transcribe_x_realtime", measured[f"{key}.transcribe_x_realtime"], stored, True),
+            self._compare(
+                f"{key}.rss_growth_mb", measured[f"{key}.rss_growth_mb"], stored, False, self.RSS_SLACK_MB
+            ),
+        ]
+        regressions = [r for r in regressions if r]
+        assert not regressions, "Regresja wydajności: " + "; ".join(regressions)
+
+
 class TestNetworkPerformance:
     """Testy wydajności sieciowej."""
 
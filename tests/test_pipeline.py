@@ -0,0 +1,136 @@
+"""
+Audio2Tekst - Testy rdzenia potoku
+==================================
+
+Testy modułu audio2tekst.pipeline (podsumowanie przyrostowe w trakcie transkrypcji).
+"""
+
+import threading
+import time
+from unittest.mock import Mock
+
+import openai
+import pytest
+
+from audio2tekst import pipeline, transcription
+
+
+def completion(content):
+    message = Mock()
+    message.content = content
+    choice = Mock()
+    choice.message = message
+    response = Mock()
+    response.choices = [choice]
+    return response
+
+
+@pytest.fixture
+def chat_client():
+    """Klient zwracający 'Temat N / Podsumowanie N' i zapamiętujący prompty."""
+    client = Mock()
+    prompts = []
+    lock = threading.Lock()
+
+    def create(model, messages, max_tokens):
+        with lock:
+            prompts.append(messages[0]["content"])
+            number = len(prompts)
+        return completion(f"Temat {number}\nPodsumowanie {number}.")
+
+    client.chat.completions.create.side_effect = create
+    client.prompts = prompts
+    return client
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "Przekroczono czas oczekiwania"
+        time.sleep(0.01)
+
+
+class TestRollingSummarizer:
+    """Testy podsumowania liczonego w trakcie transkrypcji."""
+
+    def test_parts_are_summarised_before_finish(self, chat_client):
+        rolling = pipeline.RollingSummarizer(chat_client)
+        rolling.add("a" * 5000)
+        assert chat_client.prompts == []
+        rolling.add("b" * 5000)
+        # Pierwsza część (8000 znaków) jest podsumowywana, zanim transkrypcja się skończy
+        wait_for(lambda: rolling.maps_done == 1)
+        topic, summary = rolling.finish()
+        assert (topic, summary) == ("Temat 3", "Podsumowanie 3.")
+        full_text = "a" * 5000 + "\n" + "b" * 5000
+        map_prompts, reduce = chat_client.prompts[:2], chat_client.prompts[2]
+        # Części takie same jak w summarize() dla całego tekstu
+        assert map_prompts[0].endswith(full_text[:pipeline.SUMMARY_CHUNK_CHARS])
+        assert map_prompts[1].endswith(full_text[pipeline.SUMMARY_CHUNK_CHARS:])
+        assert "(fragment 1)" in map_prompts[0] and "(fragment 2)" in map_prompts[1]
+        assert reduce == pipeline.reduce_prompt(["Temat 1\nPodsumowanie 1.", "Temat 2\nPodsumowanie 2."])
+
+    def test_short_text_uses_single_prompt(self, chat_client):
+        rolling = pipeline.RollingSummarizer(chat_client)
+        rolling.add("Pierwszy fragment.")
+        rolling.add("Drugi fragment.")
+        assert rolling.finish() == ("Temat 1", "Podsumowanie 1.")
+        assert chat_client.prompts == [pipeline.single_prompt("Pierwszy fragment.\nDrugi fragment.")]
+
+    def test_map_error(self, chat_client, monkeypatch, temp_dir):
+        monkeypatch.setattr(pipeline, "SUMMARY_ERROR_LOG", temp_dir / "summary_errors.log")
+        chat_client.chat.completions.create.side_effect = openai.APIConnectionError(request=Mock())
+        rolling = pipeline.RollingSummarizer(chat_client)
+        rolling.add("x" * (pipeline.SUMMARY_CHUNK_CHARS + 10))
+        topic, _ = rolling.finish()
+        assert topic == "Błąd podczas podsumowywania fragmentu"
+
+
+class FlakyBackend(transcription.TranscriptionBackend):
+    """Atrapa silnika zgłaszająca błąd dla fragmentów z nazwą zawierającą 'bad'."""
+
+    name = "flaky"
+    model_label = "flaky"
+    max_chunk_bytes = 10
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio_path, language):
+        self.calls.append(audio_path.name)
+        if "bad" in audio_path.name:
+            raise transcription.TranscriptionError("Błąd silnika")
+        return f"tekst {audio_path.stem}"
+
+
+def write_chunks(temp_dir, *names, size=1):
+    chunks = [temp_dir / name for name in names]
+    for chunk in chunks:
+        chunk.write_bytes(b"x" * size)
+    return chunks
+
+
+class TestTranscribeChunks:
+    """Testy transkrypcji kolejnych fragmentów."""
+
+    def test_chunks_are_joined_and_removed(self, temp_dir):
+        chunks = write_chunks(temp_dir, "ok1.wav", "empty.wav", "ok2.wav")
+        chunks[1].write_bytes(b"")
+        assert pipeline.transcribe_chunks(chunks, FlakyBackend()) == "tekst ok1\ntekst ok2"
+        assert not any(chunk.exists() for chunk in chunks)
+
+    def test_failed_chunk_stops_transcription(self, temp_dir):
+        backend = FlakyBackend()
+        chunks = write_chunks(temp_dir, "ok1.wav", "bad.wav", "ok2.wav")
+        with pytest.raises(transcription.TranscriptionError, match="2/3"):
+            pipeline.transcribe_chunks(chunks, backend)
+        # Niepełna transkrypcja nie powstaje, a kolejne fragmenty nie trafiają do silnika
+        assert backend.calls == ["ok1.wav", "bad.wav"]
+        assert not any(chunk.exists() for chunk in chunks)
+
+    def test_chunk_over_backend_limit_is_an_error(self, temp_dir):
+        backend = FlakyBackend()
+        chunks = write_chunks(temp_dir, "big.wav", size=11)
+        with pytest.raises(transcription.TranscriptionError, match="limit"):
+            pipeline.transcribe_chunks(chunks, backend)
+        assert backend.calls == [] and not chunks[0].exists()
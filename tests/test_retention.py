@@ -0,0 +1,93 @@
+"""
+Audio2Tekst - Testy polityki retencji
+=====================================
+
+Testy modułu audio2tekst.retention.
+"""
+
+import time
+
+import pytest
+
+from audio2tekst import catalog, retention
+
+
+@pytest.fixture
+def catalog_db(temp_dir):
+    """Ścieżka do pustej bazy katalogu w katalogu tymczasowym."""
+    return temp_dir / "db" / "catalog.sqlite3"
+
+
+def add_original(temp_dir, catalog_db, uid, size):
+    path = temp_dir / "originals" / f"{uid}.mp3"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    catalog.register(uid, "original", path, size, db_path=catalog_db)
+    return path
+
+
+def make_policy(quota=None, ttl=None):
+    return {
+        "quotas": {"original": quota, "transcript": None, "summary": None},
+        "ttl": {"original": ttl, "transcript": None, "summary": None},
+    }
+
+
+class TestRetention:
+    """Testy usuwania LRU/TTL i raportu zajętości."""
+
+    def test_quota_evicts_least_recently_used(self, temp_dir, catalog_db):
+        paths = {uid: add_original(temp_dir, catalog_db, uid, 100) for uid in ("a", "b", "c")}
+        catalog.lookup("a", "original", db_path=catalog_db)  # "a" jest teraz najświeższy
+        result = retention.run_retention_pass(make_policy(quota=150), db_path=catalog_db)
+        assert result["original"] == {"ttl": 0, "quota": 2, "bytes": 200}
+        assert paths["a"].exists()
+        assert not paths["b"].exists() and not paths["c"].exists()
+
+    def test_ttl_and_referenced_files(self, temp_dir, catalog_db):
+        add_original(temp_dir, catalog_db, "old", 10)
+        in_use = add_original(temp_dir, catalog_db, "in_use", 10)
+        catalog.acquire("in_use", "original", db_path=catalog_db)
+        result = retention.run_retention_pass(
+            make_policy(ttl=60), db_path=catalog_db, now=time.time() + 3600
+        )
+        assert result["original"]["ttl"] == 1
+        assert in_use.exists()
+
+    def test_recent_files_are_protected_by_grace_period(self, temp_dir, catalog_db):
+        fresh = add_original(temp_dir, catalog_db, "fresh", 100)
+        policy = dict(make_policy(quota=10), grace=60)
+        result = retention.run_retention_pass(policy, db_path=catalog_db)
+        assert result["original"]["quota"] == 0 and fresh.exists()
+        result = retention.run_retention_pass(policy, db_path=catalog_db, now=time.time() + 120)
+        assert result["original"]["quota"] == 1 and not fresh.exists()
+
+    def test_pass_is_incremental(self, temp_dir, catalog_db):
+        for uid in range(5):
+            add_original(temp_dir, catalog_db, str(uid), 10)
+        policy = make_policy(quota=1)
+        first = retention.run_retention_pass(policy, max_evictions=2, db_path=catalog_db)
+        assert first["original"]["quota"] == 2
+        assert catalog.usage_by_kind(db_path=catalog_db)["original"]["files"] == 3
+
+    def test_policy_from_env(self, monkeypatch):
+        monkeypatch.setenv("RETENTION_ORIGINALS_MB", "1")
+        monkeypatch.setenv("RETENTION_ORIGINALS_DAYS", "0")
+        policy = retention.load_policy_from_env()
+        assert policy["quotas"]["original"] == 1024 * 1024
+        assert policy["ttl"]["original"] is None
+        assert policy["quotas"]["transcript"] is None
+        assert policy["grace"] == retention.DEFAULT_GRACE_MINUTES * 60
+
+    def test_manager_report(self, temp_dir, catalog_db):
+        add_original(temp_dir, catalog_db, "a", 100)
+        add_original(temp_dir, catalog_db, "b", 100)
+        manager = retention.RetentionManager(make_policy(quota=100), interval=0.01, db_path=catalog_db)
+        manager.start()
+        deadline = time.time() + 5
+        while manager.report()["passes"] == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        manager.stop(timeout=5)
+        report = manager.report()
+        assert report["evictions"]["original"]["quota"] == 1
+        assert report["usage"]["original"] == {"files": 1, "bytes": 100, "quota": 100, "ttl": None}
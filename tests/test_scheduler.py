@@ -0,0 +1,63 @@
+"""
+Audio2Tekst - Testy harmonogramu procesów
+=========================================
+
+Testy modułu audio2tekst.scheduler (wspólny limit procesów FFmpeg).
+"""
+
+import math
+import subprocess  # nosec B404
+import sys
+import threading
+
+import pytest
+
+from audio2tekst.scheduler import ProcessScheduler
+
+SLEEP_CMD = [sys.executable, "-c", "import time; time.sleep(0.2)"]
+
+
+class TestProcessScheduler:
+    """Testy limitu równoczesnych procesów i statystyk."""
+
+    def test_concurrency_cap_across_callers(self):
+        scheduler = ProcessScheduler(max_processes=2)
+        # Kilka "sesji" jednocześnie zleca po kilka procesów
+        sessions = [
+            threading.Thread(target=scheduler.map, args=(lambda _: scheduler.run(SLEEP_CMD), range(3)))
+            for _ in range(3)
+        ]
+        for session in sessions:
+            session.start()
+        for session in sessions:
+            session.join()
+        stats = scheduler.stats()
+        assert stats["peak_running"] == 2
+        assert stats["peak_queued"] > 0
+        assert stats["completed"] == 9
+        assert stats["running"] == stats["queued"] == 0
+        assert 0 < stats["average_utilisation"] <= 1
+
+    def test_map_preserves_order_and_reports_errors(self):
+        scheduler = ProcessScheduler(max_processes=3)
+        results = scheduler.map(
+            lambda n: scheduler.run(
+                [sys.executable, "-c", f"print({n} * {n})"], capture_output=True, text=True
+            ).stdout.strip(),
+            range(5),
+        )
+        assert results == ["0", "1", "4", "9", "16"]
+        with pytest.raises(subprocess.CalledProcessError):
+            scheduler.map(
+                lambda code: scheduler.run([sys.executable, "-c", f"exit({code})"], check=True),
+                [0, 1, 0],
+            )
+        assert scheduler.stats()["failed"] == 1
+
+    def test_call_runs_in_process_pool(self):
+        scheduler = ProcessScheduler(max_processes=2)
+        try:
+            assert scheduler.call(math.factorial, 10) == 3628800
+        finally:
+            scheduler.shutdown()
+        assert scheduler.stats()["completed"] == 1
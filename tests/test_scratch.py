@@ -0,0 +1,125 @@
+"""
+Audio2Tekst - Testy przestrzeni roboczej
+========================================
+
+Testy modułu audio2tekst.scratch (limit bajtów, sprzątanie, porzucone pliki).
+"""
+
+import os
+import subprocess  # nosec B404
+import sys
+import time
+
+import pytest
+
+from audio2tekst import media, scratch
+from audio2tekst.scratch import ScratchQuotaExceeded, ScratchSpace
+from audio2tekst.system import check_dependencies
+
+DEPS = check_dependencies()
+requires_ffmpeg = pytest.mark.skipif(
+    not (DEPS["ffmpeg"]["available"] and DEPS["ffprobe"]["available"]),
+    reason="FFmpeg/FFprobe niedostępne",
+)
+
+
+@pytest.fixture
+def scratch_root(temp_dir, monkeypatch):
+    monkeypatch.setenv("SCRATCH_DIR", str(temp_dir))
+    monkeypatch.setenv("SCRATCH_TMPFS", "false")
+    monkeypatch.delenv("SCRATCH_JOB_MB", raising=False)
+    return temp_dir
+
+
+def dead_pid() -> int:
+    """Numer procesu, który już się zakończył."""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])  # nosec B603
+    process.wait()
+    return process.pid
+
+
+class TestScratchSpace:
+    """Testy katalogu roboczego zadania."""
+
+    def test_removed_after_exception(self, scratch_root):
+        with pytest.raises(RuntimeError, match="przerwane"):
+            with ScratchSpace("uid123") as space:
+                chunk = space.new_file(suffix=".mp3")
+                chunk.write_bytes(b"x" * 100)
+                assert space.path.parent == scratch_root
+                assert space.path.name.startswith(f"audio2tekst_{os.getpid()}_uid123_")
+                assert space.used_bytes() == 100
+                assert str(space.path) in [entry["path"] for entry in scratch.active_spaces()]
+                raise RuntimeError("przerwane")
+        assert not space.path.exists()
+        assert str(space.path) not in [entry["path"] for entry in scratch.active_spaces()]
+
+    def test_quota(self, scratch_root):
+        with pytest.raises(ScratchQuotaExceeded):
+            ScratchSpace(expected_bytes=2000, quota=1000)
+        with ScratchSpace(quota=1000) as space:
+            space.new_file().write_bytes(b"x" * 600)
+            with pytest.raises(ScratchQuotaExceeded):
+                space.reserve(500)
+            space.reserve(300)
+            space.unreserve(300)
+            space.new_file().write_bytes(b"x" * 600)
+            with pytest.raises(ScratchQuotaExceeded):
+                space.check_quota()
+            assert space.peak_bytes == 1200
+
+    def test_quota_from_env(self, scratch_root, monkeypatch):
+        monkeypatch.setenv("SCRATCH_JOB_MB", "0.5")
+        assert scratch.job_quota() == 512 * 1024
+
+
+class TestSweepOrphans:
+    """Testy usuwania plików pozostawionych przez zakończone procesy."""
+
+    def test_sweep(self, scratch_root):
+        dead_dir = scratch_root / f"audio2tekst_{dead_pid()}_uid_abc"
+        dead_dir.mkdir()
+        (dead_dir / "chunk_1.mp3").write_bytes(b"x" * 10)
+        old_chunk = scratch_root / "audio2tekst_legacy.mp3"
+        old_chunk.write_bytes(b"x" * 5)
+        old_time = time.time() - 7200
+        os.utime(old_chunk, (old_time, old_time))
+        fresh_chunk = scratch_root / "audio2tekst_fresh.mp3"
+        fresh_chunk.write_bytes(b"x")
+        unrelated = scratch_root / "inny_plik.mp3"
+        unrelated.write_bytes(b"x")
+        stale_own = scratch_root / f"audio2tekst_{os.getpid()}_job_old"
+        stale_own.mkdir()
+
+        with ScratchSpace("aktywne") as active:
+            removed = scratch.sweep_orphans(roots=[scratch_root], max_age=3600)
+            assert active.path.exists()
+        assert removed == {"entries": 3, "bytes": 15}
+        assert not dead_dir.exists()
+        assert not old_chunk.exists()
+        assert not stale_own.exists()
+        assert fresh_chunk.exists()
+        assert unrelated.exists()
+
+
+@requires_ffmpeg
+class TestSplitIntoScratch:
+    """Testy podziału pliku do przestrzeni roboczej."""
+
+    def test_chunks_live_in_scratch(self, scratch_root):
+        audio = scratch_root / "nagranie.mp3"
+        subprocess.run(  # nosec B603
+            [DEPS["ffmpeg"]["path"], "-y", "-v", "error", "-f", "lavfi",
+             "-i", "sine=frequency=440:duration=5", "-c:a", "libmp3lame", str(audio)],
+            check=True,
+        )
+        with ScratchSpace("uid") as space:
+            parts = media.split_audio(audio, chunk_ms=2000, scratch=space)
+            assert len(parts) == 3
+            assert all(part.parent == space.path for part in parts)
+        assert not any(part.exists() for part in parts)
+
+        with ScratchSpace("uid", quota=audio.stat().st_size // 3) as space:
+            with pytest.raises(ScratchQuotaExceeded):
+                media.split_audio(audio, chunk_ms=2000, scratch=space)
+            assert list(space.path.iterdir()) == []
@@ -0,0 +1,41 @@
+"""
+Audio2Tekst - Testy pamięci sesji
+=================================
+
+Testy modułu audio2tekst.session_memory (bufor komunikatów, zajętość stanu sesji).
+"""
+
+from audio2tekst import session_memory
+
+
+class TestMessages:
+    """Testy ograniczonego bufora komunikatów diagnostycznych."""
+
+    def test_oldest_messages_are_dropped(self, monkeypatch):
+        monkeypatch.setenv("SESSION_LOG_LINES", "3")
+        state = {}
+        for number in range(5):
+            session_memory.add_message(state, f"Fragment {number}")
+        assert session_memory.messages(state) == ["Fragment 2", "Fragment 3", "Fragment 4"]
+
+    def test_list_from_older_session_is_capped(self, monkeypatch):
+        monkeypatch.setenv("SESSION_LOG_LINES", "2")
+        state = {session_memory.MESSAGES_KEY: ["a", "b", "c"]}
+        session_memory.add_message(state, "d")
+        assert session_memory.messages(state) == ["c", "d"]
+        assert session_memory.messages({}) == []
+
+
+class TestUsage:
+    """Testy szacowania rozmiaru stanu sesji."""
+
+    def test_usage(self, monkeypatch):
+        monkeypatch.setenv("SESSION_LOG_LINES", "10")
+        state = {"yt_https://youtu.be/abc": "a" * 64, "api_key_verified": True}
+        session_memory.add_message(state, "ż" * 100)
+        report = session_memory.usage(state)
+        assert report["messages"] == 1
+        assert report["entries"][0] == {"key": session_memory.MESSAGES_KEY, "bytes": 200}
+        assert report["entries"][1] == {"key": "yt_https://youtu.be/abc", "bytes": 64}
+        assert report["total"] == sum(entry["bytes"] for entry in report["entries"])
+        assert session_memory.approx_size({"k": b"xyz"}) == 4
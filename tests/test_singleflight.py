@@ -0,0 +1,101 @@
+"""
+Audio2Tekst - Testy łączenia identycznych zadań
+===============================================
+
+Testy modułu audio2tekst.singleflight (jedno wykonanie na klucz).
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from audio2tekst.singleflight import SingleFlight, transcription_key
+
+
+class Stop(BaseException):
+    """Przerwanie wykonania jak zatrzymanie skryptu Streamlit."""
+
+
+class TestSingleFlight:
+    """Testy współdzielenia wyników, błędów i przerwanych wykonań."""
+
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = []
+
+        def work():
+            calls.append(threading.current_thread().name)
+            time.sleep(0.2)
+            return "wynik"
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            results = list(pool.map(lambda _: flight.do("plik", work), range(5)))
+        assert len(calls) == 1
+        assert [result for result, _ in results] == ["wynik"] * 5
+        assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+        assert flight.stats() == {"in_flight": 0, "waiting": 0, "executions": 1, "shared": 4}
+        # Po zakończeniu kolejne wywołanie wykonuje zadanie od nowa
+        assert flight.do("plik", work) == ("wynik", False)
+        assert len(calls) == 2
+
+    def test_keys_are_independent(self):
+        flight = SingleFlight()
+        assert transcription_key("uid", "whisper-1", "pl") != transcription_key("uid", "whisper-1", "en")
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            results = list(pool.map(lambda key: flight.do(key, lambda: key), ["a", "b"]))
+        assert results == [("a", False), ("b", False)]
+
+    def test_error_is_shared(self):
+        flight = SingleFlight()
+        started = threading.Event()
+
+        def failing():
+            started.set()
+            time.sleep(0.1)
+            raise RuntimeError("błąd FFmpeg")
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            leader = pool.submit(flight.do, "plik", failing)
+            started.wait()
+            follower = pool.submit(flight.do, "plik", failing)
+            for future in (leader, follower):
+                with pytest.raises(RuntimeError, match="błąd FFmpeg"):
+                    future.result()
+        assert flight.stats()["executions"] == 1
+
+    def test_abandoned_execution_is_retried(self):
+        flight = SingleFlight()
+        started = threading.Event()
+
+        def interrupted():
+            started.set()
+            time.sleep(0.1)
+            raise Stop()
+
+        def leader():
+            with pytest.raises(Stop):
+                flight.do("plik", interrupted)
+
+        thread = threading.Thread(target=leader)
+        thread.start()
+        started.wait()
+        assert flight.do("plik", lambda: "ponownie") == ("ponownie", False)
+        thread.join()
+        assert flight.stats()["executions"] == 2
+
+    def test_timeout(self):
+        flight = SingleFlight()
+        started = threading.Event()
+
+        def slow():
+            started.set()
+            time.sleep(0.3)
+
+        thread = threading.Thread(target=flight.do, args=("plik", slow))
+        thread.start()
+        started.wait()
+        with pytest.raises(TimeoutError):
+            flight.do("plik", slow, timeout=0.05)
+        thread.join()
@@ -0,0 +1,152 @@
+"""
+Audio2Tekst - Testy przyjmowania plików
+=======================================
+
+Testy modułu audio2tekst.storage (UID, zapis oryginałów, zapis atomowy).
+"""
+
+import subprocess  # nosec B404
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from audio2tekst import catalog, hashing, storage
+from audio2tekst.system import check_dependencies
+
+DEPS = check_dependencies()
+requires_ffmpeg = pytest.mark.skipif(
+    not (DEPS["ffmpeg"]["available"] and DEPS["ffprobe"]["available"]),
+    reason="FFmpeg/FFprobe niedostępne",
+)
+
+
+@pytest.fixture
+def recording_bytes(temp_dir):
+    path = temp_dir / "nagranie.mp3"
+    subprocess.run(  # nosec B603
+        [DEPS["ffmpeg"]["path"], "-y", "-v", "error", "-f", "lavfi",
+         "-i", "sine=frequency=440:duration=3", "-c:a", "libmp3lame", str(path)],
+        check=True,
+    )
+    return path.read_bytes()
+
+
+@requires_ffmpeg
+class TestPrepareSource:
+    """Testy przyjęcia pliku do uploads/originals."""
+
+    def test_same_file_is_stored_once(self, temp_dir, recording_bytes):
+        base_dir = temp_dir / "uploads"
+        db_path = temp_dir / "catalog.sqlite3"
+        storage.ensure_dirs(base_dir)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(
+                lambda _: storage.prepare_source(recording_bytes, ".mp3", base_dir=base_dir, catalog_db=db_path),
+                range(4),
+            ))
+        assert len(set(results)) == 1
+        uid, orig_path, transcript_path, summary_path = results[0]
+        assert orig_path == base_dir / "originals" / f"{uid}.mp3"
+        assert orig_path.read_bytes() == recording_bytes
+        assert transcript_path == base_dir / "transcripts" / f"{uid}.txt"
+        assert summary_path == base_dir / "summaries" / f"{uid}.txt"
+        # Bez pozostawionych plików tymczasowych i z jednym wpisem w katalogu
+        assert list((base_dir / "originals").iterdir()) == [orig_path]
+        assert [entry["uid"] for entry in catalog.list_artefacts("original", db_path=db_path)] == [uid]
+
+    def test_quick_id_candidate_is_confirmed(self, temp_dir, recording_bytes):
+        base_dir = temp_dir / "uploads"
+        db_path = temp_dir / "catalog.sqlite3"
+        storage.ensure_dirs(base_dir)
+        # Inny plik o tym samym szybkim identyfikatorze (np. zmieniony poza próbkami)
+        file_quick_id = hashing.quick_id(recording_bytes)
+        catalog.register_quick_id(file_quick_id, "innyplik", db_path=db_path)
+        uid, orig_path, _, _ = storage.prepare_source(
+            recording_bytes, ".mp3", base_dir=base_dir, catalog_db=db_path, quick=True
+        )
+        assert uid == hashing.content_id(recording_bytes)
+        assert orig_path.read_bytes() == recording_bytes
+        assert catalog.find_by_quick_id(file_quick_id, db_path=db_path) == uid
+        assert storage.prepare_source(
+            recording_bytes, ".mp3", base_dir=base_dir, catalog_db=db_path, quick=True
+        )[:2] == (uid, orig_path)
+
+    def test_legacy_md5_uid_is_reused(self, temp_dir, recording_bytes):
+        base_dir = temp_dir / "uploads"
+        db_path = temp_dir / "catalog.sqlite3"
+        storage.ensure_dirs(base_dir)
+        legacy_uid = hashing.content_id(recording_bytes, algorithm="md5")
+        transcript_path = base_dir / "transcripts" / f"{legacy_uid}.txt"
+        transcript_path.write_text("stara transkrypcja", encoding="utf-8")
+        catalog.sync_with_disk(base_dir, db_path=db_path)
+        upload = temp_dir / "upload.mp3"
+        upload.write_bytes(recording_bytes)
+        with open(upload, "rb") as upload_file:
+            uid, _, found_transcript, _ = storage.prepare_source(
+                upload_file, ".mp3", base_dir=base_dir, catalog_db=db_path
+            )
+        assert uid == legacy_uid
+        assert found_transcript == transcript_path
+
+    def test_moved_source(self, temp_dir, recording_bytes):
+        base_dir = temp_dir / "uploads"
+        storage.ensure_dirs(base_dir)
+        upload = base_dir / "originals" / ".upload.mp3"
+        upload.write_bytes(recording_bytes)
+        _, orig_path, _, _ = storage.prepare_source(
+            upload, ".mp3", base_dir=base_dir, catalog_db=temp_dir / "catalog.sqlite3", move=True
+        )
+        assert not upload.exists()
+        assert orig_path.read_bytes() == recording_bytes
+
+
+class TestWriteTextAtomic:
+    """Testy zapisu artefaktów tekstowych."""
+
+    def test_replaces_content(self, temp_dir):
+        path = temp_dir / "transkrypcja.txt"
+        path.write_text("stara", encoding="utf-8")
+        size = storage.write_text_atomic(path, "zażółć gęślą jaźń")
+        assert path.read_text(encoding="utf-8") == "zażółć gęślą jaźń"
+        assert size == path.stat().st_size
+        assert list(temp_dir.iterdir()) == [path]
+
+
+class TestReadSummary:
+    """Testy odczytu zapisanego podsumowania."""
+
+    def test_topic_and_summary(self, temp_dir):
+        path = temp_dir / "podsumowanie.txt"
+        storage.write_text_atomic(path, "Temat\nPierwsze zdanie.\nDrugie zdanie.")
+        assert storage.read_summary(path) == ("Temat", "Pierwsze zdanie. Drugie zdanie.")
+        path.write_text("", encoding="utf-8")
+        assert storage.read_summary(path) == ("", "")
+
+
+class TestArtefacts:
+    """Testy zapisu i odczytu skompresowanych artefaktów."""
+
+    def test_write_replaces_plain_file(self, temp_dir):
+        path = temp_dir / "uid.txt"
+        path.write_text("stara transkrypcja", encoding="utf-8")
+        stored, size = storage.write_artefact(path, "zażółć\n" * 1000, codec="gzip")
+        assert stored == temp_dir / "uid.txt.gz" and size == stored.stat().st_size
+        assert not path.exists()
+        assert size < len("zażółć\n".encode("utf-8") * 1000) / 5
+        assert storage.stored_path(path) == stored
+        assert storage.read_artefact(path) == storage.read_artefact(stored) == "zażółć\n" * 1000
+
+        stored, _ = storage.write_artefact(path, "Temat\nTreść.", codec="none")
+        assert stored == path and list(temp_dir.iterdir()) == [path]
+        assert storage.read_summary(path) == ("Temat", "Treść.")
+        with pytest.raises(FileNotFoundError):
+            storage.read_artefact(temp_dir / "brak.txt")
+
+
+class TestRangeUid:
+    """Testy UID artefaktów zakresu nagrania."""
+
+    def test_range_uid(self):
+        assert storage.range_uid("abc") == storage.range_uid("abc", 0.0, None) == "abc"
+        assert storage.range_uid("abc", 600, 1200.5) == "abc_600000-1200500"
+        assert storage.range_uid("abc", 90) == "abc_90000-end"
@@ -0,0 +1,79 @@
+"""
+Audio2Tekst - Testy indeksu pełnotekstowego
+===========================================
+
+Testy modułu audio2tekst.transcript_index (SQLite FTS5).
+"""
+
+import pytest
+
+from audio2tekst import framed, transcript_index
+
+
+@pytest.fixture
+def index_db(temp_dir):
+    """Ścieżka do pustej bazy indeksu w katalogu tymczasowym."""
+    return temp_dir / "db" / "transcripts.sqlite3"
+
+
+class TestTranscriptIndex:
+    """Testy zapisu i wyszukiwania transkrypcji."""
+
+    def test_index_and_search(self, index_db):
+        transcript_index.index_transcript(
+            "uid1",
+            "Dzisiaj omawiamy budżet gminy na przyszły rok.",
+            source="sesja_rady.mp3",
+            duration=3600.0,
+            language="pl",
+            model="whisper-1",
+            db_path=index_db,
+        )
+        transcript_index.index_transcript(
+            "uid2", "Wykład o historii sztuki.", source="dQw4w9WgXcQ",
+            source_kind="youtube", db_path=index_db,
+        )
+        hits = transcript_index.search_transcripts("budzet", db_path=index_db)
+        assert [hit["uid"] for hit in hits] == ["uid1"]
+        assert hits[0]["source"] == "sesja_rady.mp3"
+        assert hits[0]["duration"] == 3600.0
+        assert "**budżet**" in hits[0]["snippet"]
+
+    def test_prefix_and_summary_search(self, index_db):
+        transcript_index.index_transcript("uid1", "Krótka rozmowa.", db_path=index_db)
+        assert transcript_index.index_summary(
+            "uid1", "Temat: ekologia", "Rozmowa o recyklingu.", db_path=index_db
+        )
+        assert not transcript_index.index_summary("brak", "x", "y", db_path=index_db)
+        assert transcript_index.search_transcripts("recykl", db_path=index_db)[0]["uid"] == "uid1"
+
+    def test_reindex_replaces_text(self, index_db):
+        transcript_index.index_transcript("uid1", "stary tekst", db_path=index_db)
+        transcript_index.index_transcript("uid1", "nowy tekst", db_path=index_db)
+        assert transcript_index.count_indexed(db_path=index_db) == 1
+        assert transcript_index.search_transcripts("stary", db_path=index_db) == []
+        assert len(transcript_index.search_transcripts("nowy", db_path=index_db)) == 1
+
+    def test_query_sanitizing(self, index_db):
+        transcript_index.index_transcript("uid1", "tekst", db_path=index_db)
+        assert transcript_index.build_match_query('" ( *') == ""
+        assert transcript_index.search_transcripts('"tekst" (', db_path=index_db)
+
+    def test_backfill_from_uploads(self, temp_dir, index_db):
+        for folder in ("transcripts", "summaries"):
+            (temp_dir / folder).mkdir()
+        (temp_dir / "transcripts" / "abc.txt").write_text("stara transkrypcja", encoding="utf-8")
+        (temp_dir / "summaries" / "abc.txt").write_text("Temat\nOpis", encoding="utf-8")
+        (temp_dir / "transcripts" / "def.txt.gz").write_bytes(framed.compress("nowa transkrypcja".encode(), "gzip"))
+        assert transcript_index.backfill_from_uploads(temp_dir, db_path=index_db) == 2
+        assert transcript_index.backfill_from_uploads(temp_dir, db_path=index_db) == 0
+        assert transcript_index.search_transcripts("opis", db_path=index_db)[0]["topic"] == "Temat"
+        assert transcript_index.search_transcripts("nowa", db_path=index_db)[0]["uid"] == "def"
+
+    def test_remove_and_clear(self, index_db):
+        transcript_index.index_transcript("uid1", "jeden", db_path=index_db)
+        transcript_index.index_transcript("uid2", "dwa", db_path=index_db)
+        transcript_index.remove_transcript("uid1", db_path=index_db)
+        assert transcript_index.search_transcripts("jeden", db_path=index_db) == []
+        transcript_index.clear_index(db_path=index_db)
+        assert transcript_index.count_indexed(db_path=index_db) == 0
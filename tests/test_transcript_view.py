@@ -0,0 +1,81 @@
+"""
+Audio2Tekst - Testy podglądu i eksportu transkrypcji
+====================================================
+
+Testy modułu audio2tekst.transcript_view (strony z dysku, eksport JSON i ZIP blokami).
+"""
+
+import io
+import json
+import zipfile
+
+import pytest
+
+from audio2tekst import storage, transcript_view
+
+
+@pytest.fixture
+def transcript(temp_dir):
+    path = temp_dir / "transkrypcja.txt"
+    text = "\n".join(f"Fragment {i}: zażółć gęślą jaźń " * 10 for i in range(600))
+    path.write_text(text, encoding="utf-8-sig")
+    return path, text
+
+
+class TestTranscriptPages:
+    """Testy podziału transkrypcji na strony."""
+
+    def test_pages_cover_text(self, transcript):
+        path, text = transcript
+        pages = transcript_view.TranscriptPages(path, limit=2048)
+        assert len(pages) > 1
+        assert "".join(pages.page(i) for i in range(len(pages))) == text
+        # Strony kończą się na końcach wierszy (tekstach fragmentów)
+        assert all(pages.page(i).endswith("\n") for i in range(len(pages) - 1))
+        with pytest.raises(IndexError):
+            pages.page(len(pages))
+
+    def test_compressed_transcript(self, transcript):
+        path, text = transcript
+        stored, _ = storage.write_artefact(path, text, codec="gzip")
+        assert not path.exists()
+        pages = transcript_view.TranscriptPages(path, limit=2048)
+        assert pages.size == len(text.encode("utf-8"))
+        assert "".join(pages.page(i) for i in range(len(pages))) == text
+        assert b"".join(transcript_view.iter_text(stored)).decode("utf-8") == text
+
+    def test_long_line_split_on_characters(self, temp_dir):
+        path = temp_dir / "jeden_wiersz.txt"
+        path.write_text("ż" * 3000, encoding="utf-8")
+        pages = transcript_view.TranscriptPages(path, limit=1025)
+        assert len(pages) == 6
+        assert "".join(pages.page(i) for i in range(len(pages))) == "ż" * 3000
+
+    def test_index_follows_file_changes(self, temp_dir):
+        path = temp_dir / "zmieniana.txt"
+        path.write_text("a\n", encoding="utf-8")
+        assert len(transcript_view.TranscriptPages(path, limit=1024)) == 1
+        path.write_text("b" * 1500 + "\n" + "c" * 100, encoding="utf-8")
+        assert len(transcript_view.TranscriptPages(path, limit=1024)) == 2
+
+
+class TestExport:
+    """Testy eksportu generowanego blokami."""
+
+    def test_json(self, transcript):
+        path, text = transcript
+        blocks = list(transcript_view.iter_json("uid1", path, ("Temat", "Treść \"cytat\"")))
+        assert len(blocks) > 3
+        document = json.loads(b"".join(blocks))
+        assert document == {"uid": "uid1", "topic": "Temat", "summary": "Treść \"cytat\"", "transcript": text}
+
+    def test_zip(self, transcript, temp_dir):
+        path, text = transcript
+        summary = temp_dir / "podsumowanie.txt"
+        summary.write_text("Temat\nTreść.", encoding="utf-8")
+        blocks = list(transcript_view.iter_zip(transcript_view.bundle_members("uid1", path, summary)))
+        assert all(blocks)
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(blocks)))
+        assert archive.testzip() is None
+        assert archive.read("transkrypcja_uid1.txt").decode("utf-8-sig") == text
+        assert archive.read("podsumowanie_uid1.txt").decode("utf-8") == "Temat\nTreść."
@@ -0,0 +1,77 @@
+"""
+Audio2Tekst - Testy silników transkrypcji
+=========================================
+
+Testy modułu audio2tekst.transcription (interfejs silników, Whisper API).
+"""
+
+import pytest
+
+from audio2tekst import media, transcription
+
+
+class TestBackends:
+    """Testy wyboru i działania silników transkrypcji."""
+
+    def test_openai_backend_sends_chunk(self, mock_openai_client, temp_dir):
+        mock_openai_client.audio.transcriptions.create.return_value = "Dzień dobry."
+        chunk = temp_dir / "chunk.mp3"
+        chunk.write_bytes(b"ID3 audio")
+        backend = transcription.create_backend(
+            "openai", openai_client=mock_openai_client, openai_model="whisper-1"
+        )
+        assert backend.transcribe(chunk, "pl") == "Dzień dobry."
+        kwargs = mock_openai_client.audio.transcriptions.create.call_args.kwargs
+        assert kwargs["model"] == "whisper-1"
+        assert kwargs["language"] == "pl"
+        assert backend.max_chunk_bytes == transcription.OPENAI_MAX_CHUNK_BYTES
+        assert backend.model_label == "whisper-1"
+
+    def test_openai_backend_sends_chunk_from_memory(self, mock_openai_client):
+        mock_openai_client.audio.transcriptions.create.return_value = "Dzień dobry."
+        chunk = media.AudioChunk(b"ID3 audio", "chunk_0001.mp3")
+        chunk.read()
+        backend = transcription.OpenAIBackend(mock_openai_client)
+        assert backend.transcribe(chunk, "pl") == "Dzień dobry."
+        sent = mock_openai_client.audio.transcriptions.create.call_args.kwargs["file"]
+        assert sent is chunk
+        assert sent.name == "chunk_0001.mp3"
+        assert sent.tell() == 0
+
+    def test_backend_interface_is_abstract(self):
+        class Incomplete(transcription.TranscriptionBackend):
+            name = "incomplete"
+            model_label = "incomplete"
+
+        with pytest.raises(TypeError):
+            transcription.TranscriptionBackend()
+        with pytest.raises(TypeError):
+            Incomplete()
+
+    def test_create_backend_errors(self):
+        with pytest.raises(ValueError):
+            transcription.create_backend("openai")
+        with pytest.raises(ValueError):
+            transcription.create_backend("nieznany")
+
+    def test_available_backends(self):
+        names = transcription.available_backends()
+        assert names[0] == "openai"
+        assert set(names) <= set(transcription.BACKENDS)
+        assert ("local" in names) == (transcription.faster_whisper is not None)
+
+    def test_local_backend_label_and_options(self, monkeypatch):
+        monkeypatch.setenv("LOCAL_WHISPER_MODEL", "tiny")
+        monkeypatch.setenv("LOCAL_WHISPER_BATCH_SIZE", "4")
+        backend = transcription.create_backend("local")
+        assert backend.max_chunk_bytes is None
+        assert backend.batch_size == 4
+        assert backend.model_label == "faster-whisper-tiny-int8"
+
+    def test_real_time_factor(self, mock_openai_client, temp_dir):
+        chunk = temp_dir / "chunk.mp3"
+        chunk.write_bytes(b"ID3 audio")
+        backend = transcription.OpenAIBackend(mock_openai_client)
+        result = transcription.measure_real_time_factor(backend, chunk, audio_seconds=60.0)
+        assert result["audio_seconds"] == 60.0
+        assert result["rtf"] == pytest.approx(result["seconds"] / 60.0)
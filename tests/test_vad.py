@@ -0,0 +1,92 @@
+"""
+Audio2Tekst - Testy wykrywania mowy
+===================================
+
+Testy modułu audio2tekst.vad (klasyfikacja ramek, odcinki mowy, mapa czasu).
+"""
+
+import subprocess  # nosec B404
+
+import pytest
+
+from audio2tekst import media, vad
+from audio2tekst.scratch import ScratchSpace
+from audio2tekst.system import check_dependencies
+
+np = pytest.importorskip("numpy")
+
+DEPS = check_dependencies()
+requires_ffmpeg = pytest.mark.skipif(
+    not (DEPS["ffmpeg"]["available"] and DEPS["ffprobe"]["available"]),
+    reason="FFmpeg/FFprobe niedostępne",
+)
+
+# Mowa (ton modulowany w rytmie sylab) 0-3 s, cisza 3-13 s, ton stały 13-18 s, mowa 18-21 s
+SPEECH = "0.5*sin(2*PI*200*t)*abs(sin(2*PI*3*t))"
+EXPRESSION = f"if(lt(t,3), {SPEECH}, if(lt(t,13), 0, if(lt(t,18), 0.3*sin(2*PI*440*t), {SPEECH})))"
+RECORDING = "aevalsrc=exprs='" + EXPRESSION.replace(",", "\\,") + "':d=21:s=16000"
+
+
+class TestSpeechMap:
+    """Testy przeliczania czasu skróconego nagrania na czas oryginału."""
+
+    def test_to_original(self):
+        speech_map = vad.SpeechMap([(0.0, 3.0), (18.0, 21.0)], duration=21.0)
+        assert speech_map.speech_seconds == 6.0
+        assert speech_map.removed_seconds == 15.0
+        assert speech_map.to_original(1.5) == 1.5
+        assert speech_map.to_original(3.0) == 18.0
+        assert speech_map.to_original(4.0) == 19.0
+        assert speech_map.to_original(10.0) == 21.0
+
+
+class TestClassification:
+    """Testy klasyfikacji ramek i łączenia odcinków."""
+
+    def test_steady_tone_is_not_speech(self):
+        frames = vad.WINDOW_FRAMES * 4
+        modulated = -35 + 25 * np.abs(np.sin(np.arange(frames) / 3))
+        steady = np.full(frames, -10.0)
+        silence = np.full(frames, vad.SILENCE_DB)
+        energy = np.concatenate([modulated, silence, steady])
+        speech = vad.speech_frames(energy, np.full(energy.size, 0.05))
+        assert speech[:frames].mean() > 0.9
+        assert not speech[frames:].any()
+        # Szum szerokopasmowy niewiele głośniejszy od progu nie jest mową
+        quiet = np.concatenate([silence, np.full(frames, -45.0)])
+        assert not vad.speech_frames(quiet, np.full(2 * frames, 0.5), min_modulation_db=0).any()
+        assert vad.speech_frames(quiet, np.full(2 * frames, 0.05), min_modulation_db=0)[frames:].all()
+
+    def test_frames_to_spans(self):
+        speech = np.zeros(1000, dtype=bool)
+        speech[100:200] = True  # 3,0-6,0 s
+        speech[210:300] = True  # przerwa 0,3 s - łączona
+        speech[600:605] = True  # 0,15 s - trzask
+        spans = vad.frames_to_spans(speech, duration=30.0, min_silence=1.0, padding=0.2)
+        assert spans == [pytest.approx((2.8, 9.2))]
+        assert vad.frames_to_spans(np.zeros(10, dtype=bool), duration=0.3) == []
+
+
+@requires_ffmpeg
+class TestTrimSilence:
+    """Testy usuwania ciszy z nagrania przed podziałem."""
+
+    def test_trim_keeps_speech(self, temp_dir, monkeypatch):
+        monkeypatch.setenv("SCRATCH_DIR", str(temp_dir))
+        recording = temp_dir / "wyklad.mp3"
+        subprocess.run(  # nosec B603
+            [DEPS["ffmpeg"]["path"], "-y", "-v", "error", "-f", "lavfi", "-i", RECORDING,
+             "-c:a", "libmp3lame", str(recording)],
+            check=True,
+        )
+        with ScratchSpace("vad") as scratch_space:
+            trimmed, speech_map = vad.trim_silence(recording, scratch_space)
+            assert trimmed.parent == scratch_space.path
+            assert speech_map.removed_seconds == pytest.approx(14.5, abs=1.0)
+            assert [start for start, _ in speech_map.spans] == pytest.approx([0.0, 17.8], abs=0.3)
+            assert media.get_duration(trimmed) == pytest.approx(speech_map.speech_seconds, abs=0.3)
+            # Druga część mowy zaczyna się w 18. sekundzie oryginału
+            assert speech_map.to_original(3.5) == pytest.approx(18.0, abs=0.3)
+
+            untouched, no_map = vad.trim_silence(recording, scratch_space, min_removed=60)
+            assert untouched == recording and no_map is None
@@ -0,0 +1,112 @@
+"""
+Audio2Tekst - Testy YouTube
+===========================
+
+Testy modułu audio2tekst.youtube: rozpoznawanie adresów playlist, rozwijanie
+playlist (atrapa ekstraktora yt-dlp), równoległe pobieranie i rozpoznawanie
+filmów przyjętych wcześniej.
+"""
+
+import threading
+import time
+
+import pytest
+
+from audio2tekst import catalog, youtube
+
+
+class TestPlaylistUrls:
+    """Testy rozpoznawania adresów playlist i kanałów."""
+
+    @pytest.mark.parametrize("url", [
+        "https://www.youtube.com/playlist?list=PL1234567890",
+        "https://youtube.com/@wyklady",
+        "https://www.youtube.com/@wyklady/videos",
+        "https://www.youtube.com/channel/UC1234567890",
+        "https://m.youtube.com/c/Wyklady",
+    ])
+    def test_playlist_urls(self, url):
+        assert youtube.is_playlist_url(url)
+        assert not youtube.validate_youtube_url(url)
+
+    def test_video_in_playlist_is_single_video(self):
+        url = "https://www.youtube.com/watch?v=abcdefghijk&list=PL1234567890"
+        assert not youtube.is_playlist_url(url)
+        assert youtube.validate_youtube_url(url)
+
+
+class TestExpandPlaylist:
+    """Testy rozwijania playlist samymi metadanymi."""
+
+    def test_entries_are_flattened_and_deduplicated(self):
+        calls = []
+
+        def extractor(url, options):
+            calls.append((url, options))
+            return {"entries": [
+                {"id": "aaaaaaaaaaa", "title": "Wykład 1", "duration": 3600},
+                None,
+                {"entries": [{"id": "bbbbbbbbbbb"}, {"id": "aaaaaaaaaaa"}]},
+                {"id": "PL1234567890", "title": "Inna playlista"},
+            ]}
+
+        videos = youtube.expand_playlist("https://www.youtube.com/@wyklady", extractor=extractor)
+        assert calls[0][0] == "https://www.youtube.com/@wyklady/videos"
+        assert calls[0][1]["skip_download"] and calls[0][1]["extract_flat"] == "in_playlist"
+        assert videos == [
+            {"id": "aaaaaaaaaaa", "url": "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+             "title": "Wykład 1", "duration": 3600},
+            {"id": "bbbbbbbbbbb", "url": "https://www.youtube.com/watch?v=bbbbbbbbbbb",
+             "title": "bbbbbbbbbbb", "duration": None},
+        ]
+
+    def test_limit_and_invalid_url(self):
+        entries = {"entries": [{"id": f"video{number:06d}"} for number in range(5)]}
+        videos = youtube.expand_playlist(
+            "https://www.youtube.com/playlist?list=PL1", extractor=lambda url, options: entries, limit=2
+        )
+        assert [video["id"] for video in videos] == ["video000000", "video000001"]
+        with pytest.raises(ValueError):
+            youtube.expand_playlist("https://www.youtube.com/watch?v=abcdefghijk", extractor=lambda *_: {})
+
+
+class TestDownloadConcurrently:
+    """Testy pobierania przez ograniczoną pulę wątków."""
+
+    def test_results_in_completion_order_with_bounded_pool(self):
+        lock = threading.Lock()
+        running = [0, 0]  # (w toku, najwięcej naraz)
+        delays = {"a": 0.2, "b": 0.01, "c": 0.01, "d": 0.01}
+
+        def download(url):
+            with lock:
+                running[0] += 1
+                running[1] = max(running[1], running[0])
+            time.sleep(delays[url])
+            with lock:
+                running[0] -= 1
+            if url == "c":
+                raise RuntimeError("Film niedostępny")
+            return url.encode(), ".mp3"
+
+        videos = [{"id": name, "url": name} for name in "abcd"]
+        results = list(youtube.download_concurrently(videos, workers=2, download=download))
+        assert running[1] == 2
+        assert [video["id"] for video, _, _ in results][-1] == "a"
+        by_id = {video["id"]: (downloaded, error) for video, downloaded, error in results}
+        assert by_id["b"] == ((b"b", ".mp3"), None)
+        assert by_id["c"][0] is None and isinstance(by_id["c"][1], RuntimeError)
+
+
+class TestCachedVideos:
+    """Testy rozpoznawania filmów przyjętych wcześniej."""
+
+    def test_cached_uid_requires_artefact(self, temp_dir):
+        db_path = temp_dir / "catalog.sqlite3"
+        transcript = temp_dir / "uid1.txt"
+        transcript.write_text("tekst", encoding="utf-8")
+        youtube.remember_video("aaaaaaaaaaa", "uid1", db_path=db_path)
+        assert youtube.cached_uid("aaaaaaaaaaa", db_path=db_path) is None
+        catalog.register("uid1", "transcript", transcript, 5, db_path=db_path)
+        assert youtube.cached_uid("aaaaaaaaaaa", db_path=db_path) == "uid1"
+        assert youtube.cached_uid("bbbbbbbbbbb", db_path=db_path) is None